@@ -0,0 +1,32 @@
+"""
+Helps - motor de curadoria de risco e sentimento de comentários NPS.
+
+Importar o pacote não cria o cliente OpenAI nem compila os léxicos; ambos são
+inicializados sob demanda. Os módulos que dependem do pandas (`vetorizado`,
+`paralelo`, `pipeline`, `arquivos`) devem ser importados explicitamente.
+"""
+
+from .batch import classificar_via_batch
+from .cache import CacheClassificacoes
+from .execucao import LimitadorTaxa, agrupar_pares_unicos, dividir_em_lotes, executar_concorrente
+from .heuristica import heuristica_risco_explicacao, triagem_heuristica
+from .lexico import chave_texto, normalizar_texto, obter_lexicos
+from .llm import analisar_lote_risco_sentimento, analisar_risco_sentimento, definir_cliente, obter_cliente
+
+__all__ = [
+    "CacheClassificacoes",
+    "LimitadorTaxa",
+    "agrupar_pares_unicos",
+    "analisar_lote_risco_sentimento",
+    "analisar_risco_sentimento",
+    "chave_texto",
+    "classificar_via_batch",
+    "definir_cliente",
+    "dividir_em_lotes",
+    "executar_concorrente",
+    "heuristica_risco_explicacao",
+    "normalizar_texto",
+    "obter_cliente",
+    "obter_lexicos",
+    "triagem_heuristica",
+]
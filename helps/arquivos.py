@@ -0,0 +1,502 @@
+"""
+Leitura e gravação das bases NPS: Excel (títulos na linha 3), CSV e Parquet.
+
+Além da leitura completa com pandas, há leitura em fluxo: o Excel é percorrido
+com openpyxl em modo `read_only`, o CSV em `chunksize` e o Parquet por row
+groups, mantendo só as colunas escolhidas, em blocos, para que bases com
+centenas de milhares de linhas não precisem caber inteiras na memória.
+Comentários são lidos como strings Arrow e o grau de risco gravado como
+categoria, quando o pyarrow está disponível.
+"""
+
+import csv
+import io
+import os
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import islice
+from typing import Any, BinaryIO, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from .config import GRAUS_RISCO
+
+LINHA_CABECALHO_EXCEL = 2  # títulos das colunas na linha 3 do arquivo
+LINHAS_CABECALHO_SAIDA = (LINHA_CABECALHO_EXCEL, 0)  # saída injetada (linha 3) ou reexportada (linha 1)
+TAMANHO_BLOCO_PADRAO = 5_000
+EXTENSOES_PARQUET = (".parquet", ".pq")
+
+Origem = Union[str, BinaryIO]
+
+
+def _extensao(origem: Origem, nome: Optional[str] = None) -> str:
+    nome = nome or (origem if isinstance(origem, str) else getattr(origem, "name", ""))
+    return os.path.splitext(str(nome))[1].lower()
+
+
+def _formato(origem: Origem, nome: Optional[str] = None) -> str:
+    """Formato da base: ".csv", ".parquet" ou ".xlsx" (padrão)."""
+    extensao = _extensao(origem, nome)
+    if extensao == ".csv":
+        return ".csv"
+    if extensao in EXTENSOES_PARQUET:
+        return ".parquet"
+    return ".xlsx"
+
+
+@lru_cache(maxsize=None)
+def tipo_texto() -> Any:
+    """Dtype compacto para textos: string Arrow se o pyarrow estiver instalado."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return object
+    return pd.StringDtype("pyarrow")
+
+
+def resultados_em_dataframe(
+    resultados: Sequence[Tuple[str, str]],
+    nome_col_risco: str = "grau_risco",
+    nome_col_explicacao: str = "explicacao",
+) -> pd.DataFrame:
+    """Resultados como DataFrame compacto: grau categórico e explicação em string Arrow."""
+    return pd.DataFrame({
+        nome_col_risco: pd.Categorical([grau for grau, _ in resultados], categories=GRAUS_RISCO),
+        nome_col_explicacao: pd.array([explicacao for _, explicacao in resultados], dtype=tipo_texto()),
+    })
+
+
+def _rebobinar(origem: Origem) -> Origem:
+    """Volta arquivos abertos ao início, para poderem ser lidos mais de uma vez."""
+    if not isinstance(origem, str):
+        origem.seek(0)
+    return origem
+
+
+def ler_planilha(origem: Origem, nome: Optional[str] = None) -> pd.DataFrame:
+    """
+    Lê a base NPS de um caminho ou arquivo aberto.
+
+    Arquivos .csv são lidos com cabeçalho na primeira linha; planilhas Excel,
+    com cabeçalho na linha 3. `nome` define o formato quando `origem` não tem nome.
+    """
+    formato = _formato(origem, nome)
+    if formato == ".csv":
+        return pd.read_csv(_rebobinar(origem))
+    if formato == ".parquet":
+        return pd.read_parquet(_rebobinar(origem))
+    return pd.read_excel(_rebobinar(origem), header=LINHA_CABECALHO_EXCEL)
+
+
+# ============================================================================
+# LEITURA EM FLUXO
+# ============================================================================
+
+def _nomes_colunas(cabecalho: Sequence[Any]) -> List[str]:
+    """Nomeia as colunas como o pandas: vazias viram "Unnamed: i", repetidas ganham ".n"."""
+    nomes: List[str] = []
+    vistos: dict = {}
+    for i, valor in enumerate(cabecalho):
+        nome = f"Unnamed: {i}" if valor is None or str(valor).strip() == "" else str(valor)
+        if nome in vistos:
+            vistos[nome] += 1
+            nome = f"{nome}.{vistos[nome]}"
+        vistos.setdefault(nome, 0)
+        nomes.append(nome)
+    return nomes
+
+
+def _linhas_excel(
+    origem: Origem, linha_cabecalho: int = LINHA_CABECALHO_EXCEL
+) -> Tuple[List[Any], List[str], Iterator[Tuple[Any, ...]]]:
+    """
+    Abre a primeira aba em modo `read_only` e retorna (linhas de título, nomes das
+    colunas, iterador das linhas de dados). Linhas vazias no fim da aba são ignoradas.
+    """
+    from openpyxl import load_workbook
+
+    livro = load_workbook(_rebobinar(origem), read_only=True, data_only=True)
+    aba = livro.worksheets[0]
+    linhas = aba.iter_rows(values_only=True)
+
+    titulos = []
+    cabecalho: Tuple[Any, ...] = ()
+    for _ in range(linha_cabecalho + 1):
+        linha = next(linhas, None)
+        if linha is None:
+            break
+        titulos.append(linha)
+        cabecalho = linha
+    titulos = titulos[:-1]
+
+    # Descarta colunas vazias à direita do último título
+    while cabecalho and (cabecalho[-1] is None or str(cabecalho[-1]).strip() == ""):
+        cabecalho = cabecalho[:-1]
+    nomes = _nomes_colunas(cabecalho)
+    largura = len(nomes)
+
+    def dados() -> Iterator[Tuple[Any, ...]]:
+        vazias = 0
+        try:
+            for linha in linhas:
+                linha = tuple(linha[:largura]) + (None,) * (largura - len(linha))
+                if all(v is None for v in linha):
+                    vazias += 1
+                    continue
+                # Linhas vazias no meio da planilha são mantidas, como no pandas
+                for _ in range(vazias):
+                    yield (None,) * largura
+                vazias = 0
+                yield linha
+        finally:
+            livro.close()
+
+    return titulos, nomes, dados()
+
+
+def ler_colunas(
+    origem: Origem, nome: Optional[str] = None, linha_cabecalho: int = LINHA_CABECALHO_EXCEL
+) -> List[str]:
+    """Lê apenas os nomes das colunas, sem carregar os dados."""
+    formato = _formato(origem, nome)
+    if formato == ".csv":
+        return pd.read_csv(_rebobinar(origem), nrows=0).columns.tolist()
+    if formato == ".parquet":
+        return _arquivo_parquet(origem).schema_arrow.names
+    _, nomes, dados = _linhas_excel(origem, linha_cabecalho)
+    dados.close()
+    return nomes
+
+
+def localizar_cabecalho(origem: Origem, colunas: Sequence[str], nome: Optional[str] = None) -> int:
+    """
+    Linha do cabeçalho de uma planilha gerada por esta ferramenta: a linha 3 (base
+    original com as colunas injetadas) ou a linha 1 (reexportação), a primeira
+    que tiver todas as `colunas`. Sem nenhuma delas, ou fora do Excel, a linha 3.
+    """
+    if _formato(origem, nome) != ".xlsx":
+        return LINHA_CABECALHO_EXCEL
+    from openpyxl import load_workbook
+
+    livro = load_workbook(_rebobinar(origem), read_only=True, data_only=True)
+    try:
+        primeiras = list(islice(livro.worksheets[0].iter_rows(values_only=True), max(LINHAS_CABECALHO_SAIDA) + 1))
+    finally:
+        livro.close()
+    for linha in LINHAS_CABECALHO_SAIDA:
+        if linha < len(primeiras) and set(colunas) <= set(_nomes_colunas(primeiras[linha])):
+            return linha
+    return LINHA_CABECALHO_EXCEL
+
+
+def iterar_blocos(
+    origem: Origem,
+    colunas: Optional[Sequence[str]] = None,
+    nome: Optional[str] = None,
+    tamanho_bloco: int = TAMANHO_BLOCO_PADRAO,
+    linha_cabecalho: int = LINHA_CABECALHO_EXCEL,
+) -> Iterator[pd.DataFrame]:
+    """
+    Percorre a base em blocos de até `tamanho_bloco` linhas, mantendo só `colunas`
+    (todas, se None). Os índices dos blocos seguem a numeração das linhas de dados.
+    Colunas escolhidas de CSV e colunas de texto do Parquet vêm como strings Arrow.
+    `linha_cabecalho` (a partir de 0) só vale para o Excel.
+    """
+    formato = _formato(origem, nome)
+    if formato == ".csv":
+        tipos = {c: tipo_texto() for c in colunas} if colunas is not None else None
+        yield from pd.read_csv(_rebobinar(origem), usecols=colunas, dtype=tipos, chunksize=tamanho_bloco)
+        return
+    if formato == ".parquet":
+        yield from _blocos_parquet(origem, colunas, tamanho_bloco)
+        return
+
+    _, nomes, dados = _linhas_excel(origem, linha_cabecalho)
+    colunas = list(colunas) if colunas is not None else nomes
+    ausentes = [c for c in colunas if c not in nomes]
+    if ausentes:
+        dados.close()
+        raise KeyError(f"Colunas não encontradas: {', '.join(ausentes)}")
+    posicoes = [nomes.index(c) for c in colunas]
+
+    inicio = 0
+    bloco: List[List[Any]] = []
+    for linha in dados:
+        bloco.append([linha[p] for p in posicoes])
+        if len(bloco) >= tamanho_bloco:
+            yield pd.DataFrame(bloco, columns=colunas, index=pd.RangeIndex(inicio, inicio + len(bloco)))
+            inicio += len(bloco)
+            bloco = []
+    if bloco or inicio == 0:
+        yield pd.DataFrame(bloco, columns=colunas, index=pd.RangeIndex(inicio, inicio + len(bloco)))
+
+
+def _arquivo_parquet(origem: Origem):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as erro:
+        raise ImportError("Leitura e gravação de Parquet exigem o pacote pyarrow") from erro
+    return pq.ParquetFile(_rebobinar(origem))
+
+
+def _blocos_parquet(origem: Origem, colunas: Optional[Sequence[str]], tamanho_bloco: int) -> Iterator[pd.DataFrame]:
+    import pyarrow as pa
+
+    arquivo = _arquivo_parquet(origem)
+    mapa_tipos = {pa.string(): tipo_texto(), pa.large_string(): tipo_texto()}
+    inicio = 0
+    lotes = arquivo.iter_batches(batch_size=tamanho_bloco, columns=list(colunas) if colunas is not None else None)
+    vazio = True
+    for lote in lotes:
+        bloco = lote.to_pandas(types_mapper=mapa_tipos.get)
+        bloco.index = pd.RangeIndex(inicio, inicio + len(bloco))
+        inicio += len(bloco)
+        vazio = False
+        yield bloco
+    if vazio:
+        yield arquivo.schema_arrow.empty_table().select(
+            list(colunas) if colunas is not None else arquivo.schema_arrow.names
+        ).to_pandas(types_mapper=mapa_tipos.get)
+
+
+def ler_previa(origem: Origem, nome: Optional[str] = None, linhas: int = 5) -> Tuple[pd.DataFrame, int]:
+    """Retorna as primeiras `linhas` linhas (todas as colunas) e o total de linhas de dados."""
+    if _formato(origem, nome) == ".parquet":
+        # O Parquet informa o total nos metadados; basta ler o primeiro bloco
+        arquivo = _arquivo_parquet(origem)
+        previa = next(_blocos_parquet(origem, None, linhas)).head(linhas)
+        return previa, arquivo.metadata.num_rows
+    previa: Optional[pd.DataFrame] = None
+    total = 0
+    for bloco in iterar_blocos(origem, nome=nome, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+        if previa is None:
+            previa = bloco.head(linhas)
+        total += len(bloco)
+    return previa, total
+
+
+# ============================================================================
+# GRAVAÇÃO
+# ============================================================================
+
+def planilha_em_bytes(df: pd.DataFrame) -> bytes:
+    """Serializa o DataFrame como .xlsx em memória."""
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False, engine="openpyxl")
+    return buffer.getvalue()
+
+
+def gravar_planilha(df: pd.DataFrame, destino: str) -> None:
+    """Grava o DataFrame em .csv ou .xlsx conforme a extensão do destino."""
+    if _extensao(destino) == ".csv":
+        df.to_csv(destino, index=False)
+    else:
+        df.to_excel(destino, index=False, engine="openpyxl")
+
+
+def gravar_com_resultados(
+    origem: Origem,
+    destino: Union[str, BinaryIO],
+    resultados: Sequence[Tuple[str, str]],
+    nome_col_risco: str,
+    nome_col_explicacao: str,
+    nome: Optional[str] = None,
+    formato: Optional[str] = None,
+    preservar_original: bool = True,
+    origens: Optional[Sequence[str]] = None,
+    nome_col_origem: Optional[str] = None,
+) -> None:
+    """
+    Grava a base com as colunas de risco e explicação, sem montar o DataFrame
+    completo. O formato (.xlsx, .csv ou .parquet) segue a extensão do destino
+    ou `formato`. Com `origens` e `nome_col_origem`, grava também a origem do
+    grau de cada linha (IA, triagem, modelo local...).
+
+    De Excel para Excel, com `preservar_original`, as colunas são injetadas no
+    próprio arquivo enviado (mantendo formatação, títulos e demais abas); se a
+    estrutura do arquivo não permitir, ou nos demais casos, a base é relida em
+    fluxo e reexportada só com o cabeçalho e os dados.
+    """
+    formato = _formato(f"saida{formato}") if formato else _formato(destino)
+    formato_origem = _formato(origem, nome)
+    if origens is None or not nome_col_origem:
+        origens, nome_col_origem = None, None
+    if preservar_original and formato == ".xlsx" and formato_origem == ".xlsx":
+        from .injecao import InjecaoNaoSuportada, injetar_colunas
+
+        try:
+            injetar_colunas(
+                origem, destino, resultados, nome_col_risco, nome_col_explicacao,
+                largura_cabecalho=len(ler_colunas(origem, nome)), origens=origens, nome_col_origem=nome_col_origem,
+            )
+            return
+        except InjecaoNaoSuportada:
+            if not isinstance(destino, str):
+                destino.seek(0)
+                destino.truncate()
+
+    if formato == ".parquet":
+        _gravar_parquet(
+            origem, nome, destino, resultados, nome_col_risco, nome_col_explicacao, origens, nome_col_origem
+        )
+        return
+
+    colunas, linhas_originais = _linhas_originais(origem, nome)
+    colunas = colunas + [nome_col_risco, nome_col_explicacao] + ([nome_col_origem] if origens is not None else [])
+
+    def linhas() -> Iterator[List[Any]]:
+        if origens is None:
+            for valores, (grau, explicacao) in zip(linhas_originais, resultados):
+                yield valores + [grau, explicacao]
+        else:
+            for valores, (grau, explicacao), origem_grau in zip(linhas_originais, resultados, origens):
+                yield valores + [grau, explicacao, origem_grau]
+
+    if formato == ".csv":
+        with _abrir_texto_saida(destino) as arquivo:
+            escritor = csv.writer(arquivo)
+            escritor.writerow(colunas)
+            escritor.writerows(["" if v is None else v for v in linha] for linha in linhas())
+        return
+
+    from openpyxl import Workbook
+
+    livro = Workbook(write_only=True)
+    aba = livro.create_sheet()
+    aba.append(colunas)
+    for linha in linhas():
+        aba.append(linha)
+    livro.save(destino)
+
+
+def _linhas_originais(origem: Origem, nome: Optional[str]) -> Tuple[List[str], Iterator[List[Any]]]:
+    """Cabeçalho e linhas de dados da base, com os valores como estão no arquivo."""
+    formato = _formato(origem, nome)
+    if formato == ".csv":
+        arquivo = _texto_entrada(origem)
+        leitor = csv.reader(arquivo)
+        cabecalho = next(leitor, [])
+
+        def linhas_csv() -> Iterator[List[Any]]:
+            try:
+                # Linhas em branco são ignoradas, como no pandas
+                yield from (linha for linha in leitor if linha)
+            finally:
+                if isinstance(arquivo, io.TextIOWrapper) and not isinstance(origem, str):
+                    arquivo.detach()
+                else:
+                    arquivo.close()
+
+        return cabecalho, linhas_csv()
+
+    if formato == ".parquet":
+        arquivo = _arquivo_parquet(origem)
+        return arquivo.schema_arrow.names, (
+            list(linha.values())
+            for lote in arquivo.iter_batches(batch_size=TAMANHO_BLOCO_PADRAO)
+            for linha in lote.to_pylist()
+        )
+
+    _, nomes, dados = _linhas_excel(origem)
+    return nomes, (list(linha) for linha in dados)
+
+
+def _texto_entrada(origem: Origem):
+    if isinstance(origem, str):
+        return open(origem, newline="", encoding="utf-8-sig")
+    return io.TextIOWrapper(_rebobinar(origem), encoding="utf-8-sig", newline="")
+
+
+@contextmanager
+def _abrir_texto_saida(destino: Union[str, BinaryIO]) -> Iterator[Any]:
+    """Abre o destino (caminho ou arquivo binário) para escrita de texto UTF-8."""
+    if isinstance(destino, str):
+        with open(destino, "w", newline="", encoding="utf-8") as arquivo:
+            yield arquivo
+        return
+    arquivo = io.TextIOWrapper(destino, encoding="utf-8", newline="")
+    try:
+        yield arquivo
+    finally:
+        arquivo.flush()
+        arquivo.detach()
+
+
+def _gravar_parquet(
+    origem: Origem,
+    nome: Optional[str],
+    destino: Union[str, BinaryIO],
+    resultados: Sequence[Tuple[str, str]],
+    nome_col_risco: str,
+    nome_col_explicacao: str,
+    origens: Optional[Sequence[str]] = None,
+    nome_col_origem: Optional[str] = None,
+) -> None:
+    """
+    Grava Parquet em row groups. De Parquet, o esquema original é mantido; de CSV
+    ou Excel, as colunas originais são gravadas como texto. O grau de risco é
+    gravado como dicionário (categoria), a explicação e a origem como string.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tipo_grau = pa.dictionary(pa.int8(), pa.string())
+    categorias = pa.array(GRAUS_RISCO, pa.string())
+    codigo_grau = {grau: i for i, grau in enumerate(GRAUS_RISCO)}
+
+    def colunas_resultado(inicio: int, fim: int) -> List[pa.Array]:
+        fatia = resultados[inicio:fim]
+        indices = pa.array([codigo_grau[grau] for grau, _ in fatia], pa.int8())
+        colunas = [
+            pa.DictionaryArray.from_arrays(indices, categorias),
+            pa.array([explicacao for _, explicacao in fatia], pa.string()),
+        ]
+        if origens is not None:
+            colunas.append(pa.array(list(origens[inicio:fim]), pa.string()))
+        return colunas
+
+    if _formato(origem, nome) == ".parquet":
+        lotes = _arquivo_parquet(origem).iter_batches(batch_size=TAMANHO_BLOCO_PADRAO)
+        esquema_origem = _arquivo_parquet(origem).schema_arrow
+    else:
+        nomes, linhas = _linhas_originais(origem, nome)
+        esquema_origem = pa.schema([(n, pa.string()) for n in nomes])
+        lotes = _lotes_texto(nomes, linhas, esquema_origem)
+
+    esquema = esquema_origem.append(pa.field(nome_col_risco, tipo_grau)).append(
+        pa.field(nome_col_explicacao, pa.string())
+    )
+    if origens is not None:
+        esquema = esquema.append(pa.field(nome_col_origem, pa.string()))
+    with pq.ParquetWriter(destino, esquema) as escritor:
+        inicio = 0
+        for lote in lotes:
+            fim = inicio + lote.num_rows
+            colunas = list(lote.columns) + colunas_resultado(inicio, fim)
+            escritor.write_batch(pa.RecordBatch.from_arrays(colunas, schema=esquema))
+            inicio = fim
+
+
+def _lotes_texto(nomes: Sequence[str], linhas: Iterator[List[Any]], esquema) -> Iterator[Any]:
+    """Agrupa linhas em RecordBatches com todas as colunas como texto."""
+    import pyarrow as pa
+
+    def como_texto(valor: Any) -> Optional[str]:
+        return None if _vazio(valor) or valor == "" else str(valor)
+
+    def montar(bloco: List[List[Any]]):
+        colunas = [pa.array([como_texto(linha[i]) for linha in bloco], pa.string()) for i in range(len(nomes))]
+        return pa.RecordBatch.from_arrays(colunas, schema=esquema)
+
+    bloco: List[List[Any]] = []
+    for linha in linhas:
+        bloco.append(linha)
+        if len(bloco) >= TAMANHO_BLOCO_PADRAO:
+            yield montar(bloco)
+            bloco = []
+    if bloco:
+        yield montar(bloco)
+
+
+def _vazio(valor: Any) -> bool:
+    return valor is None or (isinstance(valor, float) and valor != valor)
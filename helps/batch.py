@@ -0,0 +1,290 @@
+"""
+Modo Batch API: classificação offline de bases grandes pela OpenAI Batch API.
+
+Cada comentário vira uma linha JSONL com a mesma requisição de
+`analisar_risco_sentimento`; os arquivos são enviados por `files.create`,
+submetidos com `batches.create` e consultados até o fim da janela. Os resultados
+voltam pelo `custom_id` e passam pela mesma interpretação de JSON e de grau da
+chamada interativa; cada item com erro, expirado ou com resposta inválida cai
+individualmente na heurística.
+
+Os ids dos batches submetidos ficam em `pasta`, indexados pelo conteúdo das
+requisições, e são gravados a cada batch criado: se o processo for interrompido,
+rodar de novo a mesma base retoma a espera pelos mesmos batches (e submete só
+as partes que faltavam) em vez de submetê-los outra vez.
+
+Envios, consultas e downloads repetem erros transitórios com a mesma política
+das chamadas interativas; uma consulta que ainda falhe é refeita no intervalo
+seguinte. Se a API seguir indisponível, `BatchInterrompido` encerra a execução
+com o estado salvo para a retomada.
+"""
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import replace
+from functools import partial
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .cache import CacheClassificacoes
+from .config import (
+    BATCH_CONSULTAS_FALHAS_MAX,
+    BATCH_INTERVALO_CONSULTA,
+    BATCH_JANELA,
+    BATCH_MAX_REQUISICOES,
+    PASTA_BATCHES_PADRAO,
+)
+from .heuristica import heuristica_risco_explicacao
+from .llm import extrair_texto_resposta, interpretar_resposta, montar_requisicao, obter_cliente
+from .metricas import FALLBACK_EXCECAO, FALLBACK_ITEM_AUSENTE, MetricasExecucao
+from .resiliencia import PoliticaRetentativas, chamar_com_resiliencia, erro_transitorio
+
+ENDPOINT = "/v1/responses"
+ESTADOS_FINAIS = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+class BatchInterrompido(Exception):
+    """A API ficou indisponível durante o batch; os batches submetidos ficam salvos para a retomada."""
+
+
+def _politica_arquivos(politica: PoliticaRetentativas) -> PoliticaRetentativas:
+    """Envio e download de arquivos grandes: sem o timeout curto das chamadas de classificação."""
+    return replace(politica, timeout=None)
+
+
+def montar_linhas(itens: Sequence[Tuple[int, Optional[str], str]]) -> List[str]:
+    """Uma linha JSONL por item (id, descrição, comentário), com `custom_id` "item-<id>"."""
+    return [
+        json.dumps({
+            "custom_id": f"item-{id_item}",
+            "method": "POST",
+            "url": ENDPOINT,
+            "body": montar_requisicao(descricao, comentario),
+        }, ensure_ascii=False)
+        for id_item, descricao, comentario in itens
+    ]
+
+
+def submeter_batches(
+    cliente: Any,
+    linhas: Sequence[str],
+    pasta: str,
+    prefixo: str,
+    max_requisicoes: int = BATCH_MAX_REQUISICOES,
+    politica: Optional[PoliticaRetentativas] = None,
+    ids: Sequence[str] = (),
+    ao_submeter: Optional[Callable[[List[str]], None]] = None,
+    dormir: Callable[[float], None] = time.sleep,
+) -> List[str]:
+    """
+    Grava as linhas em arquivos de até `max_requisicoes`, envia e cria um batch
+    por arquivo. As partes já em `ids` (de uma execução interrompida) são
+    puladas; `ao_submeter(ids)` é chamado após cada batch criado.
+    """
+    politica = politica or PoliticaRetentativas()
+    os.makedirs(pasta, exist_ok=True)
+    ids = list(ids)
+    for numero, inicio in enumerate(range(0, len(linhas), max_requisicoes)):
+        if numero < len(ids):
+            continue
+        caminho = os.path.join(pasta, f"{prefixo}_{numero}.jsonl")
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            arquivo.writelines(linha + "\n" for linha in linhas[inicio:inicio + max_requisicoes])
+
+        def enviar(**extras: Any) -> Any:
+            # Reaberto a cada tentativa: um envio que falhou pode ter consumido o arquivo
+            with open(caminho, "rb") as arquivo:
+                return cliente.files.create(file=arquivo, purpose="batch", **extras)
+
+        enviado = chamar_com_resiliencia(enviar, _politica_arquivos(politica), dormir=dormir)
+        batch = chamar_com_resiliencia(
+            cliente.batches.create, politica, dormir=dormir,
+            input_file_id=enviado.id,
+            endpoint=ENDPOINT,
+            completion_window=BATCH_JANELA,
+            metadata={"origem": "helps", "parte": str(numero)},
+        )
+        ids.append(batch.id)
+        if ao_submeter:
+            ao_submeter(ids)
+        os.remove(caminho)
+    return ids
+
+
+def aguardar_batches(
+    cliente: Any,
+    ids: Sequence[str],
+    intervalo: float = BATCH_INTERVALO_CONSULTA,
+    ao_progredir: Optional[Callable[[int, int], None]] = None,
+    dormir: Callable[[float], None] = time.sleep,
+    politica: Optional[PoliticaRetentativas] = None,
+    falhas_toleradas: int = BATCH_CONSULTAS_FALHAS_MAX,
+) -> List[Any]:
+    """
+    Consulta os batches a cada `intervalo` segundos até todos terminarem
+    (concluídos, com falha, expirados ou cancelados) e retorna o estado final.
+    `ao_progredir(concluidos, total)` recebe a soma dos itens processados.
+
+    Cada consulta repete erros transitórios conforme `politica`; se ainda assim
+    falhar, é refeita no intervalo seguinte, até `falhas_toleradas` rodadas
+    seguidas sem resposta, quando o erro é repassado.
+    """
+    politica = politica or PoliticaRetentativas()
+    estados: Dict[str, Any] = {}
+    falhas = 0
+    while True:
+        try:
+            for id_batch in ids:
+                if id_batch not in estados or estados[id_batch].status not in ESTADOS_FINAIS:
+                    estados[id_batch] = chamar_com_resiliencia(
+                        partial(cliente.batches.retrieve, id_batch), politica, dormir=dormir
+                    )
+        except Exception as erro:
+            falhas += 1
+            if not erro_transitorio(erro) or falhas > falhas_toleradas:
+                raise
+            dormir(intervalo)
+            continue
+        falhas = 0
+        if ao_progredir:
+            contagens = [getattr(estado, "request_counts", None) for estado in estados.values()]
+            ao_progredir(
+                sum((c.completed or 0) + (c.failed or 0) for c in contagens if c),
+                sum(c.total or 0 for c in contagens if c),
+            )
+        if all(estado.status in ESTADOS_FINAIS for estado in estados.values()):
+            return [estados[id_batch] for id_batch in ids]
+        dormir(intervalo)
+
+
+def ler_resultados(
+    cliente: Any,
+    batch: Any,
+    politica: Optional[PoliticaRetentativas] = None,
+    dormir: Callable[[float], None] = time.sleep,
+) -> Iterator[Any]:
+    """Registros dos arquivos de saída e de erros de um batch, como objetos com atributos."""
+    politica = _politica_arquivos(politica or PoliticaRetentativas())
+    for id_arquivo in (batch.output_file_id, batch.error_file_id):
+        if not id_arquivo:
+            continue
+        conteudo = chamar_com_resiliencia(partial(cliente.files.content, id_arquivo), politica, dormir=dormir)
+        for linha in conteudo.text.splitlines():
+            if linha.strip():
+                yield json.loads(linha, object_hook=lambda campos: SimpleNamespace(**campos))
+
+
+def classificar_via_batch(
+    pares: Sequence[Tuple[Optional[str], Optional[str]]],
+    cliente: Any = None,
+    cache: Optional[CacheClassificacoes] = None,
+    metricas: Optional[MetricasExecucao] = None,
+    ao_progredir: Optional[Callable[[int, int], None]] = None,
+    intervalo: float = BATCH_INTERVALO_CONSULTA,
+    pasta: str = PASTA_BATCHES_PADRAO,
+    dormir: Callable[[float], None] = time.sleep,
+    politica: Optional[PoliticaRetentativas] = None,
+    ao_usar_heuristica: Optional[Callable[[int], None]] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Classifica os pares pela Batch API e devolve os resultados na ordem de entrada.
+    Comentários vazios e itens em `cache` não são enviados. Levanta
+    `BatchInterrompido` se a API seguir indisponível após as retentativas.
+    `ao_usar_heuristica(posição)` é chamado para cada item cujo resultado não vem da IA.
+    """
+    cliente = cliente or obter_cliente()
+    resultados: List[Optional[Tuple[str, str]]] = [None] * len(pares)
+    chaves_cache: Dict[int, str] = {}
+    itens = []
+
+    for idx, (descricao, comentario) in enumerate(pares):
+        if not comentario or len(str(comentario).strip()) < 3:
+            resultados[idx] = ("Baixo", "Sem comentário relevante para análise.")
+            if ao_usar_heuristica:
+                ao_usar_heuristica(idx)
+            continue
+        comentario = str(comentario).strip()
+        descricao = str(descricao).strip() if descricao else ""
+        if cache:
+            chaves_cache[idx] = cache.chave(descricao, comentario)
+            em_cache = cache.obter(chaves_cache[idx])
+            if em_cache:
+                resultados[idx] = em_cache
+                continue
+        itens.append((idx, descricao, comentario))
+
+    def fallback(idx: int, motivo: str) -> None:
+        if metricas:
+            metricas.registrar_fallback(motivo)
+        if ao_usar_heuristica:
+            ao_usar_heuristica(idx)
+        resultados[idx] = heuristica_risco_explicacao(*pares[idx])
+
+    if itens:
+        linhas = montar_linhas(itens)
+        chave = hashlib.sha256("\n".join(linhas).encode("utf-8")).hexdigest()[:16]
+        caminho_estado = os.path.join(pasta, f"{chave}.json")
+
+        # Retoma batches já submetidos para as mesmas requisições
+        ids: List[str] = []
+        if os.path.exists(caminho_estado):
+            with open(caminho_estado, encoding="utf-8") as arquivo:
+                ids = json.load(arquivo)["batches"]
+
+        def salvar_estado(submetidos: List[str]) -> None:
+            with open(caminho_estado, "w", encoding="utf-8") as arquivo:
+                json.dump({"batches": submetidos, "itens": len(itens), "criado_em": time.time()}, arquivo)
+
+        def registrar(registro: Any) -> None:
+            try:
+                idx = int(str(registro.custom_id).rsplit("-", 1)[1])
+            except (AttributeError, IndexError, ValueError):
+                return
+            if not 0 <= idx < len(pares) or resultados[idx] is not None:
+                return
+
+            resposta = getattr(registro, "response", None)
+            if getattr(registro, "error", None) or resposta is None or resposta.status_code != 200:
+                # Itens não executados na janela contam como ausentes; os demais, como erro da API
+                codigo = getattr(getattr(registro, "error", None), "code", None)
+                fallback(idx, FALLBACK_ITEM_AUSENTE if codigo == "batch_expired" else FALLBACK_EXCECAO)
+                return
+
+            if metricas:
+                metricas.registrar_tokens(getattr(resposta.body, "usage", None))
+            resultado, motivo = interpretar_resposta(extrair_texto_resposta(resposta.body))
+            if resultado is None:
+                fallback(idx, motivo)
+                return
+            grau, explicacao = resultado
+            if not explicacao:
+                _, explicacao = heuristica_risco_explicacao(*pares[idx])
+            resultados[idx] = (grau, explicacao)
+            if cache:
+                cache.gravar(chaves_cache[idx], grau, explicacao)
+
+        try:
+            ids = submeter_batches(
+                cliente, linhas, pasta, chave, politica=politica, ids=ids, ao_submeter=salvar_estado, dormir=dormir
+            )
+            for batch in aguardar_batches(cliente, ids, intervalo, ao_progredir, dormir, politica):
+                for registro in ler_resultados(cliente, batch, politica, dormir):
+                    registrar(registro)
+        except Exception as erro:
+            if not erro_transitorio(erro):
+                raise
+            retomada = (
+                f"Os batches submetidos estão salvos em {caminho_estado}; execute de novo a mesma base para retomar."
+                if os.path.exists(caminho_estado) else "Nenhum batch chegou a ser submetido."
+            )
+            raise BatchInterrompido(f"A API ficou indisponível durante o batch ({erro}). {retomada}") from erro
+
+        os.remove(caminho_estado)
+
+    # Itens que não voltaram em nenhum arquivo (batch com falha ou cancelado)
+    for idx, resultado in enumerate(resultados):
+        if resultado is None:
+            fallback(idx, FALLBACK_ITEM_AUSENTE)
+    return resultados
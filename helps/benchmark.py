@@ -0,0 +1,431 @@
+"""
+Benchmarks de vazão da curadoria sobre um corpus sintético de comentários NPS.
+
+Uso:
+    python -m helps.benchmark --linhas 100000
+    python -m helps.benchmark --linhas 100000 --salvar base.json
+    python -m helps.benchmark --linhas 100000 --referencia base.json --tolerancia 0.2
+
+O corpus é reproduzível (mesma semente, mesmas linhas) e cobre termos dos
+léxicos, negações, intensificadores, CAPS, pontuação repetida, ironia,
+comentários triviais e duplicados. Cada medição informa linhas/s e o pico de
+memória alocada (tracemalloc, em uma segunda execução para não distorcer o
+tempo). Com `--referencia`, o código de saída é 1 se alguma medição ficar mais
+lenta ou usar mais memória que a referência além da tolerância.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from .lexico import (
+    COMENTARIOS_TRIVIAIS,
+    INDICADORES_SARCASMO,
+    INTENSIFICADORES,
+    NEGADORES,
+    PALAVRAS_POSITIVAS,
+    PALAVRAS_RISCO,
+)
+
+COLUNA_DESCRICAO = "Descrição"
+COLUNA_COMENTARIO = "Comentário"
+
+SUITES = ("heuristica", "excel", "ponta_a_ponta")
+
+# ============================================================================
+# CORPUS SINTÉTICO
+# ============================================================================
+
+DESCRICOES = (
+    "Atendimento na loja", "Entrega em domicílio", "Suporte por telefone", "Instalação do produto",
+    "Troca de produto", "Reparo em garantia", "Atendimento pelo aplicativo", "Agendamento de visita",
+)
+SUJEITOS = (
+    "o atendimento", "a entrega", "o produto", "o técnico", "a loja", "o aplicativo",
+    "o serviço", "a equipe", "o prazo", "o suporte", "a instalação", "o reparo",
+)
+COMPLEMENTOS = ("", "", " desde o primeiro contato", " na última visita", " dessa vez", " como sempre")
+
+# Probabilidades de cada variação aplicada ao comentário gerado
+PROBABILIDADE_NEGACAO = 0.15
+PROBABILIDADE_INTENSIFICADOR = 0.3
+PROBABILIDADE_CAPS = 0.08
+PROBABILIDADE_PONTUACAO = 0.15
+
+
+def _termo(rng: random.Random, termos: Sequence[str], negadores: Sequence[str], intensificadores: Sequence[str]) -> str:
+    partes = []
+    if rng.random() < PROBABILIDADE_NEGACAO:
+        partes.append(rng.choice(negadores))
+    if rng.random() < PROBABILIDADE_INTENSIFICADOR:
+        partes.append(rng.choice(intensificadores))
+    partes.append(rng.choice(termos))
+    return " ".join(partes)
+
+
+def gerar_corpus(
+    linhas: int,
+    semente: int = 42,
+    proporcao_repetidos: float = 0.3,
+    proporcao_vazios: float = 0.05,
+) -> pd.DataFrame:
+    """
+    Gera um DataFrame com as colunas "Descrição" e "Comentário".
+
+    `proporcao_repetidos` das linhas repete comentários de um pequeno conjunto
+    de respostas comuns (como acontece em pesquisas NPS reais) e
+    `proporcao_vazios` fica vazia ou trivial ("ok", "nada a declarar").
+    """
+    rng = random.Random(semente)
+    risco = sorted(PALAVRAS_RISCO)
+    positivos = sorted(PALAVRAS_POSITIVAS)
+    sarcasmo = sorted(INDICADORES_SARCASMO)
+    negadores = sorted(NEGADORES)
+    intensificadores = sorted(INTENSIFICADORES)
+    triviais = sorted(COMENTARIOS_TRIVIAIS) + ["", ""]
+
+    def comentario() -> str:
+        sujeito = rng.choice(SUJEITOS)
+        tipo = rng.random()
+        if tipo < 0.35:
+            texto = f"{sujeito} foi {_termo(rng, positivos, negadores, intensificadores)}"
+        elif tipo < 0.65:
+            texto = f"{sujeito} foi {_termo(rng, risco, negadores, intensificadores)}"
+        elif tipo < 0.85:
+            texto = (f"{sujeito} foi {_termo(rng, positivos, negadores, intensificadores)}, "
+                     f"mas {rng.choice(SUJEITOS)} foi {_termo(rng, risco, negadores, intensificadores)}")
+        elif tipo < 0.93:
+            texto = f"{rng.choice(sarcasmo)}, {sujeito} {rng.choice(risco)} de novo"
+        else:
+            texto = f"{sujeito} atendeu ao que eu precisava"
+        texto = (texto + rng.choice(COMPLEMENTOS)).capitalize()
+        if rng.random() < PROBABILIDADE_CAPS:
+            texto = texto.upper()
+        if rng.random() < PROBABILIDADE_PONTUACAO:
+            texto += rng.choice(("!!!", "!!", "???", "?!"))
+        return texto
+
+    comuns = [comentario() for _ in range(50)]
+    descricoes, comentarios = [], []
+    for _ in range(linhas):
+        sorteio = rng.random()
+        if sorteio < proporcao_vazios:
+            comentarios.append(rng.choice(triviais) or None)
+        elif sorteio < proporcao_vazios + proporcao_repetidos:
+            comentarios.append(rng.choice(comuns))
+        else:
+            comentarios.append(comentario())
+        descricoes.append(rng.choice(DESCRICOES))
+    return pd.DataFrame({COLUNA_DESCRICAO: descricoes, COLUNA_COMENTARIO: comentarios})
+
+
+def gravar_corpus(df: pd.DataFrame, destino: str) -> None:
+    """Grava o corpus como base de entrada: .csv, .parquet ou .xlsx com títulos na linha 3."""
+    extensao = os.path.splitext(destino)[1].lower()
+    if extensao == ".csv":
+        df.to_csv(destino, index=False)
+        return
+    if extensao == ".parquet":
+        df.to_parquet(destino, index=False)
+        return
+
+    from openpyxl import Workbook
+
+    from .arquivos import LINHA_CABECALHO_EXCEL
+
+    livro = Workbook(write_only=True)
+    aba = livro.create_sheet()
+    aba.append(["Pesquisa NPS (corpus sintético)"])
+    for _ in range(LINHA_CABECALHO_EXCEL - 1):
+        aba.append([])
+    aba.append(list(df.columns))
+    for linha in df.itertuples(index=False):
+        aba.append(list(linha))
+    livro.save(destino)
+
+
+# ============================================================================
+# MEDIÇÃO
+# ============================================================================
+
+@dataclass
+class Medicao:
+    nome: str
+    linhas: int
+    segundos: float
+    pico_memoria_mb: Optional[float] = None
+
+    @property
+    def linhas_por_segundo(self) -> float:
+        return self.linhas / self.segundos if self.segundos else float("inf")
+
+
+def medir(
+    nome: str,
+    funcao: Callable[[], Any],
+    linhas: int,
+    repeticoes: int = 1,
+    memoria: bool = True,
+) -> Medicao:
+    """Melhor tempo de `repeticoes` execuções e, opcionalmente, o pico de memória de mais uma."""
+    melhor = float("inf")
+    for _ in range(max(1, repeticoes)):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+
+    pico = None
+    if memoria:
+        tracemalloc.start()
+        try:
+            funcao()
+            pico = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return Medicao(nome, linhas, melhor, pico)
+
+
+def suite_heuristica(corpus: pd.DataFrame, amostra: int, repeticoes: int, memoria: bool) -> List[Medicao]:
+    """Funções da heurística por linha (sobre uma amostra) e versões vetorizada e paralela."""
+    from . import heuristica
+    from .lexico import normalizar_texto, obter_lexicos
+    from .paralelo import heuristica_blocos
+    from .vetorizado import heuristica_lote
+
+    # Léxicos e tabelas Unicode são montados na primeira chamada; fora da medição
+    lexicos = obter_lexicos()
+    heuristica_lote(corpus.head(100), COLUNA_DESCRICAO, COLUNA_COMENTARIO)
+
+    parte = corpus.head(amostra)
+    pares = [
+        (d if isinstance(d, str) else None, c if isinstance(c, str) else None)
+        for d, c in zip(parte[COLUNA_DESCRICAO], parte[COLUNA_COMENTARIO])
+    ]
+    textos = [f"{d or ''} {c or ''}".strip() for d, c in pares]
+    normalizados = [normalizar_texto(t) for t in textos]
+    scores = [heuristica.calcular_score_sentimento(d, c) for d, c in pares]
+
+    por_linha: Dict[str, Callable[[], Any]] = {
+        "normalizar_texto": lambda: [normalizar_texto(t) for t in textos],
+        "detectar_capslock": lambda: [heuristica.detectar_capslock(t) for t in textos],
+        "detectar_pontuacao_excessiva": lambda: [heuristica.detectar_pontuacao_excessiva(t) for t in textos],
+        "encontrar_palavras_com_contexto": lambda: [
+            heuristica.encontrar_palavras_com_contexto(t, lexicos.risco) for t in normalizados
+        ],
+        "detectar_sarcasmo": lambda: [heuristica.detectar_sarcasmo(t) for t in textos],
+        "calcular_score_sentimento": lambda: [heuristica.calcular_score_sentimento(d, c) for d, c in pares],
+        "score_para_grau_risco": lambda: [heuristica.score_para_grau_risco(s, det) for s, det in scores],
+        "gerar_explicacao_heuristica": lambda: [
+            heuristica.gerar_explicacao_heuristica(s, det, c) for (s, det), (_, c) in zip(scores, pares)
+        ],
+        "heuristica_risco_explicacao": lambda: [heuristica.heuristica_risco_explicacao(d, c) for d, c in pares],
+    }
+    medicoes = [
+        medir(f"heuristica.{nome}", funcao, len(pares), repeticoes, memoria)
+        for nome, funcao in por_linha.items()
+    ]
+
+    linhas = len(corpus)
+    medicoes.append(medir(
+        "heuristica.heuristica_lote",
+        lambda: heuristica_lote(corpus, COLUNA_DESCRICAO, COLUNA_COMENTARIO),
+        linhas, repeticoes, memoria,
+    ))
+    medicoes.append(medir(
+        "heuristica.heuristica_blocos",
+        lambda: list(heuristica_blocos([corpus], COLUNA_DESCRICAO, COLUNA_COMENTARIO)),
+        linhas, repeticoes, memoria,
+    ))
+    return medicoes
+
+
+def suite_excel(corpus: pd.DataFrame, pasta: str, repeticoes: int, memoria: bool) -> List[Medicao]:
+    """Leitura em fluxo e gravação do resultado (injeção e reexportação) em .xlsx."""
+    from .arquivos import gravar_com_resultados, iterar_blocos, ler_colunas
+
+    linhas = len(corpus)
+    entrada = os.path.join(pasta, "corpus.xlsx")
+    saida = os.path.join(pasta, "saida.xlsx")
+    gravar_corpus(corpus, entrada)
+    resultados = [("Médio", "Classificação simulada.")] * linhas
+
+    return [
+        medir("excel.ler_colunas", lambda: ler_colunas(entrada), linhas, repeticoes, memoria),
+        medir(
+            "excel.iterar_blocos",
+            lambda: sum(len(b) for b in iterar_blocos(entrada, [COLUNA_DESCRICAO, COLUNA_COMENTARIO])),
+            linhas, repeticoes, memoria,
+        ),
+        medir(
+            "excel.gravar_com_resultados.injecao",
+            lambda: gravar_com_resultados(entrada, saida, resultados, "Grau de Risco", "Explicação"),
+            linhas, repeticoes, memoria,
+        ),
+        medir(
+            "excel.gravar_com_resultados.reexportacao",
+            lambda: gravar_com_resultados(
+                entrada, saida, resultados, "Grau de Risco", "Explicação", preservar_original=False
+            ),
+            linhas, repeticoes, memoria,
+        ),
+    ]
+
+
+def suite_ponta_a_ponta(corpus: pd.DataFrame, pasta: str, repeticoes: int, memoria: bool) -> List[Medicao]:
+    """Leitura, classificação (IA simulada ou só heurística) e gravação de uma base .xlsx."""
+    from .arquivos import gravar_com_resultados, iterar_blocos
+    from .llm import definir_cliente
+    from .pipeline import OpcoesProcessamento, processar_blocos
+    from .simulador import ClienteSimulado, ConfiguracaoSimulador
+
+    linhas = len(corpus)
+    entrada = os.path.join(pasta, "corpus.xlsx")
+    saida = os.path.join(pasta, "saida.xlsx")
+    if not os.path.exists(entrada):
+        gravar_corpus(corpus, entrada)
+
+    def executar(opcoes: OpcoesProcessamento) -> Callable[[], Any]:
+        def rodar() -> None:
+            blocos = iterar_blocos(entrada, [COLUNA_DESCRICAO, COLUNA_COMENTARIO])
+            resultados, _ = processar_blocos(blocos, COLUNA_DESCRICAO, COLUNA_COMENTARIO, opcoes)
+            gravar_com_resultados(entrada, saida, resultados, "Grau de Risco", "Explicação")
+        return rodar
+
+    # IA que responde na hora: mede o custo do pipeline (prompts, parsing, lotes, threads)
+    definir_cliente(ClienteSimulado(ConfiguracaoSimulador(grau_fixo="Médio"), dormir=False))
+    try:
+        return [
+            medir(
+                "ponta_a_ponta.ia_simulada",
+                executar(OpcoesProcessamento(rpm=0, tpm=0, usar_cache=False)),
+                linhas, repeticoes, memoria,
+            ),
+            medir(
+                "ponta_a_ponta.ia_simulada_triagem",
+                executar(OpcoesProcessamento(rpm=0, tpm=0, usar_cache=False, usar_triagem=True)),
+                linhas, repeticoes, memoria,
+            ),
+            medir(
+                "ponta_a_ponta.somente_heuristica",
+                executar(OpcoesProcessamento(somente_heuristica=True)),
+                linhas, repeticoes, memoria,
+            ),
+        ]
+    finally:
+        definir_cliente(None)
+
+
+# ============================================================================
+# REGRESSÕES
+# ============================================================================
+
+def comparar(medicoes: Sequence[Medicao], referencia: Dict[str, Any], tolerancia: float) -> List[str]:
+    """
+    Compara com uma execução salva (`--salvar`). Medições com outro número de
+    linhas não são comparadas. Retorna a descrição de cada regressão encontrada.
+    """
+    anteriores = {m["nome"]: m for m in referencia.get("medicoes", [])}
+    regressoes = []
+    for medicao in medicoes:
+        anterior = anteriores.get(medicao.nome)
+        if not anterior or anterior["linhas"] != medicao.linhas:
+            continue
+        vazao_anterior = anterior["linhas"] / anterior["segundos"] if anterior["segundos"] else float("inf")
+        if medicao.linhas_por_segundo < vazao_anterior * (1 - tolerancia):
+            regressoes.append(
+                f"{medicao.nome}: {medicao.linhas_por_segundo:,.0f} linhas/s "
+                f"(referência {vazao_anterior:,.0f})"
+            )
+        pico_anterior = anterior.get("pico_memoria_mb")
+        if medicao.pico_memoria_mb is not None and pico_anterior:
+            if medicao.pico_memoria_mb > pico_anterior * (1 + tolerancia):
+                regressoes.append(
+                    f"{medicao.nome}: pico de {medicao.pico_memoria_mb:.1f} MB (referência {pico_anterior:.1f} MB)"
+                )
+    return regressoes
+
+
+def imprimir(medicoes: Sequence[Medicao]) -> None:
+    largura = max(len(m.nome) for m in medicoes)
+    print(f"{'medição':<{largura}}  {'linhas':>9}  {'segundos':>9}  {'linhas/s':>12}  {'pico MB':>8}")
+    for m in medicoes:
+        pico = f"{m.pico_memoria_mb:8.1f}" if m.pico_memoria_mb is not None else f"{'-':>8}"
+        print(f"{m.nome:<{largura}}  {m.linhas:>9,}  {m.segundos:>9.3f}  {m.linhas_por_segundo:>12,.0f}  {pico}")
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m helps.benchmark",
+        description="Mede a vazão da curadoria sobre um corpus sintético de comentários NPS.",
+    )
+    parser.add_argument("--linhas", type=int, default=10_000, help="Linhas do corpus (ex.: 1000 a 1000000)")
+    parser.add_argument("--semente", type=int, default=42, help="Semente do gerador do corpus")
+    parser.add_argument(
+        "--amostra", type=int, default=20_000, help="Linhas usadas nas medições das funções por linha"
+    )
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--repeticoes", type=int, default=3, help="Execuções por medição (vale a melhor)")
+    parser.add_argument("--sem-memoria", action="store_true", help="Não mede o pico de memória")
+    parser.add_argument("--exportar-corpus", metavar="ARQUIVO", help="Grava o corpus (.xlsx, .csv ou .parquet) e sai")
+    parser.add_argument("--salvar", metavar="JSON", help="Grava as medições para servir de referência")
+    parser.add_argument("--referencia", metavar="JSON", help="Compara com medições salvas anteriormente")
+    parser.add_argument(
+        "--tolerancia", type=float, default=0.2,
+        help="Piora relativa aceita em linhas/s e pico de memória antes de acusar regressão",
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = criar_parser().parse_args(argv)
+
+    corpus = gerar_corpus(args.linhas, args.semente)
+    if args.exportar_corpus:
+        gravar_corpus(corpus, args.exportar_corpus)
+        print(f"{len(corpus)} linhas -> {args.exportar_corpus}", file=sys.stderr)
+        return 0
+
+    memoria = not args.sem_memoria
+    medicoes: List[Medicao] = []
+    with tempfile.TemporaryDirectory(prefix="helps-benchmark-") as pasta:
+        if "heuristica" in args.suites:
+            medicoes += suite_heuristica(corpus, args.amostra, args.repeticoes, memoria)
+        if "excel" in args.suites:
+            medicoes += suite_excel(corpus, pasta, args.repeticoes, memoria)
+        if "ponta_a_ponta" in args.suites:
+            medicoes += suite_ponta_a_ponta(corpus, pasta, args.repeticoes, memoria)
+    imprimir(medicoes)
+
+    if args.salvar:
+        with open(args.salvar, "w", encoding="utf-8") as arquivo:
+            json.dump({
+                "linhas": args.linhas,
+                "semente": args.semente,
+                "python": platform.python_version(),
+                "nucleos": os.cpu_count(),
+                "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "medicoes": [asdict(m) for m in medicoes],
+            }, arquivo, ensure_ascii=False, indent=2)
+
+    if args.referencia:
+        with open(args.referencia, encoding="utf-8") as arquivo:
+            regressoes = comparar(medicoes, json.load(arquivo), args.tolerancia)
+        for regressao in regressoes:
+            print(f"REGRESSÃO {regressao}", file=sys.stderr)
+        if regressoes:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Cache persistente (SQLite) das classificações feitas pela IA.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .config import (
+    CACHE_INTERVALO_GRAVACAO,
+    CACHE_MAX_ENTRADAS,
+    CACHE_MAX_IDADE_DIAS,
+    CAMINHO_CACHE_PADRAO,
+    MODELO_GPT,
+    VERSAO_PROMPT,
+)
+from .heuristica import fator_caps_par
+from .lexico import chave_texto
+
+
+class CacheClassificacoes:
+    """
+    Cache em disco (SQLite) das classificações feitas pela IA.
+
+    A chave é o hash do texto normalizado (descrição + comentário), do uso de CAPS
+    LOCK, do modelo e da versão do prompt. Entradas mais antigas que
+    `max_idade_dias` são removidas e, acima de `max_entradas`, as menos acessadas
+    recentemente são descartadas.
+    Apenas respostas válidas da IA são gravadas; fallbacks heurísticos não.
+
+    Gravações e datas de acesso ficam em memória e vão para o disco numa única
+    transação a cada `intervalo` operações, em `salvar` ou em `fechar`.
+    """
+
+    def __init__(
+        self,
+        caminho: str = CAMINHO_CACHE_PADRAO,
+        max_entradas: int = CACHE_MAX_ENTRADAS,
+        max_idade_dias: float = CACHE_MAX_IDADE_DIAS,
+        intervalo: int = CACHE_INTERVALO_GRAVACAO,
+    ):
+        self.caminho = caminho
+        self.max_entradas = max_entradas
+        self.max_idade_dias = max_idade_dias
+        self.intervalo = max(1, intervalo)
+        self.acertos = 0
+        self.falhas = 0
+        self._gravacoes = 0
+        self._novas: Dict[str, Tuple[str, str, float]] = {}
+        self._acessos: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        # Com WAL, NORMAL só sincroniza nos checkpoints: uma falta de energia pode
+        # perder as últimas gravações, mas não corrompe o banco
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.execute(
+            """CREATE TABLE IF NOT EXISTS classificacoes (
+                chave TEXT PRIMARY KEY,
+                grau TEXT NOT NULL,
+                explicacao TEXT NOT NULL,
+                criado_em REAL NOT NULL,
+                acessado_em REAL NOT NULL
+            )"""
+        )
+        self._conexao.execute(
+            "CREATE INDEX IF NOT EXISTS idx_acessado_em ON classificacoes (acessado_em)"
+        )
+        self._conexao.commit()
+        self.remover_expirados()
+
+    @staticmethod
+    def chave(
+        descricao: Optional[str],
+        comentario: Optional[str],
+        modelo: str = MODELO_GPT,
+        versao_prompt: str = VERSAO_PROMPT,
+    ) -> str:
+        """Gera a chave de conteúdo para um par (descrição, comentário)."""
+        partes = [
+            chave_texto(descricao),
+            chave_texto(comentario),
+            modelo,
+            versao_prompt,
+        ]
+        # Texto em CAPS LOCK tem chave própria (sem mudar as chaves já gravadas do texto comum)
+        fator_caps = fator_caps_par(descricao, comentario)
+        if fator_caps != 1.0:
+            partes.append(f"caps={fator_caps}")
+        return hashlib.sha256("\x1f".join(partes).encode("utf-8")).hexdigest()
+
+    def obter(self, chave: str) -> Optional[Tuple[str, str]]:
+        """Retorna (grau, explicação) em cache ou None, contabilizando acerto/falha."""
+        with self._lock:
+            nova = self._novas.get(chave)
+            if nova is not None:
+                self.acertos += 1
+                return nova[0], nova[1]
+            linha = self._conexao.execute(
+                "SELECT grau, explicacao FROM classificacoes WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha is None:
+                self.falhas += 1
+                return None
+            self.acertos += 1
+            self._acessos[chave] = time.time()
+            verificar_tamanho = self._gravar_se_necessario()
+        if verificar_tamanho:
+            self.remover_expirados()
+        return linha[0], linha[1]
+
+    def gravar(self, chave: str, grau: str, explicacao: str) -> None:
+        """Grava (ou substitui) uma classificação."""
+        with self._lock:
+            self._novas[chave] = (grau, explicacao, time.time())
+            self._acessos.pop(chave, None)
+            verificar_tamanho = self._gravar_se_necessario()
+        if verificar_tamanho:
+            self.remover_expirados()
+
+    def _gravar_se_necessario(self) -> bool:
+        """Grava as pendências ao atingir `intervalo`; retorna True se é hora de aplicar os limites."""
+        if len(self._novas) + len(self._acessos) < self.intervalo:
+            return False
+        return self._gravar_pendentes()
+
+    def _gravar_pendentes(self) -> bool:
+        if not self._novas and not self._acessos:
+            return False
+        antes = self._gravacoes
+        with self._conexao:
+            self._conexao.executemany(
+                "INSERT OR REPLACE INTO classificacoes VALUES (?, ?, ?, ?, ?)",
+                [(chave, grau, explicacao, agora, agora) for chave, (grau, explicacao, agora) in self._novas.items()],
+            )
+            self._conexao.executemany(
+                "UPDATE classificacoes SET acessado_em = ? WHERE chave = ?",
+                [(acessado_em, chave) for chave, acessado_em in self._acessos.items()],
+            )
+        self._gravacoes += len(self._novas)
+        self._novas.clear()
+        self._acessos.clear()
+        return self._gravacoes // 1000 > antes // 1000
+
+    def salvar(self) -> None:
+        """Grava imediatamente as classificações e os acessos pendentes."""
+        with self._lock:
+            verificar_tamanho = self._gravar_pendentes()
+        if verificar_tamanho:
+            self.remover_expirados()
+
+    def remover_expirados(self) -> None:
+        """Aplica a expiração por idade e o limite de tamanho (LRU)."""
+        with self._lock:
+            if self.max_idade_dias:
+                limite = time.time() - self.max_idade_dias * 86400
+                self._conexao.execute("DELETE FROM classificacoes WHERE criado_em < ?", (limite,))
+            if self.max_entradas:
+                (total,) = self._conexao.execute("SELECT COUNT(*) FROM classificacoes").fetchone()
+                excesso = total - self.max_entradas
+                if excesso > 0:
+                    self._conexao.execute(
+                        """DELETE FROM classificacoes WHERE chave IN (
+                            SELECT chave FROM classificacoes ORDER BY acessado_em LIMIT ?
+                        )""",
+                        (excesso,),
+                    )
+            self._conexao.commit()
+
+    def fechar(self) -> None:
+        self.salvar()
+        with self._lock:
+            self._conexao.close()
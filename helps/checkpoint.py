@@ -0,0 +1,171 @@
+"""
+Checkpoint de execuções longas: resultados parciais gravados em disco (SQLite)
+para retomar uma classificação interrompida a partir das linhas já concluídas.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .config import CAMINHO_CHECKPOINT_PADRAO, CHECKPOINT_INTERVALO_PADRAO, MODELO_GPT, VERSAO_PROMPT
+
+
+def chave_execucao(
+    hash_entrada: str,
+    col_descricao: Optional[str],
+    col_comentario: str,
+    assinatura_opcoes: str = "",
+    hash_anterior: str = "",
+    col_id: Optional[str] = None,
+    modelo: str = MODELO_GPT,
+    versao_prompt: str = VERSAO_PROMPT,
+) -> str:
+    """
+    Identifica uma execução pelo conteúdo da entrada, colunas escolhidas, opções
+    que mudam o resultado (`OpcoesProcessamento.assinatura_resultados`), saída
+    anterior reaproveitada (hash e coluna de ID), modelo e prompt.
+    """
+    partes = [
+        hash_entrada, col_descricao or "", col_comentario, assinatura_opcoes,
+        hash_anterior, col_id or "", modelo, versao_prompt,
+    ]
+    return hashlib.sha256("\x1f".join(partes).encode("utf-8")).hexdigest()
+
+
+def hash_arquivo(caminho: str, tamanho_bloco: int = 1 << 20) -> str:
+    """SHA-256 do conteúdo de um arquivo, lido em blocos."""
+    h = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+class CheckpointExecucao:
+    """
+    Resultados parciais (linha -> grau, explicação, origem do grau) de uma execução.
+
+    `registrar` acumula os resultados em memória e grava no disco a cada
+    `intervalo` linhas; `salvar` força a gravação do que estiver pendente.
+    Ao terminar com sucesso, `descartar` remove o progresso salvo.
+    """
+
+    def __init__(
+        self,
+        chave: str,
+        caminho: str = CAMINHO_CHECKPOINT_PADRAO,
+        intervalo: int = CHECKPOINT_INTERVALO_PADRAO,
+    ):
+        self.chave = chave
+        self.caminho = caminho
+        self.intervalo = max(1, intervalo)
+        self._pendentes: List[Tuple[str, int, str, str, str]] = []
+        self._lock = threading.Lock()
+
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute(
+            """CREATE TABLE IF NOT EXISTS progresso (
+                execucao TEXT NOT NULL,
+                linha INTEGER NOT NULL,
+                grau TEXT NOT NULL,
+                explicacao TEXT NOT NULL,
+                origem TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (execucao, linha)
+            )"""
+        )
+        colunas = {coluna for _, coluna, *_ in self._conexao.execute("PRAGMA table_info(progresso)")}
+        if "origem" not in colunas:
+            # Checkpoints gravados antes da coluna de origem
+            self._conexao.execute("ALTER TABLE progresso ADD COLUMN origem TEXT NOT NULL DEFAULT ''")
+        self._conexao.execute(
+            """CREATE TABLE IF NOT EXISTS execucoes (
+                execucao TEXT PRIMARY KEY,
+                total_linhas INTEGER NOT NULL,
+                atualizado_em REAL NOT NULL
+            )"""
+        )
+        self._conexao.commit()
+
+    def carregar(self) -> Dict[int, Tuple[str, str]]:
+        """Retorna os resultados já salvos desta execução."""
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT linha, grau, explicacao FROM progresso WHERE execucao = ?", (self.chave,)
+            ).fetchall()
+        return {linha: (grau, explicacao) for linha, grau, explicacao in linhas}
+
+    def origens(self) -> Dict[int, str]:
+        """Origem do grau de cada linha já salva ("" se desconhecida)."""
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT linha, origem FROM progresso WHERE execucao = ?", (self.chave,)
+            ).fetchall()
+        return dict(linhas)
+
+    def concluidas(self) -> int:
+        """Quantidade de linhas já salvas."""
+        with self._lock:
+            (total,) = self._conexao.execute(
+                "SELECT COUNT(*) FROM progresso WHERE execucao = ?", (self.chave,)
+            ).fetchone()
+        return total
+
+    def iniciar(self, total_linhas: int) -> None:
+        """Registra (ou atualiza) o total de linhas da execução."""
+        with self._lock:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO execucoes VALUES (?, ?, ?)",
+                (self.chave, total_linhas, time.time()),
+            )
+            self._conexao.commit()
+
+    def registrar(self, resultados: Iterable[Tuple[Any, ...]]) -> None:
+        """
+        Acumula resultados (linha, (grau, explicação)) ou (linha, (grau, explicação),
+        origem); grava a cada `intervalo` linhas.
+        """
+        with self._lock:
+            self._pendentes.extend(
+                (self.chave, linha, grau, explicacao, origem[0] if origem else "")
+                for linha, (grau, explicacao), *origem in resultados
+            )
+            if len(self._pendentes) >= self.intervalo:
+                self._gravar_pendentes()
+
+    def salvar(self) -> None:
+        """Grava imediatamente os resultados pendentes."""
+        with self._lock:
+            self._gravar_pendentes()
+
+    def _gravar_pendentes(self) -> None:
+        if not self._pendentes:
+            return
+        self._conexao.executemany(
+            "INSERT OR REPLACE INTO progresso (execucao, linha, grau, explicacao, origem) VALUES (?, ?, ?, ?, ?)",
+            self._pendentes,
+        )
+        self._conexao.execute(
+            "UPDATE execucoes SET atualizado_em = ? WHERE execucao = ?", (time.time(), self.chave)
+        )
+        self._conexao.commit()
+        self._pendentes.clear()
+
+    def descartar(self) -> None:
+        """Remove o progresso salvo desta execução."""
+        with self._lock:
+            self._pendentes.clear()
+            self._conexao.execute("DELETE FROM progresso WHERE execucao = ?", (self.chave,))
+            self._conexao.execute("DELETE FROM execucoes WHERE execucao = ?", (self.chave,))
+            self._conexao.commit()
+
+    def fechar(self) -> None:
+        with self._lock:
+            self._conexao.close()
@@ -0,0 +1,438 @@
+"""
+Classificador local: um nível intermediário entre a heurística e a IA.
+
+Treinado offline com comentários já classificados pela IA (as linhas das
+planilhas curadas cuja coluna de origem vale "IA"), usa n-gramas de caracteres do comentário normalizado e as
+palavras da descrição, projetados por hashing num vetor esparso, e uma regressão
+logística multinomial treinada com AdaGrad em minilotes, só com numpy. Roda
+em CPU, classifica lotes em milissegundos e informa a confiança de cada grau:
+na curadoria, só os comentários abaixo de `CONFIANCA_MODELO_PADRAO` seguem para a IA.
+
+Uso:
+    python -m helps.classificador treinar base_curada.xlsx --coluna-comentario "Comentário"
+    python -m helps.classificador avaliar outra_base_curada.xlsx --coluna-comentario "Comentário"
+
+O modelo é um .npz (sem pickle) e é carregado uma vez por processo.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .config import (
+    CAMINHO_MODELO_PADRAO,
+    CONFIANCA_MODELO_PADRAO,
+    GRAUS_RISCO,
+    MODELO_DIMENSAO,
+    MODELO_NGRAMAS,
+    NOME_COLUNA_ORIGEM,
+    ORIGEM_IA,
+)
+from .lexico import chave_texto
+from .vetorizado import heuristica_lote
+
+VERSAO_MODELO = 1
+FAIXAS_CONFIANCA = (0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99)
+
+Par = Tuple[Optional[str], Optional[str]]
+
+
+def indices_ngramas(
+    descricao: Optional[str],
+    comentario: Optional[str],
+    dimensao: int = MODELO_DIMENSAO,
+    ngramas: Tuple[int, int] = MODELO_NGRAMAS,
+) -> np.ndarray:
+    """Posições (ordenadas, sem repetição) dos n-gramas do comentário e das palavras da descrição."""
+    texto = f" {chave_texto(comentario)} "
+    minimo, maximo = ngramas
+    fragmentos = {texto[i:i + n] for n in range(minimo, maximo + 1) for i in range(len(texto) - n + 1)}
+    fragmentos.update("d:" + palavra for palavra in chave_texto(descricao).split())
+    return np.unique(np.fromiter(
+        (zlib.crc32(f.encode("utf-8")) % dimensao for f in fragmentos), dtype=np.int64, count=len(fragmentos)
+    ))
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class ClassificadorLocal:
+    """Regressão logística sobre n-gramas com hashing; `pesos` tem uma coluna por grau de `GRAUS_RISCO`."""
+
+    def __init__(
+        self,
+        pesos: np.ndarray,
+        vies: np.ndarray,
+        ngramas: Tuple[int, int] = MODELO_NGRAMAS,
+        metadados: Optional[Dict[str, Any]] = None,
+    ):
+        self.pesos = pesos
+        self.vies = vies
+        self.ngramas = ngramas
+        self.metadados = metadados or {}
+
+    @property
+    def dimensao(self) -> int:
+        return self.pesos.shape[0]
+
+    def _vetorizar(self, pares: Sequence[Par]) -> List[np.ndarray]:
+        return [indices_ngramas(d, c, self.dimensao, self.ngramas) for d, c in pares]
+
+    @staticmethod
+    def _esparso(linhas: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(posições, valores, inícios) no formato CSR; cada linha tem norma L2 igual a 1."""
+        tamanhos = np.fromiter((len(linha) for linha in linhas), dtype=np.int64, count=len(linhas))
+        posicoes = np.concatenate(linhas) if len(linhas) else np.zeros(0, dtype=np.int64)
+        valores = np.repeat(1.0 / np.sqrt(np.maximum(tamanhos, 1)), tamanhos)
+        inicios = np.concatenate(([0], np.cumsum(tamanhos)[:-1]))
+        return posicoes, valores, inicios
+
+    def _logits(self, linhas: Sequence[np.ndarray]) -> np.ndarray:
+        posicoes, valores, inicios = self._esparso(linhas)
+        logits = np.tile(self.vies.astype(np.float64), (len(linhas), 1))
+        if len(posicoes):
+            # Os n-gramas sempre geram ao menos um fragmento, então nenhuma linha é vazia
+            logits += np.add.reduceat(self.pesos[posicoes] * valores[:, None], inicios, axis=0)
+        return logits
+
+    def probabilidades(self, pares: Sequence[Par]) -> np.ndarray:
+        """Matriz (pares × graus) de probabilidades, na ordem de `GRAUS_RISCO`."""
+        if not pares:
+            return np.zeros((0, len(GRAUS_RISCO)))
+        return _softmax(self._logits(self._vetorizar(pares)))
+
+    def prever(self, pares: Sequence[Par]) -> Tuple[List[str], np.ndarray]:
+        """Grau mais provável e sua probabilidade (confiança) para cada par."""
+        probabilidades = self.probabilidades(pares)
+        melhores = probabilidades.argmax(axis=1)
+        return [GRAUS_RISCO[i] for i in melhores], probabilidades.max(axis=1)
+
+    def classificar(
+        self,
+        pares: Sequence[Par],
+        confianca_minima: float = CONFIANCA_MODELO_PADRAO,
+    ) -> List[Optional[Tuple[str, str]]]:
+        """
+        (grau, explicação) dos pares com confiança >= `confianca_minima`; None
+        nos demais, que devem seguir para a IA. A explicação é a da heurística
+        quando ela chega ao mesmo grau.
+        """
+        graus, confiancas = self.prever(pares)
+        confiantes = [i for i, confianca in enumerate(confiancas) if confianca >= confianca_minima]
+        resultados: List[Optional[Tuple[str, str]]] = [None] * len(pares)
+        if not confiantes:
+            return resultados
+
+        heuristica = heuristica_lote(
+            pd.DataFrame([pares[i] for i in confiantes], columns=["descricao", "comentario"]),
+            "descricao", "comentario",
+        )
+        for i, grau_heuristica, explicacao in zip(confiantes, heuristica["grau_risco"], heuristica["explicacao"]):
+            if grau_heuristica != graus[i]:
+                explicacao = (
+                    f"Classificado pelo modelo local treinado com avaliações da IA "
+                    f"({confiancas[i]:.0%} de confiança)."
+                )
+            resultados[i] = (graus[i], explicacao)
+        return resultados
+
+    @classmethod
+    def treinar(
+        cls,
+        pares: Sequence[Par],
+        graus: Sequence[str],
+        epocas: int = 5,
+        taxa: float = 0.5,
+        regularizacao: float = 1e-6,
+        tamanho_lote: int = 256,
+        dimensao: int = MODELO_DIMENSAO,
+        ngramas: Tuple[int, int] = MODELO_NGRAMAS,
+        semente: int = 0,
+    ) -> "ClassificadorLocal":
+        """Ajusta o modelo por AdaGrad em minilotes, atualizando só as posições presentes em cada lote."""
+        modelo = cls(np.zeros((dimensao, len(GRAUS_RISCO))), np.zeros(len(GRAUS_RISCO)), ngramas)
+        linhas = modelo._vetorizar(pares)
+        alvos = np.eye(len(GRAUS_RISCO))[[GRAUS_RISCO.index(g) for g in graus]]
+        acumulado_pesos = np.zeros_like(modelo.pesos)
+        acumulado_vies = np.zeros_like(modelo.vies)
+        gerador = np.random.default_rng(semente)
+
+        for _ in range(epocas):
+            ordem = gerador.permutation(len(linhas))
+            for inicio in range(0, len(ordem), tamanho_lote):
+                lote = ordem[inicio:inicio + tamanho_lote]
+                linhas_lote = [linhas[i] for i in lote]
+                gradiente_logits = (_softmax(modelo._logits(linhas_lote)) - alvos[lote]) / len(lote)
+
+                # Gradiente por n-grama: agrupa as ocorrências do lote por posição
+                posicoes, valores, inicios = cls._esparso(linhas_lote)
+                linha_de = np.repeat(np.arange(len(lote)), np.diff(np.append(inicios, len(posicoes))))
+                ordem_posicoes = np.argsort(posicoes, kind="stable")
+                ordenadas = posicoes[ordem_posicoes]
+                cortes = np.flatnonzero(np.r_[True, ordenadas[1:] != ordenadas[:-1]])
+                presentes = ordenadas[cortes]
+                contribuicoes = (valores[:, None] * gradiente_logits[linha_de])[ordem_posicoes]
+                gradiente = np.add.reduceat(contribuicoes, cortes, axis=0) + regularizacao * modelo.pesos[presentes]
+
+                acumulado_pesos[presentes] += gradiente ** 2
+                modelo.pesos[presentes] -= taxa * gradiente / (np.sqrt(acumulado_pesos[presentes]) + 1e-8)
+                gradiente_vies = gradiente_logits.sum(axis=0)
+                acumulado_vies += gradiente_vies ** 2
+                modelo.vies -= taxa * gradiente_vies / (np.sqrt(acumulado_vies) + 1e-8)
+
+        modelo.pesos = modelo.pesos.astype(np.float32)
+        modelo.metadados = {"exemplos": len(linhas), "epocas": epocas, "treinado_em": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        return modelo
+
+    def salvar(self, caminho: str) -> None:
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with open(caminho, "wb") as arquivo:
+            np.savez_compressed(
+                arquivo,
+                pesos=self.pesos,
+                vies=self.vies,
+                ngramas=np.array(self.ngramas),
+                graus=np.array(GRAUS_RISCO),
+                metadados=np.array(json.dumps({"versao": VERSAO_MODELO, **self.metadados}, ensure_ascii=False)),
+            )
+
+    @classmethod
+    def carregar(cls, caminho: str) -> "ClassificadorLocal":
+        with np.load(caminho, allow_pickle=False) as dados:
+            if tuple(dados["graus"].tolist()) != GRAUS_RISCO:
+                raise ValueError(f"Modelo {caminho} foi treinado com outros graus de risco")
+            metadados = json.loads(str(dados["metadados"]))
+            if metadados.get("versao") != VERSAO_MODELO:
+                raise ValueError(f"Modelo {caminho} tem formato incompatível; treine-o novamente")
+            return cls(dados["pesos"], dados["vies"], tuple(int(n) for n in dados["ngramas"]), metadados)
+
+
+@lru_cache(maxsize=4)
+def _carregar_em_cache(caminho: str, modificado_em: float) -> ClassificadorLocal:
+    return ClassificadorLocal.carregar(caminho)
+
+
+def obter_classificador(caminho: str = CAMINHO_MODELO_PADRAO) -> ClassificadorLocal:
+    """Modelo carregado uma única vez por processo (recarregado se o arquivo for retreinado)."""
+    caminho = os.path.abspath(caminho)
+    return _carregar_em_cache(caminho, os.path.getmtime(caminho))
+
+
+# ============================================================================
+# TREINO E AVALIAÇÃO
+# ============================================================================
+
+def ler_exemplos(
+    arquivos: Sequence[str],
+    col_descricao: Optional[str],
+    col_comentario: str,
+    col_risco: str,
+    col_origem: str = NOME_COLUNA_ORIGEM,
+    aceitar_sem_origem: bool = False,
+) -> Tuple[List[Par], List[str]]:
+    """
+    Pares (descrição, comentário) e graus das planilhas curadas, injetadas ou
+    reexportadas (cabeçalho na linha 3 ou 1). Ignora linhas sem comentário ou
+    com grau inválido; pares repetidos (após normalização) entram uma vez, com
+    o último grau, para a validação não reencontrar exemplos do treino.
+
+    Só entram as linhas cuja `col_origem` vale `ORIGEM_IA`: graus da heurística,
+    da triagem, do próprio modelo ou herdados de um semelhante não são da IA.
+    Uma planilha sem essa coluna (de versões anteriores) gera ValueError, a não
+    ser com `aceitar_sem_origem`, que usa todos os graus dela.
+    """
+    from .arquivos import iterar_blocos, ler_colunas, localizar_cabecalho
+    from .pipeline import extrair_pares
+
+    exemplos: Dict[Tuple[str, str], Tuple[Par, str]] = {}
+    for caminho in arquivos:
+        linha_cabecalho = localizar_cabecalho(caminho, (col_comentario, col_risco))
+        colunas = ler_colunas(caminho, linha_cabecalho=linha_cabecalho)
+        descricao = col_descricao if col_descricao and col_descricao in colunas else None
+        faltando = [c for c in (col_comentario, col_risco) if c not in colunas]
+        if faltando:
+            raise KeyError(f"{caminho} não tem as colunas {faltando}")
+        origem = col_origem if col_origem in colunas else None
+        if origem is None and not aceitar_sem_origem:
+            raise ValueError(
+                f"{caminho} não tem a coluna '{col_origem}' com a origem dos graus; "
+                f"sem ela não há como separar os graus da IA dos da heurística"
+            )
+        blocos = iterar_blocos(
+            caminho, [c for c in (descricao, col_comentario, col_risco, origem) if c], linha_cabecalho=linha_cabecalho
+        )
+        for bloco in blocos:
+            origens = bloco[origem].tolist() if origem else [ORIGEM_IA] * len(bloco)
+            linhas = zip(extrair_pares(bloco, descricao, col_comentario), bloco[col_risco].tolist(), origens)
+            for par, grau, origem_grau in linhas:
+                if origem_grau == ORIGEM_IA and grau in GRAUS_RISCO and len(chave_texto(par[1])) >= 3:
+                    exemplos[(chave_texto(par[0]), chave_texto(par[1]))] = (par, grau)
+    return [par for par, _ in exemplos.values()], [grau for _, grau in exemplos.values()]
+
+
+def avaliar(
+    modelo: ClassificadorLocal,
+    pares: Sequence[Par],
+    graus: Sequence[str],
+    confianca_minima: float = CONFIANCA_MODELO_PADRAO,
+    referencia: str = "a IA",
+) -> Dict[str, Any]:
+    """
+    Concordância do modelo com os graus de referência (da IA, ou de `referencia`
+    quando as planilhas não dizem a origem): no total, entre os comentários que
+    ele resolveria com `confianca_minima` e por faixa de confiança.
+    """
+    inicio = time.perf_counter()
+    previstos, confiancas = modelo.prever(pares)
+    segundos = time.perf_counter() - inicio
+    acertos = np.array([p == g for p, g in zip(previstos, graus)], dtype=bool)
+    confusao = {g: {p: 0 for p in GRAUS_RISCO} for g in GRAUS_RISCO}
+    for previsto, grau in zip(previstos, graus):
+        confusao[grau][previsto] += 1
+
+    def faixa(limiar: float) -> Dict[str, Any]:
+        mascara = confiancas >= limiar
+        return {
+            "limiar": limiar,
+            "cobertura": round(float(mascara.mean()), 4) if len(mascara) else 0.0,
+            "concordancia": round(float(acertos[mascara].mean()), 4) if mascara.any() else None,
+        }
+
+    return {
+        "referencia": referencia,
+        "exemplos": len(pares),
+        "concordancia": round(float(acertos.mean()), 4) if len(acertos) else None,
+        "confianca_minima": faixa(confianca_minima),
+        "faixas": [faixa(limiar) for limiar in FAIXAS_CONFIANCA],
+        "confusao": confusao,
+        "ms_por_comentario": round(segundos * 1000 / len(pares), 4) if pares else None,
+    }
+
+
+def formatar_avaliacao(relatorio: Dict[str, Any]) -> List[str]:
+    """Linhas de texto com o resultado de `avaliar`, para terminal/log."""
+    if not relatorio["exemplos"]:
+        return ["Nenhum exemplo para avaliar."]
+    escolhida = relatorio["confianca_minima"]
+    linhas = [
+        f"Concordância com {relatorio['referencia']}: {relatorio['concordancia']:.1%} em {relatorio['exemplos']} comentários "
+        f"({relatorio['ms_por_comentario']:.3f} ms/comentário)",
+        f"Com confiança >= {escolhida['limiar']:.0%}: {escolhida['cobertura']:.1%} resolvidos localmente, "
+        f"concordância {(escolhida['concordancia'] or 0):.1%}; o restante seguiria para a IA",
+        "Por faixa de confiança:",
+    ]
+    for faixa in relatorio["faixas"]:
+        concordancia = f"{faixa['concordancia']:.1%}" if faixa["concordancia"] is not None else "-"
+        linhas.append(f"  >= {faixa['limiar']:.0%}: cobertura {faixa['cobertura']:.1%}, concordância {concordancia}")
+    largura = max(len(g) for g in GRAUS_RISCO)
+    linhas.append("Matriz de confusão (linhas: referência; colunas: modelo):")
+    linhas.append(" " * (largura + 4) + "  ".join(f"{g:>{largura}}" for g in GRAUS_RISCO))
+    for grau, previstos in relatorio["confusao"].items():
+        linhas.append(f"  {grau:<{largura}}  " + "  ".join(f"{previstos[g]:>{largura}}" for g in GRAUS_RISCO))
+    return linhas
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m helps.classificador",
+        description="Treina e avalia o classificador local com planilhas já classificadas pela IA.",
+    )
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    treinar = comandos.add_parser("treinar", help="Treina o modelo e mede a concordância numa parte separada")
+    avaliar_ = comandos.add_parser("avaliar", help="Mede a concordância de um modelo salvo com outras planilhas")
+
+    for sub in (treinar, avaliar_):
+        sub.add_argument("arquivos", nargs="+", help="Planilhas curadas (.xlsx, .csv ou .parquet)")
+        sub.add_argument("--coluna-comentario", required=True)
+        sub.add_argument("--coluna-descricao")
+        sub.add_argument("--coluna-risco", default="Grau de Risco", help="Coluna com o grau atribuído")
+        sub.add_argument(
+            "--coluna-origem", default=NOME_COLUNA_ORIGEM,
+            help="Coluna com a origem do grau; só as linhas com origem \"IA\" entram no treino e na avaliação",
+        )
+        sub.add_argument(
+            "--aceitar-sem-origem", action="store_true",
+            help="Aceita planilhas sem a coluna de origem (saídas antigas), usando todos os graus delas",
+        )
+        sub.add_argument("--modelo", default=CAMINHO_MODELO_PADRAO, help="Arquivo .npz do modelo")
+        sub.add_argument(
+            "--confianca", type=float, default=CONFIANCA_MODELO_PADRAO,
+            help="Confiança mínima para resolver sem a IA, usada no relatório",
+        )
+        sub.add_argument("--relatorio", metavar="JSON", help="Grava o relatório de concordância")
+
+    treinar.add_argument("--validacao", type=float, default=0.2, help="Fração separada para medir a concordância")
+    treinar.add_argument("--epocas", type=int, default=5)
+    treinar.add_argument("--taxa", type=float, default=0.5, help="Taxa de aprendizado do AdaGrad")
+    treinar.add_argument("--semente", type=int, default=0)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = criar_parser().parse_args(argv)
+
+    inicio = time.perf_counter()
+    try:
+        pares, graus = ler_exemplos(
+            args.arquivos, args.coluna_descricao, args.coluna_comentario, args.coluna_risco,
+            col_origem=args.coluna_origem, aceitar_sem_origem=args.aceitar_sem_origem,
+        )
+    except (KeyError, ValueError) as erro:
+        print(f"Erro ao ler as planilhas: {erro}", file=sys.stderr)
+        return 2
+    if not pares:
+        print("Nenhuma linha classificada pela IA com comentário e grau válido nas planilhas.", file=sys.stderr)
+        return 2
+    referencia = "a IA"
+    if args.aceitar_sem_origem:
+        referencia = "os graus das planilhas"
+        print(
+            f"Aviso: nas planilhas sem a coluna '{args.coluna_origem}' entram todos os graus, inclusive os da "
+            f"heurística; a concordância é medida contra eles, não só contra a IA.",
+            file=sys.stderr,
+        )
+    print(f"{len(pares)} comentários distintos lidos em {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+
+    if args.comando == "treinar":
+        ordem = np.random.default_rng(args.semente).permutation(len(pares))
+        separados = int(len(pares) * args.validacao)
+        treino, validacao = ordem[separados:], ordem[:separados]
+        inicio = time.perf_counter()
+        modelo = ClassificadorLocal.treinar(
+            [pares[i] for i in treino], [graus[i] for i in treino],
+            epocas=args.epocas, taxa=args.taxa, semente=args.semente,
+        )
+        print(f"Treinado com {len(treino)} comentários em {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+        pares_avaliacao, graus_avaliacao = [pares[i] for i in validacao], [graus[i] for i in validacao]
+    else:
+        modelo = ClassificadorLocal.carregar(args.modelo)
+        pares_avaliacao, graus_avaliacao = pares, graus
+
+    relatorio = avaliar(modelo, pares_avaliacao, graus_avaliacao, args.confianca, referencia)
+    for linha in formatar_avaliacao(relatorio):
+        print(linha, file=sys.stderr)
+
+    if args.comando == "treinar":
+        modelo.metadados["concordancia_validacao"] = relatorio["concordancia"]
+        modelo.salvar(args.modelo)
+        print(f"Modelo -> {args.modelo}", file=sys.stderr)
+    if args.relatorio:
+        with open(args.relatorio, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+"""
+Linha de comando: processa uma planilha NPS de ponta a ponta, sem Streamlit.
+
+Uso:
+    python -m helps base.xlsx --coluna-comentario "Comentário" --saida base_curada.xlsx
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from typing import List, Optional
+
+from .config import (
+    BATCH_INTERVALO_CONSULTA,
+    CAMINHO_CACHE_PADRAO,
+    CAMINHO_CHECKPOINT_PADRAO,
+    CAMINHO_MODELO_PADRAO,
+    CHECKPOINT_INTERVALO_PADRAO,
+    CONFIANCA_MODELO_PADRAO,
+    DISJUNTOR_ESPERA_PADRAO,
+    DISJUNTOR_FALHAS_PADRAO,
+    GRAUS_RISCO,
+    LIMIAR_PESO_CRITICO,
+    LIMIAR_SCORE_POSITIVO,
+    LIMIAR_SEMELHANCA_PADRAO,
+    MAX_CONCORRENCIA_PADRAO,
+    NOME_COLUNA_ORIGEM,
+    PROCESSOS_HEURISTICA_PADRAO,
+    RPM_PADRAO,
+    TAMANHO_LOTE_PADRAO,
+    TENTATIVAS_IA_PADRAO,
+    TIMEOUT_IA_PADRAO,
+    TPM_PADRAO,
+)
+
+NOME_COLUNA_RISCO = "Grau de Risco"
+NOME_COLUNA_EXPLICACAO = "Explicação do Sentimento"
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="helps",
+        description="Classifica o grau de risco e o sentimento de comentários NPS.",
+    )
+    parser.add_argument("arquivo", help="Base de entrada (.xlsx com títulos na linha 3, .csv ou .parquet)")
+    parser.add_argument("--coluna-comentario", required=True, help="Coluna com o comentário do cliente")
+    parser.add_argument("--coluna-descricao", help="Coluna com a descrição/contexto do atendimento")
+    parser.add_argument(
+        "--saida", help="Arquivo de saída (.xlsx, .csv ou .parquet); padrão: <entrada>_curada no formato da entrada"
+    )
+    parser.add_argument("--coluna-risco", default=NOME_COLUNA_RISCO, help="Nome da coluna de risco")
+    parser.add_argument("--coluna-explicacao", default=NOME_COLUNA_EXPLICACAO, help="Nome da coluna de explicação")
+    parser.add_argument(
+        "--coluna-origem", default=NOME_COLUNA_ORIGEM,
+        help="Nome da coluna com a origem do grau (IA, Triagem, Modelo local, Semelhante, Heurística)",
+    )
+    parser.add_argument(
+        "--reexportar", action="store_true",
+        help="Gera um .xlsx novo só com cabeçalho e dados, em vez de acrescentar as colunas ao arquivo original",
+    )
+
+    desempenho = parser.add_argument_group("desempenho")
+    desempenho.add_argument("--somente-heuristica", action="store_true", help="Classifica sem chamar a IA")
+    desempenho.add_argument(
+        "--processos", type=int, default=PROCESSOS_HEURISTICA_PADRAO,
+        help="Processos da heurística sem IA (0 = um por núcleo)",
+    )
+    desempenho.add_argument("--concorrencia", type=int, default=MAX_CONCORRENCIA_PADRAO, help="Requisições simultâneas")
+    desempenho.add_argument("--rpm", type=int, default=RPM_PADRAO, help="Requisições por minuto (0 = sem limite)")
+    desempenho.add_argument("--tpm", type=int, default=TPM_PADRAO, help="Tokens por minuto (0 = sem limite)")
+    desempenho.add_argument("--lote", type=int, default=TAMANHO_LOTE_PADRAO, help="Comentários por requisição")
+    desempenho.add_argument("--sem-dedup", action="store_true", help="Não agrupa comentários idênticos")
+    desempenho.add_argument(
+        "--semelhantes", action="store_true",
+        help="Agrupa comentários quase idênticos e envia à IA só um representante por grupo",
+    )
+    desempenho.add_argument(
+        "--limiar-semelhanca", type=float, default=LIMIAR_SEMELHANCA_PADRAO,
+        help="Semelhança mínima (Jaccard, 0 a 1) para agrupar dois comentários",
+    )
+    desempenho.add_argument("--triagem", action="store_true", help="Resolve casos claros com a heurística")
+    desempenho.add_argument(
+        "--modelo-local", action="store_true",
+        help="Classifica localmente, com o modelo de `python -m helps.classificador treinar`, "
+             "os comentários em que ele está confiante; só os demais vão para a IA",
+    )
+    desempenho.add_argument("--caminho-modelo", default=CAMINHO_MODELO_PADRAO)
+    desempenho.add_argument(
+        "--confianca-modelo", type=float, default=CONFIANCA_MODELO_PADRAO,
+        help="Probabilidade mínima do modelo local para dispensar a IA",
+    )
+    desempenho.add_argument("--limiar-critico", type=float, default=LIMIAR_PESO_CRITICO)
+    desempenho.add_argument("--limiar-positivo", type=float, default=LIMIAR_SCORE_POSITIVO)
+    desempenho.add_argument("--sem-cache", action="store_true", help="Não reutiliza classificações anteriores")
+    desempenho.add_argument("--caminho-cache", default=CAMINHO_CACHE_PADRAO)
+
+    desempenho.add_argument(
+        "--batch-api", action="store_true",
+        help="Envia tudo de uma vez pela Batch API da OpenAI (até 24h, metade do custo, sem disputar RPM/TPM)",
+    )
+    desempenho.add_argument(
+        "--batch-intervalo", type=float, default=BATCH_INTERVALO_CONSULTA,
+        help="Segundos entre consultas ao estado do batch",
+    )
+
+    resiliencia = parser.add_argument_group("resiliência")
+    resiliencia.add_argument(
+        "--tentativas", type=int, default=TENTATIVAS_IA_PADRAO,
+        help="Tentativas por requisição com erro transitório (429, 5xx, timeout), incluindo a primeira",
+    )
+    resiliencia.add_argument(
+        "--timeout", type=float, default=TIMEOUT_IA_PADRAO, help="Segundos por requisição à IA (0 = padrão do cliente)"
+    )
+    resiliencia.add_argument(
+        "--disjuntor-falhas", type=int, default=DISJUNTOR_FALHAS_PADRAO,
+        help="Falhas seguidas que suspendem a IA, usando só a heurística (0 = nunca suspende)",
+    )
+    resiliencia.add_argument(
+        "--disjuntor-espera", type=float, default=DISJUNTOR_ESPERA_PADRAO,
+        help="Segundos com a IA suspensa antes de testar se ela voltou",
+    )
+
+    diagnostico = parser.add_argument_group("diagnóstico")
+    diagnostico.add_argument("--metricas", metavar="JSON", help="Grava tempos por etapa, latência, tokens e fallbacks")
+    diagnostico.add_argument(
+        "--perfil", action="store_true", help="Executa sob o cProfile e mostra as funções mais custosas"
+    )
+
+    incremental = parser.add_argument_group("incremental")
+    incremental.add_argument(
+        "--anterior", metavar="ARQUIVO",
+        help="Saída curada de uma execução anterior: linhas com o mesmo ID e texto herdam a classificação dela",
+    )
+    incremental.add_argument("--coluna-id", help="Coluna com o ID do registro (obrigatória com --anterior)")
+
+    retomada = parser.add_argument_group("retomada")
+    retomada.add_argument("--sem-checkpoint", action="store_true", help="Não salva o progresso parcial")
+    retomada.add_argument("--recomecar", action="store_true", help="Descarta o progresso salvo e processa tudo")
+    retomada.add_argument(
+        "--checkpoint-intervalo", type=int, default=CHECKPOINT_INTERVALO_PADRAO,
+        help="Linhas concluídas entre gravações do progresso",
+    )
+    retomada.add_argument("--caminho-checkpoint", default=CAMINHO_CHECKPOINT_PADRAO)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = criar_parser()
+    args = parser.parse_args(argv)
+    if not os.path.isfile(args.arquivo):
+        parser.error(f"Arquivo não encontrado: {args.arquivo}")
+    if args.anterior and not args.coluna_id:
+        parser.error("--anterior exige --coluna-id")
+    if args.anterior and not os.path.isfile(args.anterior):
+        parser.error(f"Arquivo anterior não encontrado: {args.anterior}")
+    if args.modelo_local and not os.path.exists(args.caminho_modelo):
+        parser.error(f"Modelo local não encontrado: {args.caminho_modelo} (treine com python -m helps.classificador)")
+
+    # Importações pesadas (pandas, openpyxl) só depois de validar os argumentos
+    from .arquivos import gravar_com_resultados, iterar_blocos, ler_colunas, localizar_cabecalho
+    from .batch import BatchInterrompido
+    from .checkpoint import CheckpointExecucao, chave_execucao, hash_arquivo
+    from .execucao import limitar_progresso
+    from .incremental import Reaproveitamento
+    from .metricas import MetricasExecucao, formatar_resumo
+    from .pipeline import OpcoesProcessamento, processar_blocos
+
+    inicio = time.perf_counter()
+    colunas = ler_colunas(args.arquivo)
+
+    for coluna in (args.coluna_comentario, args.coluna_descricao, args.coluna_id):
+        if coluna and coluna not in colunas:
+            print(f"Coluna não encontrada: {coluna}", file=sys.stderr)
+            return 2
+    if args.coluna_risco in colunas or args.coluna_explicacao in colunas:
+        print("Os nomes das novas colunas já existem na planilha.", file=sys.stderr)
+        return 2
+
+    opcoes = OpcoesProcessamento(
+        somente_heuristica=args.somente_heuristica,
+        max_concorrencia=args.concorrencia,
+        rpm=args.rpm,
+        tpm=args.tpm,
+        tamanho_lote=args.lote,
+        agrupar_duplicados=not args.sem_dedup,
+        agrupar_semelhantes=args.semelhantes,
+        limiar_semelhanca=args.limiar_semelhanca,
+        usar_triagem=args.triagem,
+        usar_modelo_local=args.modelo_local,
+        caminho_modelo=args.caminho_modelo,
+        confianca_modelo=args.confianca_modelo,
+        limiar_critico=args.limiar_critico,
+        limiar_positivo=args.limiar_positivo,
+        usar_cache=not args.sem_cache,
+        caminho_cache=args.caminho_cache,
+        processos=args.processos,
+        tentativas=args.tentativas,
+        timeout=args.timeout,
+        disjuntor_falhas=args.disjuntor_falhas,
+        disjuntor_espera=args.disjuntor_espera,
+        usar_batch_api=args.batch_api,
+        batch_intervalo=args.batch_intervalo,
+    )
+
+    checkpoint = None
+    if not args.sem_checkpoint and not args.somente_heuristica:
+        checkpoint = CheckpointExecucao(
+            chave_execucao(
+                hash_arquivo(args.arquivo), args.coluna_descricao, args.coluna_comentario,
+                opcoes.assinatura_resultados(),
+                hash_arquivo(args.anterior) if args.anterior else "", args.coluna_id if args.anterior else None,
+            ),
+            caminho=args.caminho_checkpoint,
+            intervalo=args.checkpoint_intervalo,
+        )
+        if args.recomecar:
+            checkpoint.descartar()
+
+    reaproveitamento = None
+    if args.anterior:
+        exigidas = (args.coluna_id, args.coluna_comentario, args.coluna_risco, args.coluna_explicacao)
+        colunas_anterior = ler_colunas(args.anterior, linha_cabecalho=localizar_cabecalho(args.anterior, exigidas))
+        faltando = [c for c in exigidas if c not in colunas_anterior]
+        if faltando:
+            print(f"Colunas não encontradas em {args.anterior}: {', '.join(faltando)}", file=sys.stderr)
+            return 2
+        reaproveitamento = Reaproveitamento.de_arquivo(
+            args.anterior, args.coluna_id, args.coluna_descricao,
+            args.coluna_comentario, args.coluna_risco, args.coluna_explicacao, col_origem=args.coluna_origem,
+        )
+
+    unidade = "Itens do batch" if args.batch_api else "Lotes"
+
+    def progresso(concluidos: int, total: int) -> None:
+        print(f"\r{unidade}: {concluidos}/{total}", end="", file=sys.stderr, flush=True)
+
+    metricas = MetricasExecucao()
+    with metricas.perfilar(args.perfil):
+        try:
+            # Lê em fluxo apenas as colunas usadas na classificação
+            colunas_lidas = (args.coluna_descricao, args.coluna_comentario, args.coluna_id if reaproveitamento else None)
+            blocos = iterar_blocos(args.arquivo, [c for c in colunas_lidas if c])
+            resultados, estatisticas = processar_blocos(
+                blocos, args.coluna_descricao, args.coluna_comentario, opcoes,
+                ao_progredir=limitar_progresso(progresso), checkpoint=checkpoint, metricas=metricas,
+                reaproveitamento=reaproveitamento,
+            )
+        except KeyboardInterrupt:
+            print("\nInterrompido; o progresso salvo será retomado na próxima execução.", file=sys.stderr)
+            return 130
+        except BatchInterrompido as erro:
+            print(f"\n{erro}", file=sys.stderr)
+            return 75
+        if estatisticas.enviados_ia:
+            print(file=sys.stderr)
+        if estatisticas.retomadas:
+            print(f"Retomado: {estatisticas.retomadas} linhas já concluídas anteriormente", file=sys.stderr)
+        if reaproveitamento:
+            novas = estatisticas.total_linhas - estatisticas.reaproveitadas
+            print(
+                f"Incremental: {estatisticas.reaproveitadas} linhas reaproveitadas de {args.anterior}, "
+                f"{novas} processadas ({estatisticas.editadas} editadas)",
+                file=sys.stderr,
+            )
+
+        base, extensao = os.path.splitext(args.arquivo)
+        saida = args.saida or f"{base}_curada{extensao if extensao.lower() in ('.csv', '.parquet') else '.xlsx'}"
+        with metricas.etapa("gravacao"):
+            gravar_com_resultados(
+                args.arquivo, saida, resultados, args.coluna_risco, args.coluna_explicacao,
+                preservar_original=not args.reexportar, origens=estatisticas.origens, nome_col_origem=args.coluna_origem,
+            )
+    if checkpoint:
+        # Saída gravada: o progresso parcial não é mais necessário
+        checkpoint.descartar()
+        checkpoint.fechar()
+
+    contagem = Counter(grau for grau, _ in resultados)
+    resumo = ", ".join(f"{grau}: {contagem[grau]}" for grau in GRAUS_RISCO)
+    print(f"{len(resultados)} linhas em {time.perf_counter() - inicio:.1f}s ({resumo}) -> {saida}", file=sys.stderr)
+    processadas = estatisticas.total_linhas - estatisticas.retomadas - estatisticas.reaproveitadas
+    if not args.somente_heuristica and not args.sem_dedup and processadas:
+        print(
+            f"Deduplicação: {estatisticas.unicos} comentários únicos em {processadas} linhas "
+            f"({(processadas - estatisticas.unicos) / processadas:.0%} duplicados)",
+            file=sys.stderr,
+        )
+    if not args.somente_heuristica and args.triagem:
+        caminhos = estatisticas.caminhos
+        print(
+            f"Triagem: {sum(caminhos.values())} linhas resolvidas localmente ({caminhos['vazio']} vazias, "
+            f"{caminhos['critico']} críticas, {caminhos['positivo']} positivas), {estatisticas.linhas_ia} linhas "
+            f"classificadas pela IA ({estatisticas.enviados_ia} comentários únicos enviados)",
+            file=sys.stderr,
+        )
+    if args.modelo_local and not args.somente_heuristica:
+        print(
+            f"Modelo local: {estatisticas.resolvidos_modelo} comentários resolvidos, "
+            f"{estatisticas.enviados_ia} enviados à IA",
+            file=sys.stderr,
+        )
+    if estatisticas.semelhantes or estatisticas.divergentes:
+        print(
+            f"Semelhantes: {estatisticas.semelhantes} comentários herdaram o grau de um representante "
+            f"({estatisticas.divergentes} separados por divergirem da heurística)",
+            file=sys.stderr,
+        )
+    if estatisticas.usou_cache:
+        print(f"Cache: {estatisticas.cache_acertos} acertos, {estatisticas.cache_falhas} falhas", file=sys.stderr)
+
+    resumo_metricas = metricas.resumo()
+    for linha in formatar_resumo(resumo_metricas):
+        print(linha, file=sys.stderr)
+    if metricas.perfil:
+        print(metricas.perfil, file=sys.stderr)
+    if args.metricas:
+        with open(args.metricas, "w", encoding="utf-8") as arquivo:
+            json.dump(resumo_metricas, arquivo, ensure_ascii=False, indent=2)
+    return 0
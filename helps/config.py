@@ -0,0 +1,78 @@
+"""
+Configurações padrão do motor de curadoria (modelo, limites, cache, triagem).
+"""
+
+import os
+
+GRAUS_RISCO = ("Muito Alto", "Alto", "Médio", "Baixo")  # do mais grave ao menos grave
+CODIGOS_GRAU = {"MA": "Muito Alto", "A": "Alto", "M": "Médio", "B": "Baixo"}  # saída compacta da IA
+
+# Origem do grau de cada linha (coluna gravada na saída; o classificador local treina só com "IA")
+ORIGEM_IA = "IA"
+ORIGEM_HEURISTICA = "Heurística"  # execução sem IA, comentário vazio ou fallback de uma resposta da IA
+ORIGEM_TRIAGEM = "Triagem"
+ORIGEM_MODELO = "Modelo local"
+ORIGEM_SEMELHANTE = "Semelhante"  # herdado do representante de um grupo de quase duplicatas
+NOME_COLUNA_ORIGEM = "Origem do Grau"
+
+MODELO_GPT = "gpt-4o-mini"
+VERSAO_PROMPT = "3.0"  # Incrementar ao alterar prompt/regras para invalidar o cache
+MAX_OUTPUT_TOKENS = 60  # {"g": "M", "e": "<até 15 palavras>"}
+MAX_OUTPUT_TOKENS_POR_ITEM = 40
+
+# Cache persistente de classificações da IA
+CAMINHO_CACHE_PADRAO = os.path.join(".helps_cache", "classificacoes.sqlite")
+CACHE_MAX_ENTRADAS = 500_000
+CACHE_MAX_IDADE_DIAS = 180
+CACHE_INTERVALO_GRAVACAO = 200  # gravações e acessos acumulados por transação
+
+# Limiares da triagem heurística (casos claros não vão para a IA)
+LIMIAR_PESO_CRITICO = 9.0
+LIMIAR_SCORE_POSITIVO = 10.0
+
+# Limites padrão de execução concorrente (ajustáveis na interface)
+MAX_CONCORRENCIA_PADRAO = 8
+RPM_PADRAO = 500
+TPM_PADRAO = 200_000
+TAMANHO_LOTE_PADRAO = 10
+
+# Checkpoint de execuções longas (retomada após interrupção)
+CAMINHO_CHECKPOINT_PADRAO = os.path.join(".helps_cache", "checkpoints.sqlite")
+CHECKPOINT_INTERVALO_PADRAO = 500  # linhas entre gravações
+
+# Tarefas em segundo plano (compartilhadas entre as sessões do app)
+TAREFAS_SIMULTANEAS_PADRAO = 2
+TAREFAS_RETIDAS_PADRAO = 50  # tarefas finalizadas mantidas para download
+PASTA_TAREFAS_PADRAO = os.path.join(".helps_cache", "tarefas")
+
+# Heurística em vários processos (execuções sem IA)
+PROCESSOS_HEURISTICA_PADRAO = 0  # 0 = um por núcleo
+TAMANHO_FATIA_HEURISTICA = 5000  # linhas por tarefa enviada a um processo
+MIN_LINHAS_VETORIZADO = 500  # abaixo disso, a heurística por linha é mais rápida que a vetorizada
+
+# Resiliência das chamadas à IA (retentativas e disjuntor)
+TENTATIVAS_IA_PADRAO = 4  # total por requisição, incluindo a primeira
+RETENTATIVAS_ESPERA_BASE = 0.5  # segundos; dobra a cada tentativa (com jitter)
+RETENTATIVAS_ESPERA_MAXIMA = 20.0
+TIMEOUT_IA_PADRAO = 30.0  # segundos por requisição
+DISJUNTOR_FALHAS_PADRAO = 8  # falhas consecutivas que abrem o disjuntor (0 = desativado)
+DISJUNTOR_ESPERA_PADRAO = 30.0  # segundos aberto antes de sondar a API de novo
+
+# Modo Batch API (execuções offline: metade do custo, sem disputar RPM/TPM)
+BATCH_JANELA = "24h"  # completion_window
+BATCH_INTERVALO_CONSULTA = 60.0  # segundos entre consultas de estado
+BATCH_MAX_REQUISICOES = 50_000  # limite da API por arquivo de entrada
+BATCH_CONSULTAS_FALHAS_MAX = 30  # consultas seguidas sem resposta (após as retentativas) antes de desistir
+PASTA_BATCHES_PADRAO = os.path.join(".helps_cache", "batches")
+
+# Agrupamento de comentários quase idênticos (MinHash/LSH): só o representante vai à IA
+LIMIAR_SEMELHANCA_PADRAO = 0.8  # Jaccard mínimo entre os conjuntos de palavras e trigramas
+DIVERGENCIA_SEMELHANCA_PADRAO = 1  # diferença de grau (heurística) que separa um membro do grupo
+MINHASH_PERMUTACOES = 64
+MINHASH_BANDAS = 16  # bandas do LSH (4 valores cada)
+
+# Classificador local (n-gramas de caracteres + regressão logística), treinado com graus da IA
+CAMINHO_MODELO_PADRAO = os.path.join(".helps_cache", "modelo_local.npz")
+CONFIANCA_MODELO_PADRAO = 0.9  # abaixo disso, o comentário segue para a IA
+MODELO_DIMENSAO = 2 ** 18  # posições do hashing de n-gramas
+MODELO_NGRAMAS = (2, 5)  # tamanhos mínimo e máximo dos n-gramas de caracteres
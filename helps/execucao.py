@@ -0,0 +1,171 @@
+"""
+Execução concorrente com limite de taxa, divisão em lotes e deduplicação.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .config import MAX_CONCORRENCIA_PADRAO
+from .heuristica import fator_caps_par
+from .lexico import chave_texto
+
+
+class LimitadorTaxa:
+    """
+    Limitador de requisições e tokens por minuto (token bucket).
+    Compartilhado entre threads; valores None ou 0 desativam o respectivo limite.
+    """
+
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None):
+        self.rpm = rpm or None
+        self.tpm = tpm or None
+        self._requisicoes = float(self.rpm or 0)
+        self._tokens = float(self.tpm or 0)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reabastecer(self) -> None:
+        agora = time.monotonic()
+        decorrido = agora - self._ultimo
+        self._ultimo = agora
+        if self.rpm:
+            self._requisicoes = min(self.rpm, self._requisicoes + decorrido * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + decorrido * self.tpm / 60)
+
+    def tentar(self, tokens: int = 0) -> float:
+        """
+        Consome a cota de uma requisição com `tokens` estimados, se houver.
+        Retorna 0 se consumiu ou, sem bloquear, os segundos até haver cota.
+        """
+        if not self.rpm and not self.tpm:
+            return 0.0
+
+        # Uma requisição maior que o balde inteiro nunca caberia
+        if self.tpm:
+            tokens = min(tokens, self.tpm)
+
+        with self._lock:
+            self._reabastecer()
+            espera = 0.0
+            if self.rpm and self._requisicoes < 1:
+                espera = max(espera, (1 - self._requisicoes) * 60 / self.rpm)
+            if self.tpm and self._tokens < tokens:
+                espera = max(espera, (tokens - self._tokens) * 60 / self.tpm)
+            if espera == 0.0:
+                if self.rpm:
+                    self._requisicoes -= 1
+                if self.tpm:
+                    self._tokens -= tokens
+            return espera
+
+    def disponivel(self) -> Tuple[float, float]:
+        """Cota atual (requisições, tokens); só significativa para limites ativos."""
+        with self._lock:
+            self._reabastecer()
+            return self._requisicoes, self._tokens
+
+    def aguardar(self, tokens: int = 0) -> None:
+        """Bloqueia até haver cota para uma requisição com `tokens` estimados."""
+        while True:
+            espera = self.tentar(tokens)
+            if espera == 0.0:
+                return
+            time.sleep(espera)
+
+
+def estimar_tokens(texto: str) -> int:
+    """Estimativa grosseira de tokens (~4 caracteres por token em português)."""
+    return len(texto) // 4 + 1
+
+
+def executar_concorrente(
+    funcao: Callable[[Any], Any],
+    itens: Sequence[Any],
+    max_concorrencia: int = MAX_CONCORRENCIA_PADRAO,
+    ao_progredir: Optional[Callable[[int, int], None]] = None,
+    ao_concluir: Optional[Callable[[int, Any], None]] = None,
+) -> List[Any]:
+    """
+    Aplica `funcao` a cada item usando um pool de threads limitado.
+
+    Os resultados voltam na ordem original dos itens. `ao_progredir(concluidos, total)`
+    e `ao_concluir(indice, resultado)` são chamados na thread de quem invocou
+    (seguro para atualizar elementos do Streamlit ou gravar checkpoints).
+    """
+    total = len(itens)
+    resultados: List[Any] = [None] * total
+    if total == 0:
+        return resultados
+
+    with ThreadPoolExecutor(max_workers=max(1, max_concorrencia)) as executor:
+        futuros = {executor.submit(funcao, item): idx for idx, item in enumerate(itens)}
+        try:
+            for concluidos, futuro in enumerate(as_completed(futuros), start=1):
+                idx = futuros[futuro]
+                resultados[idx] = futuro.result()
+                if ao_concluir:
+                    ao_concluir(idx, resultados[idx])
+                if ao_progredir:
+                    ao_progredir(concluidos, total)
+        except BaseException:
+            # Interrupção: não inicia os itens que ainda estão na fila
+            for pendente in futuros:
+                pendente.cancel()
+            raise
+
+    return resultados
+
+
+def limitar_progresso(
+    ao_progredir: Callable[[int, int], None],
+    intervalo: float = 0.5,
+) -> Callable[[int, int], None]:
+    """
+    Envolve um callback de progresso para repassar no máximo uma atualização a
+    cada `intervalo` segundos; a última (concluidos == total) sempre é repassada.
+    """
+    ultima = [float("-inf")]
+
+    def limitado(concluidos: int, total: int) -> None:
+        agora = time.monotonic()
+        if concluidos >= total or agora - ultima[0] >= intervalo:
+            ultima[0] = agora
+            ao_progredir(concluidos, total)
+
+    return limitado
+
+
+def dividir_em_lotes(itens: Sequence[Any], tamanho: int) -> List[List[Any]]:
+    """Divide a sequência em lotes consecutivos de até `tamanho` itens."""
+    tamanho = max(1, tamanho)
+    return [list(itens[i:i + tamanho]) for i in range(0, len(itens), tamanho)]
+
+
+def agrupar_pares_unicos(
+    pares: Iterable[Tuple[Optional[str], Optional[str]]],
+) -> Tuple[List[Tuple[Optional[str], Optional[str]]], List[int]]:
+    """
+    Agrupa pares (descrição, comentário) idênticos após normalização.
+
+    A normalização ignora acentos e caixa, mas não o uso de CAPS LOCK: "PÉSSIMO"
+    e "péssimo" ficam em grupos separados, pois o CAPS intensifica o risco.
+
+    Retorna a lista de pares únicos (primeira ocorrência de cada grupo) e, para
+    cada linha original, o índice do seu par único, para redistribuir os resultados.
+    """
+    indice_por_chave: Dict[Tuple[str, str, float], int] = {}
+    unicos: List[Tuple[Optional[str], Optional[str]]] = []
+    mapeamento: List[int] = []
+
+    for descricao, comentario in pares:
+        chave = (chave_texto(descricao), chave_texto(comentario), fator_caps_par(descricao, comentario))
+        idx = indice_por_chave.get(chave)
+        if idx is None:
+            idx = indice_por_chave[chave] = len(unicos)
+            unicos.append((descricao, comentario))
+        mapeamento.append(idx)
+
+    return unicos, mapeamento
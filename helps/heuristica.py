@@ -0,0 +1,402 @@
+"""
+Análise heurística de risco e sentimento (fallback robusto da IA e triagem).
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .config import LIMIAR_PESO_CRITICO, LIMIAR_SCORE_POSITIVO
+from .lexico import (
+    COMENTARIOS_TRIVIAIS,
+    LexicoCompilado,
+    chave_texto,
+    normalizar_texto,
+    obter_lexicos,
+    peso_com_contexto,
+    remover_acentos,
+    tokenizar,
+)
+
+# ============================================================================
+# EXTRAÇÃO DE CARACTERÍSTICAS (UMA PASSADA POR LINHA)
+# ============================================================================
+
+RE_EXCLAMACOES = re.compile(r'!{2,}')
+RE_INTERROGACOES = re.compile(r'\?{2,}')
+_LETRAS_ASCII = bytes(range(ord("A"), ord("Z") + 1)) + bytes(range(ord("a"), ord("z") + 1))
+_MAIUSCULAS_ASCII = bytes(range(ord("A"), ord("Z") + 1))
+
+
+class CaracteristicasTexto:
+    """
+    Tudo o que a heurística usa de uma linha, extraído em uma passada por
+    `extrair_caracteristicas`: texto normalizado, tokens, contagens de letras,
+    maiúsculas e pontuação repetida, e as ocorrências dos léxicos como índices
+    em `LexicoCompilado.nomes` com o peso já ajustado pelo contexto.
+    """
+
+    __slots__ = (
+        "normalizado", "tokens", "letras", "maiusculas", "exclamacoes", "interrogacoes",
+        "negativos", "pesos_negativos", "positivos", "pesos_positivos",
+        "fator_sarcasmo", "score_risco", "score_satisfacao",
+    )
+
+    def __init__(self):
+        self.normalizado = ""
+        self.tokens: Sequence[str] = ()
+        self.letras = 0  # 0 também para textos curtos demais para avaliar CAPS
+        self.maiusculas = 0
+        self.exclamacoes = 0
+        self.interrogacoes = 0
+        self.negativos: Tuple[int, ...] = ()
+        self.pesos_negativos: Tuple[float, ...] = ()
+        self.positivos: Tuple[int, ...] = ()
+        self.pesos_positivos: Tuple[float, ...] = ()
+        self.fator_sarcasmo = 1.0
+        self.score_risco = 0.0
+        self.score_satisfacao = 0.0
+
+    @property
+    def proporcao_maiusculas(self) -> float:
+        return self.maiusculas / self.letras if self.letras else 0.0
+
+    @property
+    def fator_caps(self) -> float:
+        return fator_capslock(self.proporcao_maiusculas)
+
+    @property
+    def fator_pontuacao(self) -> float:
+        return fator_pontuacao(self.exclamacoes, self.interrogacoes)
+
+    @property
+    def score(self) -> float:
+        return self.score_satisfacao - self.score_risco
+
+    def termos_negativos(self, limite: Optional[int] = None) -> List[str]:
+        return [obter_lexicos().risco.nomes[i] for i in self.negativos[:limite]]
+
+    def termos_positivos(self, limite: Optional[int] = None) -> List[str]:
+        return [obter_lexicos().positivo.nomes[i] for i in self.positivos[:limite]]
+
+    def tem_termo_negativo(self, peso_minimo: float) -> bool:
+        """Algum termo de risco com peso (arredondado, como exibido) >= `peso_minimo`."""
+        return any(round(peso, 2) >= peso_minimo for peso in self.pesos_negativos)
+
+    def como_dict(self) -> Dict:
+        """Detalhamento legível (termos com pesos arredondados), para depuração e exibição."""
+        return {
+            "palavras_negativas": list(zip(self.termos_negativos(), (round(w, 2) for w in self.pesos_negativos))),
+            "palavras_positivas": list(zip(self.termos_positivos(), (round(w, 2) for w in self.pesos_positivos))),
+            "score_risco": round(self.score_risco, 2),
+            "score_satisfacao": round(self.score_satisfacao, 2),
+            "fator_caps": round(self.fator_caps, 2),
+            "fator_pontuacao": round(self.fator_pontuacao, 2),
+            "fator_sarcasmo": round(self.fator_sarcasmo, 2),
+        }
+
+
+def fator_capslock(proporcao: float) -> float:
+    """Fator de intensidade pela proporção de letras maiúsculas."""
+    # Se mais de 50% em caps, aumenta intensidade
+    if proporcao > 0.5:
+        return 1.3
+    elif proporcao > 0.3:
+        return 1.15
+    return 1.0
+
+
+def fator_pontuacao(exclamacoes: int, interrogacoes: int) -> float:
+    """Fator de intensidade pelas sequências de !! e ??."""
+    intensidade = 1.0 + (exclamacoes * 0.1) + (interrogacoes * 0.05)
+    return min(intensidade, 1.5)  # Cap em 1.5
+
+
+def _contar_letras(texto: str, sem_acento: str) -> Tuple[int, int]:
+    """(letras, maiúsculas) do texto; `sem_acento` é o mesmo texto após `remover_acentos`."""
+    if sem_acento.isascii():
+        # Mesma caixa e mesmas letras do original, contadas em C sobre os bytes
+        dados = sem_acento.encode("ascii")
+        return (
+            len(dados) - len(dados.translate(None, _LETRAS_ASCII)),
+            len(dados) - len(dados.translate(None, _MAIUSCULAS_ASCII)),
+        )
+    letras = [c for c in texto if c.isalpha()]
+    return len(letras), sum(1 for c in letras if c.isupper())
+
+
+def _contar_pontuacao(texto: str) -> Tuple[int, int]:
+    """Sequências de 2+ "!" e de 2+ "?"; as regexes só rodam se houver alguma."""
+    return (
+        len(RE_EXCLAMACOES.findall(texto)) if "!!" in texto else 0,
+        len(RE_INTERROGACOES.findall(texto)) if "??" in texto else 0,
+    )
+
+
+def _ocorrencias(tokens: Sequence[str], lexico: LexicoCompilado) -> Tuple[Tuple[int, ...], Tuple[float, ...]]:
+    encontrados = lexico.buscar(tokens)
+    if not encontrados:
+        return (), ()
+    return (
+        tuple(lexico.ordem[termo] for termo, _ in encontrados),
+        tuple(peso_com_contexto(tokens, pos, lexico.pesos[termo]) for termo, pos in encontrados),
+    )
+
+
+def extrair_caracteristicas(descricao: Optional[str], comentario: Optional[str]) -> CaracteristicasTexto:
+    """
+    Extrai em uma passada as características de descrição + comentário e
+    calcula os scores. Textos com menos de 3 caracteres resultam em um
+    registro vazio (score 0).
+    """
+    registro = CaracteristicasTexto()
+    texto = f"{descricao or ''} {comentario or ''}".strip()
+    if len(texto) < 3:
+        return registro
+
+    # Acentos removidos uma única vez: a mesma string dá o texto normalizado e a contagem de maiúsculas
+    sem_acento = remover_acentos(texto)
+    registro.normalizado = sem_acento.lower().strip()
+    registro.tokens = tokens = tokenizar(registro.normalizado)
+    if len(texto) >= 10:
+        registro.letras, registro.maiusculas = _contar_letras(texto, sem_acento)
+    registro.exclamacoes, registro.interrogacoes = _contar_pontuacao(texto)
+
+    lexicos = obter_lexicos()
+    registro.negativos, registro.pesos_negativos = _ocorrencias(tokens, lexicos.risco)
+    registro.positivos, registro.pesos_positivos = _ocorrencias(tokens, lexicos.positivo)
+    registro.fator_sarcasmo = fator_sarcasmo_tokens(tokens, bool(registro.negativos))
+
+    # Calcula scores
+    score_negativo = sum(peso for peso in registro.pesos_negativos if peso > 0)
+    score_negativo_invertido = sum(abs(peso) for peso in registro.pesos_negativos if peso < 0)
+
+    score_positivo = sum(peso for peso in registro.pesos_positivos if peso > 0)
+    score_positivo_invertido = sum(abs(peso) for peso in registro.pesos_positivos if peso < 0)
+
+    # Aplica fatores
+    intensidade_total = registro.fator_caps * registro.fator_pontuacao
+
+    # Score final: positivo - negativo, com ajustes
+    registro.score_risco = (score_negativo * intensidade_total) - (score_negativo_invertido * 0.5)
+    registro.score_satisfacao = (score_positivo * registro.fator_sarcasmo) - (score_positivo_invertido * 0.5)
+    return registro
+
+
+# ============================================================================
+# FUNÇÕES AUXILIARES
+# ============================================================================
+
+
+def detectar_capslock(texto: str) -> float:
+    """Detecta uso excessivo de CAPS LOCK (indica intensidade emocional)."""
+    if not texto or len(texto) < 10:
+        return 1.0
+    letras, maiusculas = _contar_letras(texto, remover_acentos(texto))
+    return fator_capslock(maiusculas / letras) if letras else 1.0
+
+
+def fator_caps_par(descricao: Optional[str], comentario: Optional[str]) -> float:
+    """Fator de CAPS LOCK de descrição + comentário, como `extrair_caracteristicas` o calcula."""
+    return detectar_capslock(f"{descricao or ''} {comentario or ''}".strip())
+
+
+def detectar_pontuacao_excessiva(texto: str) -> float:
+    """Detecta uso excessivo de pontuação (!!!, ???)."""
+    if not texto:
+        return 1.0
+    return fator_pontuacao(*_contar_pontuacao(texto))
+
+
+def encontrar_palavras_com_contexto(texto: str, lexico: LexicoCompilado) -> List[Tuple[str, float, int]]:
+    """
+    Encontra termos do léxico considerando contexto (negadores e intensificadores).
+    Retorna lista de (palavra, peso_ajustado, posição do token), uma entrada por ocorrência.
+    """
+    if not texto:
+        return []
+    
+    return palavras_em_tokens(tokenizar(normalizar_texto(texto)), lexico)
+
+
+def palavras_em_tokens(tokens: Sequence[str], lexico: LexicoCompilado) -> List[Tuple[str, float, int]]:
+    """Versão de `encontrar_palavras_com_contexto` para texto já tokenizado."""
+    return [
+        (lexico.exibicao[termo], peso_com_contexto(tokens, pos, lexico.pesos[termo]), pos)
+        for termo, pos in lexico.buscar(tokens)
+    ]
+
+
+def fator_sarcasmo_tokens(tokens: Sequence[str], tem_negativo: bool) -> float:
+    """Fator de sarcasmo a partir dos tokens (vale o primeiro indicador na ordem do dicionário)."""
+    if not tem_negativo:
+        return 1.0
+    sarcasmo = obter_lexicos().sarcasmo
+    indicadores = sarcasmo.buscar(tokens)
+    if not indicadores:
+        return 1.0
+    termo = min((termo for termo, _ in indicadores), key=sarcasmo.ordem.__getitem__)
+    return sarcasmo.pesos[termo]
+
+
+def detectar_sarcasmo(texto: str) -> float:
+    """
+    Detecta possível sarcasmo no texto.
+    Retorna fator de ajuste (< 1.0 se detectar sarcasmo).
+    """
+    if not texto:
+        return 1.0
+    
+    # Sarcasmo só conta se houver palavras negativas no mesmo texto
+    tokens = tokenizar(normalizar_texto(texto))
+    return fator_sarcasmo_tokens(tokens, bool(obter_lexicos().risco.buscar(tokens)))
+
+
+def calcular_score_sentimento(descricao: str, comentario: str) -> Tuple[float, CaracteristicasTexto]:
+    """
+    Calcula score de sentimento com análise detalhada.
+    
+    Retorna:
+    - score: float (negativo = risco, positivo = satisfação)
+    - características da linha (`CaracteristicasTexto`), consumidas por
+      `score_para_grau_risco` e `gerar_explicacao_heuristica`
+    """
+    registro = extrair_caracteristicas(descricao, comentario)
+    return registro.score, registro
+
+
+def score_para_grau_risco(score: float, caracteristicas: CaracteristicasTexto) -> str:
+    """Converte score numérico para grau de risco categórico."""
+    
+    # Verifica casos especiais
+    palavras_neg = caracteristicas.negativos
+    palavras_pos = caracteristicas.positivos
+    
+    # Se tem palavras de risco crítico (peso >= 9), é Muito Alto independente
+    tem_critico = any(abs(round(w, 2)) >= 9 for w in caracteristicas.pesos_negativos)
+    if tem_critico:
+        return "Muito Alto"
+    
+    # Se score muito negativo
+    if score <= -15:
+        return "Muito Alto"
+    elif score <= -8:
+        return "Alto"
+    elif score <= -3:
+        return "Médio"
+    elif score < 5:
+        # Zona neutra - depende do contexto
+        if palavras_neg and not palavras_pos:
+            return "Médio"
+        elif palavras_pos and not palavras_neg:
+            return "Baixo"
+        elif palavras_neg and palavras_pos:
+            return "Médio"
+        else:
+            return "Baixo"  # Sem indicadores claros
+    else:
+        return "Baixo"
+
+
+def gerar_explicacao_heuristica(score: float, caracteristicas: CaracteristicasTexto, comentario: str) -> str:
+    """Gera explicação baseada na análise heurística."""
+    
+    palavras_neg = caracteristicas.negativos
+    palavras_pos = caracteristicas.positivos
+    
+    if not comentario or len(comentario.strip()) < 3:
+        return "Sem comentário relevante para análise."
+    
+    if score <= -15:
+        principais = caracteristicas.termos_negativos(3)
+        return f"Comentário expressa forte insatisfação com indicadores críticos ({', '.join(principais)}). Requer atenção urgente."
+    
+    elif score <= -8:
+        principais = caracteristicas.termos_negativos(2)
+        return f"Cliente demonstra insatisfação significativa. Termos identificados: {', '.join(principais)}."
+    
+    elif score <= -3:
+        if palavras_neg and palavras_pos:
+            return f"Feedback misto com ressalvas. Cliente menciona pontos positivos mas também críticas."
+        else:
+            principais = caracteristicas.termos_negativos(2)
+            return f"Cliente expressa incômodo ou frustração moderada ({', '.join(principais)})."
+    
+    elif score < 5:
+        if palavras_pos:
+            return f"Comentário neutro com tendência positiva. Cliente parece satisfeito com ressalvas."
+        elif palavras_neg:
+            return f"Comentário neutro com algumas ressalvas mencionadas."
+        else:
+            return f"Comentário neutro sem indicadores fortes de satisfação ou insatisfação."
+    
+    else:
+        if score >= 15:
+            principais = caracteristicas.termos_positivos(3)
+            return f"Cliente muito satisfeito! Elogio claro com termos positivos ({', '.join(principais)})."
+        else:
+            principais = caracteristicas.termos_positivos(2)
+            return f"Feedback positivo. Cliente demonstra satisfação ({', '.join(principais)})."
+
+
+# ============================================================================
+# FUNÇÃO HEURÍSTICA ROBUSTA (FALLBACK)
+# ============================================================================
+
+def heuristica_risco_explicacao(descricao: Optional[str], comentario: Optional[str]) -> Tuple[str, str]:
+    """
+    Análise heurística robusta para classificação de risco.
+    Usada como fallback quando a IA falha.
+    """
+    grau, explicacao, _ = heuristica_com_score(descricao, comentario)
+    return grau, explicacao
+
+
+def heuristica_com_score(descricao: Optional[str], comentario: Optional[str]) -> Tuple[str, str, float]:
+    """Como `heuristica_risco_explicacao`, devolvendo também o score de sentimento."""
+    # Combina descrição e comentário
+    texto = f"{descricao or ''} {comentario or ''}".strip()
+    
+    if not texto or len(texto) < 3:
+        return "Baixo", "Sem comentário relevante para análise.", 0.0
+    
+    # Extrai as características em uma passada e calcula o score
+    caracteristicas = extrair_caracteristicas(descricao, comentario)
+    score = caracteristicas.score
+    
+    # Converte para grau de risco
+    grau = score_para_grau_risco(score, caracteristicas)
+    
+    # Gera explicação
+    explicacao = gerar_explicacao_heuristica(score, caracteristicas, comentario)
+    
+    return grau, explicacao, score
+
+
+def triagem_heuristica(
+    descricao: Optional[str],
+    comentario: Optional[str],
+    peso_critico: float = LIMIAR_PESO_CRITICO,
+    score_positivo: float = LIMIAR_SCORE_POSITIVO,
+) -> Optional[Tuple[str, str, str]]:
+    """
+    Resolve localmente os casos claros, antes de qualquer chamada à IA.
+
+    Retorna (grau, explicação, motivo) com motivo em "vazio", "critico" ou
+    "positivo"; retorna None quando o caso é ambíguo e deve ir para a IA.
+    """
+    chave = " ".join(re.sub(r"[^\w\s]", " ", chave_texto(comentario)).split())
+    if len(chave) < 3 or chave in COMENTARIOS_TRIVIAIS:
+        return "Baixo", "Sem comentário relevante para análise.", "vazio"
+
+    caracteristicas = extrair_caracteristicas(descricao, comentario)
+    score = caracteristicas.score
+
+    # Termo crítico não negado (ameaça legal, revolta extrema)
+    if caracteristicas.tem_termo_negativo(peso_critico):
+        return "Muito Alto", gerar_explicacao_heuristica(score, caracteristicas, comentario), "critico"
+
+    # Elogio claro, sem nenhum termo de risco
+    if score >= score_positivo and not caracteristicas.negativos:
+        return "Baixo", gerar_explicacao_heuristica(score, caracteristicas, comentario), "positivo"
+
+    return None
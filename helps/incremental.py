@@ -0,0 +1,124 @@
+"""
+Processamento incremental: reaproveita as classificações de uma saída anterior.
+
+As exportações semanais são cumulativas. Dada a base enriquecida da semana
+anterior e uma coluna de ID, cada linha da base nova cujo ID já estava lá com o
+mesmo texto (descrição e comentário, comparados após normalização) herda o grau,
+a explicação e a origem do grau atribuídos antes; só as linhas novas ou editadas
+são classificadas.
+"""
+
+import hashlib
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import pandas as pd
+
+from .arquivos import Origem, iterar_blocos, ler_colunas, localizar_cabecalho
+from .config import GRAUS_RISCO
+from .lexico import chave_texto
+
+
+def normalizar_id(valor: Any) -> Optional[str]:
+    """ID como texto; 123, 123.0 e "123" são o mesmo registro. None se vazio."""
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    texto = str(valor).strip()
+    return texto or None
+
+
+def assinatura_texto(descricao: Any, comentario: Any) -> bytes:
+    """Resumo do texto classificado: muda se a descrição ou o comentário forem editados."""
+    partes = (chave_texto(None if pd.isna(descricao) else descricao),
+              chave_texto(None if pd.isna(comentario) else comentario))
+    return hashlib.blake2b("\x1f".join(partes).encode("utf-8"), digest_size=16).digest()
+
+
+class Reaproveitamento:
+    """
+    Classificações da saída anterior indexadas por ID.
+
+    `filtrar(blocos, ...)` repassa os blocos da base nova e, para cada linha com
+    ID conhecido e texto inalterado, guarda em `resultados[linha]` o
+    (grau, explicação) anterior e em `origens[linha]` a origem do grau ("" se a
+    saída anterior não a tiver). `editadas` conta os IDs conhecidos cujo texto mudou.
+    """
+
+    def __init__(
+        self, anteriores: Dict[str, Tuple[bytes, str, str, str]], col_id: str, comparar_descricao: bool = True
+    ):
+        self.anteriores = anteriores
+        self.col_id = col_id
+        self.comparar_descricao = comparar_descricao
+        self.resultados: Dict[int, Tuple[str, str]] = {}
+        self.origens: Dict[int, str] = {}
+        self.editadas = 0
+
+    @classmethod
+    def de_arquivo(
+        cls,
+        origem: Origem,
+        col_id: str,
+        col_descricao: Optional[str],
+        col_comentario: str,
+        col_risco: str,
+        col_explicacao: str,
+        nome: Optional[str] = None,
+        col_origem: Optional[str] = None,
+    ) -> "Reaproveitamento":
+        """
+        Lê em fluxo a saída anterior, injetada ou reexportada (cabeçalho na linha
+        3 ou 1). Linhas sem ID ou com grau fora de `GRAUS_RISCO` são ignoradas;
+        com IDs repetidos, vale a última ocorrência. Se a saída anterior não
+        tiver `col_descricao`, compara só o comentário; sem `col_origem`, a
+        origem dos graus reaproveitados fica desconhecida.
+        """
+        linha_cabecalho = localizar_cabecalho(origem, (col_id, col_comentario, col_risco, col_explicacao), nome)
+        colunas_anteriores = ler_colunas(origem, nome, linha_cabecalho)
+        if col_descricao and col_descricao not in colunas_anteriores:
+            col_descricao = None
+        if col_origem and col_origem not in colunas_anteriores:
+            col_origem = None
+        colunas = [c for c in (col_id, col_descricao, col_comentario, col_risco, col_explicacao, col_origem) if c]
+        anteriores: Dict[str, Tuple[bytes, str, str, str]] = {}
+        for bloco in iterar_blocos(origem, colunas, nome, linha_cabecalho=linha_cabecalho):
+            descricoes = bloco[col_descricao].tolist() if col_descricao else [None] * len(bloco)
+            origens = bloco[col_origem].tolist() if col_origem else [None] * len(bloco)
+            for id_bruto, descricao, comentario, grau, explicacao, origem_grau in zip(
+                bloco[col_id].tolist(), descricoes, bloco[col_comentario].tolist(),
+                bloco[col_risco].tolist(), bloco[col_explicacao].tolist(), origens,
+            ):
+                id_registro = normalizar_id(id_bruto)
+                if id_registro is None or grau not in GRAUS_RISCO:
+                    continue
+                explicacao = "" if explicacao is None or pd.isna(explicacao) else str(explicacao)
+                origem_grau = "" if origem_grau is None or pd.isna(origem_grau) else str(origem_grau)
+                anteriores[id_registro] = (assinatura_texto(descricao, comentario), grau, explicacao, origem_grau)
+        return cls(anteriores, col_id, comparar_descricao=bool(col_descricao))
+
+    def filtrar(
+        self,
+        blocos: Iterable[pd.DataFrame],
+        col_descricao: Optional[str],
+        col_comentario: str,
+    ) -> Iterator[pd.DataFrame]:
+        """Repassa os blocos (que devem incluir a coluna de ID), registrando as linhas reaproveitadas."""
+        linha = 0
+        if not self.comparar_descricao:
+            col_descricao = None
+        for bloco in blocos:
+            descricoes = bloco[col_descricao].tolist() if col_descricao else [None] * len(bloco)
+            for id_bruto, descricao, comentario in zip(
+                bloco[self.col_id].tolist(), descricoes, bloco[col_comentario].tolist()
+            ):
+                anterior = self.anteriores.get(normalizar_id(id_bruto))
+                if anterior is not None:
+                    assinatura, grau, explicacao, origem_grau = anterior
+                    if assinatura == assinatura_texto(descricao, comentario):
+                        self.resultados[linha] = (grau, explicacao)
+                        self.origens[linha] = origem_grau
+                    else:
+                        self.editadas += 1
+                linha += 1
+            yield bloco
@@ -0,0 +1,240 @@
+"""
+Injeção das colunas de resultado diretamente no .xlsx original.
+
+Em vez de reexportar a planilha inteira, o arquivo é copiado entrada a entrada
+(estilos, demais abas, títulos e fórmulas ficam intactos) e apenas o XML da
+primeira aba é reescrito em fluxo, acrescentando ao fim de cada linha as células
+de risco e explicação (e, se informada, da origem do grau). O custo cresce com
+as colunas novas, não com a planilha.
+"""
+
+import codecs
+import posixpath
+import re
+import shutil
+import zipfile
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Tuple, Union
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+from openpyxl.utils import column_index_from_string, get_column_letter
+
+from .arquivos import LINHA_CABECALHO_EXCEL, Origem, _rebobinar
+
+NS_PLANILHA = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_RELACOES_DOC = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_RELACOES_PACOTE = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+TAMANHO_LEITURA = 1 << 20
+
+RE_LINHA_R = re.compile(r'\br="(\d+)"')
+RE_SPANS = re.compile(r'\bspans="(\d+):(\d+)"')
+RE_CELULA_R = re.compile(r'<c\b[^>]*?\br="([A-Z]+)\d+"')
+RE_ESTILO = re.compile(r'\bs="(\d+)"')
+RE_DIMENSAO = re.compile(r'(<dimension\b[^>]*?\bref=")([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?(")')
+RE_CARACTERES_INVALIDOS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class InjecaoNaoSuportada(ValueError):
+    """O .xlsx tem uma estrutura que a injeção em fluxo não trata; use a reexportação."""
+
+
+def _caminho_primeira_aba(pacote: zipfile.ZipFile) -> str:
+    """Resolve, pelo workbook.xml e suas relações, o XML da primeira aba."""
+    livro = ElementTree.fromstring(pacote.read("xl/workbook.xml"))
+    aba = livro.find(f"{{{NS_PLANILHA}}}sheets/{{{NS_PLANILHA}}}sheet")
+    if aba is None:
+        raise InjecaoNaoSuportada("Planilha sem abas")
+    id_relacao = aba.get(f"{{{NS_RELACOES_DOC}}}id")
+
+    relacoes = ElementTree.fromstring(pacote.read("xl/_rels/workbook.xml.rels"))
+    for relacao in relacoes.iter(f"{{{NS_RELACOES_PACOTE}}}Relationship"):
+        if relacao.get("Id") == id_relacao:
+            alvo = relacao.get("Target")
+            if alvo.startswith("/"):
+                return alvo.lstrip("/")
+            return posixpath.normpath(posixpath.join("xl", alvo))
+    raise InjecaoNaoSuportada("Relação da primeira aba não encontrada")
+
+
+def _celula_texto(referencia: str, texto: str, estilo: Optional[str] = None) -> str:
+    texto = RE_CARACTERES_INVALIDOS.sub("", texto)
+    espaco = ' xml:space="preserve"' if texto != texto.strip() else ""
+    atributo_estilo = f' s="{estilo}"' if estilo else ""
+    return f'<c r="{referencia}"{atributo_estilo} t="inlineStr"><is><t{espaco}>{escape(texto)}</t></is></c>'
+
+
+def _elementos(fluxo: BinaryIO) -> Iterator[Tuple[str, str]]:
+    """
+    Percorre o XML da aba em blocos, produzindo ("inicio", texto até a abertura
+    de <sheetData>), ("linha", elemento <row>) e ("fim", restante do documento).
+    """
+    decodificador = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+
+    def ler() -> bool:
+        nonlocal buffer, pos
+        bloco = fluxo.read(TAMANHO_LEITURA)
+        if not bloco:
+            return False
+        buffer = buffer[pos:] + decodificador.decode(bloco)
+        pos = 0
+        return True
+
+    # Cabeçalho do documento até o fim da tag de abertura de <sheetData>
+    while True:
+        inicio = buffer.find("<sheetData")
+        fim_tag = buffer.find(">", inicio) if inicio >= 0 else -1
+        if fim_tag >= 0:
+            break
+        if not ler():
+            raise InjecaoNaoSuportada("Elemento <sheetData> não encontrado")
+    if buffer[fim_tag - 1] == "/":
+        raise InjecaoNaoSuportada("Aba sem dados")
+    yield "inicio", buffer[:fim_tag + 1]
+    pos = fim_tag + 1
+
+    while True:
+        while pos < len(buffer) and buffer[pos].isspace():
+            pos += 1
+        if buffer.startswith("<row", pos):
+            fim_tag = buffer.find(">", pos)
+            if fim_tag >= 0 and buffer[fim_tag - 1] == "/":
+                yield "linha", buffer[pos:fim_tag + 1]
+                pos = fim_tag + 1
+                continue
+            fim = buffer.find("</row>", pos)
+            if fim >= 0:
+                yield "linha", buffer[pos:fim + len("</row>")]
+                pos = fim + len("</row>")
+                continue
+        elif buffer.startswith("</sheetData>", pos):
+            resto = [buffer[pos:]]
+            while True:
+                bloco = fluxo.read(TAMANHO_LEITURA)
+                if not bloco:
+                    break
+                resto.append(decodificador.decode(bloco))
+            resto.append(decodificador.decode(b"", final=True))
+            yield "fim", "".join(resto)
+            return
+        elif len(buffer) - pos >= len("</sheetData>"):
+            raise InjecaoNaoSuportada(f"Conteúdo inesperado em <sheetData>: {buffer[pos:pos + 40]!r}")
+        if not ler():
+            raise InjecaoNaoSuportada("XML da aba truncado")
+
+
+def _reescrever_aba(
+    entrada: BinaryIO,
+    saida: BinaryIO,
+    resultados: Sequence[Tuple[str, str]],
+    nomes: Sequence[str],
+    largura_cabecalho: int,
+    origens: Optional[Sequence[str]] = None,
+) -> None:
+    linha_cabecalho = LINHA_CABECALHO_EXCEL + 1
+    primeira_linha_dados = linha_cabecalho + 1
+    ultima_linha_dados = linha_cabecalho + len(resultados)
+    coluna_inicial = largura_cabecalho + 1
+    letras: List[str] = []
+
+    def celulas(numero: int, estilo_cabecalho: Optional[str] = None) -> str:
+        if numero == linha_cabecalho:
+            valores: Sequence[str] = nomes
+        elif primeira_linha_dados <= numero <= ultima_linha_dados:
+            posicao = numero - primeira_linha_dados
+            valores = resultados[posicao] if origens is None else (*resultados[posicao], origens[posicao])
+            estilo_cabecalho = None
+        else:
+            return ""
+        return "".join(
+            _celula_texto(f"{letra}{numero}", valor, estilo_cabecalho) for letra, valor in zip(letras, valores)
+        )
+
+    def linhas_ausentes(de: int, ate: int) -> str:
+        # Linhas sem elemento <row> no XML (vazias) que precisam receber resultado
+        inicio = max(de, linha_cabecalho)
+        fim = min(ate, ultima_linha_dados + 1)
+        return "".join(f'<row r="{n}">{celulas(n)}</row>' for n in range(inicio, fim))
+
+    anterior = 0
+    for tipo, texto in _elementos(entrada):
+        if tipo == "inicio":
+            if "<x:" in texto:
+                raise InjecaoNaoSuportada("XML da aba com prefixos de namespace")
+            # As colunas novas ficam à direita de tudo o que a aba já usa
+            dimensao = RE_DIMENSAO.search(texto)
+            if dimensao:
+                ultima_coluna = column_index_from_string(dimensao.group(4) or dimensao.group(2))
+                coluna_inicial = max(coluna_inicial, ultima_coluna + 1)
+            letras = [get_column_letter(coluna_inicial + i) for i in range(len(nomes))]
+            texto = RE_DIMENSAO.sub(
+                lambda m: (f"{m.group(1)}{m.group(2)}{m.group(3)}:{letras[-1]}"
+                           f"{max(int(m.group(5) or m.group(3)), ultima_linha_dados)}{m.group(6)}"),
+                texto,
+            )
+        elif tipo == "linha":
+            fim_tag = texto.find(">")
+            abertura = texto[:fim_tag + 1]
+            achado = RE_LINHA_R.search(abertura)
+            numero = int(achado.group(1)) if achado else anterior + 1
+            saida.write(linhas_ausentes(anterior + 1, numero).encode("utf-8"))
+            anterior = numero
+
+            estilo = None
+            ultima = texto.rfind("<c ")
+            if ultima >= 0:
+                ultima_celula = RE_CELULA_R.match(texto, ultima)
+                if ultima_celula and column_index_from_string(ultima_celula.group(1)) >= coluna_inicial:
+                    raise InjecaoNaoSuportada(f"Linha {numero} já tem dados na coluna {letras[0]}")
+                if numero == linha_cabecalho:
+                    achado_estilo = RE_ESTILO.search(texto[ultima:texto.find(">", ultima)])
+                    estilo = achado_estilo.group(1) if achado_estilo else None
+
+            novas = celulas(numero, estilo)
+            if novas:
+                abertura_nova = RE_SPANS.sub(lambda m: f'spans="{m.group(1)}:{coluna_inicial + len(nomes) - 1}"', abertura)
+                texto = abertura_nova + texto[len(abertura):]
+                abertura = abertura_nova
+                if abertura.endswith("/>"):
+                    texto = f"{abertura[:-2].rstrip()}>{novas}</row>"
+                else:
+                    texto = texto[:-len("</row>")] + novas + "</row>"
+        else:
+            saida.write(linhas_ausentes(anterior + 1, ultima_linha_dados + 1).encode("utf-8"))
+        saida.write(texto.encode("utf-8"))
+
+
+def injetar_colunas(
+    origem: Origem,
+    destino: Union[str, BinaryIO],
+    resultados: Sequence[Tuple[str, str]],
+    nome_col_risco: str,
+    nome_col_explicacao: str,
+    largura_cabecalho: int = 0,
+    origens: Optional[Sequence[str]] = None,
+    nome_col_origem: Optional[str] = None,
+) -> None:
+    """
+    Copia o .xlsx `origem` para `destino` acrescentando as colunas de risco e
+    explicação (e `nome_col_origem`, com `origens`) à primeira aba, logo após a
+    última coluna usada (pelo menos após as `largura_cabecalho` colunas do cabeçalho).
+
+    Levanta `InjecaoNaoSuportada` se a estrutura do arquivo não permitir a
+    injeção em fluxo (ex.: XML com prefixos de namespace, colunas ocupadas).
+    """
+    nomes = [nome_col_risco, nome_col_explicacao]
+    if origens is not None and nome_col_origem:
+        nomes.append(nome_col_origem)
+    else:
+        origens = None
+    with zipfile.ZipFile(_rebobinar(origem)) as pacote_origem:
+        caminho_aba = _caminho_primeira_aba(pacote_origem)
+        with zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as pacote_destino:
+            for info in pacote_origem.infolist():
+                with pacote_origem.open(info) as entrada, pacote_destino.open(info, "w", force_zip64=True) as saida:
+                    if info.filename == caminho_aba:
+                        _reescrever_aba(entrada, saida, resultados, nomes, largura_cabecalho, origens)
+                    else:
+                        shutil.copyfileobj(entrada, saida, TAMANHO_LEITURA)
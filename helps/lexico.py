@@ -0,0 +1,303 @@
+"""
+Dicionários de análise semântica, normalização de texto e léxicos compilados.
+
+Os léxicos são compilados sob demanda (`obter_lexicos`), na primeira análise,
+para que importar o pacote seja barato.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# ============================================================================
+# DICIONÁRIOS DE ANÁLISE SEMÂNTICA
+# ============================================================================
+
+# Palavras com peso de risco (quanto maior, mais grave)
+PALAVRAS_RISCO = {
+    # Nível Crítico (peso 10) - Ameaças legais e extremo descontentamento
+    "procon": 10, "processo": 10, "processar": 10, "advogado": 10, "justiça": 10,
+    "reclame aqui": 10, "reclameaqui": 10, "consumidor.gov": 10, "juizado": 10,
+    "indenização": 10, "indenizar": 10, "danos morais": 10, "nunca mais": 9,
+    "vergonha": 9, "vergonhoso": 9, "absurdo": 9, "inadmissível": 9,
+    "inaceitável": 9, "revoltado": 9, "revoltante": 9, "indignado": 9,
+    "indignação": 9, "escândalo": 9, "escandaloso": 9, "criminoso": 10,
+    "crime": 10, "fraude": 10, "golpe": 10, "enganado": 9, "enganação": 9,
+    "mentira": 8, "mentiroso": 9, "calote": 10, "roubo": 10, "roubado": 10,
+    
+    # Nível Alto (peso 7-8) - Forte insatisfação
+    "péssimo": 8, "pessimo": 8, "horrível": 8, "horrivel": 8, "terrível": 8,
+    "terrivel": 8, "lixo": 8, "nojo": 8, "nojento": 8, "incompetente": 8,
+    "incompetência": 8, "descaso": 8, "abandono": 7, "abandonado": 7,
+    "desrespeito": 8, "desrespeitado": 8, "desrespeitoso": 8, "falta de respeito": 8,
+    "humilhado": 8, "humilhação": 8, "deboche": 8, "debochado": 8,
+    "irresponsável": 8, "irresponsabilidade": 8, "negligente": 8, "negligência": 8,
+    "não recomendo": 7, "nao recomendo": 7, "não indico": 7, "nao indico": 7,
+    "pior": 7, "decepcionado": 7, "decepcionante": 7, "decepção": 7,
+    "frustrado": 7, "frustração": 7, "frustrante": 7, "raiva": 7,
+    "ódio": 8, "odio": 8, "detesto": 7, "arrependi": 7, "arrependido": 7,
+    
+    # Nível Médio-Alto (peso 5-6) - Insatisfação clara
+    "ruim": 6, "insatisfeito": 6, "insatisfação": 6, "problema": 5, "problemas": 5,
+    "atraso": 5, "atrasado": 5, "atrasaram": 5, "demorado": 5, "demora": 5,
+    "demorou": 5, "lento": 5, "lentidão": 5, "erro": 5, "errado": 5,
+    "errou": 5, "erros": 5, "falha": 5, "falharam": 5, "defeito": 6,
+    "defeituoso": 6, "quebrado": 5, "quebrou": 5, "não funciona": 6,
+    "nao funciona": 6, "não funcionou": 6, "nao funcionou": 6,
+    "reclamação": 5, "reclamar": 5, "insistir": 5, "insisti": 5,
+    "cobrar": 5, "cobrei": 5, "várias vezes": 5, "varias vezes": 5,
+    "diversas vezes": 5, "repetidas vezes": 5, "falta": 5, "faltou": 5,
+    "faltando": 5, "incompleto": 5, "mal": 5, "malfeito": 6,
+    "desorganizado": 5, "desorganização": 5, "bagunça": 5, "confuso": 5,
+    "confusão": 5, "perdido": 5, "perderam": 5, "sumiram": 6, "sumiu": 6,
+    
+    # Nível Médio (peso 3-4) - Ressalvas e incômodos
+    "poderia melhorar": 4, "poderia ser melhor": 4, "esperava mais": 4,
+    "deixou a desejar": 4, "regular": 3, "médio": 3, "mediano": 3,
+    "normal": 2, "ok": 2, "mais ou menos": 3, "nem bom nem ruim": 3,
+    "indiferente": 3, "tanto faz": 3, "razoável": 3, "razoavel": 3,
+    "aceitável": 3, "aceitavel": 3, "tolerável": 3, "toleravel": 3,
+    "chato": 4, "chatice": 4, "incômodo": 4, "incomodo": 4, "desconfortável": 4,
+    "desconfortavel": 4, "estranho": 3, "esquisito": 3, "duvidoso": 4,
+}
+
+# Palavras positivas (quanto maior, mais positivo)
+PALAVRAS_POSITIVAS = {
+    # Nível Excelente (peso 10) - Encantamento total
+    "perfeito": 10, "perfeita": 10, "impecável": 10, "impecavel": 10,
+    "excepcional": 10, "extraordinário": 10, "extraordinario": 10,
+    "maravilhoso": 10, "maravilhosa": 10, "sensacional": 10, "fantástico": 10,
+    "fantastico": 10, "espetacular": 10, "incrível": 10, "incrivel": 10,
+    "surpreendente": 9, "surpreendeu": 9, "superou": 9, "superaram": 9,
+    "encantado": 10, "encantada": 10, "encantador": 10, "apaixonado": 9,
+    "apaixonada": 9, "amei": 9, "adorei": 9, "melhor": 8, "melhor de todos": 10,
+    "nota 10": 10, "nota dez": 10, "10/10": 10, "cinco estrelas": 10,
+    "5 estrelas": 10, "recomendo muito": 9, "super recomendo": 10,
+    "altamente recomendo": 10, "indico demais": 9,
+    
+    # Nível Muito Bom (peso 7-8) - Alta satisfação
+    "excelente": 8, "ótimo": 8, "otimo": 8, "ótima": 8, "otima": 8,
+    "muito bom": 8, "muito boa": 8, "muito bem": 8, "parabéns": 8, "parabens": 8,
+    "satisfeito": 7, "satisfeita": 7, "satisfação": 7, "satisfacao": 7,
+    "gostei muito": 8, "gostei demais": 8, "adorável": 8, "adoravel": 8,
+    "top": 7, "top demais": 8, "show": 7, "demais": 7, "arrasou": 8,
+    "mandou bem": 8, "mandaram bem": 8, "caprichado": 8, "capricharam": 8,
+    "profissional": 7, "profissionais": 7, "competente": 7, "competentes": 7,
+    "eficiente": 7, "eficientes": 7, "eficiência": 7, "eficiencia": 7,
+    
+    # Nível Bom (peso 5-6) - Satisfação clara
+    "bom": 6, "boa": 6, "bem": 5, "gostei": 6, "gosto": 5, "legal": 5,
+    "bacana": 5, "tranquilo": 5, "tranquila": 5, "suave": 5, "ok": 4,
+    "certinho": 6, "certinha": 6, "correto": 5, "correta": 5,
+    "rápido": 6, "rapido": 6, "rápida": 6, "rapida": 6, "rapidez": 6,
+    "ágil": 6, "agil": 6, "agilidade": 6, "pontual": 6, "pontualidade": 6,
+    "atencioso": 6, "atenciosa": 6, "atenciosos": 6, "atenção": 6, "atencao": 6,
+    "educado": 6, "educada": 6, "educados": 6, "cordial": 6, "cordiais": 6,
+    "cordialidade": 6, "gentil": 6, "gentis": 6, "gentileza": 6,
+    "simpático": 6, "simpatico": 6, "simpática": 6, "simpatica": 6,
+    "prestativo": 6, "prestativa": 6, "prestativos": 6, "solicito": 6,
+    "solícito": 6, "cuidadoso": 6, "cuidadosa": 6, "cuidado": 5,
+    "organizado": 6, "organizada": 6, "limpo": 5, "limpa": 5, "limpeza": 5,
+    "qualidade": 6, "confiável": 6, "confiavel": 6, "confiança": 6,
+    "confianca": 6, "seguro": 5, "segura": 5, "resolvi": 6, "resolveu": 6,
+    "resolvido": 6, "resolveram": 6, "solução": 6, "solucao": 6,
+    "funcionou": 6, "funciona": 5, "recomendo": 6, "indico": 6,
+    "voltarei": 7, "voltaria": 7, "volto": 6, "retorno": 5,
+    
+    # Nível Neutro-Positivo (peso 3-4) - Aceitação
+    "adequado": 4, "adequada": 4, "suficiente": 4, "dentro do esperado": 4,
+    "como esperado": 4, "normal": 3, "padrão": 3, "padrao": 3,
+    "cumpriu": 5, "cumpriram": 5, "entregou": 5, "entregaram": 5,
+}
+
+# Intensificadores (multiplicam o peso)
+INTENSIFICADORES = {
+    "muito": 1.5, "demais": 1.5, "extremamente": 2.0, "super": 1.7,
+    "mega": 1.7, "ultra": 1.8, "hiper": 1.8, "totalmente": 1.6,
+    "completamente": 1.6, "absolutamente": 1.8, "realmente": 1.3,
+    "verdadeiramente": 1.4, "incrivelmente": 1.6, "absurdamente": 1.8,
+    "ridiculamente": 1.7, "imensamente": 1.6, "profundamente": 1.5,
+    "bastante": 1.3, "bem": 1.2, "tão": 1.4, "tanto": 1.3,
+}
+
+# Negadores (invertem o sentido)
+NEGADORES = {
+    "não", "nao", "nunca", "jamais", "nem", "nenhum", "nenhuma",
+    "nada", "sem", "tampouco", "sequer",
+}
+
+# Indicadores de sarcasmo/ironia
+INDICADORES_SARCASMO = {
+    "parabéns pela": 0.7, "parabens pela": 0.7, "parabéns pelo": 0.7, 
+    "parabens pelo": 0.7, "que maravilha": 0.6, "que ótimo": 0.6,
+    "claro que sim": 0.7, "com certeza": 0.8, "obviamente": 0.7,
+    "né": 0.8, "ne": 0.8, "viu": 0.8, "hein": 0.7,
+}
+
+# Comentários sem conteúdo avaliável (forma normalizada, sem pontuação)
+COMENTARIOS_TRIVIAIS = {
+    "nada", "nada a declarar", "nada a acrescentar", "nada a dizer", "sem comentarios",
+    "sem comentario", "nenhum", "nenhum comentario", "n a", "na", "nao", "sim",
+    "ok", "x", "xx", "xxx", "-", "teste",
+}
+
+
+# ============================================================================
+# NORMALIZAÇÃO E LÉXICO COMPILADO
+# ============================================================================
+
+def _remover_acentos_nfd(texto: str) -> str:
+    texto_norm = unicodedata.normalize('NFD', texto)
+    return ''.join(c for c in texto_norm if unicodedata.category(c) != 'Mn')
+
+
+def _tabela_sem_acento() -> Dict[int, str]:
+    """
+    Letras latinas acentuadas -> letra ASCII equivalente, com o mesmo resultado
+    da decomposição NFD e preservando maiúsculas/minúsculas. Só entram as
+    letras que continuam letras da mesma caixa.
+    """
+    tabela = {}
+    for codigo in range(0xC0, 0x250):
+        caractere = chr(codigo)
+        base = _remover_acentos_nfd(caractere)
+        if (
+            len(base) == 1 and base.isascii() and base != caractere
+            and (base.isalpha(), base.isupper()) == (caractere.isalpha(), caractere.isupper())
+        ):
+            tabela[codigo] = base
+    return tabela
+
+
+_SEM_ACENTO = _tabela_sem_acento()
+
+
+def remover_acentos(texto: str) -> str:
+    """
+    Remove acentos preservando a caixa. Textos em português caem no caminho
+    rápido (`str.translate`); os demais passam pela decomposição NFD completa.
+    """
+    sem_acento = texto.translate(_SEM_ACENTO)
+    if sem_acento.isascii():
+        return sem_acento
+    return _remover_acentos_nfd(texto)
+
+
+def normalizar_texto(texto: str) -> str:
+    """Remove acentos e converte para minúsculas."""
+    if not texto:
+        return ""
+    return remover_acentos(texto).lower().strip()
+
+
+def chave_texto(texto: Optional[str]) -> str:
+    """Forma canônica do texto para comparação (normalizado e com espaços colapsados)."""
+    return " ".join(normalizar_texto(str(texto or "")).split())
+
+
+RE_TOKEN = re.compile(r"\w+")
+
+# Marcador de fim de termo nos nós da trie (tokens nunca são vazios)
+_FIM = ""
+
+
+def tokenizar(texto_norm: str) -> List[str]:
+    """Quebra um texto já normalizado em tokens (palavras/números, sem pontuação)."""
+    return RE_TOKEN.findall(texto_norm)
+
+
+class LexicoCompilado:
+    """
+    Dicionário de termos compilado em uma trie de tokens.
+
+    Construída uma única vez: encontra todas as ocorrências de todos os termos
+    (inclusive expressões de várias palavras) em uma só passada pelos tokens,
+    respeitando limites de palavra. O custo depende do tamanho do texto, não
+    do número de termos no dicionário.
+    """
+
+    def __init__(self, dicionario: Dict[str, float]):
+        self.raiz: Dict[str, Any] = {}
+        self.pesos: Dict[str, float] = {}
+        self.exibicao: Dict[str, str] = {}
+        self.ordem: Dict[str, int] = {}
+        self.nomes: List[str] = []  # forma de exibição de cada termo, pela posição em `ordem`
+
+        for palavra, peso in dicionario.items():
+            tokens_termo = tokenizar(normalizar_texto(palavra))
+            if not tokens_termo:
+                continue
+            termo = " ".join(tokens_termo)
+            # Variantes com/sem acento colapsam no mesmo termo: mantém a primeira
+            if termo in self.pesos:
+                continue
+            self.pesos[termo] = peso
+            self.exibicao[termo] = palavra
+            self.ordem[termo] = len(self.ordem)
+            self.nomes.append(palavra)
+
+            no = self.raiz
+            for token in tokens_termo:
+                no = no.setdefault(token, {})
+            no[_FIM] = termo
+
+    def buscar(self, tokens: Sequence[str]) -> List[Tuple[str, int]]:
+        """Retorna (termo, posição do primeiro token) de todas as ocorrências, em ordem."""
+        ocorrencias = []
+        raiz = self.raiz
+        total = len(tokens)
+        for inicio in range(total):
+            no = raiz.get(tokens[inicio])
+            fim = inicio + 1
+            while no is not None:
+                termo = no.get(_FIM)
+                if termo is not None:
+                    ocorrencias.append((termo, inicio))
+                if fim >= total:
+                    break
+                no = no.get(tokens[fim])
+                fim += 1
+        return ocorrencias
+
+
+# Índices de contexto em forma normalizada (mesmo alfabeto dos tokens)
+NEGADORES_NORM = frozenset(normalizar_texto(n) for n in NEGADORES)
+INTENSIFICADORES_NORM: Dict[str, Tuple[int, float]] = {}
+for _intens, _mult in INTENSIFICADORES.items():
+    INTENSIFICADORES_NORM.setdefault(normalizar_texto(_intens), (len(INTENSIFICADORES_NORM), _mult))
+
+
+class Lexicos(NamedTuple):
+    """Léxicos compilados usados pela heurística."""
+    risco: LexicoCompilado
+    positivo: LexicoCompilado
+    sarcasmo: LexicoCompilado
+
+
+@lru_cache(maxsize=None)
+def obter_lexicos() -> Lexicos:
+    """Compila os léxicos na primeira chamada; as seguintes reutilizam (uma vez por processo)."""
+    return Lexicos(
+        risco=LexicoCompilado(PALAVRAS_RISCO),
+        positivo=LexicoCompilado(PALAVRAS_POSITIVAS),
+        sarcasmo=LexicoCompilado(INDICADORES_SARCASMO),
+    )
+
+
+def peso_com_contexto(tokens: Sequence[str], pos: int, peso_base: float) -> float:
+    """Ajusta o peso de um termo pelos negadores e intensificadores nas 3 palavras anteriores."""
+    janela = tokens[max(0, pos - 3):pos]
+    peso_final = peso_base
+
+    # Verifica negadores
+    if any(t in NEGADORES_NORM for t in janela):
+        # Inverte o sentido
+        peso_final = -peso_final * 0.7
+
+    # Verifica intensificadores (vale o primeiro na ordem do dicionário)
+    intensificadores = [INTENSIFICADORES_NORM[t] for t in janela if t in INTENSIFICADORES_NORM]
+    if intensificadores:
+        peso_final *= min(intensificadores)[1]
+
+    return peso_final
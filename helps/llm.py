@@ -0,0 +1,414 @@
+"""
+Classificação de risco e sentimento com a OpenAI (Responses API).
+
+O cliente é criado sob demanda na primeira chamada (chave em OPENAI_API_KEY), de
+modo que importar este módulo não exige a biblioteca `openai` nem credenciais.
+Interfaces podem injetar o próprio cliente com `definir_cliente`.
+"""
+
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .cache import CacheClassificacoes
+from .config import CODIGOS_GRAU, MAX_OUTPUT_TOKENS, MAX_OUTPUT_TOKENS_POR_ITEM, MODELO_GPT
+from .execucao import LimitadorTaxa, estimar_tokens
+from .heuristica import heuristica_risco_explicacao
+from .metricas import (
+    FALLBACK_DISJUNTOR,
+    FALLBACK_EXCECAO,
+    FALLBACK_GRAU_INVALIDO,
+    FALLBACK_ITEM_AUSENTE,
+    FALLBACK_JSON_INVALIDO,
+    FALLBACK_SEM_JSON,
+    FALLBACK_TEXTO_VAZIO,
+    MetricasExecucao,
+)
+from .resiliencia import Disjuntor, IAIndisponivel, PoliticaRetentativas, chamar_com_resiliencia
+
+_cliente: Any = None
+_lock_cliente = threading.Lock()
+
+
+def definir_cliente(cliente: Any) -> None:
+    """Define o cliente OpenAI compartilhado (ou None para voltar ao padrão)."""
+    global _cliente
+    with _lock_cliente:
+        _cliente = cliente
+
+
+def obter_cliente() -> Any:
+    """Retorna o cliente compartilhado, criando-o na primeira chamada."""
+    global _cliente
+    with _lock_cliente:
+        if _cliente is None:
+            from openai import OpenAI
+
+            # Retentativas ficam a cargo de `resiliencia` (evita repetir duas vezes)
+            _cliente = OpenAI(max_retries=0)
+        return _cliente
+
+
+INSTRUCOES_SISTEMA = """Você é um especialista em análise de sentimento e experiência do cliente.
+Sua tarefa é classificar o risco reputacional de feedbacks NPS.
+Seja preciso: elogios claros = Baixo, críticas severas = Alto/Muito Alto."""
+
+REGRAS_CLASSIFICACAO = """REGRAS DE CLASSIFICAÇÃO (siga rigorosamente):
+
+1. **Muito Alto** - Use APENAS quando houver:
+   - Ameaça legal explícita (Procon, processo, advogado, Reclame Aqui)
+   - Palavras de revolta extrema (absurdo, vergonha, inadmissível, escândalo)
+   - Acusações graves (fraude, golpe, roubo, crime, calote)
+   - Declaração "nunca mais volto/uso/compro"
+   - CAPS LOCK com xingamentos ou ofensas
+
+2. **Alto** - Use quando houver:
+   - Insatisfação forte e clara (péssimo, horrível, terrível, nojento)
+   - Declaração de arrependimento ou decepção profunda
+   - Múltiplos problemas graves relatados
+   - Indicação de que não recomendaria
+   - Tom de raiva ou frustração intensa
+
+3. **Médio** - Use quando houver:
+   - Reclamação moderada (ruim, demorado, problema, erro)
+   - Feedback misto (elogios E críticas)
+   - Ressalvas ou sugestões de melhoria
+   - Tom de incômodo mas sem revolta
+   - Expectativas parcialmente atendidas
+
+4. **Baixo** - Use quando houver:
+   - Elogio claro (ótimo, excelente, muito bom, parabéns)
+   - Satisfação expressa (gostei, recomendo, voltarei)
+   - Agradecimento ou reconhecimento positivo
+   - Comentário neutro sem queixas
+   - Menção de experiência agradável
+
+ATENÇÃO ESPECIAL:
+- "Agendamento rápido e cordialidade no atendimento" = BAIXO (elogio claro)
+- "Atendimento ok mas demorou" = MÉDIO (misto)
+- "Péssimo, nunca mais volto" = MUITO ALTO (revolta + declaração)
+- Comentário vazio ou sem sentido = BAIXO"""
+
+FORMATO_ENTRADA_SAIDA = """ENTRADA: um JSON com "contexto" (contexto do atendimento; null se não informado) e \
+"comentario" (comentário do cliente). Com vários feedbacks, um JSON com "itens", cada um com "id", "contexto" e \
+"comentario"; avalie cada item de forma independente.
+
+SAÍDA: para cada feedback, "g" com o código do GRAU DE RISCO para a empresa (MA = Muito Alto, A = Alto, \
+M = Médio, B = Baixo) e "e" com uma frase curta, de até 15 palavras, explicando o SENTIMENTO do cliente. \
+Com vários feedbacks, devolva "itens" com "id", "g" e "e" de cada um."""
+
+# Prefixo estático e idêntico em toda requisição (individual, lote ou Batch API),
+# para aproveitar o cache de prompt do provedor; só o `input` varia por linha.
+INSTRUCOES = "\n\n".join((INSTRUCOES_SISTEMA, REGRAS_CLASSIFICACAO, FORMATO_ENTRADA_SAIDA))
+
+_PROPRIEDADES_ITEM = {"g": {"type": "string", "enum": list(CODIGOS_GRAU)}, "e": {"type": "string"}}
+
+# Saída estruturada (JSON Schema estrito): a resposta é o próprio JSON, sem texto ao redor
+FORMATO_INDIVIDUAL = {"format": {
+    "type": "json_schema",
+    "name": "classificacao",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": _PROPRIEDADES_ITEM,
+        "required": ["g", "e"],
+        "additionalProperties": False,
+    },
+}}
+FORMATO_LOTE = {"format": {
+    "type": "json_schema",
+    "name": "classificacoes",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {"itens": {"type": "array", "items": {
+            "type": "object",
+            "properties": {"id": {"type": "integer"}, **_PROPRIEDADES_ITEM},
+            "required": ["id", "g", "e"],
+            "additionalProperties": False,
+        }}},
+        "required": ["itens"],
+        "additionalProperties": False,
+    },
+}}
+
+
+def extrair_texto_resposta(response) -> str:
+    """Concatena o texto de `output[].content[].text` da Responses API."""
+    return "".join(
+        content.text
+        for item in getattr(response, "output", None) or ()
+        for content in getattr(item, "content", None) or ()
+        if getattr(content, "text", None)
+    )
+
+
+def montar_entrada(descricao: Optional[str], comentario: str) -> str:
+    """Parte variável da requisição de um único comentário."""
+    return json.dumps({"contexto": descricao or None, "comentario": comentario}, ensure_ascii=False)
+
+
+def montar_requisicao(descricao: Optional[str], comentario: str) -> Dict[str, Any]:
+    """Parâmetros de `responses.create` para um único comentário (corpo de cada linha do Batch API)."""
+    return {
+        "model": MODELO_GPT,
+        "instructions": INSTRUCOES,
+        "input": montar_entrada(descricao, comentario),
+        "text": FORMATO_INDIVIDUAL,
+        "max_output_tokens": MAX_OUTPUT_TOKENS,
+        "temperature": 0.1,  # Baixa temperatura para consistência
+    }
+
+
+def _ler_item(dados: Any) -> Tuple[Optional[Tuple[str, str]], Optional[str]]:
+    """(grau, explicação) de um objeto {"g", "e"} ou (None, motivo do fallback)."""
+    if not isinstance(dados, dict):
+        return None, FALLBACK_SEM_JSON
+    codigo = dados.get("g")
+    grau = CODIGOS_GRAU.get(codigo) if isinstance(codigo, str) else None
+    if grau is None:
+        return None, FALLBACK_GRAU_INVALIDO
+    return (grau, str(dados.get("e") or "").strip()), None
+
+
+def interpretar_resposta(resposta_texto: str) -> Tuple[Optional[Tuple[str, str]], Optional[str]]:
+    """
+    Extrai (grau, explicação) da resposta estruturada a `montar_requisicao`.
+    Retorna (None, motivo do fallback) se a resposta não for aproveitável;
+    a explicação pode vir vazia.
+    """
+    if not resposta_texto:
+        return None, FALLBACK_TEXTO_VAZIO
+    try:
+        dados = json.loads(resposta_texto)
+    except ValueError:
+        # Com saída estruturada, só acontece com a resposta cortada por max_output_tokens
+        return None, FALLBACK_JSON_INVALIDO
+    return _ler_item(dados)
+
+
+def _chamar_ia(
+    cliente: Any,
+    limitador: Optional[LimitadorTaxa],
+    metricas: Optional[MetricasExecucao],
+    tokens_estimados: int,
+    politica: Optional[PoliticaRetentativas] = None,
+    disjuntor: Optional[Disjuntor] = None,
+    **parametros: Any,
+) -> Any:
+    """
+    Chama `responses.create` com retentativas e disjuntor, respeitando o limitador
+    a cada tentativa e registrando latência, tokens e retentativas.
+    """
+    def tentar(**argumentos: Any) -> Any:
+        if limitador:
+            inicio = time.perf_counter()
+            limitador.aguardar(tokens_estimados)
+            if metricas:
+                metricas.registrar_espera(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        try:
+            response = (cliente or obter_cliente()).responses.create(**argumentos)
+        except Exception:
+            if metricas:
+                metricas.registrar_chamada(time.perf_counter() - inicio, erro=True)
+            raise
+        if metricas:
+            metricas.registrar_chamada(time.perf_counter() - inicio, getattr(response, "usage", None))
+        return response
+
+    def ao_repetir(tentativa: int, espera: float, erro: BaseException) -> None:
+        if metricas:
+            metricas.registrar_retentativa(espera)
+
+    return chamar_com_resiliencia(tentar, politica, disjuntor, ao_repetir, **parametros)
+
+
+def analisar_risco_sentimento(
+    descricao: Optional[str],
+    comentario: Optional[str],
+    limitador: Optional[LimitadorTaxa] = None,
+    cache: Optional[CacheClassificacoes] = None,
+    cliente: Any = None,
+    metricas: Optional[MetricasExecucao] = None,
+    politica: Optional[PoliticaRetentativas] = None,
+    disjuntor: Optional[Disjuntor] = None,
+    ao_usar_heuristica: Optional[Callable[[], None]] = None,
+) -> Tuple[str, str]:
+    """
+    Analisa risco e sentimento usando OpenAI com fallback heurístico.
+    Se `limitador` for informado, respeita os limites de RPM/TPM antes da chamada.
+    Se `cache` for informado, reutiliza classificações já feitas para o mesmo texto.
+    Sem `cliente`, usa o cliente compartilhado de `obter_cliente()`.
+    Com `metricas`, registra a chamada e o motivo de cada fallback heurístico.
+    Erros transitórios são repetidos conforme `politica`; com o `disjuntor` aberto,
+    a IA não é chamada e a heurística responde na hora.
+    `ao_usar_heuristica()` é chamado quando o resultado não vem da IA.
+    """
+    # Tratamento de comentário vazio
+    if not comentario or len(str(comentario).strip()) < 3:
+        if ao_usar_heuristica:
+            ao_usar_heuristica()
+        return "Baixo", "Sem comentário relevante para análise."
+    
+    comentario = str(comentario).strip()
+    descricao = str(descricao).strip() if descricao else ""
+    
+    # Consulta o cache antes de chamar a IA
+    chave_cache = None
+    if cache:
+        chave_cache = cache.chave(descricao, comentario)
+        em_cache = cache.obter(chave_cache)
+        if em_cache:
+            return em_cache
+    
+    parametros = montar_requisicao(descricao, comentario)
+
+    def fallback(motivo: str) -> Tuple[str, str]:
+        if metricas:
+            metricas.registrar_fallback(motivo)
+        if ao_usar_heuristica:
+            ao_usar_heuristica()
+        return heuristica_risco_explicacao(descricao, comentario)
+
+    try:
+        response = _chamar_ia(
+            cliente, limitador, metricas,
+            estimar_tokens(INSTRUCOES + parametros["input"]) + MAX_OUTPUT_TOKENS,
+            politica, disjuntor,
+            **parametros,
+        )
+        
+        resultado, motivo = interpretar_resposta(extrair_texto_resposta(response))
+        if resultado is None:
+            return fallback(motivo)
+        grau, explicacao = resultado
+        
+        if not explicacao:
+            _, explicacao = heuristica_risco_explicacao(descricao, comentario)
+        
+        if cache:
+            cache.gravar(chave_cache, grau, explicacao)
+        
+        return grau, explicacao
+        
+    except IAIndisponivel:
+        return fallback(FALLBACK_DISJUNTOR)
+    except Exception:
+        # Em caso de erro, usa heurística
+        return fallback(FALLBACK_EXCECAO)
+
+
+def analisar_lote_risco_sentimento(
+    pares: Sequence[Tuple[Optional[str], Optional[str]]],
+    limitador: Optional[LimitadorTaxa] = None,
+    cache: Optional[CacheClassificacoes] = None,
+    cliente: Any = None,
+    metricas: Optional[MetricasExecucao] = None,
+    politica: Optional[PoliticaRetentativas] = None,
+    disjuntor: Optional[Disjuntor] = None,
+    ao_usar_heuristica: Optional[Callable[[int], None]] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Classifica vários pares (descrição, comentário) em uma única requisição.
+
+    As regras são enviadas uma vez e a IA devolve os itens indexados por `id`.
+    Itens ausentes ou malformados na resposta caem individualmente na heurística,
+    sem invalidar o restante do lote. Itens já presentes no `cache` não são enviados.
+    `ao_usar_heuristica(posição)` é chamado para cada item cujo resultado não vem da IA.
+    """
+    resultados: List[Optional[Tuple[str, str]]] = [None] * len(pares)
+    chaves_cache: Dict[int, str] = {}
+    itens_prompt = []
+    # Motivo do fallback dos itens que ficarem sem resposta válida
+    motivo_lote = FALLBACK_ITEM_AUSENTE
+    graus_invalidos = set()
+
+    for idx, (descricao, comentario) in enumerate(pares):
+        if not comentario or len(str(comentario).strip()) < 3:
+            resultados[idx] = ("Baixo", "Sem comentário relevante para análise.")
+            if ao_usar_heuristica:
+                ao_usar_heuristica(idx)
+            continue
+        if cache:
+            chaves_cache[idx] = cache.chave(descricao, comentario)
+            em_cache = cache.obter(chaves_cache[idx])
+            if em_cache:
+                resultados[idx] = em_cache
+                continue
+        itens_prompt.append({
+            "id": idx + 1,
+            "contexto": str(descricao).strip() if descricao else None,
+            "comentario": str(comentario).strip(),
+        })
+
+    if itens_prompt:
+        entrada = json.dumps({"itens": itens_prompt}, ensure_ascii=False)
+        max_tokens = MAX_OUTPUT_TOKENS_POR_ITEM * len(itens_prompt) + 10
+
+        try:
+            response = _chamar_ia(
+                cliente, limitador, metricas,
+                estimar_tokens(INSTRUCOES + entrada) + max_tokens,
+                politica, disjuntor,
+                model=MODELO_GPT,
+                instructions=INSTRUCOES,
+                input=entrada,
+                text=FORMATO_LOTE,
+                max_output_tokens=max_tokens,
+                temperature=0.1
+            )
+
+            resposta_texto = extrair_texto_resposta(response)
+            itens = []
+            if not resposta_texto:
+                motivo_lote = FALLBACK_TEXTO_VAZIO
+            else:
+                try:
+                    dados = json.loads(resposta_texto)
+                except ValueError:
+                    motivo_lote = FALLBACK_JSON_INVALIDO
+                else:
+                    itens = dados.get("itens") if isinstance(dados, dict) else None
+                    if not isinstance(itens, list):
+                        itens, motivo_lote = [], FALLBACK_SEM_JSON
+
+            for entrada_item in itens:
+                if not isinstance(entrada_item, dict):
+                    continue
+                try:
+                    idx = int(entrada_item.get("id")) - 1
+                except (TypeError, ValueError):
+                    continue
+                if not 0 <= idx < len(pares) or resultados[idx] is not None:
+                    continue
+
+                resultado, motivo = _ler_item(entrada_item)
+                if resultado is None:
+                    graus_invalidos.add(idx)
+                    continue
+                grau, explicacao = resultado
+                if not explicacao:
+                    _, explicacao = heuristica_risco_explicacao(*pares[idx])
+                resultados[idx] = (grau, explicacao)
+                if cache:
+                    cache.gravar(chaves_cache[idx], grau, explicacao)
+
+        except IAIndisponivel:
+            motivo_lote = FALLBACK_DISJUNTOR
+        except Exception:
+            # Falha do lote inteiro: todos os itens pendentes vão para a heurística
+            motivo_lote = FALLBACK_EXCECAO
+
+    # Itens sem resposta válida usam a heurística individualmente
+    for idx, resultado in enumerate(resultados):
+        if resultado is None:
+            if metricas:
+                metricas.registrar_fallback(FALLBACK_GRAU_INVALIDO if idx in graus_invalidos else motivo_lote)
+            if ao_usar_heuristica:
+                ao_usar_heuristica(idx)
+            resultados[idx] = heuristica_risco_explicacao(*pares[idx])
+
+    return resultados
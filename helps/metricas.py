@@ -0,0 +1,215 @@
+"""
+Instrumentação de uma execução: tempo por etapa, latência e tokens da IA e
+motivos de fallback para a heurística.
+"""
+
+import cProfile
+import io
+import pstats
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+# Motivos de uma linha classificada pela heurística no lugar da IA
+FALLBACK_EXCECAO = "excecao"  # erro na chamada (rede, 429, 500, timeout...)
+FALLBACK_TEXTO_VAZIO = "texto_vazio"  # resposta sem texto
+FALLBACK_SEM_JSON = "sem_json"  # JSON sem o objeto/lista de itens esperado
+FALLBACK_JSON_INVALIDO = "json_invalido"  # JSON encontrado, mas malformado
+FALLBACK_GRAU_INVALIDO = "grau_invalido"  # grau fora de GRAUS_RISCO
+FALLBACK_ITEM_AUSENTE = "item_ausente"  # lote respondido sem o id do item
+FALLBACK_DISJUNTOR = "disjuntor_aberto"  # IA não chamada: disjuntor aberto após falhas seguidas
+
+PERCENTIS_LATENCIA = (50, 90, 95, 99)
+
+
+def _percentil(ordenados: Sequence[float], percentil: float) -> float:
+    """Percentil pelo método do posto mais próximo (valores já ordenados)."""
+    if not ordenados:
+        return 0.0
+    posto = max(1, -(-len(ordenados) * percentil // 100))
+    return ordenados[int(posto) - 1]
+
+
+class MetricasExecucao:
+    """
+    Coletor de métricas compartilhado entre threads.
+
+    `etapa(nome)` mede o tempo de parede exclusivo de uma etapa (descontado o
+    de etapas medidas dentro dela); `registrar_chamada` guarda a latência e o
+    `usage` de cada chamada à IA; `registrar_fallback` conta as linhas que
+    caíram na heurística, por motivo.
+    """
+
+    def __init__(self):
+        self.linhas = 0
+        self.etapas: Dict[str, float] = {}
+        self.latencias: List[float] = []
+        self.chamadas_com_erro = 0
+        self.espera_limitador = 0.0
+        self.retentativas = 0
+        self.espera_retentativas = 0.0
+        self.aberturas_disjuntor = 0
+        self.tokens_entrada = 0
+        self.tokens_entrada_cache = 0
+        self.tokens_saida = 0
+        self.fallbacks: Counter = Counter()
+        self.perfil: Optional[str] = None
+        self._total_etapas = 0.0
+        self._lock = threading.Lock()
+
+    def adicionar_etapa(self, nome: str, segundos: float) -> None:
+        with self._lock:
+            self.etapas[nome] = self.etapas.get(nome, 0.0) + segundos
+            self._total_etapas += segundos
+
+    @contextmanager
+    def etapa(self, nome: str) -> Iterator[None]:
+        with self._lock:
+            aninhadas_antes = self._total_etapas
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            decorrido = time.perf_counter() - inicio
+            with self._lock:
+                aninhadas = self._total_etapas - aninhadas_antes
+            self.adicionar_etapa(nome, max(0.0, decorrido - aninhadas))
+
+    def medir_iteracao(self, nome: str, itens: Iterable[Any]) -> Iterator[Any]:
+        """Repassa os itens, somando à etapa `nome` o tempo gasto para produzir cada um."""
+        iterador = iter(itens)
+        while True:
+            inicio = time.perf_counter()
+            try:
+                item = next(iterador)
+            except StopIteration:
+                self.adicionar_etapa(nome, time.perf_counter() - inicio)
+                return
+            self.adicionar_etapa(nome, time.perf_counter() - inicio)
+            yield item
+
+    def registrar_espera(self, segundos: float) -> None:
+        with self._lock:
+            self.espera_limitador += segundos
+
+    def registrar_retentativa(self, espera: float) -> None:
+        with self._lock:
+            self.retentativas += 1
+            self.espera_retentativas += espera
+
+    def registrar_chamada(self, segundos: float, usage: Any = None, erro: bool = False) -> None:
+        """Registra uma chamada à IA; `usage` é o `response.usage` da Responses API."""
+        with self._lock:
+            self.latencias.append(segundos)
+            self.chamadas_com_erro += int(erro)
+        self.registrar_tokens(usage)
+
+    def registrar_tokens(self, usage: Any) -> None:
+        """Soma os tokens de um `usage` (também os de itens do Batch API, sem latência)."""
+        entrada = getattr(usage, "input_tokens", None) or 0
+        saida = getattr(usage, "output_tokens", None) or 0
+        detalhes = getattr(usage, "input_tokens_details", None)
+        em_cache = getattr(detalhes, "cached_tokens", None) or 0
+        with self._lock:
+            self.tokens_entrada += entrada
+            self.tokens_entrada_cache += em_cache
+            self.tokens_saida += saida
+
+    def registrar_fallback(self, motivo: str, linhas: int = 1) -> None:
+        if linhas:
+            with self._lock:
+                self.fallbacks[motivo] += linhas
+
+    def resumo(self) -> Dict[str, Any]:
+        """Resumo serializável em JSON."""
+        with self._lock:
+            latencias = sorted(self.latencias)
+            etapas = dict(self.etapas)
+            fallbacks = dict(self.fallbacks)
+        linhas = self.linhas
+        return {
+            "linhas": linhas,
+            "etapas": {
+                nome: {
+                    "segundos": round(segundos, 4),
+                    "ms_por_linha": round(segundos * 1000 / linhas, 4) if linhas else None,
+                }
+                for nome, segundos in etapas.items()
+            },
+            "ia": {
+                "chamadas": len(latencias),
+                "chamadas_com_erro": self.chamadas_com_erro,
+                "latencia_s": {
+                    **{f"p{p}": round(_percentil(latencias, p), 4) for p in PERCENTIS_LATENCIA},
+                    "media": round(sum(latencias) / len(latencias), 4) if latencias else 0.0,
+                    "max": round(latencias[-1], 4) if latencias else 0.0,
+                },
+                "espera_limitador_s": round(self.espera_limitador, 4),
+                "retentativas": self.retentativas,
+                "espera_retentativas_s": round(self.espera_retentativas, 4),
+                "aberturas_disjuntor": self.aberturas_disjuntor,
+                "tokens_entrada": self.tokens_entrada,
+                "tokens_entrada_cache": self.tokens_entrada_cache,
+                "tokens_saida": self.tokens_saida,
+            },
+            "fallbacks": fallbacks,
+            "perfil": self.perfil,
+        }
+
+    @contextmanager
+    def perfilar(self, ativo: bool = True, linhas: int = 30) -> Iterator[None]:
+        """
+        Executa o bloco sob o cProfile (apenas a thread atual) e guarda em
+        `perfil` as `linhas` funções com maior tempo acumulado.
+        """
+        if not ativo:
+            yield
+            return
+        perfilador = cProfile.Profile()
+        try:
+            perfilador.enable()
+        except ValueError:
+            # Outro perfilador ativo no processo (ex.: outra tarefa perfilada)
+            yield
+            return
+        try:
+            yield
+        finally:
+            perfilador.disable()
+            saida = io.StringIO()
+            pstats.Stats(perfilador, stream=saida).sort_stats("cumulative").print_stats(linhas)
+            self.perfil = saida.getvalue()
+
+
+def formatar_resumo(resumo: Dict[str, Any]) -> List[str]:
+    """Linhas de texto com o resumo de `MetricasExecucao.resumo()`, para terminal/log."""
+    linhas = []
+    etapas = ", ".join(
+        f"{nome} {dados['segundos']:.2f}s ({dados['ms_por_linha'] or 0:.3f} ms/linha)"
+        for nome, dados in resumo["etapas"].items()
+    )
+    if etapas:
+        linhas.append(f"Etapas: {etapas}")
+
+    ia = resumo["ia"]
+    if ia["chamadas"]:
+        latencia = ia["latencia_s"]
+        percentis = " ".join(f"p{p} {latencia[f'p{p}']:.2f}s" for p in PERCENTIS_LATENCIA)
+        linhas.append(f"IA: {ia['chamadas']} chamadas ({ia['chamadas_com_erro']} com erro), latência {percentis}")
+    if ia["tokens_entrada"]:
+        linhas.append(
+            f"Tokens: {ia['tokens_entrada']} de entrada ({ia['tokens_entrada_cache']} em cache), "
+            f"{ia['tokens_saida']} de saída"
+        )
+    if ia["retentativas"] or ia["aberturas_disjuntor"]:
+        linhas.append(
+            f"Retentativas: {ia['retentativas']} ({ia['espera_retentativas_s']:.1f}s de espera); "
+            f"disjuntor aberto {ia['aberturas_disjuntor']} vez(es)"
+        )
+
+    if resumo["fallbacks"]:
+        motivos = ", ".join(f"{motivo} {quantidade}" for motivo, quantidade in sorted(resumo["fallbacks"].items()))
+        linhas.append(f"Fallbacks para a heurística: {motivos}")
+    return linhas
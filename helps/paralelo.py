@@ -0,0 +1,97 @@
+"""
+Heurística vetorizada distribuída em vários processos.
+
+A heurística é CPU pura e, em uma thread, fica presa a um único núcleo pelo GIL.
+Aqui a base é dividida em fatias classificadas por `heuristica_lote` em um
+`ProcessPoolExecutor`; cada processo compila os léxicos e as tabelas Unicode uma
+única vez, ao iniciar, e os resultados voltam na ordem original das linhas.
+"""
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import chain
+from typing import Deque, Iterable, Iterator, Optional
+
+import pandas as pd
+
+from .config import PROCESSOS_HEURISTICA_PADRAO, TAMANHO_FATIA_HEURISTICA
+from .lexico import obter_lexicos
+from .vetorizado import _tabela_unicode, heuristica_lote
+
+
+def _inicializar_processo() -> None:
+    """Pré-carrega, em cada processo, o que `heuristica_lote` reutiliza entre fatias."""
+    obter_lexicos()
+    for nome in ("marca", "letra", "maiuscula"):
+        _tabela_unicode(nome)
+
+
+def _classificar_fatia(fatia: pd.DataFrame, col_descricao: Optional[str], col_comentario: str) -> pd.DataFrame:
+    # Só grau e explicação voltam ao processo principal
+    return heuristica_lote(fatia, col_descricao, col_comentario)[["grau_risco", "explicacao"]]
+
+
+def _fatiar(blocos: Iterable[pd.DataFrame], tamanho: int) -> Iterator[pd.DataFrame]:
+    tamanho = max(1, tamanho)
+    for bloco in blocos:
+        for inicio in range(0, len(bloco), tamanho):
+            yield bloco.iloc[inicio:inicio + tamanho]
+
+
+def numero_processos(processos: int = PROCESSOS_HEURISTICA_PADRAO) -> int:
+    """Resolve o número de processos: 0 (ou negativo) usa um por núcleo disponível."""
+    if processos > 0:
+        return processos
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def heuristica_blocos(
+    blocos: Iterable[pd.DataFrame],
+    col_descricao: Optional[str],
+    col_comentario: str,
+    processos: int = PROCESSOS_HEURISTICA_PADRAO,
+    tamanho_fatia: int = TAMANHO_FATIA_HEURISTICA,
+) -> Iterator[pd.DataFrame]:
+    """
+    Aplica `heuristica_lote` a fatias de até `tamanho_fatia` linhas dos `blocos`,
+    produzindo os resultados (colunas "grau_risco" e "explicacao") na ordem das
+    linhas. Com mais de um processo e mais de uma fatia, as fatias são
+    distribuídas entre `processos` processos (0 = um por núcleo); no máximo duas
+    fatias por processo ficam em andamento, então a leitura em fluxo continua
+    limitando a memória.
+    """
+    colunas = [c for c in (col_descricao, col_comentario) if c]
+    fatias = (fatia[colunas] for fatia in _fatiar(blocos, tamanho_fatia))
+    processos = numero_processos(processos)
+
+    primeiras = [fatia for _, fatia in zip(range(2), fatias)]
+    if processos == 1 or len(primeiras) < 2:
+        # Base pequena (ou um núcleo só): iniciar processos custaria mais que classificar
+        for fatia in chain(primeiras, fatias):
+            yield _classificar_fatia(fatia, col_descricao, col_comentario)
+        return
+
+    # "fork" a partir de um processo com threads (o app, as tarefas em segundo
+    # plano) pode travar; o forkserver cria os processos a partir de um estado limpo
+    metodo = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    with ProcessPoolExecutor(
+        max_workers=processos,
+        mp_context=multiprocessing.get_context(metodo),
+        initializer=_inicializar_processo,
+    ) as executor:
+        pendentes: Deque[Future] = deque()
+        try:
+            for fatia in chain(primeiras, fatias):
+                pendentes.append(executor.submit(_classificar_fatia, fatia, col_descricao, col_comentario))
+                if len(pendentes) >= 2 * processos:
+                    yield pendentes.popleft().result()
+            while pendentes:
+                yield pendentes.popleft().result()
+        finally:
+            for futuro in pendentes:
+                futuro.cancel()
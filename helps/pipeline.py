@@ -0,0 +1,408 @@
+"""
+Orquestração da curadoria de uma planilha: deduplicação, triagem, IA e heurística.
+
+Independente de interface: usado pelo app Streamlit e pela linha de comando.
+"""
+
+import hashlib
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from .cache import CacheClassificacoes
+from .checkpoint import CheckpointExecucao
+from .classificador import obter_classificador
+from .batch import classificar_via_batch
+from .config import (
+    BATCH_INTERVALO_CONSULTA,
+    CAMINHO_CACHE_PADRAO,
+    CAMINHO_MODELO_PADRAO,
+    CONFIANCA_MODELO_PADRAO,
+    DISJUNTOR_ESPERA_PADRAO,
+    DISJUNTOR_FALHAS_PADRAO,
+    LIMIAR_PESO_CRITICO,
+    LIMIAR_SCORE_POSITIVO,
+    LIMIAR_SEMELHANCA_PADRAO,
+    MAX_CONCORRENCIA_PADRAO,
+    ORIGEM_HEURISTICA,
+    ORIGEM_IA,
+    ORIGEM_MODELO,
+    ORIGEM_SEMELHANTE,
+    ORIGEM_TRIAGEM,
+    PROCESSOS_HEURISTICA_PADRAO,
+    RPM_PADRAO,
+    TAMANHO_LOTE_PADRAO,
+    TENTATIVAS_IA_PADRAO,
+    TIMEOUT_IA_PADRAO,
+    TPM_PADRAO,
+)
+from .execucao import LimitadorTaxa, agrupar_pares_unicos, dividir_em_lotes, executar_concorrente
+from .heuristica import heuristica_risco_explicacao, triagem_heuristica
+from .incremental import Reaproveitamento
+from .llm import analisar_lote_risco_sentimento, analisar_risco_sentimento
+from .metricas import FALLBACK_EXCECAO, MetricasExecucao
+from .paralelo import heuristica_blocos
+from .resiliencia import Disjuntor, PoliticaRetentativas
+from .semelhantes import agrupar_semelhantes
+
+
+@dataclass
+class OpcoesProcessamento:
+    """Parâmetros de uma execução da curadoria."""
+
+    somente_heuristica: bool = False
+    max_concorrencia: int = MAX_CONCORRENCIA_PADRAO
+    rpm: int = RPM_PADRAO
+    tpm: int = TPM_PADRAO
+    tamanho_lote: int = TAMANHO_LOTE_PADRAO
+    agrupar_duplicados: bool = True
+    agrupar_semelhantes: bool = False  # quase duplicatas: só um representante por grupo vai à IA
+    limiar_semelhanca: float = LIMIAR_SEMELHANCA_PADRAO
+    usar_triagem: bool = False
+    usar_modelo_local: bool = False  # classificador local treinado com graus da IA; só os incertos vão à IA
+    caminho_modelo: str = CAMINHO_MODELO_PADRAO
+    confianca_modelo: float = CONFIANCA_MODELO_PADRAO
+    limiar_critico: float = LIMIAR_PESO_CRITICO
+    limiar_positivo: float = LIMIAR_SCORE_POSITIVO
+    usar_cache: bool = True
+    caminho_cache: str = CAMINHO_CACHE_PADRAO
+    processos: int = PROCESSOS_HEURISTICA_PADRAO  # heurística sem IA; 0 = um por núcleo
+    tentativas: int = TENTATIVAS_IA_PADRAO  # por requisição à IA, incluindo a primeira
+    timeout: float = TIMEOUT_IA_PADRAO  # segundos por requisição à IA
+    disjuntor_falhas: int = DISJUNTOR_FALHAS_PADRAO  # 0 = sem disjuntor
+    disjuntor_espera: float = DISJUNTOR_ESPERA_PADRAO
+    usar_batch_api: bool = False  # execuções offline: Batch API em vez de chamadas interativas
+    batch_intervalo: float = BATCH_INTERVALO_CONSULTA  # segundos entre consultas ao batch
+
+    def assinatura_resultados(self) -> str:
+        """
+        Resumo das opções que mudam como as linhas são classificadas (não o
+        ritmo da execução), para a chave do checkpoint. Parâmetros de etapas
+        desligadas não contam; o modelo local entra com a data do arquivo.
+        """
+        valores: List[object] = [
+            self.somente_heuristica, self.agrupar_duplicados, self.usar_triagem,
+            self.agrupar_semelhantes, self.usar_modelo_local,
+        ]
+        if self.usar_triagem:
+            valores += [self.limiar_critico, self.limiar_positivo]
+        if self.agrupar_semelhantes:
+            valores.append(self.limiar_semelhanca)
+        if self.usar_modelo_local:
+            caminho = os.path.abspath(self.caminho_modelo)
+            valores += [caminho, self.confianca_modelo, os.path.getmtime(caminho) if os.path.exists(caminho) else None]
+        return hashlib.sha256(repr(valores).encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class EstatisticasProcessamento:
+    """Contadores de uma execução, para exibição ao usuário."""
+
+    total_linhas: int = 0
+    retomadas: int = 0
+    reaproveitadas: int = 0  # herdadas de uma saída anterior (processamento incremental)
+    editadas: int = 0  # IDs já classificados antes, mas com texto alterado
+    unicos: int = 0
+    enviados_ia: int = 0  # comentários únicos enviados à IA
+    linhas_ia: int = 0  # linhas classificadas pela IA (duplicatas e semelhantes incluídas)
+    resolvidos_modelo: int = 0  # classificados pelo modelo local com confiança suficiente
+    semelhantes: int = 0  # comentários que herdaram o grau de um representante semelhante
+    divergentes: int = 0  # semelhantes separados do grupo por divergirem da heurística
+    # Linhas resolvidas pela triagem, por caminho
+    caminhos: Dict[str, int] = field(default_factory=lambda: {"vazio": 0, "critico": 0, "positivo": 0})
+    cache_acertos: int = 0
+    cache_falhas: int = 0
+    usou_cache: bool = False
+    origens: List[str] = field(default_factory=list)  # origem do grau de cada linha (ORIGEM_*; "" se desconhecida)
+    metricas: MetricasExecucao = field(default_factory=MetricasExecucao)
+
+
+def extrair_pares(
+    df: pd.DataFrame,
+    col_descricao: Optional[str],
+    col_comentario: str,
+) -> List[Tuple[Optional[str], Optional[str]]]:
+    """Obtém os pares (descrição, comentário) na ordem das linhas; vazios viram None."""
+    comentarios = df[col_comentario]
+    descricoes = df[col_descricao] if col_descricao else pd.Series([None] * len(df), index=df.index)
+    return [
+        (str(d) if pd.notna(d) else None, str(c) if pd.notna(c) else None)
+        for d, c in zip(descricoes.tolist(), comentarios.tolist())
+    ]
+
+
+def processar_dataframe(
+    df: pd.DataFrame,
+    col_descricao: Optional[str],
+    col_comentario: str,
+    opcoes: Optional[OpcoesProcessamento] = None,
+    ao_progredir: Optional[Callable[[int, int], None]] = None,
+    checkpoint: Optional[CheckpointExecucao] = None,
+    metricas: Optional[MetricasExecucao] = None,
+) -> Tuple[List[Tuple[str, str]], EstatisticasProcessamento]:
+    """
+    Classifica cada linha do DataFrame, retornando (grau, explicação) por linha.
+
+    `ao_progredir(concluidos, total)` recebe o avanço em lotes enviados à IA.
+    Com `checkpoint`, linhas já concluídas em uma execução anterior são
+    reaproveitadas e cada lote concluído é registrado para uma futura retomada.
+    Tempos por etapa, chamadas à IA e fallbacks ficam em `estatisticas.metricas`
+    (ou no `metricas` informado, para somar etapas medidas pelo chamador).
+    """
+    return processar_blocos([df], col_descricao, col_comentario, opcoes, ao_progredir, checkpoint, metricas)
+
+
+def processar_blocos(
+    blocos: Iterable[pd.DataFrame],
+    col_descricao: Optional[str],
+    col_comentario: str,
+    opcoes: Optional[OpcoesProcessamento] = None,
+    ao_progredir: Optional[Callable[[int, int], None]] = None,
+    checkpoint: Optional[CheckpointExecucao] = None,
+    metricas: Optional[MetricasExecucao] = None,
+    reaproveitamento: Optional[Reaproveitamento] = None,
+) -> Tuple[List[Tuple[str, str]], EstatisticasProcessamento]:
+    """
+    Como `processar_dataframe`, mas consumindo a base em blocos (ex.: `iterar_blocos`),
+    sem manter a planilha inteira na memória.
+
+    Com `reaproveitamento` (processamento incremental), os blocos devem trazer a
+    coluna de ID; linhas com ID e texto iguais aos da saída anterior herdam a
+    classificação dela e não são reclassificadas.
+    """
+    opcoes = opcoes or OpcoesProcessamento()
+    metricas = metricas or MetricasExecucao()
+    blocos = metricas.medir_iteracao("leitura", blocos)
+    if reaproveitamento:
+        blocos = reaproveitamento.filtrar(blocos, col_descricao, col_comentario)
+
+    if opcoes.somente_heuristica:
+        # Classificação vetorizada, em fatias distribuídas entre processos, sem IA
+        resultados: List[Tuple[str, str]] = []
+        with metricas.etapa("heuristica"):
+            for resultado_lote in heuristica_blocos(blocos, col_descricao, col_comentario, int(opcoes.processos)):
+                resultados.extend(zip(resultado_lote["grau_risco"], resultado_lote["explicacao"]))
+        metricas.linhas = len(resultados)
+        estatisticas = EstatisticasProcessamento(
+            total_linhas=len(resultados), unicos=len(resultados), metricas=metricas,
+            origens=[ORIGEM_HEURISTICA] * len(resultados),
+        )
+        if reaproveitamento:
+            for linha, resultado in reaproveitamento.resultados.items():
+                resultados[linha] = resultado
+                estatisticas.origens[linha] = reaproveitamento.origens.get(linha, "")
+            estatisticas.reaproveitadas = len(reaproveitamento.resultados)
+            estatisticas.editadas = reaproveitamento.editadas
+            estatisticas.unicos -= estatisticas.reaproveitadas
+        return resultados, estatisticas
+
+    pares = (par for bloco in blocos for par in extrair_pares(bloco, col_descricao, col_comentario))
+    resultados, estatisticas = processar_pares(
+        pares, opcoes, ao_progredir, checkpoint, metricas,
+        reaproveitadas=reaproveitamento.resultados if reaproveitamento else None,
+        origens_reaproveitadas=reaproveitamento.origens if reaproveitamento else None,
+    )
+    if reaproveitamento:
+        estatisticas.editadas = reaproveitamento.editadas
+    return resultados, estatisticas
+
+
+def processar_pares(
+    pares: Iterable[Tuple[Optional[str], Optional[str]]],
+    opcoes: Optional[OpcoesProcessamento] = None,
+    ao_progredir: Optional[Callable[[int, int], None]] = None,
+    checkpoint: Optional[CheckpointExecucao] = None,
+    metricas: Optional[MetricasExecucao] = None,
+    reaproveitadas: Optional[Dict[int, Tuple[str, str]]] = None,
+    origens_reaproveitadas: Optional[Dict[int, str]] = None,
+) -> Tuple[List[Tuple[str, str]], EstatisticasProcessamento]:
+    """
+    Classifica pares (descrição, comentário) vindos de qualquer iterável, inclusive
+    geradores: só os pares únicos pendentes ficam em memória até a classificação.
+
+    `reaproveitadas` traz resultados já conhecidos por linha; pode ser preenchido
+    enquanto `pares` é consumido, desde que cada linha entre antes do seu par.
+    `origens_reaproveitadas` traz a origem do grau dessas linhas, se conhecida.
+    A origem do grau de cada linha sai em `estatisticas.origens`.
+    """
+    opcoes = opcoes or OpcoesProcessamento()
+    estatisticas = EstatisticasProcessamento(metricas=metricas or MetricasExecucao())
+    metricas = estatisticas.metricas
+    reaproveitadas = reaproveitadas if reaproveitadas is not None else {}
+    origens_reaproveitadas = origens_reaproveitadas if origens_reaproveitadas is not None else {}
+
+    # Retomada: apenas as linhas ainda sem resultado salvo são processadas
+    salvos: Dict[int, Tuple[str, str]] = checkpoint.carregar() if checkpoint else {}
+    origens: Dict[int, str] = checkpoint.origens() if checkpoint else {}
+    linhas_pendentes: List[int] = []
+
+    def pendentes() -> Iterator[Tuple[Optional[str], Optional[str]]]:
+        for linha, par in enumerate(pares):
+            estatisticas.total_linhas += 1
+            if linha not in salvos and linha not in reaproveitadas:
+                linhas_pendentes.append(linha)
+                yield par
+
+    # Agrupa comentários idênticos para classificar cada um uma única vez
+    with metricas.etapa("deduplicacao"):
+        if opcoes.agrupar_duplicados:
+            pares_unicos, mapeamento = agrupar_pares_unicos(pendentes())
+        else:
+            pares_unicos = list(pendentes())
+            mapeamento = list(range(len(pares_unicos)))
+    estatisticas.unicos = len(pares_unicos)
+    metricas.linhas = estatisticas.total_linhas
+
+    salvos = {
+        linha: r for linha, r in salvos.items()
+        if linha < estatisticas.total_linhas and linha not in reaproveitadas
+    }
+    estatisticas.retomadas = len(salvos)
+    estatisticas.reaproveitadas = len(reaproveitadas)
+    salvos.update(reaproveitadas)
+    origens = {linha: origens.get(linha, "") for linha in salvos}
+    origens.update(origens_reaproveitadas)
+    if checkpoint:
+        checkpoint.iniciar(estatisticas.total_linhas)
+
+    linhas_por_unico: List[List[int]] = [[] for _ in pares_unicos]
+    for linha, idx in zip(linhas_pendentes, mapeamento):
+        linhas_por_unico[idx].append(linha)
+
+    # Origem do grau de cada par único; as linhas herdadas de um semelhante têm a própria
+    origens_unicos: List[str] = [ORIGEM_IA] * len(pares_unicos)
+    linhas_herdadas: Set[int] = set()
+
+    def registrar(indices: List[int], resultados: List[Tuple[str, str]]) -> None:
+        if checkpoint:
+            checkpoint.registrar(
+                (linha, resultado, ORIGEM_SEMELHANTE if linha in linhas_herdadas else origens_unicos[idx])
+                for idx, resultado in zip(indices, resultados)
+                for linha in linhas_por_unico[idx]
+            )
+
+    # Triagem: resolve localmente os casos claros
+    resultados_unicos: List[Optional[Tuple[str, str]]] = [None] * len(pares_unicos)
+    if opcoes.usar_triagem:
+        with metricas.etapa("triagem"):
+            for idx, (descricao, comentario) in enumerate(pares_unicos):
+                triagem = triagem_heuristica(
+                    descricao, comentario,
+                    peso_critico=opcoes.limiar_critico, score_positivo=opcoes.limiar_positivo,
+                )
+                if triagem:
+                    grau, explicacao, motivo = triagem
+                    resultados_unicos[idx] = (grau, explicacao)
+                    origens_unicos[idx] = ORIGEM_TRIAGEM
+                    estatisticas.caminhos[motivo] += len(linhas_por_unico[idx])
+    indices_ia = [idx for idx, r in enumerate(resultados_unicos) if r is None]
+    indices_triagem = [idx for idx, r in enumerate(resultados_unicos) if r is not None]
+    registrar(indices_triagem, [resultados_unicos[idx] for idx in indices_triagem])
+
+    # Modelo local: resolve os comentários em que está confiante; os demais seguem
+    if opcoes.usar_modelo_local and indices_ia:
+        with metricas.etapa("modelo_local"):
+            previstos = obter_classificador(opcoes.caminho_modelo).classificar(
+                [pares_unicos[idx] for idx in indices_ia], opcoes.confianca_modelo
+            )
+            resolvidos = [idx for idx, resultado in zip(indices_ia, previstos) if resultado]
+            for idx in resolvidos:
+                origens_unicos[idx] = ORIGEM_MODELO
+            for idx, resultado in zip(indices_ia, previstos):
+                resultados_unicos[idx] = resultado
+            registrar(resolvidos, [resultados_unicos[idx] for idx in resolvidos])
+            indices_ia = [idx for idx in indices_ia if resultados_unicos[idx] is None]
+        estatisticas.resolvidos_modelo = len(resolvidos)
+
+    # Quase duplicatas: só o representante de cada grupo vai à IA; as linhas dos
+    # membros passam a ser registradas junto com as dele
+    membros: Dict[int, int] = {}
+    if opcoes.agrupar_semelhantes and len(indices_ia) > 1:
+        with metricas.etapa("semelhantes"):
+            representantes, estatisticas.divergentes = agrupar_semelhantes(
+                [pares_unicos[idx] for idx in indices_ia], opcoes.limiar_semelhanca
+            )
+            for posicao, representante in enumerate(representantes):
+                if representante != posicao:
+                    membros[indices_ia[posicao]] = indices_ia[representante]
+                    linhas_por_unico[indices_ia[representante]].extend(linhas_por_unico[indices_ia[posicao]])
+                    linhas_herdadas.update(linhas_por_unico[indices_ia[posicao]])
+            indices_ia = [idx for idx in indices_ia if idx not in membros]
+        estatisticas.semelhantes = len(membros)
+    estatisticas.enviados_ia = len(indices_ia)
+    estatisticas.linhas_ia = sum(len(linhas_por_unico[idx]) for idx in indices_ia)
+
+    limitador = LimitadorTaxa(rpm=int(opcoes.rpm), tpm=int(opcoes.tpm))
+    cache = CacheClassificacoes(opcoes.caminho_cache) if opcoes.usar_cache else None
+    # Um disjuntor por execução: com a API fora do ar, as linhas restantes vão
+    # direto para a heurística até uma sondagem indicar que ela voltou
+    politica = PoliticaRetentativas(tentativas=max(1, int(opcoes.tentativas)), timeout=opcoes.timeout or None)
+    disjuntor = Disjuntor(int(opcoes.disjuntor_falhas), opcoes.disjuntor_espera)
+    argumentos_ia = dict(limitador=limitador, cache=cache, metricas=metricas, politica=politica, disjuntor=disjuntor)
+
+    def classificados_heuristica(indices: Iterable[int]) -> None:
+        # Enviados à IA, mas resolvidos pela heurística (fallback ou comentário vazio)
+        for idx in indices:
+            origens_unicos[idx] = ORIGEM_HEURISTICA
+
+    def classificar(indices: List[int]) -> List[Tuple[str, str]]:
+        lote = [pares_unicos[idx] for idx in indices]
+        try:
+            if len(lote) == 1:
+                return [analisar_risco_sentimento(
+                    *lote[0], ao_usar_heuristica=lambda: classificados_heuristica(indices), **argumentos_ia
+                )]
+            return analisar_lote_risco_sentimento(
+                lote, ao_usar_heuristica=lambda posicao: classificados_heuristica([indices[posicao]]), **argumentos_ia
+            )
+        except Exception:
+            metricas.registrar_fallback(FALLBACK_EXCECAO, len(lote))
+            classificados_heuristica(indices)
+            return [heuristica_risco_explicacao(d, c) for d, c in lote]
+
+    lotes_indices = dividir_em_lotes(indices_ia, int(opcoes.tamanho_lote))
+    try:
+        if opcoes.usar_batch_api:
+            # Batch API: uma requisição por comentário único, todas num mesmo envio
+            lotes_indices = [indices_ia]
+            with metricas.etapa("batch"):
+                resultados_lotes = [classificar_via_batch(
+                    [pares_unicos[idx] for idx in indices_ia],
+                    cache=cache, metricas=metricas, ao_progredir=ao_progredir, intervalo=opcoes.batch_intervalo,
+                    politica=politica,
+                    ao_usar_heuristica=lambda posicao: classificados_heuristica([indices_ia[posicao]]),
+                )] if indices_ia else []
+            registrar(indices_ia, resultados_lotes[0] if indices_ia else [])
+        else:
+            # Analisa em paralelo, preservando a ordem das linhas
+            with metricas.etapa("ia"):
+                resultados_lotes = executar_concorrente(
+                    classificar,
+                    lotes_indices,
+                    max_concorrencia=int(opcoes.max_concorrencia),
+                    ao_progredir=ao_progredir,
+                    ao_concluir=lambda i, resultados: registrar(lotes_indices[i], resultados),
+                )
+    finally:
+        metricas.aberturas_disjuntor += disjuntor.aberturas
+        if checkpoint:
+            checkpoint.salvar()
+        if cache:
+            cache.fechar()
+            estatisticas.usou_cache = True
+            estatisticas.cache_acertos = cache.acertos
+            estatisticas.cache_falhas = cache.falhas
+
+    for lote, resultados in zip(lotes_indices, resultados_lotes):
+        for idx, resultado in zip(lote, resultados):
+            resultados_unicos[idx] = resultado
+    for membro, representante in membros.items():
+        resultados_unicos[membro] = resultados_unicos[representante]
+
+    for linha, idx in zip(linhas_pendentes, mapeamento):
+        salvos[linha] = resultados_unicos[idx]
+        origens[linha] = ORIGEM_SEMELHANTE if idx in membros else origens_unicos[idx]
+    estatisticas.origens = [origens.get(linha, "") for linha in range(estatisticas.total_linhas)]
+    return [salvos[linha] for linha in range(estatisticas.total_linhas)], estatisticas
@@ -0,0 +1,202 @@
+"""
+Resiliência das chamadas à IA: retentativas com backoff e disjuntor.
+
+Erros transitórios (429, 5xx, timeout, conexão) são repetidos com backoff
+exponencial com jitter, respeitando o `Retry-After` enviado pela API. Um
+`Disjuntor` compartilhado pela execução abre após falhas consecutivas: enquanto
+aberto, as chamadas nem são feitas (as linhas vão direto para a heurística) e,
+passado o tempo de espera, uma única chamada de sondagem decide se ele fecha.
+
+Os erros são inspecionados por atributos (`status_code`, `response.headers`),
+como nos erros do SDK da OpenAI, sem importar a biblioteca.
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional
+
+from .config import (
+    DISJUNTOR_ESPERA_PADRAO,
+    DISJUNTOR_FALHAS_PADRAO,
+    RETENTATIVAS_ESPERA_BASE,
+    RETENTATIVAS_ESPERA_MAXIMA,
+    TENTATIVAS_IA_PADRAO,
+    TIMEOUT_IA_PADRAO,
+)
+
+STATUS_TRANSITORIOS = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+FECHADO = "fechado"
+ABERTO = "aberto"
+SEMIABERTO = "semiaberto"
+
+
+class IAIndisponivel(Exception):
+    """Chamada recusada porque o disjuntor está aberto."""
+
+
+def erro_transitorio(erro: BaseException) -> bool:
+    """Indica se vale repetir a chamada que levantou `erro`."""
+    status = getattr(erro, "status_code", None)
+    if status is not None:
+        return status in STATUS_TRANSITORIOS
+    if isinstance(erro, (TimeoutError, ConnectionError)):
+        return True
+    # APITimeoutError/APIConnectionError do SDK e exceções do httpx não têm status
+    nome = type(erro).__name__
+    return "Timeout" in nome or "Connection" in nome
+
+
+def segundos_retry_after(erro: BaseException) -> Optional[float]:
+    """
+    Espera pedida pela API no erro: `retry-after-ms`, ou `retry-after` em
+    segundos ou como data HTTP. None se ausente ou inválida.
+    """
+    cabecalhos = getattr(getattr(erro, "response", None), "headers", None)
+    if not cabecalhos:
+        return None
+    try:
+        valor = cabecalhos.get("retry-after-ms")
+        if valor is not None:
+            return max(0.0, float(valor) / 1000)
+        valor = cabecalhos.get("retry-after")
+        if valor is None:
+            return None
+        try:
+            return max(0.0, float(valor))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class PoliticaRetentativas:
+    """Quantas vezes e com que espera repetir uma chamada com erro transitório."""
+
+    tentativas: int = TENTATIVAS_IA_PADRAO  # total, incluindo a primeira
+    espera_base: float = RETENTATIVAS_ESPERA_BASE
+    espera_maxima: float = RETENTATIVAS_ESPERA_MAXIMA
+    timeout: Optional[float] = TIMEOUT_IA_PADRAO  # por requisição; None = padrão do cliente
+
+    def espera(self, tentativa: int, erro: BaseException, aleatorio: Callable[[], float] = random.random) -> float:
+        """
+        Segundos antes da tentativa seguinte à `tentativa` (contada a partir de 1).
+        Com `Retry-After`, espera o pedido pela API; sem ele, "full jitter":
+        um valor uniforme entre 0 e min(espera_maxima, espera_base * 2^(tentativa-1)).
+        """
+        retry_after = segundos_retry_after(erro)
+        if retry_after is not None:
+            return retry_after
+        return aleatorio() * min(self.espera_maxima, self.espera_base * 2 ** (tentativa - 1))
+
+
+class Disjuntor:
+    """
+    Disjuntor (circuit breaker) compartilhado entre threads.
+
+    Abre após `limiar_falhas` falhas transitórias consecutivas. Aberto, recusa
+    chamadas por `espera` segundos; depois deixa passar uma sondagem (estado
+    semiaberto): sucesso fecha o disjuntor, falha o reabre por mais `espera`.
+    `limiar_falhas` 0 desativa o disjuntor.
+    """
+
+    def __init__(
+        self,
+        limiar_falhas: int = DISJUNTOR_FALHAS_PADRAO,
+        espera: float = DISJUNTOR_ESPERA_PADRAO,
+        relogio: Callable[[], float] = time.monotonic,
+    ):
+        self.limiar_falhas = limiar_falhas
+        self.espera = espera
+        self.estado = FECHADO
+        self.aberturas = 0
+        self._relogio = relogio
+        self._falhas = 0
+        self._aberto_em = 0.0
+        self._sondando = False
+        self._lock = threading.Lock()
+
+    def permitir(self) -> bool:
+        """Indica se uma chamada pode ser feita agora (e reserva a sondagem, se for o caso)."""
+        if not self.limiar_falhas:
+            return True
+        with self._lock:
+            if self.estado == FECHADO:
+                return True
+            if self.estado == ABERTO and self._relogio() - self._aberto_em >= self.espera:
+                self.estado = SEMIABERTO
+            if self.estado == SEMIABERTO and not self._sondando:
+                self._sondando = True
+                return True
+            return False
+
+    def registrar_sucesso(self) -> None:
+        with self._lock:
+            self.estado, self._falhas, self._sondando = FECHADO, 0, False
+
+    def registrar_falha(self) -> bool:
+        """Conta uma falha transitória; retorna True se ela abriu o disjuntor."""
+        if not self.limiar_falhas:
+            return False
+        with self._lock:
+            self._falhas += 1
+            if self.estado == SEMIABERTO or (self.estado == FECHADO and self._falhas >= self.limiar_falhas):
+                abriu = self.estado == FECHADO
+                self.estado, self._aberto_em, self._sondando = ABERTO, self._relogio(), False
+                self.aberturas += int(abriu)
+                return abriu
+            return False
+
+    def liberar_sondagem(self) -> None:
+        """Devolve a sondagem reservada por `permitir` sem resultado conclusivo."""
+        with self._lock:
+            self._sondando = False
+
+
+def chamar_com_resiliencia(
+    funcao: Callable[..., Any],
+    politica: Optional[PoliticaRetentativas] = None,
+    disjuntor: Optional[Disjuntor] = None,
+    ao_repetir: Optional[Callable[[int, float, BaseException], None]] = None,
+    dormir: Callable[[float], None] = time.sleep,
+    **parametros: Any,
+) -> Any:
+    """
+    Chama `funcao(**parametros)` (com `timeout` da política), repetindo erros
+    transitórios. Levanta `IAIndisponivel` se o disjuntor recusar a chamada e o
+    último erro quando as tentativas acabam ou o erro não é transitório.
+    `ao_repetir(tentativa, espera, erro)` é chamado antes de cada espera.
+    """
+    politica = politica or PoliticaRetentativas()
+    if politica.timeout:
+        parametros["timeout"] = politica.timeout
+
+    tentativa = 1
+    while True:
+        if disjuntor and not disjuntor.permitir():
+            raise IAIndisponivel("Disjuntor aberto: a API está falhando; usando a heurística")
+        try:
+            resposta = funcao(**parametros)
+        except Exception as erro:
+            if not erro_transitorio(erro):
+                # Erro de requisição (400, 401...): não diz nada sobre a saúde da API
+                if disjuntor:
+                    disjuntor.liberar_sondagem()
+                raise
+            if disjuntor:
+                disjuntor.registrar_falha()
+            if tentativa >= politica.tentativas:
+                raise
+            espera = politica.espera(tentativa, erro)
+            if ao_repetir:
+                ao_repetir(tentativa, espera, erro)
+            dormir(espera)
+            tentativa += 1
+            continue
+        if disjuntor:
+            disjuntor.registrar_sucesso()
+        return resposta
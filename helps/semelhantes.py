@@ -0,0 +1,144 @@
+"""
+Agrupamento de comentários quase idênticos, para classificar um representante por grupo.
+
+Além das duplicatas exatas, os comentários NPS vêm em famílias de variantes
+("atendimento ótimo!!", "Atendimento otimo", "otimo atendimento, obrigado").
+Cada comentário vira o conjunto das suas palavras normalizadas e dos trigramas
+de caracteres de cada palavra; assinaturas MinHash em bandas (LSH) apontam os
+candidatos e a semelhança de Jaccard exata decide o grupo. O agrupamento é
+"líder": cada comentário entra no primeiro representante semelhante ou vira um.
+
+Comentários quase iguais podem ter sentidos opostos ("o técnico foi ótimo" /
+"o técnico foi péssimo", "foi resolvido" / "não foi resolvido"). Por isso só se
+agrupam pares com a mesma descrição e as mesmas negações e, quando a heurística
+de um membro diverge da do representante em `divergencia` níveis de grau ou
+mais, o membro é separado do grupo e classificado por conta própria.
+"""
+
+import zlib
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .config import (
+    DIVERGENCIA_SEMELHANCA_PADRAO,
+    GRAUS_RISCO,
+    LIMIAR_SEMELHANCA_PADRAO,
+    MINHASH_BANDAS,
+    MINHASH_PERMUTACOES,
+)
+from .lexico import NEGADORES_NORM, RE_TOKEN, chave_texto, normalizar_texto
+from .vetorizado import heuristica_lote
+
+_BLOCO_ASSINATURAS = 2000  # comentários por passada vetorizada do MinHash
+
+# Coeficientes fixos: o mesmo texto tem sempre a mesma assinatura
+_GERADOR = np.random.default_rng(20240517)
+_MULTIPLICADORES = _GERADOR.integers(1, 2 ** 63, MINHASH_PERMUTACOES, dtype=np.uint64) | np.uint64(1)
+_DESLOCAMENTOS = _GERADOR.integers(0, 2 ** 63, MINHASH_PERMUTACOES, dtype=np.uint64)
+
+
+def fragmentos(texto: Optional[str]) -> FrozenSet[str]:
+    """Palavras normalizadas do texto e trigramas de caracteres de cada uma (com bordas)."""
+    palavras = RE_TOKEN.findall(normalizar_texto(texto or ""))
+    conjunto = set(palavras)
+    for palavra in palavras:
+        marcada = f" {palavra} "
+        conjunto.update(marcada[i:i + 3] for i in range(len(marcada) - 2))
+    return frozenset(conjunto)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    comuns = len(a & b)
+    return comuns / (len(a) + len(b) - comuns)
+
+
+def assinaturas_minhash(conjuntos: Sequence[FrozenSet[str]]) -> np.ndarray:
+    """
+    Matriz (comentários × `MINHASH_PERMUTACOES`) de assinaturas MinHash.
+
+    Cada fragmento vira um CRC32; cada permutação é um hash multiplicativo de 64
+    bits (com estouro intencional), e o mínimo por comentário sai de
+    `np.minimum.reduceat`. Conjuntos vazios ficam com o valor máximo.
+    """
+    resultado = np.full((len(conjuntos), MINHASH_PERMUTACOES), np.iinfo(np.uint64).max, dtype=np.uint64)
+    for inicio in range(0, len(conjuntos), _BLOCO_ASSINATURAS):
+        bloco = conjuntos[inicio:inicio + _BLOCO_ASSINATURAS]
+        tamanhos = np.fromiter((len(c) for c in bloco), dtype=np.int64, count=len(bloco))
+        preenchidos = np.flatnonzero(tamanhos)
+        if not len(preenchidos):
+            continue
+        hashes = np.fromiter(
+            (zlib.crc32(f.encode("utf-8")) for c in bloco for f in c), dtype=np.uint64, count=int(tamanhos.sum())
+        )
+        with np.errstate(over="ignore"):
+            permutados = hashes[:, None] * _MULTIPLICADORES + _DESLOCAMENTOS
+        inicios = np.concatenate(([0], np.cumsum(tamanhos)[:-1]))[preenchidos]
+        resultado[inicio + preenchidos] = np.minimum.reduceat(permutados, inicios, axis=0)
+    return resultado
+
+
+def agrupar_semelhantes(
+    pares: Sequence[Tuple[Optional[str], Optional[str]]],
+    limiar: float = LIMIAR_SEMELHANCA_PADRAO,
+    divergencia: int = DIVERGENCIA_SEMELHANCA_PADRAO,
+) -> Tuple[List[int], int]:
+    """
+    Agrupa pares (descrição, comentário) com comentários quase idênticos.
+
+    Retorna, para cada par, o índice do representante do seu grupo (o próprio
+    índice, se ele for um representante) e quantos membros foram separados por
+    divergirem da heurística do representante.
+    """
+    conjuntos = [fragmentos(comentario) for _, comentario in pares]
+    assinaturas = assinaturas_minhash(conjuntos)
+    linhas_banda = MINHASH_PERMUTACOES // MINHASH_BANDAS
+    contextos = [
+        (chave_texto(descricao), frozenset(RE_TOKEN.findall(normalizar_texto(comentario or ""))) & NEGADORES_NORM)
+        for descricao, comentario in pares
+    ]
+
+    # Graus da heurística, comparados entre membro e representante
+    graus = heuristica_lote(
+        pd.DataFrame(pares, columns=["descricao", "comentario"]), "descricao", "comentario"
+    )["grau_risco"].map(GRAUS_RISCO.index).to_numpy()
+
+    baldes: Dict[Tuple[int, Tuple[str, FrozenSet[str]], bytes], List[int]] = {}
+    representantes: List[int] = []
+    divergentes = 0
+
+    for idx, conjunto in enumerate(conjuntos):
+        representantes.append(idx)
+        if not conjunto:
+            continue
+        chaves = [
+            (banda, contextos[idx], assinaturas[idx, banda * linhas_banda:(banda + 1) * linhas_banda].tobytes())
+            for banda in range(MINHASH_BANDAS)
+        ]
+        vistos = set()
+        divergiu = False
+        for chave in chaves:
+            for candidato in baldes.get(chave, ()):
+                if candidato in vistos:
+                    continue
+                vistos.add(candidato)
+                if jaccard(conjunto, conjuntos[candidato]) < limiar:
+                    continue
+                if abs(int(graus[idx]) - int(graus[candidato])) >= divergencia:
+                    divergiu = True
+                    continue
+                representantes[idx] = candidato
+                break
+            if representantes[idx] != idx:
+                break
+
+        if representantes[idx] == idx:
+            # Novo representante: passa a receber os próximos semelhantes
+            divergentes += int(divergiu)
+            for chave in chaves:
+                baldes.setdefault(chave, []).append(idx)
+
+    return representantes, divergentes
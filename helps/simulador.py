@@ -0,0 +1,661 @@
+"""
+Simulador local da Responses API da OpenAI, para testes de carga sem rede nem custo.
+
+Duas formas de uso:
+
+- em processo, injetando um `ClienteSimulado` no lugar do cliente OpenAI:
+
+      from helps.llm import definir_cliente
+      from helps.simulador import ClienteSimulado, ConfiguracaoSimulador
+      definir_cliente(ClienteSimulado(ConfiguracaoSimulador(latencia_media=0.8, taxa_429=0.02)))
+
+- como servidor HTTP compatível com o SDK, apontando o cliente real para ele:
+
+      python -m helps.simulador --porta 8000 --taxa-429 0.02 --rpm 500
+      OPENAI_BASE_URL=http://localhost:8000/v1 OPENAI_API_KEY=x python -m helps base.xlsx ...
+
+As respostas seguem o formato usado aqui (`output[].content[].text`, com `usage`),
+trazem a saída estruturada pedida por `helps.llm` (códigos curtos de grau) e
+classificam cada comentário com a heurística local. Instruções repetidas com
+1024 tokens ou mais aparecem como `cached_tokens`, como no cache de prompt da API. Latência, erros 429/500,
+JSON malformado, texto vazio e limites de RPM/TPM (com os cabeçalhos
+`x-ratelimit-*` e `retry-after`) são configuráveis.
+
+Os endpoints de arquivos e batches (`files.create`, `files.content`,
+`batches.create/retrieve/cancel`) também são simulados, para testar o modo
+Batch API: o batch fica pronto após `duracao_batch` segundos.
+"""
+
+import argparse
+import email.policy
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import CODIGOS_GRAU, MODELO_GPT
+from .execucao import LimitadorTaxa, estimar_tokens
+from .heuristica import heuristica_risco_explicacao
+
+DISTRIBUICOES_LATENCIA = ("fixa", "uniforme", "exponencial", "lognormal")
+
+CODIGO_POR_GRAU = {grau: codigo for codigo, grau in CODIGOS_GRAU.items()}
+MINIMO_TOKENS_CACHE_PROMPT = 1024
+
+
+@dataclass
+class ConfiguracaoSimulador:
+    """Comportamento do simulador; taxas são probabilidades por requisição (0 a 1)."""
+
+    latencia: str = "lognormal"  # uma de DISTRIBUICOES_LATENCIA
+    latencia_media: float = 0.8  # segundos (mediana na lognormal)
+    latencia_dispersao: float = 0.5  # sigma da lognormal; amplitude relativa da uniforme
+    segundos_por_token_saida: float = 0.0  # acrescentado à latência, proporcional à resposta
+    taxa_429: float = 0.0
+    taxa_500: float = 0.0
+    taxa_json_invalido: float = 0.0
+    taxa_texto_vazio: float = 0.0
+    retry_after: float = 1.0  # segundos informados nos 429 sorteados por `taxa_429`
+    rpm: int = 0  # limite da conta simulada (0 = sem limite); excedido, responde 429
+    tpm: int = 0
+    grau_fixo: Optional[str] = None  # responde sempre este grau em vez de usar a heurística
+    duracao_batch: float = 2.0  # segundos até um batch ficar pronto (Batch API)
+    taxa_batch_expirado: float = 0.0  # fração dos itens de cada batch não processados na janela
+    semente: Optional[int] = None
+
+
+class ErroApiSimulado(Exception):
+    """
+    Erro HTTP do simulador, com os mesmos atributos usados dos erros do SDK
+    (`status_code`, `response.headers`, `body`).
+    """
+
+    def __init__(self, status_code: int, mensagem: str, cabecalhos: Dict[str, str], corpo: Dict[str, Any]):
+        super().__init__(f"Error code: {status_code} - {mensagem}")
+        self.status_code = status_code
+        self.message = mensagem
+        self.response = SimpleNamespace(status_code=status_code, headers=cabecalhos)
+        self.body = corpo
+
+
+class ErroTimeoutSimulado(TimeoutError):
+    """Latência sorteada maior que o `timeout` da requisição (como o `APITimeoutError` do SDK)."""
+
+
+def _duracao(segundos: float) -> str:
+    """Formato dos cabeçalhos x-ratelimit-reset-* ("20ms", "1.5s")."""
+    if segundos < 1:
+        return f"{max(0, math.ceil(segundos * 1000))}ms"
+    return f"{segundos:.3g}s"
+
+
+class SimuladorResponses:
+    """
+    Núcleo do simulador: decide o desfecho de cada requisição e monta a resposta.
+    Compartilhado entre threads; `contagem` acumula as respostas por tipo.
+    """
+
+    def __init__(self, configuracao: Optional[ConfiguracaoSimulador] = None):
+        self.configuracao = configuracao or ConfiguracaoSimulador()
+        if self.configuracao.latencia not in DISTRIBUICOES_LATENCIA:
+            raise ValueError(f"Distribuição de latência desconhecida: {self.configuracao.latencia}")
+        self.limitador = LimitadorTaxa(rpm=self.configuracao.rpm, tpm=self.configuracao.tpm)
+        self.contagem: Counter = Counter()
+        self._prefixos: set = set()
+        self._aleatorio = random.Random(self.configuracao.semente)
+        self._lock = threading.Lock()
+
+    def _sortear(self) -> float:
+        with self._lock:
+            return self._aleatorio.random()
+
+    def latencia(self, tokens_saida: int = 0) -> float:
+        """Sorteia a latência de uma resposta com `tokens_saida` tokens."""
+        config = self.configuracao
+        media = config.latencia_media
+        with self._lock:
+            if config.latencia == "uniforme":
+                amplitude = media * config.latencia_dispersao
+                base = self._aleatorio.uniform(media - amplitude, media + amplitude)
+            elif config.latencia == "exponencial":
+                base = self._aleatorio.expovariate(1 / media) if media > 0 else 0.0
+            elif config.latencia == "lognormal":
+                sigma = config.latencia_dispersao
+                base = self._aleatorio.lognormvariate(math.log(media), sigma) if media > 0 else 0.0
+            else:
+                base = media
+        return max(0.0, base) + tokens_saida * config.segundos_por_token_saida
+
+    def _cabecalhos_limite(self) -> Dict[str, str]:
+        cabecalhos = {}
+        requisicoes, tokens = self.limitador.disponivel()
+        for nome, limite, disponivel in (
+            ("requests", self.limitador.rpm, requisicoes),
+            ("tokens", self.limitador.tpm, tokens),
+        ):
+            if limite:
+                cabecalhos[f"x-ratelimit-limit-{nome}"] = str(limite)
+                cabecalhos[f"x-ratelimit-remaining-{nome}"] = str(max(0, int(disponivel)))
+                cabecalhos[f"x-ratelimit-reset-{nome}"] = _duracao((limite - disponivel) * 60 / limite)
+        return cabecalhos
+
+    def _classificar(self, descricao: Optional[str], comentario: Optional[str]) -> Tuple[str, str]:
+        if self.configuracao.grau_fixo:
+            return self.configuracao.grau_fixo, "Classificação simulada."
+        return heuristica_risco_explicacao(descricao, comentario)
+
+    def _texto_resposta(self, entrada: str) -> str:
+        """
+        Resposta "correta" no formato estruturado de `helps.llm`: {"itens": [...]}
+        para lotes, {"g", "e"} para um comentário. Entradas que não são JSON são
+        tratadas como o próprio comentário.
+        """
+        try:
+            dados = json.loads(entrada)
+        except ValueError:
+            dados = {"comentario": entrada}
+        if not isinstance(dados, dict):
+            dados = {"comentario": entrada}
+
+        def classificar(item: Dict[str, Any]) -> Dict[str, Any]:
+            grau, explicacao = self._classificar(item.get("contexto"), item.get("comentario"))
+            return {"g": CODIGO_POR_GRAU.get(grau, grau), "e": explicacao}
+
+        if isinstance(dados.get("itens"), list):
+            itens = [{"id": item.get("id"), **classificar(item)} for item in dados["itens"] if isinstance(item, dict)]
+            return json.dumps({"itens": itens}, ensure_ascii=False)
+        return json.dumps(classificar(dados), ensure_ascii=False)
+
+    def _tokens_em_cache(self, instrucoes: str) -> int:
+        """
+        Cache de prompt como o do provedor: instruções idênticas a uma requisição
+        anterior, a partir de 1024 tokens, contam como em cache em blocos de 128.
+        """
+        tokens = estimar_tokens(instrucoes)
+        if tokens < MINIMO_TOKENS_CACHE_PROMPT:
+            return 0
+        chave = hash(instrucoes)
+        with self._lock:
+            if chave not in self._prefixos:
+                self._prefixos.add(chave)
+                return 0
+        return tokens // 128 * 128
+
+    def _contar(self, desfecho: str) -> None:
+        with self._lock:
+            self.contagem[desfecho] += 1
+
+    def _erro(
+        self, status: int, tipo: str, mensagem: str, cabecalhos: Dict[str, str]
+    ) -> Tuple[int, Dict[str, str], Dict[str, Any]]:
+        self._contar(str(status))
+        return status, cabecalhos, {"error": {"message": mensagem, "type": tipo, "param": None, "code": tipo}}
+
+    def responder(
+        self, parametros: Dict[str, Any], limitar: bool = True
+    ) -> Tuple[int, Dict[str, str], Dict[str, Any]]:
+        """
+        Processa os parâmetros de `responses.create` e retorna (status HTTP,
+        cabeçalhos, corpo JSON), sem esperar a latência. `limitar=False` ignora
+        o RPM/TPM da conta (itens de batch têm cota própria).
+        """
+        config = self.configuracao
+        instrucoes = str(parametros.get("instructions") or "")
+        entrada = parametros.get("input") or ""
+        if not isinstance(entrada, str):
+            entrada = json.dumps(entrada, ensure_ascii=False)
+        tokens_entrada = estimar_tokens(instrucoes + entrada)
+        tokens_pedidos = tokens_entrada + int(parametros.get("max_output_tokens") or 0)
+
+        # Limite da conta simulada: como na API, excedê-lo responde 429 com o tempo de espera
+        espera = self.limitador.tentar(tokens_pedidos) if limitar else 0.0
+        cabecalhos = self._cabecalhos_limite()
+        if espera:
+            cabecalhos.update({"retry-after": str(math.ceil(espera)), "retry-after-ms": str(math.ceil(espera * 1000))})
+            return self._erro(429, "rate_limit_exceeded", "Rate limit reached (simulated).", cabecalhos)
+
+        sorteio = self._sortear()
+        if sorteio < config.taxa_429:
+            cabecalhos.update({
+                "retry-after": str(math.ceil(config.retry_after)),
+                "retry-after-ms": str(math.ceil(config.retry_after * 1000)),
+            })
+            return self._erro(429, "rate_limit_exceeded", "Rate limit reached (simulated).", cabecalhos)
+        sorteio -= config.taxa_429
+        if sorteio < config.taxa_500:
+            return self._erro(500, "server_error", "The server had an error (simulated).", cabecalhos)
+        sorteio -= config.taxa_500
+
+        texto = self._texto_resposta(entrada)
+        if sorteio < config.taxa_json_invalido:
+            # Como uma resposta cortada por max_output_tokens
+            texto = texto[:max(1, len(texto) // 2)]
+            self._contar("json_invalido")
+        elif sorteio < config.taxa_json_invalido + config.taxa_texto_vazio:
+            texto = ""
+            self._contar("texto_vazio")
+        else:
+            self._contar("200")
+
+        tokens_saida = estimar_tokens(texto) if texto else 0
+        corpo = {
+            "id": f"resp_{uuid.uuid4().hex}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "status": "completed",
+            "model": parametros.get("model") or MODELO_GPT,
+            "output": [{
+                "type": "message",
+                "id": f"msg_{uuid.uuid4().hex}",
+                "status": "completed",
+                "role": "assistant",
+                "content": [{"type": "output_text", "text": texto, "annotations": []}],
+            }],
+            "usage": {
+                "input_tokens": tokens_entrada,
+                "input_tokens_details": {"cached_tokens": self._tokens_em_cache(instrucoes)},
+                "output_tokens": tokens_saida,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": tokens_entrada + tokens_saida,
+            },
+        }
+        return 200, cabecalhos, corpo
+
+
+class ErroNaoEncontrado(KeyError):
+    """Arquivo ou batch inexistente no simulador (404 na API)."""
+
+
+class SimuladorBatches:
+    """
+    Arquivos e batches (`/v1/files`, `/v1/batches`) em memória.
+
+    Um batch fica `in_progress` por `duracao_batch` segundos, com a contagem de
+    itens avançando proporcionalmente; ao ser consultado depois disso, cada linha
+    é respondida por `SimuladorResponses.responder` (com as mesmas taxas de erro,
+    sem o limite de RPM/TPM) e os arquivos de saída e de erros são gerados.
+    """
+
+    def __init__(self, simulador: SimuladorResponses, relogio: Callable[[], float] = time.time):
+        self.simulador = simulador
+        self.arquivos: Dict[str, Dict[str, Any]] = {}
+        self.conteudos: Dict[str, bytes] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self._inicios: Dict[str, float] = {}
+        self._relogio = relogio
+        self._lock = threading.Lock()
+
+    def criar_arquivo(self, conteudo: bytes, nome: str, proposito: str) -> Dict[str, Any]:
+        with self._lock:
+            return self._gravar_arquivo(conteudo, nome, proposito)
+
+    def _gravar_arquivo(self, conteudo: bytes, nome: str, proposito: str) -> Dict[str, Any]:
+        arquivo = {
+            "id": f"file-{uuid.uuid4().hex}",
+            "object": "file",
+            "bytes": len(conteudo),
+            "created_at": int(self._relogio()),
+            "filename": nome,
+            "purpose": proposito,
+            "status": "processed",
+        }
+        self.arquivos[arquivo["id"]] = arquivo
+        self.conteudos[arquivo["id"]] = conteudo
+        return arquivo
+
+    def conteudo_arquivo(self, id_arquivo: str) -> bytes:
+        with self._lock:
+            if id_arquivo not in self.conteudos:
+                raise ErroNaoEncontrado(id_arquivo)
+            return self.conteudos[id_arquivo]
+
+    def criar_batch(
+        self,
+        input_file_id: str,
+        endpoint: str,
+        completion_window: str = "24h",
+        metadata: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        with self._lock:
+            if input_file_id not in self.conteudos:
+                raise ErroNaoEncontrado(input_file_id)
+            linhas = [linha for linha in self.conteudos[input_file_id].splitlines() if linha.strip()]
+            agora = int(self._relogio())
+            batch = {
+                "id": f"batch_{uuid.uuid4().hex}",
+                "object": "batch",
+                "endpoint": endpoint,
+                "input_file_id": input_file_id,
+                "completion_window": completion_window,
+                "status": "in_progress",
+                "output_file_id": None,
+                "error_file_id": None,
+                "created_at": agora,
+                "in_progress_at": agora,
+                "completed_at": None,
+                "expired_at": None,
+                "cancelled_at": None,
+                "errors": None,
+                "request_counts": {"total": len(linhas), "completed": 0, "failed": 0},
+                "metadata": metadata or {},
+            }
+            self.batches[batch["id"]] = batch
+            self._inicios[batch["id"]] = self._relogio()
+            return dict(batch)
+
+    def obter_batch(self, id_batch: str) -> Dict[str, Any]:
+        with self._lock:
+            batch = self.batches.get(id_batch)
+            if batch is None:
+                raise ErroNaoEncontrado(id_batch)
+            if batch["status"] == "in_progress":
+                decorrido = self._relogio() - self._inicios[id_batch]
+                duracao = self.simulador.configuracao.duracao_batch
+                if decorrido >= duracao:
+                    self._concluir(batch)
+                else:
+                    total = batch["request_counts"]["total"]
+                    batch["request_counts"]["completed"] = int(total * decorrido / duracao) if duracao else total
+            return dict(batch)
+
+    def cancelar_batch(self, id_batch: str) -> Dict[str, Any]:
+        with self._lock:
+            batch = self.batches.get(id_batch)
+            if batch is None:
+                raise ErroNaoEncontrado(id_batch)
+            if batch["status"] == "in_progress":
+                batch["status"], batch["cancelled_at"] = "cancelled", int(self._relogio())
+            return dict(batch)
+
+    def _concluir(self, batch: Dict[str, Any]) -> None:
+        """Responde às linhas do batch e grava os arquivos de saída e de erros."""
+        config = self.simulador.configuracao
+        saida, erros = [], []
+        linhas = [linha for linha in self.conteudos[batch["input_file_id"]].splitlines() if linha.strip()]
+        processar = len(linhas) - int(len(linhas) * config.taxa_batch_expirado)
+        for numero, linha in enumerate(linhas):
+            requisicao = json.loads(linha)
+            registro = {"id": f"batch_req_{uuid.uuid4().hex}", "custom_id": requisicao.get("custom_id")}
+            if numero >= processar:
+                erro = {"code": "batch_expired", "message": "This request could not be executed before the "
+                                                           "completion window expired."}
+                erros.append({**registro, "response": None, "error": erro})
+                continue
+            status, _, corpo = self.simulador.responder(requisicao.get("body") or {}, limitar=False)
+            resposta = {"status_code": status, "request_id": f"req_{uuid.uuid4().hex}", "body": corpo}
+            (saida if status == 200 else erros).append({**registro, "response": resposta, "error": None})
+
+        def jsonl(registros: List[Dict[str, Any]]) -> bytes:
+            return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in registros).encode("utf-8")
+
+        agora = int(self._relogio())
+        if saida:
+            batch["output_file_id"] = self._gravar_arquivo(jsonl(saida), "batch_output.jsonl", "batch_output")["id"]
+        if erros:
+            batch["error_file_id"] = self._gravar_arquivo(jsonl(erros), "batch_errors.jsonl", "batch_output")["id"]
+        batch["request_counts"] = {"total": len(linhas), "completed": len(saida), "failed": len(erros)}
+        if processar < len(linhas):
+            batch["status"], batch["expired_at"] = "expired", agora
+        else:
+            batch["status"], batch["completed_at"] = "completed", agora
+
+
+def _objeto(valor: Any) -> Any:
+    """JSON em objetos com atributos, como os modelos do SDK (`response.output[0].content`)."""
+    if isinstance(valor, dict):
+        return SimpleNamespace(**{chave: _objeto(v) for chave, v in valor.items()})
+    if isinstance(valor, list):
+        return [_objeto(v) for v in valor]
+    return valor
+
+
+class ClienteSimulado:
+    """
+    Substituto em processo do cliente OpenAI: `cliente.responses.create(...)`
+    espera a latência sorteada e retorna a resposta ou levanta `ErroApiSimulado`
+    (ou `ErroTimeoutSimulado`, se a latência passar do `timeout` informado).
+    """
+
+    def __init__(self, configuracao: Optional[ConfiguracaoSimulador] = None, dormir: bool = True):
+        self.simulador = SimuladorResponses(configuracao)
+        self.dormir = dormir
+        self.responses = SimpleNamespace(create=self.create)
+        self.simulador_batches = SimuladorBatches(self.simulador)
+        self.files = SimpleNamespace(create=self._criar_arquivo, content=self._conteudo_arquivo)
+        # `timeout` é aceito como no SDK, mas ignorado: arquivos e batches respondem na hora
+        self.batches = SimpleNamespace(
+            create=lambda timeout=None, **parametros: _objeto(self.simulador_batches.criar_batch(**parametros)),
+            retrieve=lambda id_batch, timeout=None: _objeto(self.simulador_batches.obter_batch(id_batch)),
+            cancel=lambda id_batch, timeout=None: _objeto(self.simulador_batches.cancelar_batch(id_batch)),
+        )
+
+    @property
+    def contagem(self) -> Counter:
+        return self.simulador.contagem
+
+    def create(self, timeout: Optional[float] = None, **parametros: Any) -> Any:
+        status, cabecalhos, corpo = self.simulador.responder(parametros)
+        tokens_saida = corpo["usage"]["output_tokens"] if status == 200 else 0
+        latencia = self.simulador.latencia(tokens_saida)
+        if timeout is not None and latencia > timeout:
+            if self.dormir:
+                time.sleep(timeout)
+            raise ErroTimeoutSimulado("Request timed out (simulated).")
+        if self.dormir:
+            time.sleep(latencia)
+        if status != 200:
+            raise ErroApiSimulado(status, corpo["error"]["message"], cabecalhos, corpo)
+        return _objeto(corpo)
+
+    def _criar_arquivo(self, file: Any, purpose: str, timeout: Optional[float] = None) -> Any:
+        """Aceita as mesmas formas do SDK: arquivo aberto, bytes, caminho ou (nome, conteúdo)."""
+        nome = "upload.jsonl"
+        if isinstance(file, tuple):
+            nome, file = file[0], file[1]
+        if hasattr(file, "read"):
+            nome = os.path.basename(getattr(file, "name", nome))
+            conteudo = file.read()
+        elif isinstance(file, (str, os.PathLike)):
+            nome = os.path.basename(file)
+            with open(file, "rb") as arquivo:
+                conteudo = arquivo.read()
+        else:
+            conteudo = file
+        if isinstance(conteudo, str):
+            conteudo = conteudo.encode("utf-8")
+        return _objeto(self.simulador_batches.criar_arquivo(conteudo, nome, purpose))
+
+    def _conteudo_arquivo(self, id_arquivo: str, timeout: Optional[float] = None) -> Any:
+        conteudo = self.simulador_batches.conteudo_arquivo(id_arquivo)
+        return SimpleNamespace(content=conteudo, text=conteudo.decode("utf-8"), read=lambda: conteudo)
+
+
+# ============================================================================
+# SERVIDOR HTTP
+# ============================================================================
+
+def _ler_multipart(tipo_conteudo: str, corpo: bytes) -> Dict[str, Tuple[Optional[str], bytes]]:
+    """Campos de um corpo multipart/form-data: nome -> (nome do arquivo, conteúdo)."""
+    mensagem = BytesParser(policy=email.policy.HTTP).parsebytes(
+        f"Content-Type: {tipo_conteudo}\r\n\r\n".encode("latin-1") + corpo
+    )
+    campos = {}
+    for parte in mensagem.iter_parts():
+        nome = parte.get_param("name", header="content-disposition")
+        if nome:
+            campos[nome] = (parte.get_filename(), parte.get_payload(decode=True) or b"")
+    return campos
+
+
+def criar_servidor(
+    configuracao: Optional[ConfiguracaoSimulador] = None,
+    host: str = "127.0.0.1",
+    porta: int = 8000,
+) -> ThreadingHTTPServer:
+    """
+    Servidor que atende `POST /v1/responses`, `/v1/files` e `/v1/batches` como a
+    API (uma thread por conexão).
+    """
+    simulador = SimuladorResponses(configuracao)
+    batches = SimuladorBatches(simulador)
+
+    class Tratador(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _enviar(self, status: int, cabecalhos: Dict[str, str], corpo: Any) -> None:
+            if isinstance(corpo, bytes):
+                dados, tipo = corpo, "application/octet-stream"
+            else:
+                dados, tipo = json.dumps(corpo, ensure_ascii=False).encode("utf-8"), "application/json"
+            self.send_response(status)
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(dados)))
+            for nome, valor in cabecalhos.items():
+                self.send_header(nome, valor)
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def _erro(self, status: int, mensagem: str) -> None:
+            self._enviar(status, {}, {"error": {"message": mensagem, "type": "invalid_request_error"}})
+
+        def _partes(self) -> List[str]:
+            caminho = self.path.split("?", 1)[0].strip("/").split("/")
+            return caminho[1:] if caminho[:1] == ["v1"] else caminho
+
+        def do_GET(self) -> None:
+            partes = self._partes()
+            try:
+                if len(partes) == 3 and partes[0] == "files" and partes[2] == "content":
+                    self._enviar(200, {}, batches.conteudo_arquivo(partes[1]))
+                elif len(partes) == 2 and partes[0] == "files":
+                    batches.conteudo_arquivo(partes[1])
+                    self._enviar(200, {}, batches.arquivos[partes[1]])
+                elif len(partes) == 2 and partes[0] == "batches":
+                    self._enviar(200, {}, batches.obter_batch(partes[1]))
+                else:
+                    self._erro(404, f"Unknown path {self.path}")
+            except ErroNaoEncontrado as erro:
+                self._erro(404, f"No such object: {erro.args[0]}")
+
+        def do_POST(self) -> None:
+            tamanho = int(self.headers.get("Content-Length") or 0)
+            corpo = self.rfile.read(tamanho)
+            partes = self._partes()
+
+            if partes == ["files"]:
+                campos = _ler_multipart(self.headers.get("Content-Type", ""), corpo)
+                if "file" not in campos:
+                    self._erro(400, "Missing file")
+                    return
+                nome, conteudo = campos["file"]
+                proposito = campos.get("purpose", (None, b"batch"))[1].decode("utf-8")
+                self._enviar(200, {}, batches.criar_arquivo(conteudo, nome or "upload.jsonl", proposito))
+                return
+            if len(partes) == 3 and partes[0] == "batches" and partes[2] == "cancel":
+                try:
+                    self._enviar(200, {}, batches.cancelar_batch(partes[1]))
+                except ErroNaoEncontrado as erro:
+                    self._erro(404, f"No such batch: {erro.args[0]}")
+                return
+            if partes not in (["responses"], ["batches"]):
+                self._erro(404, f"Unknown path {self.path}")
+                return
+
+            try:
+                parametros = json.loads(corpo or b"{}")
+            except ValueError:
+                self._erro(400, "Invalid JSON body")
+                return
+            if partes == ["batches"]:
+                try:
+                    self._enviar(200, {}, batches.criar_batch(**parametros))
+                except (ErroNaoEncontrado, TypeError) as erro:
+                    self._erro(400, f"Invalid batch: {erro}")
+                return
+
+            status, cabecalhos, resposta = simulador.responder(parametros)
+            tokens_saida = resposta["usage"]["output_tokens"] if status == 200 else 0
+            time.sleep(simulador.latencia(tokens_saida))
+            self._enviar(status, cabecalhos, resposta)
+
+        def log_message(self, formato: str, *args: Any) -> None:
+            pass
+
+    servidor = ThreadingHTTPServer((host, porta), Tratador)
+    servidor.daemon_threads = True
+    servidor.simulador = simulador
+    servidor.simulador_batches = batches
+    return servidor
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m helps.simulador",
+        description="Servidor local que simula a Responses API e a Batch API da OpenAI.",
+    )
+    padrao = ConfiguracaoSimulador()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--latencia", choices=DISTRIBUICOES_LATENCIA, default=padrao.latencia)
+    parser.add_argument("--latencia-media", type=float, default=padrao.latencia_media, help="Segundos")
+    parser.add_argument("--latencia-dispersao", type=float, default=padrao.latencia_dispersao)
+    parser.add_argument("--segundos-por-token", type=float, default=padrao.segundos_por_token_saida)
+    parser.add_argument("--taxa-429", type=float, default=0.0)
+    parser.add_argument("--taxa-500", type=float, default=0.0)
+    parser.add_argument("--taxa-json-invalido", type=float, default=0.0)
+    parser.add_argument("--taxa-texto-vazio", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=padrao.retry_after)
+    parser.add_argument("--rpm", type=int, default=0, help="Limite de requisições por minuto (0 = sem limite)")
+    parser.add_argument("--tpm", type=int, default=0, help="Limite de tokens por minuto (0 = sem limite)")
+    parser.add_argument(
+        "--duracao-batch", type=float, default=padrao.duracao_batch, help="Segundos até um batch ficar pronto"
+    )
+    parser.add_argument(
+        "--taxa-batch-expirado", type=float, default=0.0, help="Fração dos itens de cada batch que expiram"
+    )
+    parser.add_argument("--semente", type=int)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = criar_parser().parse_args(argv)
+    configuracao = ConfiguracaoSimulador(
+        latencia=args.latencia,
+        latencia_media=args.latencia_media,
+        latencia_dispersao=args.latencia_dispersao,
+        segundos_por_token_saida=args.segundos_por_token,
+        taxa_429=args.taxa_429,
+        taxa_500=args.taxa_500,
+        taxa_json_invalido=args.taxa_json_invalido,
+        taxa_texto_vazio=args.taxa_texto_vazio,
+        retry_after=args.retry_after,
+        rpm=args.rpm,
+        tpm=args.tpm,
+        duracao_batch=args.duracao_batch,
+        taxa_batch_expirado=args.taxa_batch_expirado,
+        semente=args.semente,
+    )
+    servidor = criar_servidor(configuracao, args.host, args.porta)
+    print(f"Simulador em http://{args.host}:{args.porta}/v1 (Ctrl+C para encerrar)", file=sys.stderr)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        print(f"\nRespostas: {dict(servidor.simulador.contagem)}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
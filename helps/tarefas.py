@@ -0,0 +1,274 @@
+"""
+Tarefas de curadoria em segundo plano, desacopladas da sessão do Streamlit.
+
+Um `GerenciadorTarefas` mantém uma fila atendida por um pool de threads: cada
+tarefa tem um id, estado e progresso consultáveis a qualquer momento, e o
+arquivo de resultado fica em disco até a tarefa ser descartada. O id de uma
+curadoria é derivado do conteúdo e das opções, então o mesmo pedido feito por
+duas pessoas reaproveita a tarefa já existente em vez de processar de novo.
+"""
+
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from .arquivos import gravar_com_resultados, iterar_blocos
+from .checkpoint import CheckpointExecucao, chave_execucao
+from .config import NOME_COLUNA_ORIGEM, PASTA_TAREFAS_PADRAO, TAREFAS_RETIDAS_PADRAO, TAREFAS_SIMULTANEAS_PADRAO
+from .execucao import limitar_progresso
+from .incremental import Reaproveitamento
+from .metricas import MetricasExecucao
+from .pipeline import EstatisticasProcessamento, OpcoesProcessamento, processar_blocos
+
+NA_FILA = "na_fila"
+EXECUTANDO = "executando"
+CONCLUIDA = "concluida"
+FALHOU = "falhou"
+
+
+@dataclass
+class Tarefa:
+    """Estado de uma tarefa; atualizado pela thread de trabalho e lido pela interface."""
+
+    id: str
+    descricao: str
+    estado: str = NA_FILA
+    etapa: str = "Aguardando na fila"
+    concluidos: int = 0
+    total: int = 0
+    criada_em: float = field(default_factory=time.time)
+    iniciada_em: Optional[float] = None
+    finalizada_em: Optional[float] = None
+    erro: Optional[str] = None
+    resultado: Any = None
+    arquivos: List[str] = field(default_factory=list)
+
+    @property
+    def finalizada(self) -> bool:
+        return self.estado in (CONCLUIDA, FALHOU)
+
+    @property
+    def progresso(self) -> float:
+        if self.estado == CONCLUIDA:
+            return 1.0
+        return self.concluidos / self.total if self.total else 0.0
+
+    def atualizar_progresso(self, concluidos: int, total: int) -> None:
+        self.concluidos, self.total = concluidos, total
+
+
+class GerenciadorTarefas:
+    """
+    Fila de tarefas atendida por até `max_simultaneas` threads.
+
+    Tarefas finalizadas além de `max_retidas` são descartadas (das mais antigas
+    para as mais novas), junto com os arquivos que produziram.
+    """
+
+    def __init__(
+        self,
+        max_simultaneas: int = TAREFAS_SIMULTANEAS_PADRAO,
+        max_retidas: int = TAREFAS_RETIDAS_PADRAO,
+    ):
+        self.max_retidas = max_retidas
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_simultaneas), thread_name_prefix="helps-tarefa")
+        self._tarefas: "OrderedDict[str, Tarefa]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submeter(self, id_tarefa: str, descricao: str, funcao: Callable[[Tarefa], Any]) -> Tarefa:
+        """
+        Enfileira `funcao(tarefa)`. Se já existir uma tarefa com o mesmo id que não
+        tenha falhado, ela é retornada e nada novo é processado.
+        """
+        with self._lock:
+            existente = self._tarefas.get(id_tarefa)
+            if existente and existente.estado != FALHOU and all(map(os.path.exists, existente.arquivos)):
+                return existente
+            tarefa = self._tarefas[id_tarefa] = Tarefa(id=id_tarefa, descricao=descricao)
+            self._tarefas.move_to_end(id_tarefa)
+        self._executor.submit(self._executar, tarefa, funcao)
+        self._descartar_antigas()
+        return tarefa
+
+    def _executar(self, tarefa: Tarefa, funcao: Callable[[Tarefa], Any]) -> None:
+        tarefa.estado, tarefa.etapa, tarefa.iniciada_em = EXECUTANDO, "Iniciando", time.time()
+        try:
+            tarefa.resultado = funcao(tarefa)
+            tarefa.estado, tarefa.etapa = CONCLUIDA, "Concluída"
+        except Exception as erro:
+            tarefa.erro = f"{type(erro).__name__}: {erro}"
+            tarefa.estado, tarefa.etapa = FALHOU, "Falhou"
+        finally:
+            tarefa.finalizada_em = time.time()
+        self._descartar_antigas()
+
+    def obter(self, id_tarefa: str) -> Optional[Tarefa]:
+        with self._lock:
+            return self._tarefas.get(id_tarefa.strip())
+
+    def listar(self) -> List[Tarefa]:
+        """Tarefas da mais recente para a mais antiga."""
+        with self._lock:
+            return list(reversed(self._tarefas.values()))
+
+    def _descartar_antigas(self) -> None:
+        with self._lock:
+            finalizadas = [t for t in self._tarefas.values() if t.finalizada]
+            descartadas = finalizadas[:max(0, len(finalizadas) - self.max_retidas)]
+            for tarefa in descartadas:
+                del self._tarefas[tarefa.id]
+        for tarefa in descartadas:
+            for caminho in tarefa.arquivos:
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+
+    def encerrar(self, aguardar: bool = True) -> None:
+        self._executor.shutdown(wait=aguardar, cancel_futures=not aguardar)
+
+
+# ============================================================================
+# CURADORIA COMO TAREFA
+# ============================================================================
+
+@dataclass
+class PedidoCuradoria:
+    """Tudo o que uma curadoria precisa para rodar sem a sessão que a pediu."""
+
+    conteudo: bytes
+    nome: str
+    col_descricao: Optional[str]
+    col_comentario: str
+    nome_col_risco: str
+    nome_col_explicacao: str
+    opcoes: OpcoesProcessamento = field(default_factory=OpcoesProcessamento)
+    nome_col_origem: str = NOME_COLUNA_ORIGEM
+    formato: str = ".xlsx"
+    preservar_original: bool = True
+    usar_checkpoint: bool = True
+    perfilar: bool = False
+    hash_conteudo: str = ""
+    # Processamento incremental: saída curada anterior e coluna de ID do registro
+    conteudo_anterior: Optional[bytes] = None
+    nome_anterior: str = ""
+    col_id: Optional[str] = None
+    hash_anterior: str = ""
+
+    def __post_init__(self):
+        if not self.hash_conteudo:
+            self.hash_conteudo = hashlib.sha256(self.conteudo).hexdigest()
+        if self.conteudo_anterior is not None and not self.hash_anterior:
+            self.hash_anterior = hashlib.sha256(self.conteudo_anterior).hexdigest()
+
+    def id_tarefa(self) -> str:
+        """Id curto e determinístico: mesmo arquivo e mesmas opções, mesma tarefa."""
+        partes = [
+            self.hash_conteudo, self.col_descricao or "", self.col_comentario,
+            self.nome_col_risco, self.nome_col_explicacao, self.nome_col_origem, self.formato,
+            str(self.preservar_original), str(self.perfilar), repr(self.opcoes),
+            self.hash_anterior, self.col_id or "",
+        ]
+        return hashlib.sha256("\x1f".join(partes).encode("utf-8")).hexdigest()[:12]
+
+
+@dataclass
+class ResultadoCuradoria:
+    caminho: str
+    formato: str
+    contagem: Dict[str, int]
+    estatisticas: EstatisticasProcessamento
+    previa: pd.DataFrame
+    opcoes: OpcoesProcessamento
+
+
+def executar_curadoria(pedido: PedidoCuradoria, tarefa: Tarefa, pasta: str = PASTA_TAREFAS_PADRAO) -> ResultadoCuradoria:
+    """Classifica a base do pedido e grava o arquivo de saída em `pasta`."""
+    colunas = [c for c in (pedido.col_descricao, pedido.col_comentario) if c]
+
+    checkpoint = None
+    if pedido.usar_checkpoint and not pedido.opcoes.somente_heuristica:
+        checkpoint = CheckpointExecucao(
+            chave_execucao(
+                pedido.hash_conteudo, pedido.col_descricao, pedido.col_comentario,
+                pedido.opcoes.assinatura_resultados(), pedido.hash_anterior, pedido.col_id,
+            )
+        )
+
+    reaproveitamento = None
+    colunas_lidas = list(colunas)
+    if pedido.conteudo_anterior is not None and pedido.col_id:
+        tarefa.etapa = "Lendo a saída anterior"
+        reaproveitamento = Reaproveitamento.de_arquivo(
+            io.BytesIO(pedido.conteudo_anterior), pedido.col_id, pedido.col_descricao, pedido.col_comentario,
+            pedido.nome_col_risco, pedido.nome_col_explicacao, nome=pedido.nome_anterior,
+            col_origem=pedido.nome_col_origem,
+        )
+        if pedido.col_id not in colunas_lidas:
+            colunas_lidas.append(pedido.col_id)
+
+    metricas = MetricasExecucao()
+    tarefa.etapa = "Classificando"
+    try:
+        with metricas.perfilar(pedido.perfilar):
+            resultados, estatisticas = processar_blocos(
+                iterar_blocos(io.BytesIO(pedido.conteudo), colunas_lidas, pedido.nome),
+                pedido.col_descricao,
+                pedido.col_comentario,
+                pedido.opcoes,
+                ao_progredir=limitar_progresso(tarefa.atualizar_progresso),
+                checkpoint=checkpoint,
+                metricas=metricas,
+                reaproveitamento=reaproveitamento,
+            )
+
+        tarefa.etapa = "Gravando arquivo de saída"
+        os.makedirs(pasta, exist_ok=True)
+        caminho = os.path.join(pasta, f"{tarefa.id}{pedido.formato}")
+        tarefa.arquivos.append(caminho)
+        with metricas.etapa("gravacao"):
+            gravar_com_resultados(
+                io.BytesIO(pedido.conteudo), caminho, resultados,
+                pedido.nome_col_risco, pedido.nome_col_explicacao,
+                nome=pedido.nome, formato=pedido.formato, preservar_original=pedido.preservar_original,
+                origens=estatisticas.origens, nome_col_origem=pedido.nome_col_origem,
+            )
+
+        # Saída gravada: o progresso parcial não é mais necessário
+        if checkpoint:
+            checkpoint.descartar()
+    finally:
+        if checkpoint:
+            checkpoint.fechar()
+
+    previa = next(iterar_blocos(io.BytesIO(pedido.conteudo), colunas, pedido.nome, tamanho_bloco=10))
+    previa[pedido.nome_col_risco] = [grau for grau, _ in resultados[:len(previa)]]
+    previa[pedido.nome_col_explicacao] = [explicacao for _, explicacao in resultados[:len(previa)]]
+    previa[pedido.nome_col_origem] = estatisticas.origens[:len(previa)]
+
+    return ResultadoCuradoria(
+        caminho=caminho,
+        formato=pedido.formato,
+        contagem=dict(Counter(grau for grau, _ in resultados)),
+        estatisticas=estatisticas,
+        previa=previa,
+        opcoes=pedido.opcoes,
+    )
+
+
+def submeter_curadoria(
+    gerenciador: GerenciadorTarefas,
+    pedido: PedidoCuradoria,
+    pasta: str = PASTA_TAREFAS_PADRAO,
+) -> Tarefa:
+    """Enfileira a curadoria (ou reaproveita a tarefa idêntica já existente)."""
+    descricao = f"{pedido.nome} · {pedido.col_comentario}"
+    return gerenciador.submeter(
+        pedido.id_tarefa(), descricao, lambda tarefa: executar_curadoria(pedido, tarefa, pasta)
+    )
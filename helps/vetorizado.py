@@ -0,0 +1,354 @@
+"""
+Heurística em lote (vetorizada) sobre colunas inteiras de um DataFrame.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .config import GRAUS_RISCO, MIN_LINHAS_VETORIZADO
+from .heuristica import heuristica_com_score
+from .lexico import INTENSIFICADORES_NORM, NEGADORES_NORM, LexicoCompilado, obter_lexicos
+
+# Separador de linhas no texto concatenado da coluna (não é letra nem token;
+# NUL não serve porque o numpy descarta NULs finais ao comparar strings)
+_SEPARADOR = "\x1f"
+RE_TOKEN_OU_SEPARADOR = re.compile(r"\w+|\x1f")
+
+
+_PREDICADOS_UNICODE = {
+    "marca": lambda c: unicodedata.category(c) == 'Mn',
+    "letra": str.isalpha,
+    "maiuscula": lambda c: c.isalpha() and c.isupper(),
+}
+_LIMITE_TABELA_UNICODE = 0x3000  # latim, grego, cirílico, pontuação, símbolos comuns
+
+
+@lru_cache(maxsize=None)
+def _tabela_unicode(nome: str) -> np.ndarray:
+    """
+    Tabela booleana, indexada por code point, de um predicado de `str`/`unicodedata`
+    para os primeiros `_LIMITE_TABELA_UNICODE` code points. Construída uma vez por processo.
+    """
+    predicado = _PREDICADOS_UNICODE[nome]
+    return np.fromiter(
+        (predicado(chr(codigo)) for codigo in range(_LIMITE_TABELA_UNICODE)),
+        dtype=bool,
+        count=_LIMITE_TABELA_UNICODE,
+    )
+
+
+def _mascara_unicode(nome: str, pontos: np.ndarray) -> np.ndarray:
+    """
+    Aplica o predicado `nome` a cada code point: pela tabela, abaixo do limite,
+    e avaliando só os code points distintos acima dele (emojis, CJK...).
+    """
+    tabela = _tabela_unicode(nome)
+    baixos = pontos < len(tabela)
+    if baixos.all():
+        return tabela[pontos]
+    mascara = np.zeros(len(pontos), dtype=bool)
+    mascara[baixos] = tabela[pontos[baixos]]
+    altos, posicoes = np.unique(pontos[~baixos], return_inverse=True)
+    predicado = _PREDICADOS_UNICODE[nome]
+    mascara[~baixos] = np.fromiter((predicado(chr(c)) for c in altos.tolist()), dtype=bool, count=len(altos))[posicoes]
+    return mascara
+
+
+def _code_points(texto: str) -> np.ndarray:
+    return np.frombuffer(texto.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+
+
+def _contar_por_linha(mascara: np.ndarray, inicios: np.ndarray, tamanhos: np.ndarray) -> np.ndarray:
+    """Soma a máscara em cada segmento [inicio, inicio + tamanho) do texto concatenado."""
+    acumulado = np.concatenate(([0], np.cumsum(mascara, dtype=np.int64)))
+    return acumulado[inicios + tamanhos] - acumulado[inicios]
+
+
+def _sequencias_repetidas(pontos: np.ndarray, caractere: str) -> np.ndarray:
+    """Marca o início de cada sequência de 2+ `caractere` (equivale a findall(c{2,}))."""
+    igual = pontos == ord(caractere)
+    anterior = np.r_[False, igual[:-1]]
+    seguinte = np.r_[igual[1:], False]
+    return igual & ~anterior & seguinte
+
+
+def _achados_por_linha(padrao: re.Pattern, texto: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Aplica `padrao` (que também casa o separador) ao texto concatenado.
+    Retorna (achados, linha de cada achado), sem os separadores.
+    """
+    achados = np.array(padrao.findall(texto), dtype=object)
+    eh_separador = achados == _SEPARADOR
+    linhas = np.cumsum(eh_separador)[~eh_separador]
+    return achados[~eh_separador], linhas
+
+
+def _procurar(fatorado: Tuple[np.ndarray, np.ndarray], tabela: Dict[str, Any], padrao: Any) -> np.ndarray:
+    """
+    Consulta vetorizada de um dicionário sobre valores já fatorados (`pd.factorize`):
+    resolve só os valores distintos e espalha o resultado.
+    """
+    codigos, unicos = fatorado
+    resolvidos = np.array([tabela.get(valor, padrao) for valor in unicos] + [padrao])
+    return resolvidos[codigos]
+
+
+def _primeiros_termos(linhas: np.ndarray, nomes: np.ndarray, total: int, k: int) -> np.ndarray:
+    """Junta com ', ' os primeiros `k` nomes de cada linha (string vazia se nenhum)."""
+    juntos = np.full(total, "", dtype=object)
+    if not len(linhas):
+        return juntos
+    # Ordem dentro da linha (as ocorrências já estão ordenadas por linha)
+    inicio_grupo = np.r_[0, np.flatnonzero(np.diff(linhas)) + 1]
+    ordem = np.arange(len(linhas)) - np.repeat(inicio_grupo, np.diff(np.r_[inicio_grupo, len(linhas)]))
+    for posicao in range(k):
+        selecao = ordem == posicao
+        alvo = linhas[selecao]
+        prefixo = np.where(juntos[alvo] == "", "", juntos[alvo] + ", ")
+        juntos[alvo] = prefixo + nomes[selecao]
+    return juntos
+
+
+def _ngramas_candidatos(
+    tokens: np.ndarray, linha_token: np.ndarray, lexicos: Sequence[LexicoCompilado]
+) -> List[Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray]]]:
+    """
+    Equivalente vetorizado da descida na trie: para cada tamanho n, retorna as
+    posições iniciais e os n-gramas (fatorados) que ainda podem formar um termo,
+    isto é, cujo (n-1)-grama é prefixo de algum termo e que não cruzam linhas.
+    """
+    prefixos: Dict[int, set] = {}
+    max_n = 1
+    for lexico in lexicos:
+        for termo in lexico.pesos:
+            partes = termo.split()
+            max_n = max(max_n, len(partes))
+            for n in range(1, len(partes)):
+                prefixos.setdefault(n, set()).add(" ".join(partes[:n]))
+
+    posicoes = np.arange(len(tokens))
+    valores = tokens
+    resultado = [(posicoes, pd.factorize(valores))]
+    for n in range(2, max_n + 1):
+        eh_prefixo = _procurar(resultado[-1][1], dict.fromkeys(prefixos.get(n - 1, ()), True), False)
+        fim = posicoes + n - 1
+        continua = eh_prefixo & (fim < len(tokens))
+        continua[continua] = linha_token[fim[continua]] == linha_token[posicoes[continua]]
+        posicoes = posicoes[continua]
+        valores = valores[continua] + " " + tokens[fim[continua]]
+        resultado.append((posicoes, pd.factorize(valores)))
+    return resultado
+
+
+def _ocorrencias_lexico(
+    ngramas: List[Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray]]], lexico: LexicoCompilado
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Localiza os termos do léxico entre os n-gramas candidatos.
+    Retorna (índice global do token inicial, id do termo em `lexico.ordem`) na
+    mesma ordem da busca por linha: por posição e, na mesma posição, do termo
+    mais curto ao mais longo.
+    """
+    indices, tamanhos, ids = [], [], []
+    for n, (posicoes, fatorado) in enumerate(ngramas, start=1):
+        id_termo = _procurar(fatorado, lexico.ordem, -1)
+        encontrados = id_termo >= 0
+        indices.append(posicoes[encontrados])
+        tamanhos.append(np.full(int(encontrados.sum()), n))
+        ids.append(id_termo[encontrados])
+
+    indice = np.concatenate(indices)
+    ordem = np.lexsort((np.concatenate(tamanhos), indice))
+    return indice[ordem], np.concatenate(ids)[ordem]
+
+
+def heuristica_lote(df: pd.DataFrame, col_descricao: Optional[str], col_comentario: str) -> pd.DataFrame:
+    """
+    Versão vetorizada de `heuristica_risco_explicacao` para colunas inteiras.
+
+    Os textos da coluna são concatenados (com um separador de controle) e processados de uma
+    vez: normalização Unicode, contagem de letras/maiúsculas por tabelas de code
+    points e tokenização em uma única passada de regex. Os termos do léxico formam
+    uma matriz esparsa linha × ocorrência cujos pesos ajustados por contexto são
+    somados por linha com `np.bincount`. O resultado é idêntico ao da função por linha.
+
+    Abaixo de `MIN_LINHAS_VETORIZADO` linhas, o custo fixo das operações em lote
+    supera o ganho e cada linha passa pela função por linha.
+
+    Retorna um DataFrame com o mesmo índice de `df` e as colunas
+    "grau_risco", "explicacao" e "score".
+    """
+    total = len(df)
+
+    def como_texto(serie: pd.Series) -> pd.Series:
+        # Mesma conversão da interface: ausentes viram vazio, o resto passa por str()
+        serie = serie.reset_index(drop=True).astype(object)
+        return serie.map(str, na_action="ignore").where(serie.notna(), "").astype(object)
+
+    comentario = como_texto(df[col_comentario])
+    descricao = como_texto(df[col_descricao]) if col_descricao else pd.Series([""] * total, dtype=object)
+
+    if total < MIN_LINHAS_VETORIZADO:
+        resultados = [heuristica_com_score(d, c) for d, c in zip(descricao.tolist(), comentario.tolist())]
+        return pd.DataFrame(
+            {
+                "grau_risco": pd.Categorical([grau for grau, _, _ in resultados], categories=GRAUS_RISCO),
+                "explicacao": [explicacao for _, explicacao, _ in resultados],
+                "score": np.array([score for _, _, score in resultados], dtype=float),
+            }
+        ).set_index(df.index)
+
+    texto = (descricao + " " + comentario).str.strip().str.replace(_SEPARADOR, " ", regex=False)
+    tamanhos = texto.str.len().to_numpy()
+    inicios = np.cumsum(tamanhos + 1) - (tamanhos + 1)
+    texto_concatenado = _SEPARADOR.join(texto)
+    vazio = tamanhos < 3
+
+    # Fatores de escrita (sobre o texto original)
+    pontos = _code_points(texto_concatenado)
+    letras = _contar_por_linha(_mascara_unicode("letra", pontos), inicios, tamanhos)
+    maiusculas = _contar_por_linha(_mascara_unicode("maiuscula", pontos), inicios, tamanhos)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        proporcao = maiusculas / letras
+    caps_valido = (tamanhos >= 10) & (letras > 0)
+    fator_caps = np.where(
+        caps_valido & (proporcao > 0.5), 1.3,
+        np.where(caps_valido & (proporcao > 0.3), 1.15, 1.0),
+    )
+
+    exclamacoes = _contar_por_linha(_sequencias_repetidas(pontos, "!"), inicios, tamanhos)
+    interrogacoes = _contar_por_linha(_sequencias_repetidas(pontos, "?"), inicios, tamanhos)
+    fator_pontuacao = np.minimum(1.0 + (exclamacoes * 0.1) + (interrogacoes * 0.05), 1.5)
+
+    # Normalização (NFD, sem marcas, minúsculas) e tokenização do texto inteiro
+    pontos_nfd = _code_points(unicodedata.normalize('NFD', texto_concatenado))
+    sem_marcas = pontos_nfd[~_mascara_unicode("marca", pontos_nfd)]
+    normalizado = sem_marcas.tobytes().decode("utf-32-le", "surrogatepass").lower()
+    tokens, linha_token = _achados_por_linha(RE_TOKEN_OU_SEPARADOR, normalizado)
+    qtd_tokens = np.bincount(linha_token, minlength=total)
+    inicio_linha = np.repeat(np.cumsum(qtd_tokens) - qtd_tokens, qtd_tokens)
+
+    # N-gramas de tokens dentro de cada linha que podem formar termos dos léxicos
+    lexicos = obter_lexicos()
+    ngramas = _ngramas_candidatos(tokens, linha_token, lexicos)
+    tokens_fatorados = ngramas[0][1]
+
+    # Contexto: negadores e intensificadores nos 3 tokens anteriores
+    eh_negador = _procurar(tokens_fatorados, dict.fromkeys(NEGADORES_NORM, True), False)
+    rank_intens = _procurar(
+        tokens_fatorados, {t: r for t, (r, _) in INTENSIFICADORES_NORM.items()}, np.inf
+    ).astype(float)
+    mult_por_rank = np.array([mult for _, mult in sorted(INTENSIFICADORES_NORM.values())])
+
+    def pesos_ajustados(indice: np.ndarray, ids: np.ndarray, lexico: LexicoCompilado) -> np.ndarray:
+        peso = np.array([lexico.pesos[t] for t in lexico.ordem], dtype=float)[ids]
+        negado = np.zeros(len(indice), dtype=bool)
+        melhor_rank = np.full(len(indice), np.inf)
+        for k in (1, 2, 3):
+            anterior = indice - k
+            valido = anterior >= inicio_linha[indice]
+            anterior = np.where(valido, anterior, 0)
+            negado |= valido & eh_negador[anterior]
+            melhor_rank = np.fmin(melhor_rank, np.where(valido, rank_intens[anterior], np.inf))
+        peso = np.where(negado, -peso * 0.7, peso)
+        tem_intens = np.isfinite(melhor_rank)
+        mult = mult_por_rank[np.where(tem_intens, melhor_rank, 0).astype(int)]
+        return np.where(tem_intens, peso * mult, peso)
+
+    idx_neg, ids_neg = _ocorrencias_lexico(ngramas, lexicos.risco)
+    idx_pos, ids_pos = _ocorrencias_lexico(ngramas, lexicos.positivo)
+    idx_sarc, ids_sarc = _ocorrencias_lexico(ngramas, lexicos.sarcasmo)
+
+    peso_neg = pesos_ajustados(idx_neg, ids_neg, lexicos.risco)
+    peso_pos = pesos_ajustados(idx_pos, ids_pos, lexicos.positivo)
+    linha_neg = linha_token[idx_neg]
+    linha_pos = linha_token[idx_pos]
+
+    # Produto matriz esparsa (linha × ocorrência) × vetor de pesos, separado por sinal
+    def somar(linhas: np.ndarray, valores: np.ndarray) -> np.ndarray:
+        return np.bincount(linhas, weights=valores, minlength=total)
+
+    score_negativo = somar(linha_neg, np.where(peso_neg > 0, peso_neg, 0.0))
+    score_negativo_invertido = somar(linha_neg, np.where(peso_neg < 0, -peso_neg, 0.0))
+    score_positivo = somar(linha_pos, np.where(peso_pos > 0, peso_pos, 0.0))
+    score_positivo_invertido = somar(linha_pos, np.where(peso_pos < 0, -peso_pos, 0.0))
+    qtd_neg = np.bincount(linha_neg, minlength=total)
+    qtd_pos = np.bincount(linha_pos, minlength=total)
+
+    # Sarcasmo: primeiro indicador (ordem do dicionário) em textos com termos negativos
+    menor_ordem = np.full(total, np.inf)
+    np.minimum.at(menor_ordem, linha_token[idx_sarc], ids_sarc.astype(float))
+    fator_por_ordem = np.array([lexicos.sarcasmo.pesos[t] for t in lexicos.sarcasmo.ordem] + [1.0])
+    tem_sarc = np.isfinite(menor_ordem) & (qtd_neg > 0)
+    fator_sarcasmo = np.where(tem_sarc, fator_por_ordem[np.where(tem_sarc, menor_ordem, -1).astype(int)], 1.0)
+
+    intensidade_total = fator_caps * fator_pontuacao
+    score_risco = (score_negativo * intensidade_total) - (score_negativo_invertido * 0.5)
+    score_satisfacao = (score_positivo * fator_sarcasmo) - (score_positivo_invertido * 0.5)
+    score = score_satisfacao - score_risco
+
+    # Grau (mesmas regras de score_para_grau_risco, sobre os pesos arredondados)
+    valores_peso, codigos_peso = np.unique(peso_neg, return_inverse=True)
+    critico = np.array([abs(round(v, 2)) >= 9 for v in valores_peso.tolist()], dtype=float)[codigos_peso]
+    tem_critico = np.bincount(linha_neg, weights=critico, minlength=total) > 0
+    tem_neg, tem_pos = qtd_neg > 0, qtd_pos > 0
+
+    grau = np.select(
+        [tem_critico, score <= -15, score <= -8, score <= -3, score < 5],
+        ["Muito Alto", "Muito Alto", "Alto", "Médio", np.where(tem_neg, "Médio", "Baixo")],
+        default="Baixo",
+    ).astype(object)
+
+    # Explicação (mesmos textos de gerar_explicacao_heuristica)
+    nomes_neg = np.array([lexicos.risco.exibicao[t] for t in lexicos.risco.ordem], dtype=object)[ids_neg]
+    nomes_pos = np.array([lexicos.positivo.exibicao[t] for t in lexicos.positivo.ordem], dtype=object)[ids_pos]
+    neg2 = _primeiros_termos(linha_neg, nomes_neg, total, 2)
+    neg3 = _primeiros_termos(linha_neg, nomes_neg, total, 3)
+    pos2 = _primeiros_termos(linha_pos, nomes_pos, total, 2)
+    pos3 = _primeiros_termos(linha_pos, nomes_pos, total, 3)
+
+    explicacao = np.select(
+        [
+            score <= -15,
+            score <= -8,
+            (score <= -3) & tem_neg & tem_pos,
+            score <= -3,
+            (score < 5) & tem_pos,
+            (score < 5) & tem_neg,
+            score < 5,
+            score >= 15,
+        ],
+        [
+            "Comentário expressa forte insatisfação com indicadores críticos (" + neg3 + "). Requer atenção urgente.",
+            "Cliente demonstra insatisfação significativa. Termos identificados: " + neg2 + ".",
+            "Feedback misto com ressalvas. Cliente menciona pontos positivos mas também críticas.",
+            "Cliente expressa incômodo ou frustração moderada (" + neg2 + ").",
+            "Comentário neutro com tendência positiva. Cliente parece satisfeito com ressalvas.",
+            "Comentário neutro com algumas ressalvas mencionadas.",
+            "Comentário neutro sem indicadores fortes de satisfação ou insatisfação.",
+            "Cliente muito satisfeito! Elogio claro com termos positivos (" + pos3 + ").",
+        ],
+        default="Feedback positivo. Cliente demonstra satisfação (" + pos2 + ").",
+    ).astype(object)
+
+    sem_comentario = (comentario.str.strip().str.len() < 3).to_numpy()
+    explicacao = np.where(sem_comentario, "Sem comentário relevante para análise.", explicacao)
+
+    # Textos vazios retornam antes de qualquer análise
+    grau = np.where(vazio, "Baixo", grau)
+    explicacao = np.where(vazio, "Sem comentário relevante para análise.", explicacao)
+    score = np.where(vazio, 0.0, score)
+
+    return pd.DataFrame(
+        {
+            "grau_risco": pd.Categorical(grau, categories=GRAUS_RISCO),
+            "explicacao": explicacao,
+            "score": score,
+        },
+        index=df.index,
+    )
@@ -15,12 +15,46 @@ Melhorias implementadas:
 
 import streamlit as st
 import pandas as pd
+import hashlib
 import io
+import os
 import json
-import re
-from openai import OpenAI
-from typing import Tuple, Optional, Dict, List
-import unicodedata
+import time
+from typing import List, Tuple
+
+from helps.arquivos import ler_colunas, ler_previa
+from helps.checkpoint import CheckpointExecucao, chave_execucao
+from helps.config import (
+    CAMINHO_MODELO_PADRAO,
+    CONFIANCA_MODELO_PADRAO,
+    DISJUNTOR_FALHAS_PADRAO,
+    GRAUS_RISCO,
+    LIMIAR_PESO_CRITICO,
+    LIMIAR_SCORE_POSITIVO,
+    LIMIAR_SEMELHANCA_PADRAO,
+    MAX_CONCORRENCIA_PADRAO,
+    NOME_COLUNA_ORIGEM,
+    PROCESSOS_HEURISTICA_PADRAO,
+    RPM_PADRAO,
+    TAMANHO_LOTE_PADRAO,
+    TENTATIVAS_IA_PADRAO,
+    TIMEOUT_IA_PADRAO,
+    TPM_PADRAO,
+)
+from helps.lexico import Lexicos, obter_lexicos
+from helps.llm import definir_cliente
+from helps.metricas import PERCENTIS_LATENCIA
+from helps.pipeline import OpcoesProcessamento
+from helps.tarefas import (
+    CONCLUIDA,
+    EXECUTANDO,
+    FALHOU,
+    NA_FILA,
+    GerenciadorTarefas,
+    PedidoCuradoria,
+    ResultadoCuradoria,
+    submeter_curadoria,
+)
 
 # ============================================================================
 # CONFIGURAÇÃO
@@ -32,532 +66,319 @@ st.set_page_config(
     layout="wide"
 )
 
-client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
 
-# ============================================================================
-# DICIONÁRIOS DE ANÁLISE SEMÂNTICA
-# ============================================================================
+@st.cache_resource
+def obter_cliente_openai():
+    """Cria o cliente OpenAI com a chave dos secrets (apenas quando a IA é usada)."""
+    from openai import OpenAI
 
-# Palavras com peso de risco (quanto maior, mais grave)
-PALAVRAS_RISCO = {
-    # Nível Crítico (peso 10) - Ameaças legais e extremo descontentamento
-    "procon": 10, "processo": 10, "processar": 10, "advogado": 10, "justiça": 10,
-    "reclame aqui": 10, "reclameaqui": 10, "consumidor.gov": 10, "juizado": 10,
-    "indenização": 10, "indenizar": 10, "danos morais": 10, "nunca mais": 9,
-    "vergonha": 9, "vergonhoso": 9, "absurdo": 9, "inadmissível": 9,
-    "inaceitável": 9, "revoltado": 9, "revoltante": 9, "indignado": 9,
-    "indignação": 9, "escândalo": 9, "escandaloso": 9, "criminoso": 10,
-    "crime": 10, "fraude": 10, "golpe": 10, "enganado": 9, "enganação": 9,
-    "mentira": 8, "mentiroso": 9, "calote": 10, "roubo": 10, "roubado": 10,
-    
-    # Nível Alto (peso 7-8) - Forte insatisfação
-    "péssimo": 8, "pessimo": 8, "horrível": 8, "horrivel": 8, "terrível": 8,
-    "terrivel": 8, "lixo": 8, "nojo": 8, "nojento": 8, "incompetente": 8,
-    "incompetência": 8, "descaso": 8, "abandono": 7, "abandonado": 7,
-    "desrespeito": 8, "desrespeitado": 8, "desrespeitoso": 8, "falta de respeito": 8,
-    "humilhado": 8, "humilhação": 8, "deboche": 8, "debochado": 8,
-    "irresponsável": 8, "irresponsabilidade": 8, "negligente": 8, "negligência": 8,
-    "não recomendo": 7, "nao recomendo": 7, "não indico": 7, "nao indico": 7,
-    "pior": 7, "decepcionado": 7, "decepcionante": 7, "decepção": 7,
-    "frustrado": 7, "frustração": 7, "frustrante": 7, "raiva": 7,
-    "ódio": 8, "odio": 8, "detesto": 7, "arrependi": 7, "arrependido": 7,
-    
-    # Nível Médio-Alto (peso 5-6) - Insatisfação clara
-    "ruim": 6, "insatisfeito": 6, "insatisfação": 6, "problema": 5, "problemas": 5,
-    "atraso": 5, "atrasado": 5, "atrasaram": 5, "demorado": 5, "demora": 5,
-    "demorou": 5, "lento": 5, "lentidão": 5, "erro": 5, "errado": 5,
-    "errou": 5, "erros": 5, "falha": 5, "falharam": 5, "defeito": 6,
-    "defeituoso": 6, "quebrado": 5, "quebrou": 5, "não funciona": 6,
-    "nao funciona": 6, "não funcionou": 6, "nao funcionou": 6,
-    "reclamação": 5, "reclamar": 5, "insistir": 5, "insisti": 5,
-    "cobrar": 5, "cobrei": 5, "várias vezes": 5, "varias vezes": 5,
-    "diversas vezes": 5, "repetidas vezes": 5, "falta": 5, "faltou": 5,
-    "faltando": 5, "incompleto": 5, "mal": 5, "malfeito": 6,
-    "desorganizado": 5, "desorganização": 5, "bagunça": 5, "confuso": 5,
-    "confusão": 5, "perdido": 5, "perderam": 5, "sumiram": 6, "sumiu": 6,
-    
-    # Nível Médio (peso 3-4) - Ressalvas e incômodos
-    "poderia melhorar": 4, "poderia ser melhor": 4, "esperava mais": 4,
-    "deixou a desejar": 4, "regular": 3, "médio": 3, "mediano": 3,
-    "normal": 2, "ok": 2, "mais ou menos": 3, "nem bom nem ruim": 3,
-    "indiferente": 3, "tanto faz": 3, "razoável": 3, "razoavel": 3,
-    "aceitável": 3, "aceitavel": 3, "tolerável": 3, "toleravel": 3,
-    "chato": 4, "chatice": 4, "incômodo": 4, "incomodo": 4, "desconfortável": 4,
-    "desconfortavel": 4, "estranho": 3, "esquisito": 3, "duvidoso": 4,
-}
+    # Retentativas ficam a cargo de `helps.resiliencia`
+    return OpenAI(api_key=st.secrets["OPENAI_API_KEY"], max_retries=0)
 
-# Palavras positivas (quanto maior, mais positivo)
-PALAVRAS_POSITIVAS = {
-    # Nível Excelente (peso 10) - Encantamento total
-    "perfeito": 10, "perfeita": 10, "impecável": 10, "impecavel": 10,
-    "excepcional": 10, "extraordinário": 10, "extraordinario": 10,
-    "maravilhoso": 10, "maravilhosa": 10, "sensacional": 10, "fantástico": 10,
-    "fantastico": 10, "espetacular": 10, "incrível": 10, "incrivel": 10,
-    "surpreendente": 9, "surpreendeu": 9, "superou": 9, "superaram": 9,
-    "encantado": 10, "encantada": 10, "encantador": 10, "apaixonado": 9,
-    "apaixonada": 9, "amei": 9, "adorei": 9, "melhor": 8, "melhor de todos": 10,
-    "nota 10": 10, "nota dez": 10, "10/10": 10, "cinco estrelas": 10,
-    "5 estrelas": 10, "recomendo muito": 9, "super recomendo": 10,
-    "altamente recomendo": 10, "indico demais": 9,
-    
-    # Nível Muito Bom (peso 7-8) - Alta satisfação
-    "excelente": 8, "ótimo": 8, "otimo": 8, "ótima": 8, "otima": 8,
-    "muito bom": 8, "muito boa": 8, "muito bem": 8, "parabéns": 8, "parabens": 8,
-    "satisfeito": 7, "satisfeita": 7, "satisfação": 7, "satisfacao": 7,
-    "gostei muito": 8, "gostei demais": 8, "adorável": 8, "adoravel": 8,
-    "top": 7, "top demais": 8, "show": 7, "demais": 7, "arrasou": 8,
-    "mandou bem": 8, "mandaram bem": 8, "caprichado": 8, "capricharam": 8,
-    "profissional": 7, "profissionais": 7, "competente": 7, "competentes": 7,
-    "eficiente": 7, "eficientes": 7, "eficiência": 7, "eficiencia": 7,
-    
-    # Nível Bom (peso 5-6) - Satisfação clara
-    "bom": 6, "boa": 6, "bem": 5, "gostei": 6, "gosto": 5, "legal": 5,
-    "bacana": 5, "tranquilo": 5, "tranquila": 5, "suave": 5, "ok": 4,
-    "certinho": 6, "certinha": 6, "correto": 5, "correta": 5,
-    "rápido": 6, "rapido": 6, "rápida": 6, "rapida": 6, "rapidez": 6,
-    "ágil": 6, "agil": 6, "agilidade": 6, "pontual": 6, "pontualidade": 6,
-    "atencioso": 6, "atenciosa": 6, "atenciosos": 6, "atenção": 6, "atencao": 6,
-    "educado": 6, "educada": 6, "educados": 6, "cordial": 6, "cordiais": 6,
-    "cordialidade": 6, "gentil": 6, "gentis": 6, "gentileza": 6,
-    "simpático": 6, "simpatico": 6, "simpática": 6, "simpatica": 6,
-    "prestativo": 6, "prestativa": 6, "prestativos": 6, "solicito": 6,
-    "solícito": 6, "cuidadoso": 6, "cuidadosa": 6, "cuidado": 5,
-    "organizado": 6, "organizada": 6, "limpo": 5, "limpa": 5, "limpeza": 5,
-    "qualidade": 6, "confiável": 6, "confiavel": 6, "confiança": 6,
-    "confianca": 6, "seguro": 5, "segura": 5, "resolvi": 6, "resolveu": 6,
-    "resolvido": 6, "resolveram": 6, "solução": 6, "solucao": 6,
-    "funcionou": 6, "funciona": 5, "recomendo": 6, "indico": 6,
-    "voltarei": 7, "voltaria": 7, "volto": 6, "retorno": 5,
-    
-    # Nível Neutro-Positivo (peso 3-4) - Aceitação
-    "adequado": 4, "adequada": 4, "suficiente": 4, "dentro do esperado": 4,
-    "como esperado": 4, "normal": 3, "padrão": 3, "padrao": 3,
-    "cumpriu": 5, "cumpriram": 5, "entregou": 5, "entregaram": 5,
-}
 
-# Intensificadores (multiplicam o peso)
-INTENSIFICADORES = {
-    "muito": 1.5, "demais": 1.5, "extremamente": 2.0, "super": 1.7,
-    "mega": 1.7, "ultra": 1.8, "hiper": 1.8, "totalmente": 1.6,
-    "completamente": 1.6, "absolutamente": 1.8, "realmente": 1.3,
-    "verdadeiramente": 1.4, "incrivelmente": 1.6, "absurdamente": 1.8,
-    "ridiculamente": 1.7, "imensamente": 1.6, "profundamente": 1.5,
-    "bastante": 1.3, "bem": 1.2, "tão": 1.4, "tanto": 1.3,
-}
+@st.cache_resource
+def obter_lexicos_compilados() -> Lexicos:
+    """Compila os léxicos uma vez por processo do servidor, compartilhados entre sessões."""
+    return obter_lexicos()
+
+
+@st.cache_resource
+def obter_gerenciador_tarefas() -> GerenciadorTarefas:
+    """Fila de tarefas única por servidor, compartilhada por todas as sessões."""
+    return GerenciadorTarefas()
+
+
+@st.cache_data(show_spinner="Lendo planilha...", max_entries=4)
+def carregar_estrutura(hash_arquivo: str, nome: str, _conteudo: bytes) -> Tuple[List[str], pd.DataFrame, int]:
+    """
+    Lê em fluxo as colunas, a prévia e o total de linhas da planilha enviada, sem
+    mantê-la inteira na memória. A chave do cache é o hash do conteúdo (`_conteudo`
+    não é hasheado pelo Streamlit), então reruns causados por widgets não a releem.
+    """
+    previa, total = ler_previa(io.BytesIO(_conteudo), nome)
+    return ler_colunas(io.BytesIO(_conteudo), nome), previa, total
+
 
-# Negadores (invertem o sentido)
-NEGADORES = {
-    "não", "nao", "nunca", "jamais", "nem", "nenhum", "nenhuma",
-    "nada", "sem", "tampouco", "sequer",
+# Formatos de download: rótulo -> extensão, e extensão -> tipo MIME
+FORMATOS_SAIDA = {
+    "Excel (.xlsx)": ".xlsx",
+    "CSV (.csv)": ".csv",
+    "Parquet (.parquet)": ".parquet",
+}
+TIPOS_MIME = {
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".csv": "text/csv",
+    ".parquet": "application/vnd.apache.parquet",
 }
 
-# Indicadores de sarcasmo/ironia
-INDICADORES_SARCASMO = {
-    "parabéns pela": 0.7, "parabens pela": 0.7, "parabéns pelo": 0.7, 
-    "parabens pelo": 0.7, "que maravilha": 0.6, "que ótimo": 0.6,
-    "claro que sim": 0.7, "com certeza": 0.8, "obviamente": 0.7,
-    "né": 0.8, "ne": 0.8, "viu": 0.8, "hein": 0.7,
+ROTULOS_ESTADO = {
+    NA_FILA: "🕒 Na fila",
+    EXECUTANDO: "⚙️ Executando",
+    CONCLUIDA: "✅ Concluída",
+    FALHOU: "❌ Falhou",
 }
 
 
 # ============================================================================
-# FUNÇÕES AUXILIARES
+# INTERFACE STREAMLIT
 # ============================================================================
 
-def normalizar_texto(texto: str) -> str:
-    """Remove acentos e converte para minúsculas."""
-    if not texto:
-        return ""
-    # Remove acentos
-    texto_norm = unicodedata.normalize('NFD', texto)
-    texto_sem_acento = ''.join(c for c in texto_norm if unicodedata.category(c) != 'Mn')
-    return texto_sem_acento.lower().strip()
+def exibir_resultado(tarefa_id: str, resultado: ResultadoCuradoria) -> None:
+    """Métricas, gráfico, prévia e download de uma tarefa concluída."""
+    # Resultados
+    st.subheader("4️⃣ Resultados")
 
+    # Estatísticas
+    col_stats1, col_stats2, col_stats3, col_stats4 = st.columns(4)
 
-def detectar_capslock(texto: str) -> float:
-    """Detecta uso excessivo de CAPS LOCK (indica intensidade emocional)."""
-    if not texto or len(texto) < 10:
-        return 1.0
-    
-    letras = [c for c in texto if c.isalpha()]
-    if not letras:
-        return 1.0
-    
-    maiusculas = sum(1 for c in letras if c.isupper())
-    proporcao = maiusculas / len(letras)
-    
-    # Se mais de 50% em caps, aumenta intensidade
-    if proporcao > 0.5:
-        return 1.3
-    elif proporcao > 0.3:
-        return 1.15
-    return 1.0
-
-
-def detectar_pontuacao_excessiva(texto: str) -> float:
-    """Detecta uso excessivo de pontuação (!!!, ???)."""
-    if not texto:
-        return 1.0
-    
-    # Conta sequências de ! ou ?
-    exclamacoes = len(re.findall(r'!{2,}', texto))
-    interrogacoes = len(re.findall(r'\?{2,}', texto))
-    
-    intensidade = 1.0 + (exclamacoes * 0.1) + (interrogacoes * 0.05)
-    return min(intensidade, 1.5)  # Cap em 1.5
+    contagem = resultado.contagem
 
+    with col_stats1:
+        st.metric(
+            "🔴 Muito Alto",
+            contagem.get("Muito Alto", 0),
+            help="Requerem atenção urgente"
+        )
 
-def encontrar_palavras_com_contexto(texto: str, dicionario: dict) -> List[Tuple[str, float, int]]:
-    """
-    Encontra palavras do dicionário considerando contexto (negadores e intensificadores).
-    Retorna lista de (palavra, peso_ajustado, posição).
-    """
-    if not texto:
-        return []
-    
-    texto_norm = normalizar_texto(texto)
-    palavras_texto = texto_norm.split()
-    resultados = []
-    
-    for palavra, peso_base in dicionario.items():
-        # Busca a palavra ou expressão no texto
-        if palavra in texto_norm:
-            # Encontra a posição
-            pos = texto_norm.find(palavra)
-            
-            # Pega contexto anterior (3 palavras antes)
-            texto_antes = texto_norm[:pos].split()[-3:]
-            
-            peso_final = peso_base
-            
-            # Verifica negadores
-            tem_negador = any(neg in texto_antes for neg in NEGADORES)
-            if tem_negador:
-                # Inverte o sentido
-                peso_final = -peso_final * 0.7
-            
-            # Verifica intensificadores
-            for intens, mult in INTENSIFICADORES.items():
-                if intens in texto_antes:
-                    peso_final *= mult
-                    break
-            
-            resultados.append((palavra, peso_final, pos))
-    
-    return resultados
+    with col_stats2:
+        st.metric(
+            "🟠 Alto",
+            contagem.get("Alto", 0),
+            help="Insatisfação significativa"
+        )
 
+    with col_stats3:
+        st.metric(
+            "🟡 Médio",
+            contagem.get("Médio", 0),
+            help="Ressalvas ou feedback misto"
+        )
 
-def detectar_sarcasmo(texto: str) -> float:
-    """
-    Detecta possível sarcasmo no texto.
-    Retorna fator de ajuste (< 1.0 se detectar sarcasmo).
-    """
-    if not texto:
-        return 1.0
-    
-    texto_lower = texto.lower()
-    
-    for indicador, fator in INDICADORES_SARCASMO.items():
-        if indicador in texto_lower:
-            # Verifica se há palavras negativas no mesmo texto
-            texto_norm = normalizar_texto(texto)
-            tem_negativo = any(p in texto_norm for p in PALAVRAS_RISCO.keys())
-            if tem_negativo:
-                return fator
-    
-    return 1.0
+    with col_stats4:
+        st.metric(
+            "🟢 Baixo",
+            contagem.get("Baixo", 0),
+            help="Satisfeitos ou sem problemas"
+        )
 
+    # Gráfico de distribuição
+    st.markdown("**Distribuição de Risco:**")
 
-def calcular_score_sentimento(descricao: str, comentario: str) -> Tuple[float, Dict]:
-    """
-    Calcula score de sentimento com análise detalhada.
-    
-    Retorna:
-    - score: float (negativo = risco, positivo = satisfação)
-    - detalhes: dict com breakdown da análise
-    """
-    texto_completo = f"{descricao or ''} {comentario or ''}".strip()
-    
-    if not texto_completo or len(texto_completo.strip()) < 3:
-        return 0, {"motivo": "texto_vazio"}
-    
-    # Fatores de intensidade
-    fator_caps = detectar_capslock(texto_completo)
-    fator_pontuacao = detectar_pontuacao_excessiva(texto_completo)
-    fator_sarcasmo = detectar_sarcasmo(texto_completo)
-    
-    # Encontra palavras
-    palavras_negativas = encontrar_palavras_com_contexto(texto_completo, PALAVRAS_RISCO)
-    palavras_positivas = encontrar_palavras_com_contexto(texto_completo, PALAVRAS_POSITIVAS)
-    
-    # Calcula scores
-    score_negativo = sum(peso for _, peso, _ in palavras_negativas if peso > 0)
-    score_negativo_invertido = sum(abs(peso) for _, peso, _ in palavras_negativas if peso < 0)
-    
-    score_positivo = sum(peso for _, peso, _ in palavras_positivas if peso > 0)
-    score_positivo_invertido = sum(abs(peso) for _, peso, _ in palavras_positivas if peso < 0)
-    
-    # Aplica fatores
-    intensidade_total = fator_caps * fator_pontuacao
-    
-    # Score final: positivo - negativo, com ajustes
-    score_risco = (score_negativo * intensidade_total) - (score_negativo_invertido * 0.5)
-    score_satisfacao = (score_positivo * fator_sarcasmo) - (score_positivo_invertido * 0.5)
-    
-    score_final = score_satisfacao - score_risco
-    
-    detalhes = {
-        "palavras_negativas": [(p, round(w, 2)) for p, w, _ in palavras_negativas],
-        "palavras_positivas": [(p, round(w, 2)) for p, w, _ in palavras_positivas],
-        "score_risco": round(score_risco, 2),
-        "score_satisfacao": round(score_satisfacao, 2),
-        "fator_caps": round(fator_caps, 2),
-        "fator_pontuacao": round(fator_pontuacao, 2),
-        "fator_sarcasmo": round(fator_sarcasmo, 2),
-    }
-    
-    return score_final, detalhes
+    # Prepara dados para o gráfico na ordem correta
+    ordem_risco = list(GRAUS_RISCO)
+    dados_grafico = pd.DataFrame({
+        "Grau de Risco": ordem_risco,
+        "Quantidade": [contagem.get(r, 0) for r in ordem_risco]
+    }).set_index("Grau de Risco")
 
+    st.bar_chart(dados_grafico)
 
-def score_para_grau_risco(score: float, detalhes: Dict) -> str:
-    """Converte score numérico para grau de risco categórico."""
-    
-    # Verifica casos especiais
-    palavras_neg = detalhes.get("palavras_negativas", [])
-    palavras_pos = detalhes.get("palavras_positivas", [])
-    
-    # Se tem palavras de risco crítico (peso >= 9), é Muito Alto independente
-    tem_critico = any(abs(w) >= 9 for _, w in palavras_neg)
-    if tem_critico:
-        return "Muito Alto"
-    
-    # Se score muito negativo
-    if score <= -15:
-        return "Muito Alto"
-    elif score <= -8:
-        return "Alto"
-    elif score <= -3:
-        return "Médio"
-    elif score < 5:
-        # Zona neutra - depende do contexto
-        if palavras_neg and not palavras_pos:
-            return "Médio"
-        elif palavras_pos and not palavras_neg:
-            return "Baixo"
-        elif palavras_neg and palavras_pos:
-            return "Médio"
-        else:
-            return "Baixo"  # Sem indicadores claros
-    else:
-        return "Baixo"
-
-
-def gerar_explicacao_heuristica(score: float, detalhes: Dict, comentario: str) -> str:
-    """Gera explicação baseada na análise heurística."""
-    
-    palavras_neg = detalhes.get("palavras_negativas", [])
-    palavras_pos = detalhes.get("palavras_positivas", [])
-    
-    # Pega trecho do comentário
-    trecho = (comentario[:80] + "...") if len(comentario or "") > 80 else (comentario or "")
-    trecho = trecho.replace('"', "'")
-    
-    if not comentario or len(comentario.strip()) < 3:
-        return "Sem comentário relevante para análise."
-    
-    if score <= -15:
-        principais = [p for p, _ in palavras_neg[:3]]
-        return f"Comentário expressa forte insatisfação com indicadores críticos ({', '.join(principais)}). Requer atenção urgente."
-    
-    elif score <= -8:
-        principais = [p for p, _ in palavras_neg[:2]]
-        return f"Cliente demonstra insatisfação significativa. Termos identificados: {', '.join(principais)}."
-    
-    elif score <= -3:
-        if palavras_neg and palavras_pos:
-            return f"Feedback misto com ressalvas. Cliente menciona pontos positivos mas também críticas."
-        else:
-            principais = [p for p, _ in palavras_neg[:2]]
-            return f"Cliente expressa incômodo ou frustração moderada ({', '.join(principais)})."
-    
-    elif score < 5:
-        if palavras_pos:
-            return f"Comentário neutro com tendência positiva. Cliente parece satisfeito com ressalvas."
-        elif palavras_neg:
-            return f"Comentário neutro com algumas ressalvas mencionadas."
-        else:
-            return f"Comentário neutro sem indicadores fortes de satisfação ou insatisfação."
-    
-    else:
-        if score >= 15:
-            principais = [p for p, _ in palavras_pos[:3]]
-            return f"Cliente muito satisfeito! Elogio claro com termos positivos ({', '.join(principais)})."
-        else:
-            principais = [p for p, _ in palavras_pos[:2]]
-            return f"Feedback positivo. Cliente demonstra satisfação ({', '.join(principais)})."
+    # Retomada
+    estatisticas = resultado.estatisticas
+    somente_heuristica = resultado.opcoes.somente_heuristica
+    if estatisticas.retomadas:
+        st.caption(
+            f"⏯️ Retomada: **{estatisticas.retomadas}** linhas reaproveitadas de uma execução interrompida"
+        )
 
+    # Processamento incremental
+    if estatisticas.reaproveitadas or estatisticas.editadas:
+        st.caption(
+            f"🔁 Incremental: **{estatisticas.reaproveitadas}** linhas reaproveitadas da saída anterior, "
+            f"**{estatisticas.total_linhas - estatisticas.reaproveitadas}** processadas "
+            f"({estatisticas.editadas} editadas)"
+        )
 
-# ============================================================================
-# FUNÇÃO HEURÍSTICA ROBUSTA (FALLBACK)
-# ============================================================================
+    # Deduplicação
+    total_linhas = estatisticas.total_linhas - estatisticas.retomadas - estatisticas.reaproveitadas
+    if not somente_heuristica and resultado.opcoes.agrupar_duplicados and total_linhas:
+        duplicados = total_linhas - estatisticas.unicos
+        st.caption(
+            f"🧬 Deduplicação: **{estatisticas.unicos}** comentários únicos em "
+            f"**{total_linhas}** linhas ({duplicados / total_linhas:.0%} duplicados)"
+        )
 
-def heuristica_risco_explicacao(descricao: Optional[str], comentario: Optional[str]) -> Tuple[str, str]:
-    """
-    Análise heurística robusta para classificação de risco.
-    Usada como fallback quando a IA falha.
-    """
-    # Combina descrição e comentário
-    texto = f"{descricao or ''} {comentario or ''}".strip()
-    
-    if not texto or len(texto) < 3:
-        return "Baixo", "Sem comentário relevante para análise."
-    
-    # Calcula score de sentimento
-    score, detalhes = calcular_score_sentimento(descricao, comentario)
-    
-    # Converte para grau de risco
-    grau = score_para_grau_risco(score, detalhes)
-    
-    # Gera explicação
-    explicacao = gerar_explicacao_heuristica(score, detalhes, comentario)
-    
-    return grau, explicacao
+    # Modelo local
+    if not somente_heuristica and resultado.opcoes.usar_modelo_local:
+        st.caption(
+            f"🧠 Modelo local: **{estatisticas.resolvidos_modelo}** comentários resolvidos com confiança "
+            f"≥ {resultado.opcoes.confianca_modelo:.0%}"
+        )
 
+    # Quase duplicatas
+    if not somente_heuristica and resultado.opcoes.agrupar_semelhantes:
+        st.caption(
+            f"🧩 Semelhantes: **{estatisticas.semelhantes}** comentários herdaram o grau de um representante "
+            f"quase idêntico ({estatisticas.divergentes} separados por divergirem da heurística)"
+        )
 
-# ============================================================================
-# FUNÇÃO PRINCIPAL COM IA
-# ============================================================================
+    # Caminhos de classificação
+    if not somente_heuristica and resultado.opcoes.usar_triagem:
+        caminhos = estatisticas.caminhos
+        st.caption(
+            f"🩺 Triagem: **{sum(caminhos.values())}** linhas resolvidas localmente "
+            f"({caminhos['vazio']} vazias, {caminhos['critico']} críticas, "
+            f"{caminhos['positivo']} positivas), **{estatisticas.linhas_ia}** linhas classificadas pela IA "
+            f"({estatisticas.enviados_ia} comentários únicos enviados)"
+        )
 
-def analisar_risco_sentimento(descricao: Optional[str], comentario: Optional[str]) -> Tuple[str, str]:
-    """
-    Analisa risco e sentimento usando OpenAI com fallback heurístico.
-    """
-    # Tratamento de comentário vazio
-    if not comentario or len(str(comentario).strip()) < 3:
-        return "Baixo", "Sem comentário relevante para análise."
-    
-    comentario = str(comentario).strip()
-    descricao = str(descricao).strip() if descricao else ""
-    
-    # Monta o prompt otimizado
-    prompt = f"""Analise o seguinte feedback de cliente de uma pesquisa NPS.
-
-CONTEXTO DO ATENDIMENTO: {descricao if descricao else "Não especificado"}
-
-COMENTÁRIO DO CLIENTE: "{comentario}"
-
-TAREFA: Classifique o GRAU DE RISCO para a empresa e explique o SENTIMENTO do cliente.
-
-REGRAS DE CLASSIFICAÇÃO (siga rigorosamente):
-
-1. **Muito Alto** - Use APENAS quando houver:
-   - Ameaça legal explícita (Procon, processo, advogado, Reclame Aqui)
-   - Palavras de revolta extrema (absurdo, vergonha, inadmissível, escândalo)
-   - Acusações graves (fraude, golpe, roubo, crime, calote)
-   - Declaração "nunca mais volto/uso/compro"
-   - CAPS LOCK com xingamentos ou ofensas
-
-2. **Alto** - Use quando houver:
-   - Insatisfação forte e clara (péssimo, horrível, terrível, nojento)
-   - Declaração de arrependimento ou decepção profunda
-   - Múltiplos problemas graves relatados
-   - Indicação de que não recomendaria
-   - Tom de raiva ou frustração intensa
-
-3. **Médio** - Use quando houver:
-   - Reclamação moderada (ruim, demorado, problema, erro)
-   - Feedback misto (elogios E críticas)
-   - Ressalvas ou sugestões de melhoria
-   - Tom de incômodo mas sem revolta
-   - Expectativas parcialmente atendidas
-
-4. **Baixo** - Use quando houver:
-   - Elogio claro (ótimo, excelente, muito bom, parabéns)
-   - Satisfação expressa (gostei, recomendo, voltarei)
-   - Agradecimento ou reconhecimento positivo
-   - Comentário neutro sem queixas
-   - Menção de experiência agradável
-
-ATENÇÃO ESPECIAL:
-- "Agendamento rápido e cordialidade no atendimento" = BAIXO (elogio claro)
-- "Atendimento ok mas demorou" = MÉDIO (misto)
-- "Péssimo, nunca mais volto" = MUITO ALTO (revolta + declaração)
-- Comentário vazio ou sem sentido = BAIXO
-
-Responda SOMENTE com JSON válido (sem markdown, sem texto antes/depois):
-{{"grau_risco": "Muito Alto|Alto|Médio|Baixo", "explicacao": "Frase curta explicando o sentimento"}}"""
-
-    try:
-        response = client.responses.create(
-            model="gpt-4o-mini",
-            instructions="""Você é um especialista em análise de sentimento e experiência do cliente.
-Sua tarefa é classificar o risco reputacional de feedbacks NPS.
-Seja preciso: elogios claros = Baixo, críticas severas = Alto/Muito Alto.
-Responda APENAS com JSON válido, sem nenhum texto adicional.""",
-            input=prompt,
-            max_output_tokens=250,
-            temperature=0.1  # Baixa temperatura para consistência
+    # Aproveitamento do cache
+    if estatisticas.usou_cache:
+        consultas = estatisticas.cache_acertos + estatisticas.cache_falhas
+        taxa_acerto = estatisticas.cache_acertos / consultas if consultas else 0
+        st.caption(
+            f"♻️ Cache: **{estatisticas.cache_acertos}** acertos, **{estatisticas.cache_falhas}** falhas "
+            f"({taxa_acerto:.0%} reaproveitado)"
         )
-        
-        # Extrai o texto da resposta
-        resposta_texto = ""
-        if hasattr(response, 'output'):
-            for item in response.output:
-                if hasattr(item, 'content'):
-                    for content in item.content:
-                        if hasattr(content, 'text'):
-                            resposta_texto += content.text
-        
-        if not resposta_texto:
-            return heuristica_risco_explicacao(descricao, comentario)
-        
-        # Tenta extrair JSON
-        # Remove possíveis backticks de markdown
-        resposta_texto = re.sub(r'```json\s*', '', resposta_texto)
-        resposta_texto = re.sub(r'```\s*', '', resposta_texto)
-        
-        # Encontra o JSON
-        match = re.search(r'\{[^{}]*\}', resposta_texto, re.DOTALL)
-        if not match:
-            return heuristica_risco_explicacao(descricao, comentario)
-        
-        json_str = match.group(0)
-        dados = json.loads(json_str)
-        
-        grau = dados.get("grau_risco", "").strip()
-        explicacao = dados.get("explicacao", "").strip()
-        
-        # Valida o grau
-        graus_validos = ["Muito Alto", "Alto", "Médio", "Baixo"]
-        if grau not in graus_validos:
-            # Tenta normalizar
-            grau_lower = grau.lower()
-            if "muito alto" in grau_lower:
-                grau = "Muito Alto"
-            elif "alto" in grau_lower:
-                grau = "Alto"
-            elif "médio" in grau_lower or "medio" in grau_lower:
-                grau = "Médio"
-            elif "baixo" in grau_lower:
-                grau = "Baixo"
-            else:
-                return heuristica_risco_explicacao(descricao, comentario)
-        
-        if not explicacao:
-            _, explicacao = heuristica_risco_explicacao(descricao, comentario)
-        
-        return grau, explicacao
-        
-    except Exception as e:
-        # Em caso de erro, usa heurística
-        return heuristica_risco_explicacao(descricao, comentario)
 
+    # Instrumentação
+    exibir_metricas(tarefa_id, estatisticas.metricas.resumo())
+
+    # Preview da saída
+    with st.expander("📄 Prévia do resultado (primeiras 10 linhas)", expanded=True):
+        # Mostra apenas as colunas relevantes
+        st.dataframe(resultado.previa, use_container_width=True)
+
+    # Download
+    st.subheader("5️⃣ Download")
+
+    with open(resultado.caminho, "rb") as arquivo_saida:
+        st.download_button(
+            label=f"📥 Baixar base com Grau de Risco e Explicação ({resultado.formato})",
+            data=arquivo_saida.read(),
+            file_name=f"base_helps_curadoria_risco_sentimento{resultado.formato}",
+            mime=TIPOS_MIME[resultado.formato],
+            use_container_width=True,
+            key=f"baixar_{tarefa_id}",
+        )
+
+    st.success("🎉 Análise concluída! Clique acima para baixar o arquivo.")
+
+
+def exibir_metricas(tarefa_id: str, resumo: dict) -> None:
+    """Tempo por etapa, latência e tokens da IA, fallbacks e perfil de uma execução."""
+    with st.expander("📈 Métricas da execução"):
+        st.markdown("**Tempo por etapa:**")
+        st.dataframe(
+            pd.DataFrame([
+                {"Etapa": nome, "Segundos": dados["segundos"], "ms/linha": dados["ms_por_linha"]}
+                for nome, dados in resumo["etapas"].items()
+            ]),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+        ia = resumo["ia"]
+        if ia["chamadas"]:
+            st.markdown(
+                f"**IA:** {ia['chamadas']} chamadas ({ia['chamadas_com_erro']} com erro), "
+                f"{ia['espera_limitador_s']:.1f}s aguardando o limitador de taxa, "
+                f"{ia['retentativas']} retentativas ({ia['espera_retentativas_s']:.1f}s de espera)"
+            )
+            if ia["aberturas_disjuntor"]:
+                st.warning(
+                    f"⚡ A IA falhou seguidamente e foi suspensa {ia['aberturas_disjuntor']} vez(es); "
+                    f"as linhas do período foram classificadas pela heurística."
+                )
+            colunas_latencia = st.columns(len(PERCENTIS_LATENCIA))
+            for coluna, percentil in zip(colunas_latencia, PERCENTIS_LATENCIA):
+                coluna.metric(f"Latência p{percentil}", f"{ia['latencia_s'][f'p{percentil}']:.2f}s")
+
+        if ia["tokens_entrada"]:
+            st.caption(
+                f"🔤 Tokens: **{ia['tokens_entrada']}** de entrada "
+                f"({ia['tokens_entrada_cache']} em cache), **{ia['tokens_saida']}** de saída"
+            )
+
+        if resumo["fallbacks"]:
+            st.markdown("**Fallbacks para a heurística, por motivo:**")
+            st.dataframe(
+                pd.DataFrame(
+                    [{"Motivo": motivo, "Linhas": linhas} for motivo, linhas in resumo["fallbacks"].items()]
+                ),
+                use_container_width=True,
+                hide_index=True,
+            )
+
+        if resumo["perfil"]:
+            st.markdown("**Perfil (cProfile):**")
+            st.code(resumo["perfil"], language=None)
+
+        st.download_button(
+            label="📥 Baixar métricas (JSON)",
+            data=json.dumps(resumo, ensure_ascii=False, indent=2),
+            file_name=f"metricas_{tarefa_id}.json",
+            mime="application/json",
+            key=f"metricas_{tarefa_id}",
+        )
+
+
+def painel_tarefa(tarefa_id: str, acompanhando: bool) -> None:
+    """Estado e progresso de uma tarefa; ao concluir, exibe o resultado."""
+    tarefa = obter_gerenciador_tarefas().obter(tarefa_id)
+    if tarefa is None:
+        st.warning(f"Tarefa **{tarefa_id}** não encontrada (pode ter expirado).")
+        return
+    
+    if tarefa.finalizada and acompanhando:
+        st.rerun()  # redesenha a página sem a atualização periódica do painel
+    
+    if tarefa.estado == CONCLUIDA:
+        exibir_resultado(tarefa.id, tarefa.resultado)
+        return
+    
+    if tarefa.estado == FALHOU:
+        st.error(f"❌ A tarefa **{tarefa.id}** falhou: {tarefa.erro}")
+        return
+    
+    st.progress(tarefa.progresso)
+    detalhe = f" — lote {tarefa.concluidos}/{tarefa.total}" if tarefa.total else ""
+    st.caption(f"⏳ Tarefa **{tarefa.id}**: {tarefa.etapa}{detalhe}")
+
+
+def exibir_tarefas() -> None:
+    """Acompanhamento da tarefa da sessão (ou de qualquer id informado) e lista das recentes."""
+    gerenciador = obter_gerenciador_tarefas()
+    tarefas = gerenciador.listar()
+    tarefa_id = st.session_state.get("tarefa_id")
+    if not tarefas and not tarefa_id:
+        return
+    
+    st.subheader("⏱️ Tarefas")
+    
+    tarefa_id = st.text_input(
+        "ID da tarefa:",
+        value=tarefa_id or "",
+        help="Informe o ID para acompanhar ou baixar o resultado de uma tarefa iniciada em outra sessão"
+    ).strip()
+    
+    if tarefa_id:
+        tarefa = gerenciador.obter(tarefa_id)
+        # Atualiza só este painel, a cada segundo, enquanto a tarefa não termina
+        acompanhando = bool(tarefa and not tarefa.finalizada)
+        st.fragment(run_every=1 if acompanhando else None)(painel_tarefa)(tarefa_id, acompanhando)
+    
+    if tarefas:
+        with st.expander(f"📋 Tarefas recentes ({len(tarefas)})"):
+            st.dataframe(
+                pd.DataFrame([
+                    {
+                        "ID": t.id,
+                        "Arquivo": t.descricao,
+                        "Estado": ROTULOS_ESTADO[t.estado],
+                        "Progresso": f"{t.progresso:.0%}",
+                        "Criada em": time.strftime("%d/%m %H:%M", time.localtime(t.criada_em)),
+                    }
+                    for t in tarefas
+                ]),
+                use_container_width=True,
+                hide_index=True,
+            )
 
-# ============================================================================
-# INTERFACE STREAMLIT
-# ============================================================================
 
 def main():
+    obter_lexicos_compilados()
+    
     # Header
     st.markdown("""
     <div style="text-align: center; padding: 1rem 0;">
@@ -574,10 +395,10 @@ def main():
         st.markdown("""
         **Passo a passo:**
         
-        1. **Upload** - Envie o arquivo Excel com a base NPS
+        1. **Upload** - Envie a base NPS (Excel, CSV ou Parquet)
         2. **Selecione** - Indique as colunas de descrição e comentário
         3. **Processe** - Clique para gerar a análise
-        4. **Download** - Baixe o Excel enriquecido
+        4. **Download** - Baixe a base enriquecida
         
         ---
         
@@ -606,27 +427,28 @@ def main():
     st.subheader("1️⃣ Upload do arquivo")
     
     arquivo = st.file_uploader(
-        "Envie o arquivo Excel (.xlsx) com a base NPS",
-        type=["xlsx", "xls"],
-        help="O título das colunas deve estar na linha 3 do arquivo"
+        "Envie a base NPS (.xlsx, .csv ou .parquet)",
+        type=["xlsx", "xls", "csv", "parquet"],
+        help="No Excel, o título das colunas deve estar na linha 3; em CSV e Parquet, na primeira linha"
     )
     
     if arquivo:
         try:
-            # Lê o Excel com header na linha 3 (header=2)
-            df = pd.read_excel(arquivo, header=2)
+            # Lê o Excel com header na linha 3 (header=2); reaproveita a leitura
+            # enquanto o conteúdo enviado for o mesmo
+            conteudo = arquivo.getvalue()
+            hash_arquivo = hashlib.sha256(conteudo).hexdigest()
+            colunas, previa, total_linhas = carregar_estrutura(hash_arquivo, arquivo.name, conteudo)
             
-            st.success(f"✅ Arquivo carregado: **{len(df)} registros** encontrados")
+            st.success(f"✅ Arquivo carregado: **{total_linhas} registros** encontrados")
             
             # Preview
             with st.expander("📄 Prévia dos dados (primeiras 5 linhas)", expanded=True):
-                st.dataframe(df.head(), use_container_width=True)
+                st.dataframe(previa, use_container_width=True)
             
             # Seleção de colunas
             st.subheader("2️⃣ Configuração das colunas")
             
-            colunas = df.columns.tolist()
-            
             col1, col2 = st.columns(2)
             
             with col1:
@@ -675,140 +497,309 @@ def main():
                     value="Explicação do Sentimento"
                 )
             
+            col5, col6 = st.columns(2)
+            
+            with col5:
+                formato_saida = st.selectbox(
+                    "Formato do arquivo de saída:",
+                    list(FORMATOS_SAIDA),
+                    help="CSV e Parquet são gravados muito mais rápido que Excel em bases grandes"
+                )
+            
+            with col6:
+                preservar_original = st.checkbox(
+                    "Manter formatação, títulos e demais abas da planilha original",
+                    value=True,
+                    disabled=FORMATOS_SAIDA[formato_saida] != ".xlsx",
+                    help="Acrescenta as duas colunas ao próprio arquivo Excel enviado, em vez de gerar "
+                         "uma planilha nova apenas com o cabeçalho e os dados"
+                )
+            
+            # Processamento incremental
+            with st.expander("🔁 Processamento incremental"):
+                arquivo_anterior = st.file_uploader(
+                    "Saída curada anterior (opcional)",
+                    type=["xlsx", "xls", "csv", "parquet"],
+                    help="Planilha gerada por esta ferramenta numa execução anterior: linhas com o mesmo ID e o "
+                         "mesmo texto herdam a classificação dela; só as novas ou editadas são classificadas",
+                    key="arquivo_anterior",
+                )
+                idx_id = 0
+                for i, c in enumerate(colunas):
+                    if c.strip().lower() in ("id", "protocolo", "código", "codigo") or c.lower().startswith("id "):
+                        idx_id = i + 1
+                        break
+                col_id = st.selectbox(
+                    "Coluna de ID do registro:",
+                    ["(nenhuma)"] + colunas,
+                    index=idx_id,
+                    disabled=arquivo_anterior is None,
+                    help="Identificador único de cada resposta, presente nas duas planilhas"
+                )
+            
+            # Configurações de desempenho
+            with st.expander("⚙️ Configurações de desempenho"):
+                somente_heuristica = st.checkbox(
+                    "Somente heurística (sem IA)",
+                    value=False,
+                    help="Classifica a planilha inteira localmente, de forma vetorizada, sem chamar a IA"
+                )
+
+                processos = PROCESSOS_HEURISTICA_PADRAO
+                if somente_heuristica:
+                    processos = st.number_input(
+                        "Processos da heurística:",
+                        min_value=0, max_value=64,
+                        value=PROCESSOS_HEURISTICA_PADRAO,
+                        help="Núcleos usados na classificação sem IA (0 = todos os núcleos do servidor)"
+                    )
+
+                col_perf1, col_perf2, col_perf3, col_perf4 = st.columns(4)
+
+                with col_perf1:
+                    max_concorrencia = st.number_input(
+                        "Requisições simultâneas:",
+                        min_value=1, max_value=64,
+                        value=MAX_CONCORRENCIA_PADRAO,
+                        help="Máximo de chamadas à IA em andamento ao mesmo tempo"
+                    )
+
+                with col_perf2:
+                    limite_rpm = st.number_input(
+                        "Requisições por minuto:",
+                        min_value=0, value=RPM_PADRAO, step=50,
+                        help="Limite da conta OpenAI (0 = sem limite)"
+                    )
+
+                with col_perf3:
+                    limite_tpm = st.number_input(
+                        "Tokens por minuto:",
+                        min_value=0, value=TPM_PADRAO, step=10_000,
+                        help="Limite da conta OpenAI (0 = sem limite)"
+                    )
+
+                with col_perf4:
+                    tamanho_lote = st.number_input(
+                        "Comentários por requisição:",
+                        min_value=1, max_value=50,
+                        value=TAMANHO_LOTE_PADRAO,
+                        help="Agrupa vários comentários em uma única chamada à IA (1 = um por vez)"
+                    )
+
+                col_res1, col_res2, col_res3 = st.columns(3)
+
+                with col_res1:
+                    tentativas = st.number_input(
+                        "Tentativas por requisição:",
+                        min_value=1, max_value=10,
+                        value=TENTATIVAS_IA_PADRAO,
+                        help="Erros temporários da IA (429, 5xx, timeout) são repetidos com espera crescente, "
+                             "respeitando o Retry-After da API"
+                    )
+
+                with col_res2:
+                    timeout_ia = st.number_input(
+                        "Timeout por requisição (s):",
+                        min_value=1.0, max_value=600.0,
+                        value=TIMEOUT_IA_PADRAO, step=5.0,
+                        help="Requisições mais lentas que isso são abandonadas e repetidas"
+                    )
+
+                with col_res3:
+                    disjuntor_falhas = st.number_input(
+                        "Falhas seguidas para suspender a IA:",
+                        min_value=0, max_value=100,
+                        value=DISJUNTOR_FALHAS_PADRAO,
+                        help="Com a API instável, as linhas seguintes usam só a heurística até ela "
+                             "voltar a responder (0 = nunca suspende)"
+                    )
+
+                agrupar_duplicados = st.checkbox(
+                    "Classificar comentários idênticos apenas uma vez",
+                    value=True,
+                    help="Comentários iguais (ignorando acentos, maiúsculas e espaços) recebem a mesma classificação"
+                )
+
+                agrupar_semelhantes = st.checkbox(
+                    "Classificar comentários quase idênticos apenas uma vez",
+                    value=False,
+                    help="Agrupa variações do mesmo comentário (\"atendimento ótimo!!\", \"Atendimento otimo\") "
+                         "e envia à IA só um representante por grupo; membros cuja heurística discorda "
+                         "do representante são classificados separadamente"
+                )
+
+                limiar_semelhanca = LIMIAR_SEMELHANCA_PADRAO
+                if agrupar_semelhantes:
+                    limiar_semelhanca = st.slider(
+                        "Semelhança mínima para agrupar:",
+                        min_value=0.5, max_value=1.0,
+                        value=LIMIAR_SEMELHANCA_PADRAO, step=0.05,
+                        help="Proporção de palavras e trechos em comum (Jaccard); valores menores agrupam mais"
+                    )
+
+                usar_triagem = st.checkbox(
+                    "Triagem heurística (casos claros sem IA)",
+                    value=False,
+                    help="Comentários vazios, com termos críticos ou claramente positivos são "
+                         "classificados localmente; apenas os ambíguos vão para a IA"
+                )
+
+                modelo_disponivel = os.path.exists(CAMINHO_MODELO_PADRAO)
+                usar_modelo_local = st.checkbox(
+                    "Modelo local para comentários rotineiros",
+                    value=False,
+                    disabled=not modelo_disponivel,
+                    help="Classificador treinado com avaliações anteriores da IA "
+                         "(python -m helps.classificador treinar); só os comentários em que ele "
+                         "não está confiante são enviados à IA"
+                         + ("" if modelo_disponivel else f". Nenhum modelo em {CAMINHO_MODELO_PADRAO}")
+                )
+
+                confianca_modelo = CONFIANCA_MODELO_PADRAO
+                if usar_modelo_local:
+                    confianca_modelo = st.slider(
+                        "Confiança mínima do modelo local:",
+                        min_value=0.5, max_value=0.99,
+                        value=CONFIANCA_MODELO_PADRAO, step=0.01,
+                        help="Abaixo dessa probabilidade o comentário segue para a IA"
+                    )
+
+                limiar_critico, limiar_positivo = LIMIAR_PESO_CRITICO, LIMIAR_SCORE_POSITIVO
+                if usar_triagem:
+                    col_tri1, col_tri2 = st.columns(2)
+                    with col_tri1:
+                        limiar_critico = st.number_input(
+                            "Peso mínimo de termo crítico:",
+                            min_value=1.0, max_value=20.0,
+                            value=LIMIAR_PESO_CRITICO, step=0.5,
+                            help="Termos de risco com peso igual ou maior resultam em Muito Alto"
+                        )
+                    with col_tri2:
+                        limiar_positivo = st.number_input(
+                            "Score mínimo de elogio claro:",
+                            min_value=1.0, max_value=100.0,
+                            value=LIMIAR_SCORE_POSITIVO, step=1.0,
+                            help="Comentários sem termos de risco e com score igual ou maior resultam em Baixo"
+                        )
+
+                usar_cache = st.checkbox(
+                    "Reutilizar classificações anteriores (cache)",
+                    value=True,
+                    help="Comentários já classificados pela IA em execuções anteriores não são reenviados"
+                )
+
+                usar_checkpoint = st.checkbox(
+                    "Salvar progresso para retomar execuções interrompidas",
+                    value=True,
+                    help="Resultados parciais são gravados em disco a cada bloco de linhas; "
+                         "reprocessar a mesma planilha com as mesmas colunas e opções continua de onde parou"
+                )
+
+                perfilar = st.checkbox(
+                    "Gerar perfil de desempenho (cProfile)",
+                    value=False,
+                    help="Registra as funções mais custosas da execução, exibidas nas métricas do resultado"
+                )
+
             # Botão de processamento
             st.subheader("3️⃣ Processar análise")
             
+            # Opções da execução (também entram na chave do progresso salvo)
+            opcoes = OpcoesProcessamento(
+                somente_heuristica=somente_heuristica,
+                max_concorrencia=int(max_concorrencia),
+                rpm=int(limite_rpm),
+                tpm=int(limite_tpm),
+                tamanho_lote=int(tamanho_lote),
+                agrupar_duplicados=agrupar_duplicados,
+                agrupar_semelhantes=agrupar_semelhantes,
+                limiar_semelhanca=float(limiar_semelhanca),
+                usar_triagem=usar_triagem,
+                usar_modelo_local=usar_modelo_local,
+                confianca_modelo=float(confianca_modelo),
+                limiar_critico=limiar_critico,
+                limiar_positivo=limiar_positivo,
+                usar_cache=usar_cache,
+                processos=int(processos),
+                tentativas=int(tentativas),
+                timeout=float(timeout_ia),
+                disjuntor_falhas=int(disjuntor_falhas),
+            )
+            conteudo_anterior = arquivo_anterior.getvalue() if arquivo_anterior is not None else None
+            hash_anterior = hashlib.sha256(conteudo_anterior).hexdigest() if conteudo_anterior is not None else ""
+
+            # Progresso salvo de uma execução anterior interrompida
+            if usar_checkpoint and not somente_heuristica:
+                checkpoint = CheckpointExecucao(chave_execucao(
+                    hash_arquivo,
+                    None if col_descricao == "(nenhuma)" else col_descricao,
+                    col_comentario,
+                    opcoes.assinatura_resultados(),
+                    hash_anterior,
+                    col_id if conteudo_anterior is not None else None,
+                ))
+                linhas_salvas = checkpoint.concluidas()
+                if linhas_salvas:
+                    col_ck1, col_ck2 = st.columns([3, 1])
+                    with col_ck1:
+                        st.info(
+                            f"⏯️ Progresso salvo encontrado: **{linhas_salvas}** de **{total_linhas}** linhas já "
+                            f"classificadas. O processamento continuará de onde parou."
+                        )
+                    with col_ck2:
+                        if st.button("Descartar progresso", use_container_width=True):
+                            checkpoint.descartar()
+                            checkpoint.fechar()
+                            st.rerun()
+                checkpoint.fechar()
+            
             if st.button("🚀 Gerar análise de risco e sentimento", type="primary", use_container_width=True):
                 
                 # Validações
-                if nome_col_risco in colunas or nome_col_explicacao in colunas:
-                    st.error("❌ Os nomes das novas colunas já existem na planilha. Escolha nomes diferentes.")
-                    return
-                
-                # Processamento
-                riscos = []
-                explicacoes = []
-                
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                total = len(df)
-                
-                for i, linha in df.iterrows():
-                    # Atualiza progresso
-                    progress = (i + 1) / total
-                    progress_bar.progress(progress)
-                    status_text.text(f"Processando: {i + 1}/{total} ({progress:.0%})")
-                    
-                    # Obtém valores
-                    descricao_val = None if col_descricao == "(nenhuma)" else linha.get(col_descricao)
-                    comentario_val = linha.get(col_comentario)
-                    
-                    # Converte para string se necessário
-                    if pd.notna(descricao_val):
-                        descricao_val = str(descricao_val)
-                    else:
-                        descricao_val = None
-                        
-                    if pd.notna(comentario_val):
-                        comentario_val = str(comentario_val)
-                    else:
-                        comentario_val = None
-                    
-                    # Analisa
-                    try:
-                        grau, explicacao = analisar_risco_sentimento(descricao_val, comentario_val)
-                    except Exception as e:
-                        grau, explicacao = heuristica_risco_explicacao(descricao_val, comentario_val)
-                    
-                    riscos.append(grau)
-                    explicacoes.append(explicacao)
-                
-                progress_bar.progress(1.0)
-                status_text.text("✅ Processamento concluído!")
-                
-                # Cria DataFrame de saída
-                df_saida = df.copy()
-                df_saida[nome_col_risco] = riscos
-                df_saida[nome_col_explicacao] = explicacoes
-                
-                # Resultados
-                st.subheader("4️⃣ Resultados")
-                
-                # Estatísticas
-                col_stats1, col_stats2, col_stats3, col_stats4 = st.columns(4)
-                
-                contagem = pd.Series(riscos).value_counts()
-                
-                with col_stats1:
-                    st.metric(
-                        "🔴 Muito Alto",
-                        contagem.get("Muito Alto", 0),
-                        help="Requerem atenção urgente"
-                    )
-                
-                with col_stats2:
-                    st.metric(
-                        "🟠 Alto",
-                        contagem.get("Alto", 0),
-                        help="Insatisfação significativa"
+                if {nome_col_risco, nome_col_explicacao, NOME_COLUNA_ORIGEM} & set(colunas):
+                    st.error(
+                        f"❌ Os nomes das novas colunas (risco, explicação ou '{NOME_COLUNA_ORIGEM}') "
+                        f"já existem na planilha. Escolha nomes diferentes."
                     )
+                    return
                 
-                with col_stats3:
-                    st.metric(
-                        "🟡 Médio",
-                        contagem.get("Médio", 0),
-                        help="Ressalvas ou feedback misto"
-                    )
-                
-                with col_stats4:
-                    st.metric(
-                        "🟢 Baixo",
-                        contagem.get("Baixo", 0),
-                        help="Satisfeitos ou sem problemas"
-                    )
-                
-                # Gráfico de distribuição
-                st.markdown("**Distribuição de Risco:**")
-                
-                # Prepara dados para o gráfico na ordem correta
-                ordem_risco = ["Muito Alto", "Alto", "Médio", "Baixo"]
-                dados_grafico = pd.DataFrame({
-                    "Grau de Risco": ordem_risco,
-                    "Quantidade": [contagem.get(r, 0) for r in ordem_risco]
-                }).set_index("Grau de Risco")
-                
-                st.bar_chart(dados_grafico)
-                
-                # Preview da saída
-                with st.expander("📄 Prévia do resultado (primeiras 10 linhas)", expanded=True):
-                    # Mostra apenas as colunas relevantes
-                    colunas_exibir = [col_comentario, nome_col_risco, nome_col_explicacao]
-                    if col_descricao != "(nenhuma)":
-                        colunas_exibir.insert(0, col_descricao)
-                    
-                    st.dataframe(df_saida[colunas_exibir].head(10), use_container_width=True)
-                
-                # Download
-                st.subheader("5️⃣ Download")
+                if arquivo_anterior is not None and col_id == "(nenhuma)":
+                    st.error("❌ Escolha a coluna de ID para reaproveitar a saída anterior.")
+                    return
+                incremental = arquivo_anterior is not None
                 
-                buffer = io.BytesIO()
-                df_saida.to_excel(buffer, index=False, engine='openpyxl')
-                buffer.seek(0)
+                if not somente_heuristica:
+                    definir_cliente(obter_cliente_openai())
                 
-                st.download_button(
-                    label="📥 Baixar planilha com Grau de Risco e Explicação (.xlsx)",
-                    data=buffer,
-                    file_name="base_helps_curadoria_risco_sentimento.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    use_container_width=True
+                pedido = PedidoCuradoria(
+                    conteudo=conteudo,
+                    nome=arquivo.name,
+                    col_descricao=None if col_descricao == "(nenhuma)" else col_descricao,
+                    col_comentario=col_comentario,
+                    nome_col_risco=nome_col_risco,
+                    nome_col_explicacao=nome_col_explicacao,
+                    opcoes=opcoes,
+                    formato=FORMATOS_SAIDA[formato_saida],
+                    preservar_original=preservar_original,
+                    usar_checkpoint=usar_checkpoint,
+                    perfilar=perfilar,
+                    hash_conteudo=hash_arquivo,
+                    conteudo_anterior=conteudo_anterior,
+                    nome_anterior=arquivo_anterior.name if incremental else "",
+                    col_id=col_id if incremental else None,
+                    hash_anterior=hash_anterior,
                 )
                 
-                st.success("🎉 Análise concluída! Clique acima para baixar o arquivo.")
+                # A tarefa roda em segundo plano; a sessão apenas acompanha pelo id
+                tarefa = submeter_curadoria(obter_gerenciador_tarefas(), pedido)
+                st.session_state["tarefa_id"] = tarefa.id
                 
         except Exception as e:
             st.error(f"❌ Erro ao processar arquivo: {str(e)}")
             st.info("💡 Verifique se o arquivo está no formato correto e se os títulos estão na linha 3.")
+    
+    # Acompanhamento das tarefas (continua visível após reruns e sem o upload)
+    exibir_tarefas()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,48 @@
+import os
+import sys
+from typing import Any, List, Sequence
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TITULOS = ("Pesquisa de satisfação NPS", "Exportado em 01/10/2024")
+
+
+def gravar_base_excel(caminho: str, colunas: Sequence[str], linhas: Sequence[Sequence[Any]]) -> str:
+    """Grava uma base no formato exportado: duas linhas de título e o cabeçalho na linha 3."""
+    from openpyxl import Workbook
+
+    livro = Workbook()
+    aba = livro.active
+    aba.title = "Respostas"
+    aba.append([TITULOS[0]])
+    aba.append([TITULOS[1]])
+    aba.append(list(colunas))
+    for linha in linhas:
+        aba.append(list(linha))
+    livro.save(caminho)
+    return str(caminho)
+
+
+@pytest.fixture
+def comentarios() -> List[tuple]:
+    """Pares (descrição, comentário) variados: críticos, positivos, neutros, vazios, caps e pontuação."""
+    return [
+        ("Instalação de para-brisa", "Péssimo atendimento, vou processar a empresa!!!"),
+        ("Troca de vidro", "Ótimo atendimento, técnico muito educado. Nota 10"),
+        ("Reparo", "O serviço foi realizado no prazo"),
+        ("Reparo", "Demorou muito para agendar, fiquei insatisfeito"),
+        ("Troca de vidro", "PÉSSIMO SERVIÇO, NUNCA MAIS"),
+        (None, "Não gostei, o técnico não resolveu o problema??"),
+        ("Instalação", ""),
+        ("Instalação", None),
+        ("Reparo", "ok"),
+        ("Troca", "Atendimento excelente, mas a loja estava suja"),
+        ("Troca", "Que maravilha, esperei 5 horas... adorei"),
+        ("Reparo", "Vou acionar o procon, um absurdo o descaso"),
+        ("Reparo", "Não foi resolvido"),
+        ("Reparo", "Foi resolvido"),
+        ("Instalação", "Ærø ÇÃO straße 😀 horrível!!"),
+        ("Instalação", "Recomendo, gostei bastante do serviço!"),
+    ]
@@ -0,0 +1,176 @@
+import json
+import os
+
+import pytest
+
+from helps.batch import BatchInterrompido, aguardar_batches, classificar_via_batch, montar_linhas, submeter_batches
+from helps.cli import main
+from helps.llm import definir_cliente
+from helps.metricas import (
+    FALLBACK_EXCECAO,
+    FALLBACK_ITEM_AUSENTE,
+    FALLBACK_JSON_INVALIDO,
+    FALLBACK_SEM_JSON,
+    MetricasExecucao,
+)
+from helps.resiliencia import PoliticaRetentativas
+from helps.simulador import ClienteSimulado, ConfiguracaoSimulador, ErroApiSimulado
+
+from conftest import gravar_base_excel
+
+POLITICA = PoliticaRetentativas(tentativas=3, espera_base=0.0)
+
+
+def _nao_dormir(segundos):
+    pass
+
+
+class Instavel:
+    """Envolve um método do cliente, falhando com 503 nas primeiras `falhas` chamadas."""
+
+    def __init__(self, funcao, falhas, status=503):
+        self.funcao = funcao
+        self.falhas = falhas
+        self.status = status
+        self.chamadas = 0
+
+    def __call__(self, *args, **kwargs):
+        self.chamadas += 1
+        if self.falhas:
+            self.falhas -= 1
+            raise ErroApiSimulado(self.status, "Service unavailable", {}, {})
+        return self.funcao(*args, **kwargs)
+
+
+def _cliente(**configuracao):
+    return ClienteSimulado(ConfiguracaoSimulador(duracao_batch=0, semente=7, **configuracao), dormir=False)
+
+
+def _classificar(cliente, pares, pasta, **extras):
+    return classificar_via_batch(
+        pares, cliente=cliente, pasta=str(pasta), intervalo=0, dormir=_nao_dormir, politica=POLITICA, **extras
+    )
+
+
+def test_resultados_voltam_na_ordem_pelo_custom_id(tmp_path, comentarios):
+    cliente = _cliente(grau_fixo="Médio")
+    metricas = MetricasExecucao()
+    resultados = _classificar(cliente, comentarios, tmp_path, metricas=metricas)
+
+    assert len(resultados) == len(comentarios)
+    for (_, comentario), (grau, explicacao) in zip(comentarios, resultados):
+        if comentario and len(comentario.strip()) >= 3:
+            assert (grau, explicacao) == ("Médio", "Classificação simulada.")
+        else:
+            assert grau == "Baixo"
+    assert not metricas.fallbacks
+    assert metricas.tokens_entrada > 0
+    # Batch concluído: o estado para retomada é apagado
+    assert not [nome for nome in os.listdir(tmp_path) if nome.endswith(".json")]
+
+
+def test_itens_expirados_e_respostas_invalidas_caem_na_heuristica(tmp_path, comentarios):
+    validos = [par for par in comentarios if par[1] and len(par[1]) >= 3]
+
+    metricas = MetricasExecucao()
+    _classificar(_cliente(grau_fixo="Médio", taxa_batch_expirado=0.5), validos, tmp_path, metricas=metricas)
+    assert metricas.fallbacks[FALLBACK_ITEM_AUSENTE] == len(validos) // 2
+
+    metricas = MetricasExecucao()
+    _classificar(_cliente(grau_fixo="Médio", taxa_json_invalido=1.0), validos, tmp_path, metricas=metricas)
+    assert metricas.fallbacks[FALLBACK_JSON_INVALIDO] + metricas.fallbacks[FALLBACK_SEM_JSON] == len(validos)
+
+    metricas = MetricasExecucao()
+    resultados = _classificar(_cliente(grau_fixo="Médio", taxa_500=1.0), validos, tmp_path, metricas=metricas)
+    assert metricas.fallbacks[FALLBACK_EXCECAO] == len(validos)
+    assert all(explicacao != "Classificação simulada." for _, explicacao in resultados)
+
+
+def test_erros_transitorios_sao_repetidos(tmp_path, comentarios):
+    cliente = _cliente(grau_fixo="Médio")
+    cliente.files.create = Instavel(cliente.files.create, 2)
+    cliente.batches.create = Instavel(cliente.batches.create, 1)
+    cliente.batches.retrieve = Instavel(cliente.batches.retrieve, 2)
+    cliente.files.content = Instavel(cliente.files.content, 1)
+
+    resultados = _classificar(cliente, comentarios, tmp_path)
+    assert ("Médio", "Classificação simulada.") in resultados
+    assert len(cliente.simulador_batches.batches) == 1
+    assert cliente.files.create.chamadas == 3
+
+
+def test_consulta_refeita_no_intervalo_seguinte(tmp_path):
+    cliente = _cliente()
+    ids = submeter_batches(cliente, montar_linhas([(0, "Reparo", "Ótimo")]), str(tmp_path), "t", politica=POLITICA)
+    # Duas rodadas inteiras de retentativas falham; a terceira responde
+    cliente.batches.retrieve = Instavel(cliente.batches.retrieve, 2 * POLITICA.tentativas)
+    esperas = []
+    estados = aguardar_batches(cliente, ids, 5.0, dormir=esperas.append, politica=POLITICA, falhas_toleradas=2)
+    assert [estado.status for estado in estados] == ["completed"]
+    assert esperas.count(5.0) == 2
+
+
+def test_api_indisponivel_interrompe_e_retoma_sem_resubmeter(tmp_path, comentarios):
+    cliente = _cliente(grau_fixo="Médio")
+    consultar = cliente.batches.retrieve
+    cliente.batches.retrieve = Instavel(consultar, 10 ** 6)
+
+    with pytest.raises(BatchInterrompido, match="execute de novo"):
+        _classificar(cliente, comentarios, tmp_path)
+    estados = [nome for nome in os.listdir(tmp_path) if nome.endswith(".json")]
+    assert len(estados) == 1
+    with open(tmp_path / estados[0], encoding="utf-8") as arquivo:
+        ids = json.load(arquivo)["batches"]
+    assert list(cliente.simulador_batches.batches) == ids
+
+    # A API volta: a mesma base retoma a espera pelo batch já submetido
+    cliente.batches.retrieve = consultar
+    resultados = _classificar(cliente, comentarios, tmp_path)
+    assert ("Médio", "Classificação simulada.") in resultados
+    assert list(cliente.simulador_batches.batches) == ids
+
+
+def test_envio_sem_sucesso_nao_deixa_estado(tmp_path, comentarios):
+    cliente = _cliente()
+    cliente.files.create = Instavel(cliente.files.create, 10 ** 6)
+    with pytest.raises(BatchInterrompido, match="Nenhum batch"):
+        _classificar(cliente, comentarios, tmp_path)
+    assert not cliente.simulador_batches.batches
+
+
+def test_erro_nao_transitorio_nao_e_repetido(tmp_path, comentarios):
+    cliente = _cliente()
+    cliente.files.create = Instavel(cliente.files.create, 1, status=401)
+    with pytest.raises(ErroApiSimulado):
+        _classificar(cliente, comentarios, tmp_path)
+    assert cliente.files.create.chamadas == 1
+
+
+def test_submissao_parcial_continua_das_partes_que_faltam(tmp_path):
+    cliente = _cliente()
+    linhas = montar_linhas([(i, "Reparo", f"Comentário {i}") for i in range(5)])
+    gravados = []
+    primeiro = submeter_batches(cliente, linhas[:2], str(tmp_path), "p", max_requisicoes=2, politica=POLITICA)
+    ids = submeter_batches(
+        cliente, linhas, str(tmp_path), "p", max_requisicoes=2, politica=POLITICA,
+        ids=primeiro, ao_submeter=lambda submetidos: gravados.append(list(submetidos)),
+    )
+    assert len(ids) == 3 and ids[0] == primeiro[0]
+    assert gravados == [ids[:2], ids]
+    assert len(cliente.simulador_batches.batches) == 3
+
+
+def test_cli_encerra_com_estado_salvo_se_a_api_cair(tmp_path, comentarios, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    entrada = gravar_base_excel(tmp_path / "base.xlsx", ["Descrição", "Comentário"], comentarios)
+    cliente = _cliente()
+    cliente.batches.retrieve = Instavel(cliente.batches.retrieve, 10 ** 6)
+    definir_cliente(cliente)
+    try:
+        codigo = main([entrada, "--coluna-comentario", "Comentário", "--batch-api", "--batch-intervalo", "0",
+                       "--tentativas", "1", "--sem-cache"])
+    finally:
+        definir_cliente(None)
+    assert codigo == 75
+    assert "execute de novo a mesma base" in capsys.readouterr().err
+    assert len(cliente.simulador_batches.batches) == 1
@@ -0,0 +1,64 @@
+import sqlite3
+
+from helps.cache import CacheClassificacoes
+
+
+def _linhas(caminho):
+    with sqlite3.connect(caminho) as conexao:
+        return dict(
+            (chave, (grau, acessado_em))
+            for chave, grau, acessado_em in conexao.execute("SELECT chave, grau, acessado_em FROM classificacoes")
+        )
+
+
+def test_chave_ignora_acentos_caixa_e_espacos():
+    assert CacheClassificacoes.chave("Reparo", "Ótimo  atendimento") == CacheClassificacoes.chave(
+        "reparo", "otimo atendimento "
+    )
+    assert CacheClassificacoes.chave("Reparo", "Ótimo") != CacheClassificacoes.chave("Reparo", "Ótimo", versao_prompt="x")
+
+
+def test_gravacoes_acumuladas_ate_o_intervalo(tmp_path):
+    caminho = str(tmp_path / "cache.sqlite")
+    cache = CacheClassificacoes(caminho, intervalo=3)
+    cache.gravar("a", "Alto", "x")
+    cache.gravar("b", "Baixo", "y")
+    # Pendentes: ainda não estão no disco, mas já são lidas pelo próprio cache
+    assert _linhas(caminho) == {}
+    assert cache.obter("a") == ("Alto", "x")
+    cache.gravar("c", "Médio", "z")
+    assert set(_linhas(caminho)) == {"a", "b", "c"}
+    assert cache.obter("inexistente") is None
+    assert (cache.acertos, cache.falhas) == (1, 1)
+    cache.fechar()
+
+
+def test_fechar_grava_pendencias_e_acessos(tmp_path):
+    caminho = str(tmp_path / "cache.sqlite")
+    cache = CacheClassificacoes(caminho)
+    cache.gravar("a", "Alto", "x")
+    cache.fechar()
+    gravado_em = _linhas(caminho)["a"][1]
+
+    cache = CacheClassificacoes(caminho)
+    assert cache.obter("a") == ("Alto", "x")
+    assert _linhas(caminho)["a"][1] == gravado_em
+    cache.fechar()
+    assert _linhas(caminho)["a"][1] > gravado_em
+
+
+def test_limite_de_entradas_descarta_as_menos_acessadas(tmp_path):
+    caminho = str(tmp_path / "cache.sqlite")
+    cache = CacheClassificacoes(caminho, max_entradas=2, intervalo=1)
+    for chave in ("a", "b", "c"):
+        cache.gravar(chave, "Baixo", chave)
+    cache.obter("a")
+    cache.remover_expirados()
+    cache.fechar()
+    assert set(_linhas(caminho)) == {"a", "c"}
+
+
+def test_chave_separa_texto_em_caps_lock():
+    comum = CacheClassificacoes.chave("Reparo", "Péssimo atendimento, nunca mais")
+    assert CacheClassificacoes.chave("Reparo", "PÉSSIMO ATENDIMENTO, NUNCA MAIS") != comum
+    assert CacheClassificacoes.chave("Reparo", "Péssimo Atendimento, Nunca Mais") == comum
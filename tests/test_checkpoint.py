@@ -0,0 +1,114 @@
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from helps.checkpoint import CheckpointExecucao, chave_execucao, hash_arquivo
+from helps.cli import NOME_COLUNA_EXPLICACAO, main
+from helps.llm import definir_cliente
+from helps.pipeline import OpcoesProcessamento
+from helps.simulador import ClienteSimulado, ConfiguracaoSimulador
+
+from conftest import gravar_base_excel
+
+
+def test_opcoes_que_mudam_o_resultado_mudam_a_assinatura(tmp_path):
+    padrao = OpcoesProcessamento().assinatura_resultados()
+    for opcoes in (
+        OpcoesProcessamento(usar_triagem=True),
+        OpcoesProcessamento(agrupar_semelhantes=True),
+        OpcoesProcessamento(agrupar_duplicados=False),
+        OpcoesProcessamento(usar_modelo_local=True, caminho_modelo=str(tmp_path / "m.npz")),
+    ):
+        assert opcoes.assinatura_resultados() != padrao
+    assert (OpcoesProcessamento(usar_triagem=True, limiar_critico=5).assinatura_resultados()
+            != OpcoesProcessamento(usar_triagem=True).assinatura_resultados())
+    assert (OpcoesProcessamento(agrupar_semelhantes=True, limiar_semelhanca=0.9).assinatura_resultados()
+            != OpcoesProcessamento(agrupar_semelhantes=True).assinatura_resultados())
+    assert (OpcoesProcessamento(usar_modelo_local=True, confianca_modelo=0.8).assinatura_resultados()
+            != OpcoesProcessamento(usar_modelo_local=True).assinatura_resultados())
+
+
+def test_ritmo_e_etapas_desligadas_nao_mudam_a_assinatura():
+    padrao = OpcoesProcessamento().assinatura_resultados()
+    assert OpcoesProcessamento(
+        max_concorrencia=2, rpm=10, tpm=0, tentativas=1, timeout=5, disjuntor_falhas=0, usar_cache=False,
+        processos=3, usar_batch_api=True, batch_intervalo=1,
+        limiar_critico=1, limiar_semelhanca=0.5, confianca_modelo=0.5,  # etapas desligadas
+    ).assinatura_resultados() == padrao
+
+
+def test_modelo_retreinado_muda_a_assinatura(tmp_path):
+    caminho = tmp_path / "modelo.npz"
+    caminho.write_bytes(b"v1")
+    opcoes = OpcoesProcessamento(usar_modelo_local=True, caminho_modelo=str(caminho))
+    antes = opcoes.assinatura_resultados()
+    os.utime(caminho, (1, 1))
+    assert opcoes.assinatura_resultados() != antes
+
+
+def test_chave_separa_opcoes_e_saida_anterior():
+    base = chave_execucao("h", "Descrição", "Comentário")
+    assert chave_execucao("h", "Descrição", "Comentário", "a") != base
+    assert chave_execucao("h", "Descrição", "Comentário", "", "anterior", "ID") != base
+    assert chave_execucao("h", "Descrição", "Comentário", "", "anterior", "ID") != chave_execucao(
+        "h", "Descrição", "Comentário", "", "outra", "ID"
+    )
+
+
+def test_checkpoint_registra_e_descarta(tmp_path):
+    checkpoint = CheckpointExecucao("k", caminho=str(tmp_path / "ck.sqlite"), intervalo=2)
+    checkpoint.iniciar(3)
+    checkpoint.registrar([(0, ("Alto", "a"))])
+    assert checkpoint.concluidas() == 0  # abaixo do intervalo, ainda pendente
+    checkpoint.registrar([(1, ("Baixo", "b"))])
+    assert checkpoint.carregar() == {0: ("Alto", "a"), 1: ("Baixo", "b")}
+    checkpoint.descartar()
+    assert checkpoint.concluidas() == 0
+    checkpoint.fechar()
+
+
+def test_checkpoint_guarda_a_origem_e_migra_tabela_antiga(tmp_path):
+    caminho = str(tmp_path / "ck.sqlite")
+    conexao = sqlite3.connect(caminho)
+    conexao.execute(
+        "CREATE TABLE progresso (execucao TEXT NOT NULL, linha INTEGER NOT NULL, grau TEXT NOT NULL, "
+        "explicacao TEXT NOT NULL, PRIMARY KEY (execucao, linha))"
+    )
+    conexao.execute("INSERT INTO progresso VALUES ('k', 0, 'Alto', 'a')")
+    conexao.commit()
+    conexao.close()
+
+    checkpoint = CheckpointExecucao("k", caminho=caminho, intervalo=1)
+    checkpoint.registrar([(1, ("Baixo", "b"), "IA"), (2, ("Médio", "c"))])
+    assert checkpoint.carregar() == {0: ("Alto", "a"), 1: ("Baixo", "b"), 2: ("Médio", "c")}
+    assert checkpoint.origens() == {0: "", 1: "IA", 2: ""}
+    checkpoint.fechar()
+
+
+@pytest.mark.parametrize("triagem, retomou", [(False, True), (True, False)])
+def test_cli_so_retoma_progresso_das_mesmas_opcoes(tmp_path, comentarios, monkeypatch, triagem, retomou):
+    monkeypatch.chdir(tmp_path)
+    entrada = gravar_base_excel(tmp_path / "base.xlsx", ["Descrição", "Comentário"], comentarios)
+    caminho = str(tmp_path / "ck.sqlite")
+
+    # Progresso de uma execução interrompida sem triagem
+    chave = chave_execucao(
+        hash_arquivo(entrada), "Descrição", "Comentário", OpcoesProcessamento().assinatura_resultados()
+    )
+    salvo = CheckpointExecucao(chave, caminho=caminho)
+    salvo.iniciar(len(comentarios))
+    salvo.registrar([(0, ("Médio", "Progresso salvo."))])
+    salvo.salvar()
+    salvo.fechar()
+
+    definir_cliente(ClienteSimulado(ConfiguracaoSimulador(semente=1), dormir=False))
+    try:
+        argv = [entrada, "--coluna-comentario", "Comentário", "--coluna-descricao", "Descrição",
+                "--sem-cache", "--caminho-checkpoint", caminho, "--saida", str(tmp_path / "saida.xlsx")]
+        assert main(argv + (["--triagem"] if triagem else [])) == 0
+    finally:
+        definir_cliente(None)
+    saida = pd.read_excel(tmp_path / "saida.xlsx", header=2)
+    assert (saida.loc[0, NOME_COLUNA_EXPLICACAO] == "Progresso salvo.") is retomou
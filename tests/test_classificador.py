@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from helps.classificador import ClassificadorLocal, ler_exemplos
+from helps.classificador import main as main_classificador
+from helps.cli import NOME_COLUNA_RISCO, main
+from helps.config import GRAUS_RISCO, NOME_COLUNA_ORIGEM
+from helps.llm import definir_cliente
+from helps.simulador import ClienteSimulado, ConfiguracaoSimulador
+
+from conftest import gravar_base_excel
+
+
+def _curar(tmp_path, comentarios, saida, *extras):
+    entrada = gravar_base_excel(tmp_path / "base.xlsx", ["Descrição", "Comentário"], comentarios)
+    argv = [entrada, "--coluna-comentario", "Comentário", "--coluna-descricao", "Descrição",
+            "--sem-cache", "--sem-checkpoint", "--saida", str(saida), *extras]
+    definir_cliente(ClienteSimulado(ConfiguracaoSimulador(semente=3), dormir=False))
+    try:
+        assert main(argv) == 0
+    finally:
+        definir_cliente(None)
+    return str(saida)
+
+
+@pytest.fixture(params=["injetada", "reexportada", "csv", "parquet"])
+def curada(request, tmp_path, comentarios):
+    """Saída curada pela linha de comando: injetada (cabeçalho na linha 3), reexportada (linha 1), CSV ou Parquet."""
+    if request.param in ("csv", "parquet"):
+        return _curar(tmp_path, comentarios, tmp_path / f"curada.{request.param}")
+    extras = ["--reexportar"] if request.param == "reexportada" else []
+    return _curar(tmp_path, comentarios, tmp_path / "curada.xlsx", *extras)
+
+
+def test_saida_curada_registra_a_origem_do_grau(curada, comentarios):
+    from helps.arquivos import iterar_blocos, localizar_cabecalho
+
+    linha_cabecalho = localizar_cabecalho(curada, ("Comentário", NOME_COLUNA_ORIGEM))
+    bloco = next(iter(iterar_blocos(curada, ["Comentário", NOME_COLUNA_ORIGEM], linha_cabecalho=linha_cabecalho)))
+    origens = dict(zip(bloco["Comentário"].fillna("").tolist(), bloco[NOME_COLUNA_ORIGEM].tolist()))
+    # Comentários vazios ou triviais não vão à IA: o grau deles é da heurística
+    assert origens["Não foi resolvido"] == "IA"
+    assert origens[""] == "Heurística"
+    assert len(bloco) == len(comentarios)
+
+
+def test_ler_exemplos_so_com_graus_da_ia(curada, comentarios):
+    pares, graus = ler_exemplos([curada], "Descrição", "Comentário", NOME_COLUNA_RISCO)
+    # Comentários vazios ou com menos de 3 caracteres ficam de fora
+    assert 0 < len(pares) <= len([c for _, c in comentarios if c and len(c) >= 3])
+    assert set(graus) <= set(GRAUS_RISCO)
+    assert ("Reparo", "Não foi resolvido") in pares
+
+
+def test_ler_exemplos_sem_a_coluna_de_risco(curada):
+    with pytest.raises(KeyError):
+        ler_exemplos([curada], None, "Comentário", "Grau inexistente")
+
+
+def test_ler_exemplos_ignora_graus_que_nao_vieram_da_ia(tmp_path, comentarios):
+    heuristica = _curar(tmp_path, comentarios, tmp_path / "curada.xlsx", "--somente-heuristica")
+    assert ler_exemplos([heuristica], "Descrição", "Comentário", NOME_COLUNA_RISCO) == ([], [])
+
+
+def test_planilha_sem_origem_exige_confirmacao(tmp_path, capsys):
+    linhas = [("Péssimo, vou ao procon", "Muito Alto"), ("Ótimo atendimento", "Baixo")] * 20
+    antiga = gravar_base_excel(tmp_path / "antiga.xlsx", ["Comentário", NOME_COLUNA_RISCO], linhas)
+    with pytest.raises(ValueError, match=NOME_COLUNA_ORIGEM):
+        ler_exemplos([antiga], None, "Comentário", NOME_COLUNA_RISCO)
+    pares, graus = ler_exemplos([antiga], None, "Comentário", NOME_COLUNA_RISCO, aceitar_sem_origem=True)
+    assert len(pares) == 2 and sorted(graus) == ["Baixo", "Muito Alto"]
+
+    modelo = str(tmp_path / "modelo.npz")
+    argv = ["treinar", antiga, "--coluna-comentario", "Comentário", "--modelo", modelo, "--validacao", "0.5"]
+    assert main_classificador(argv) == 2
+    assert main_classificador([*argv, "--aceitar-sem-origem"]) == 0
+    erro = capsys.readouterr().err
+    assert "Concordância com os graus das planilhas" in erro and "Concordância com a IA" not in erro
+
+
+def test_treinar_salvar_e_carregar(tmp_path):
+    positivos = [("Reparo", f"Ótimo atendimento, técnico nota {n}") for n in range(40)]
+    criticos = [("Reparo", f"Péssimo, vou ao procon, protocolo {n}") for n in range(40)]
+    pares = positivos + criticos
+    graus = ["Baixo"] * 40 + ["Muito Alto"] * 40
+    modelo = ClassificadorLocal.treinar(pares, graus, epocas=10, dimensao=2 ** 12)
+
+    previstos, confiancas = modelo.prever([("Reparo", "Ótimo atendimento"), ("Reparo", "Péssimo, procon")])
+    assert previstos == ["Baixo", "Muito Alto"]
+    assert np.all((confiancas > 0) & (confiancas <= 1))
+
+    caminho = str(tmp_path / "modelo.npz")
+    modelo.salvar(caminho)
+    carregado = ClassificadorLocal.carregar(caminho)
+    np.testing.assert_allclose(carregado.probabilidades(pares), modelo.probabilidades(pares), rtol=1e-6)
+
+    # Sem confiança suficiente, nada é resolvido localmente
+    assert carregado.classificar(pares[:3], confianca_minima=1.01) == [None, None, None]
+    resolvidos = carregado.classificar(pares[:3], confianca_minima=0.0)
+    assert all(grau == "Baixo" and explicacao for grau, explicacao in resolvidos)
+
+
+def test_cli_treina_com_saida_curada(curada, tmp_path, capsys):
+    modelo = str(tmp_path / "modelo.npz")
+    argv = ["treinar", curada, "--coluna-comentario", "Comentário", "--modelo", modelo, "--validacao", "0.25"]
+    assert main_classificador(argv) == 0
+    assert ClassificadorLocal.carregar(modelo).metadados["exemplos"] > 0
+    assert main_classificador(["avaliar", curada, "--coluna-comentario", "Comentário", "--coluna-risco", "X",
+                               "--modelo", modelo]) == 2
+    assert "Erro ao ler as planilhas" in capsys.readouterr().err
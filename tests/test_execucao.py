@@ -0,0 +1,20 @@
+from helps.execucao import agrupar_pares_unicos
+from helps.heuristica import heuristica_risco_explicacao
+
+
+def test_agrupa_pares_normalizados_mas_separa_caps_lock():
+    pares = [
+        ("Reparo", "Péssimo atendimento, nunca mais volto"),
+        ("reparo", "pessimo  atendimento, nunca mais volto"),
+        ("Reparo", "PÉSSIMO ATENDIMENTO, NUNCA MAIS VOLTO"),
+        ("Reparo", "Péssimo Atendimento, Nunca Mais Volto"),
+        (None, None),
+        ("", ""),
+    ]
+    unicos, mapeamento = agrupar_pares_unicos(pares)
+
+    assert mapeamento == [0, 0, 1, 0, 2, 2]
+    assert unicos == [pares[0], pares[2], pares[4]]
+    # Cada linha recebe exatamente o resultado que teria se fosse classificada sozinha
+    for par, idx in zip(pares, mapeamento):
+        assert heuristica_risco_explicacao(*par) == heuristica_risco_explicacao(*unicos[idx])
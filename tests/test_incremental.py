@@ -0,0 +1,127 @@
+import pandas as pd
+import pytest
+
+from helps.arquivos import LINHA_CABECALHO_EXCEL, iterar_blocos, ler_colunas, localizar_cabecalho
+from helps.cli import NOME_COLUNA_EXPLICACAO, NOME_COLUNA_RISCO, main
+from helps.config import NOME_COLUNA_ORIGEM
+from helps.incremental import Reaproveitamento, assinatura_texto, normalizar_id
+
+from conftest import gravar_base_excel
+
+COLUNAS = ["ID", "Descrição", "Comentário"]
+
+
+def _base(comentarios):
+    return [(i + 1, descricao, comentario) for i, (descricao, comentario) in enumerate(comentarios)]
+
+
+def _curar(entrada, saida, *extras):
+    argv = [
+        entrada, "--coluna-comentario", "Comentário", "--coluna-descricao", "Descrição",
+        "--somente-heuristica", "--sem-cache", "--saida", saida, *extras,
+    ]
+    return main(argv)
+
+
+def test_normalizar_id():
+    assert normalizar_id(123) == normalizar_id(123.0) == normalizar_id(" 123 ") == "123"
+    assert normalizar_id(None) is None
+    assert normalizar_id(float("nan")) is None
+    assert normalizar_id("  ") is None
+
+
+def test_assinatura_ignora_acentos_e_caixa_mas_nao_o_texto():
+    assert assinatura_texto("Reparo", "Ótimo atendimento") == assinatura_texto("reparo", "otimo atendimento")
+    assert assinatura_texto("Reparo", "Ótimo atendimento") != assinatura_texto("Reparo", "Péssimo atendimento")
+    assert assinatura_texto(float("nan"), "x") == assinatura_texto(None, "x")
+
+
+def test_filtrar_reaproveita_so_linhas_inalteradas():
+    anterior = pd.DataFrame({
+        "ID": [1, 2, 3, None],
+        "Descrição": ["Reparo", "Reparo", "Troca", "Troca"],
+        "Comentário": ["Ótimo", "Demorou", "Péssimo", "Sem ID"],
+        "Grau": ["Baixo", "Médio", "Alto", "Baixo"],
+        "Explicação": ["Elogio.", "Demora.", "Reclamação.", "x"],
+        "Origem": ["IA", "Triagem", "", "IA"],
+    })
+    reaproveitamento = Reaproveitamento(
+        {
+            normalizar_id(i): (assinatura_texto(d, c), g, e, o)
+            for i, d, c, g, e, o in anterior.itertuples(index=False)
+            if normalizar_id(i)
+        },
+        "ID",
+    )
+    nova = pd.DataFrame({
+        "ID": ["1", 2.0, 3, 4],
+        "Descrição": ["reparo", "Reparo", "Troca", "Troca"],
+        "Comentário": ["otimo", "Demorou demais", "Péssimo", "Novo"],
+    })
+    blocos = list(reaproveitamento.filtrar([nova.iloc[:2], nova.iloc[2:]], "Descrição", "Comentário"))
+
+    assert [len(b) for b in blocos] == [2, 2]
+    assert reaproveitamento.resultados == {0: ("Baixo", "Elogio."), 2: ("Alto", "Reclamação.")}
+    assert reaproveitamento.origens == {0: "IA", 2: ""}
+    assert reaproveitamento.editadas == 1
+
+
+@pytest.mark.parametrize("reexportar", [False, True])
+def test_saida_curada_lida_como_anterior(tmp_path, comentarios, reexportar):
+    """Curadoria, (re)exportação e nova execução com --anterior: as linhas inalteradas são reaproveitadas."""
+    entrada = gravar_base_excel(tmp_path / "base.xlsx", COLUNAS, _base(comentarios))
+    anterior = str(tmp_path / "anterior.xlsx")
+    assert _curar(entrada, anterior, *(["--reexportar"] if reexportar else [])) == 0
+
+    exigidas = ("ID", "Comentário", NOME_COLUNA_RISCO, NOME_COLUNA_EXPLICACAO)
+    linha = localizar_cabecalho(anterior, exigidas)
+    assert linha == (0 if reexportar else LINHA_CABECALHO_EXCEL)
+    assert set(exigidas) <= set(ler_colunas(anterior, linha_cabecalho=linha))
+
+    # Semana seguinte: um comentário editado e uma linha nova
+    linhas = _base(comentarios)
+    linhas[1] = (2, linhas[1][1], "Atendimento razoável")
+    linhas.append((len(linhas) + 1, "Reparo", "Gostei muito"))
+    nova = gravar_base_excel(tmp_path / "base2.xlsx", COLUNAS, linhas)
+
+    reaproveitamento = Reaproveitamento.de_arquivo(
+        anterior, "ID", "Descrição", "Comentário", NOME_COLUNA_RISCO, NOME_COLUNA_EXPLICACAO
+    )
+    list(reaproveitamento.filtrar(iterar_blocos(nova, COLUNAS), "Descrição", "Comentário"))
+    assert len(reaproveitamento.resultados) == len(comentarios) - 1
+    assert 1 not in reaproveitamento.resultados
+    assert reaproveitamento.editadas == 1
+
+    saida = str(tmp_path / "saida.xlsx")
+    assert _curar(nova, saida, "--anterior", anterior, "--coluna-id", "ID") == 0
+    resultado = pd.read_excel(saida, header=LINHA_CABECALHO_EXCEL)
+    original = pd.read_excel(anterior, header=linha)
+    assert len(resultado) == len(linhas)
+    inalteradas = [i for i in range(len(comentarios)) if i != 1]
+    assert (
+        resultado.loc[inalteradas, NOME_COLUNA_RISCO].tolist()
+        == original.loc[inalteradas, NOME_COLUNA_RISCO].tolist()
+    )
+    # A origem do grau acompanha a classificação reaproveitada
+    assert (
+        resultado.loc[inalteradas, NOME_COLUNA_ORIGEM].tolist()
+        == original.loc[inalteradas, NOME_COLUNA_ORIGEM].tolist()
+    )
+
+
+def test_anterior_sem_as_colunas_exigidas(tmp_path, comentarios, capsys):
+    entrada = gravar_base_excel(tmp_path / "base.xlsx", COLUNAS, _base(comentarios))
+    saida = str(tmp_path / "saida.xlsx")
+    assert _curar(entrada, saida, "--anterior", entrada, "--coluna-id", "ID") == 2
+    assert "Colunas não encontradas" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("faltando", ["entrada", "anterior"])
+def test_arquivo_inexistente_e_erro_de_uso(tmp_path, comentarios, capsys, faltando):
+    entrada = gravar_base_excel(tmp_path / "base.xlsx", COLUNAS, _base(comentarios))
+    inexistente = str(tmp_path / "nao_existe.xlsx")
+    argumentos = ["--anterior", inexistente if faltando == "anterior" else entrada, "--coluna-id", "ID"]
+    with pytest.raises(SystemExit) as erro:
+        _curar(inexistente if faltando == "entrada" else entrada, str(tmp_path / "saida.xlsx"), *argumentos)
+    assert erro.value.code == 2
+    assert "não encontrado: " + inexistente in capsys.readouterr().err
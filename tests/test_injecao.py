@@ -0,0 +1,91 @@
+import zipfile
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Font, PatternFill
+
+from helps.arquivos import LINHA_CABECALHO_EXCEL
+from helps.injecao import injetar_colunas
+
+RESULTADOS = [("Alto", "Reclamação grave"), ("Baixo", "Elogio <ao> técnico & equipe"), ("Médio", "Sem \x01 controle")]
+
+
+def _livro(caminho):
+    """Base exportada com título mesclado, cabeçalho formatado, fórmula, linha vazia e uma aba extra."""
+    livro = Workbook()
+    aba = livro.active
+    aba.title = "Respostas"
+    aba["A1"] = "Pesquisa de satisfação NPS"
+    aba["A1"].font = Font(bold=True, size=14)
+    aba.merge_cells("A1:C1")
+    aba["A2"] = "Exportado em 01/10/2024"
+    for coluna, nome in enumerate(["ID", "Descrição", "Comentário"], start=1):
+        celula = aba.cell(row=3, column=coluna, value=nome)
+        celula.font = Font(bold=True, color="FFFFFF")
+        celula.fill = PatternFill("solid", fgColor="1F4E78")
+    aba.append([1, "Reparo", "Péssimo, vou ao procon"])
+    aba.append([2, "Troca", "Ótimo atendimento"])
+    aba["A7"] = "=SUM(A4:A5)"  # a linha 6 fica sem elemento <row> no XML
+    aba.column_dimensions["C"].width = 42
+    resumo = livro.create_sheet("Resumo")
+    resumo["A1"] = "Total"
+    resumo["B1"] = "=COUNTA(Respostas!A4:A7)"
+    livro.save(caminho)
+    return str(caminho)
+
+
+def test_injecao_preserva_estilos_titulos_e_demais_abas(tmp_path):
+    origem = _livro(tmp_path / "base.xlsx")
+    destino = str(tmp_path / "saida.xlsx")
+    injetar_colunas(origem, destino, RESULTADOS + [("Baixo", "")], "Grau de Risco", "Explicação", largura_cabecalho=3)
+
+    livro = load_workbook(destino)
+    aba = livro["Respostas"]
+    assert livro.sheetnames == ["Respostas", "Resumo"]
+    assert [aba.cell(row=3, column=c).value for c in range(1, 6)] == [
+        "ID", "Descrição", "Comentário", "Grau de Risco", "Explicação",
+    ]
+    # O cabeçalho novo herda o estilo da última célula do cabeçalho original
+    assert aba["D3"].font.bold and aba["D3"].fill.fgColor.rgb == aba["C3"].fill.fgColor.rgb
+    assert [(aba.cell(row=r, column=4).value, aba.cell(row=r, column=5).value) for r in range(4, 7)] == [
+        ("Alto", "Reclamação grave"), ("Baixo", "Elogio <ao> técnico & equipe"), ("Médio", "Sem  controle"),
+    ]
+    assert aba["D7"].value == "Baixo"
+
+    # Títulos, mesclagem, fórmulas, larguras e a aba extra ficam intactos
+    assert aba["A1"].value == "Pesquisa de satisfação NPS" and aba["A1"].font.bold and aba["A1"].font.size == 14
+    assert [str(faixa) for faixa in aba.merged_cells.ranges] == ["A1:C1"]
+    assert aba["A2"].value == "Exportado em 01/10/2024"
+    assert aba["A7"].value == "=SUM(A4:A5)"
+    assert aba.column_dimensions["C"].width == 42
+    assert livro["Resumo"]["B1"].value == "=COUNTA(Respostas!A4:A7)"
+
+    # Só o XML da primeira aba muda; as demais entradas são copiadas byte a byte
+    with zipfile.ZipFile(origem) as antes, zipfile.ZipFile(destino) as depois:
+        assert antes.namelist() == depois.namelist()
+        diferentes = [nome for nome in antes.namelist() if antes.read(nome) != depois.read(nome)]
+    assert diferentes == ["xl/worksheets/sheet1.xml"]
+
+
+def test_injecao_lida_como_base_com_as_colunas_novas(tmp_path):
+    origem = _livro(tmp_path / "base.xlsx")
+    destino = str(tmp_path / "saida.xlsx")
+    injetar_colunas(origem, destino, RESULTADOS[:2], "Grau de Risco", "Explicação", largura_cabecalho=3)
+
+    tabela = pd.read_excel(destino, header=LINHA_CABECALHO_EXCEL)
+    assert list(tabela.columns) == ["ID", "Descrição", "Comentário", "Grau de Risco", "Explicação"]
+    assert tabela["Grau de Risco"].tolist()[:2] == ["Alto", "Baixo"]
+
+
+def test_injecao_com_a_coluna_de_origem(tmp_path):
+    origem = _livro(tmp_path / "base.xlsx")
+    destino = str(tmp_path / "saida.xlsx")
+    injetar_colunas(
+        origem, destino, RESULTADOS[:2], "Grau de Risco", "Explicação", largura_cabecalho=3,
+        origens=["IA", "Triagem"], nome_col_origem="Origem do Grau",
+    )
+
+    tabela = pd.read_excel(destino, header=LINHA_CABECALHO_EXCEL)
+    assert list(tabela.columns) == ["ID", "Descrição", "Comentário", "Grau de Risco", "Explicação", "Origem do Grau"]
+    assert tabela["Origem do Grau"].tolist()[:2] == ["IA", "Triagem"]
+    assert load_workbook(destino)["Respostas"]["F3"].font.bold
@@ -0,0 +1,112 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from helps.heuristica import heuristica_risco_explicacao
+from helps.llm import analisar_lote_risco_sentimento, analisar_risco_sentimento, interpretar_resposta
+from helps.metricas import (
+    FALLBACK_GRAU_INVALIDO,
+    FALLBACK_ITEM_AUSENTE,
+    FALLBACK_JSON_INVALIDO,
+    FALLBACK_SEM_JSON,
+    FALLBACK_TEXTO_VAZIO,
+    MetricasExecucao,
+)
+
+
+class ClienteFixo:
+    """Cliente da Responses API que sempre devolve o mesmo texto."""
+
+    def __init__(self, texto):
+        self.responses = self
+        self.texto = texto
+
+    def create(self, **parametros):
+        return SimpleNamespace(output=[SimpleNamespace(content=[SimpleNamespace(text=self.texto)])], usage=None)
+
+
+@pytest.mark.parametrize(
+    "texto, esperado",
+    [
+        ('{"g": "MA", "e": "Cliente revoltado "}', (("Muito Alto", "Cliente revoltado"), None)),
+        ('{"g": "B", "e": null}', (("Baixo", ""), None)),
+        ('{"g": "M"}', (("Médio", ""), None)),
+        ("", (None, FALLBACK_TEXTO_VAZIO)),
+        ('{"g": "A", "e": "Cliente insatisfeito com o', (None, FALLBACK_JSON_INVALIDO)),
+        ('{"g": "A", "e": "ok"}}', (None, FALLBACK_JSON_INVALIDO)),
+        ("Grau: Alto", (None, FALLBACK_JSON_INVALIDO)),
+        ('["A", "ok"]', (None, FALLBACK_SEM_JSON)),
+        ("null", (None, FALLBACK_SEM_JSON)),
+        ('"A"', (None, FALLBACK_SEM_JSON)),
+        ('{"g": "Alto", "e": "nome em vez do código"}', (None, FALLBACK_GRAU_INVALIDO)),
+        ('{"g": "X", "e": "x"}', (None, FALLBACK_GRAU_INVALIDO)),
+        ('{"e": "sem grau"}', (None, FALLBACK_GRAU_INVALIDO)),
+        ('{"g": ["A"], "e": "x"}', (None, FALLBACK_GRAU_INVALIDO)),
+    ],
+)
+def test_interpretar_resposta(texto, esperado):
+    assert interpretar_resposta(texto) == esperado
+
+
+def test_resposta_malformada_cai_na_heuristica_com_o_motivo():
+    metricas = MetricasExecucao()
+    comentario = "Péssimo atendimento, vou ao procon"
+    resultado = analisar_risco_sentimento(
+        "Reparo", comentario, cliente=ClienteFixo('{"g": "MA", "e": "corta'), metricas=metricas
+    )
+    assert resultado == heuristica_risco_explicacao("Reparo", comentario)
+    assert metricas.fallbacks == {FALLBACK_JSON_INVALIDO: 1}
+
+    # Sem explicação, o grau da IA é mantido e a explicação vem da heurística
+    grau, explicacao = analisar_risco_sentimento("Reparo", comentario, cliente=ClienteFixo('{"g": "B", "e": ""}'))
+    assert grau == "Baixo" and explicacao == heuristica_risco_explicacao("Reparo", comentario)[1]
+
+
+def test_lote_parcial_aproveita_os_itens_validos():
+    pares = [
+        ("Reparo", "Ótimo atendimento, recomendo"),
+        ("Reparo", "Demorou muito para agendar"),
+        ("Troca", "Péssimo, nunca mais volto"),
+        ("Troca", "ok"),
+        ("Troca", "Técnico educado, mas atrasou"),
+        ("Reparo", "Vidro trincou de novo"),
+    ]
+    resposta = json.dumps({"itens": [
+        {"id": 1, "g": "B", "e": "Cliente satisfeito"},
+        {"id": 1, "g": "A", "e": "duplicado: ignorado"},
+        {"id": 2, "g": "Médio", "e": "grau inválido"},
+        {"id": 3, "g": ["MA"], "e": "grau que nem é texto"},
+        {"id": 4, "g": "MA", "e": "comentário trivial: não foi enviado"},
+        {"id": 9, "g": "A", "e": "fora do lote"},
+        {"id": "x", "g": "A", "e": "id inválido"},
+        "texto solto",
+        {"id": "5", "g": "M", "e": ""},
+    ]})
+    metricas = MetricasExecucao()
+    resultados = analisar_lote_risco_sentimento(pares, cliente=ClienteFixo(resposta), metricas=metricas)
+
+    assert resultados[0] == ("Baixo", "Cliente satisfeito")
+    assert resultados[1] == heuristica_risco_explicacao(*pares[1])
+    assert resultados[2] == heuristica_risco_explicacao(*pares[2])
+    assert resultados[3] == ("Baixo", "Sem comentário relevante para análise.")
+    assert resultados[4] == ("Médio", heuristica_risco_explicacao(*pares[4])[1])
+    assert resultados[5] == heuristica_risco_explicacao(*pares[5])
+    assert metricas.fallbacks == {FALLBACK_GRAU_INVALIDO: 2, FALLBACK_ITEM_AUSENTE: 1}
+
+
+@pytest.mark.parametrize(
+    "texto, motivo",
+    [
+        ("", FALLBACK_TEXTO_VAZIO),
+        ('{"itens": [{"id": 1, "g": "B", "e": "corta', FALLBACK_JSON_INVALIDO),
+        ('{"itens": {"id": 1}}', FALLBACK_SEM_JSON),
+        ("[]", FALLBACK_SEM_JSON),
+    ],
+)
+def test_lote_malformado_cai_inteiro_na_heuristica(texto, motivo):
+    pares = [("Reparo", "Ótimo atendimento, recomendo"), ("Troca", "Péssimo, nunca mais volto")]
+    metricas = MetricasExecucao()
+    resultados = analisar_lote_risco_sentimento(pares, cliente=ClienteFixo(texto), metricas=metricas)
+    assert resultados == [heuristica_risco_explicacao(*par) for par in pares]
+    assert metricas.fallbacks == {motivo: 2}
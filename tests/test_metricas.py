@@ -0,0 +1,21 @@
+from helps.metricas import FALLBACK_DISJUNTOR, FALLBACK_EXCECAO, MetricasExecucao, formatar_resumo
+
+
+def test_resumo_com_a_api_fora_do_ar_reporta_retentativas_e_disjuntor():
+    metricas = MetricasExecucao()
+    for _ in range(3):
+        metricas.registrar_chamada(0.5, erro=True)  # sem `usage`: nenhum token contabilizado
+    metricas.registrar_retentativa(1.5)
+    metricas.registrar_retentativa(2.0)
+    metricas.aberturas_disjuntor = 1
+    metricas.registrar_fallback(FALLBACK_EXCECAO)
+    metricas.registrar_fallback(FALLBACK_DISJUNTOR, linhas=4)
+
+    resumo = metricas.resumo()
+    assert resumo["ia"]["chamadas"] == 3 and resumo["ia"]["tokens_entrada"] == 0
+    linhas = formatar_resumo(resumo)
+
+    assert not any(linha.startswith("Tokens:") for linha in linhas)
+    assert "Retentativas: 2 (3.5s de espera); disjuntor aberto 1 vez(es)" in linhas
+    assert any(linha.startswith("IA: 3 chamadas (3 com erro)") for linha in linhas)
+    assert linhas[-1] == f"Fallbacks para a heurística: {FALLBACK_DISJUNTOR} 4, {FALLBACK_EXCECAO} 1"
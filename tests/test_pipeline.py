@@ -0,0 +1,74 @@
+from helps.cli import main
+from helps.llm import definir_cliente
+from helps.pipeline import OpcoesProcessamento, processar_pares
+from helps.simulador import ClienteSimulado, ConfiguracaoSimulador
+
+from conftest import gravar_base_excel
+
+CRITICO = ("Reparo", "Péssimo, vou ao procon, um absurdo")
+POSITIVO = ("Reparo", "Ótimo atendimento, excelente, recomendo, adorei, parabéns")
+VAZIO = ("Reparo", "ok")
+DUVIDOSO = ("Reparo", "Demorou para agendar, mas foi resolvido")
+OUTRO = ("Reparo", "O técnico atrasou um pouco")
+
+
+def test_triagem_conta_linhas_e_comentarios_unicos_por_caminho(tmp_path):
+    pares = [CRITICO] * 3 + [POSITIVO] * 2 + [VAZIO, (None, None), ("Troca", "")] + [DUVIDOSO] * 4 + [OUTRO]
+    definir_cliente(ClienteSimulado(ConfiguracaoSimulador(semente=3, grau_fixo="Médio"), dormir=False))
+    try:
+        resultados, estatisticas = processar_pares(
+            pares, OpcoesProcessamento(usar_triagem=True, usar_cache=False, tamanho_lote=1)
+        )
+    finally:
+        definir_cliente(None)
+
+    assert len(resultados) == len(pares)
+    assert estatisticas.unicos == 7
+    assert estatisticas.caminhos == {"vazio": 3, "critico": 3, "positivo": 2}
+    assert (estatisticas.enviados_ia, estatisticas.linhas_ia) == (2, 5)
+    assert sum(estatisticas.caminhos.values()) + estatisticas.linhas_ia == len(pares)
+    assert [grau for grau, _ in resultados[-5:]] == ["Médio"] * 5
+    assert estatisticas.origens == ["Triagem"] * 8 + ["IA"] * 5
+
+
+def test_origem_do_grau_de_semelhantes_e_fallback():
+    pares = [
+        ("Reparo", "Atendimento ótimo!! técnico muito educado e atencioso"),
+        ("Reparo", "atendimento otimo, tecnico muito educado e atencioso"),
+        ("Reparo", "Demorou demais para agendar a troca do vidro"),
+        ("Reparo", "ok"),
+    ]
+    opcoes = OpcoesProcessamento(agrupar_semelhantes=True, usar_cache=False, tamanho_lote=1)
+    definir_cliente(ClienteSimulado(ConfiguracaoSimulador(semente=3, grau_fixo="Médio"), dormir=False))
+    try:
+        _, estatisticas = processar_pares(pares, opcoes)
+        opcoes.tentativas = 1
+        definir_cliente(ClienteSimulado(ConfiguracaoSimulador(semente=3, taxa_500=1.0), dormir=False))
+        _, falhas = processar_pares(pares, opcoes)
+    finally:
+        definir_cliente(None)
+
+    # Comentários triviais nem chegam à IA: o grau é da heurística
+    assert estatisticas.origens == ["IA", "Semelhante", "IA", "Heurística"]
+    assert falhas.origens == ["Heurística", "Semelhante", "Heurística", "Heurística"]
+
+
+def test_resumo_da_cli_mostra_deduplicacao_e_triagem(tmp_path, capsys):
+    pares = [CRITICO] * 3 + [POSITIVO] * 2 + [VAZIO] + [DUVIDOSO] * 4 + [OUTRO]
+    entrada = gravar_base_excel(tmp_path / "base.xlsx", ["Descrição", "Comentário"], pares)
+    argv = [
+        entrada, "--coluna-comentario", "Comentário", "--coluna-descricao", "Descrição", "--triagem",
+        "--sem-cache", "--sem-checkpoint", "--lote", "1", "--saida", str(tmp_path / "saida.xlsx"),
+    ]
+    definir_cliente(ClienteSimulado(ConfiguracaoSimulador(semente=3, grau_fixo="Médio"), dormir=False))
+    try:
+        assert main(argv) == 0
+    finally:
+        definir_cliente(None)
+
+    erro = capsys.readouterr().err
+    assert "Deduplicação: 5 comentários únicos em 11 linhas (55% duplicados)" in erro
+    assert (
+        "Triagem: 6 linhas resolvidas localmente (1 vazias, 3 críticas, 2 positivas), "
+        "5 linhas classificadas pela IA (2 comentários únicos enviados)"
+    ) in erro
@@ -0,0 +1,176 @@
+import pytest
+
+from helps.resiliencia import (
+    ABERTO,
+    FECHADO,
+    SEMIABERTO,
+    Disjuntor,
+    IAIndisponivel,
+    PoliticaRetentativas,
+    chamar_com_resiliencia,
+    erro_transitorio,
+    segundos_retry_after,
+)
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+class Resposta:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class ErroAPI(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = Resposta(headers or {})
+
+
+class APITimeoutError(Exception):
+    pass
+
+
+def _roteiro(*passos):
+    """Função que levanta ou retorna os passos em ordem, registrando os parâmetros de cada chamada."""
+    chamadas = []
+
+    def funcao(**parametros):
+        chamadas.append(parametros)
+        passo = passos[len(chamadas) - 1]
+        if isinstance(passo, BaseException):
+            raise passo
+        return passo
+
+    return funcao, chamadas
+
+
+def test_disjuntor_abre_sonda_e_fecha():
+    relogio = Relogio()
+    disjuntor = Disjuntor(limiar_falhas=3, espera=10, relogio=relogio)
+
+    assert not disjuntor.registrar_falha() and not disjuntor.registrar_falha()
+    disjuntor.registrar_sucesso()  # sucesso zera a contagem de falhas consecutivas
+    assert not disjuntor.registrar_falha() and not disjuntor.registrar_falha()
+    assert disjuntor.estado == FECHADO and disjuntor.permitir()
+    assert disjuntor.registrar_falha()
+    assert disjuntor.estado == ABERTO and disjuntor.aberturas == 1
+
+    relogio.agora = 9.9
+    assert not disjuntor.permitir()
+    relogio.agora = 10
+    assert disjuntor.permitir()  # a sondagem
+    assert disjuntor.estado == SEMIABERTO
+    assert not disjuntor.permitir()  # só uma sondagem por vez
+    disjuntor.registrar_sucesso()
+    assert disjuntor.estado == FECHADO and disjuntor.permitir()
+
+
+def test_disjuntor_reabre_quando_a_sondagem_falha():
+    relogio = Relogio()
+    disjuntor = Disjuntor(limiar_falhas=1, espera=5, relogio=relogio)
+    assert disjuntor.registrar_falha()
+
+    relogio.agora = 5
+    assert disjuntor.permitir()
+    assert not disjuntor.registrar_falha()  # reabrir não conta como nova abertura
+    assert disjuntor.estado == ABERTO and disjuntor.aberturas == 1
+    relogio.agora = 9
+    assert not disjuntor.permitir()  # nova espera conta a partir da sondagem falha
+    relogio.agora = 10
+    assert disjuntor.permitir()
+
+
+def test_disjuntor_libera_sondagem_sem_resultado():
+    relogio = Relogio()
+    disjuntor = Disjuntor(limiar_falhas=1, espera=5, relogio=relogio)
+    disjuntor.registrar_falha()
+    relogio.agora = 5
+    assert disjuntor.permitir() and not disjuntor.permitir()
+    disjuntor.liberar_sondagem()
+    assert disjuntor.estado == SEMIABERTO and disjuntor.permitir()
+
+
+def test_disjuntor_desativado():
+    disjuntor = Disjuntor(limiar_falhas=0)
+    for _ in range(100):
+        assert not disjuntor.registrar_falha()
+    assert disjuntor.estado == FECHADO and disjuntor.permitir()
+
+
+def test_erros_transitorios_e_retry_after():
+    assert erro_transitorio(ErroAPI(429)) and erro_transitorio(ErroAPI(503))
+    assert not erro_transitorio(ErroAPI(400)) and not erro_transitorio(ValueError())
+    assert erro_transitorio(APITimeoutError()) and erro_transitorio(ConnectionResetError())
+
+    assert segundos_retry_after(ErroAPI(429, {"retry-after-ms": "1500"})) == 1.5
+    assert segundos_retry_after(ErroAPI(429, {"retry-after": "3"})) == 3.0
+    assert segundos_retry_after(ErroAPI(429, {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+    assert segundos_retry_after(ErroAPI(429, {"retry-after": "logo"})) is None
+    assert segundos_retry_after(ErroAPI(429)) is None
+
+
+def test_espera_com_jitter_limitada():
+    politica = PoliticaRetentativas(espera_base=0.5, espera_maxima=3)
+    erro = ErroAPI(500)
+    assert [politica.espera(t, erro, aleatorio=lambda: 1.0) for t in range(1, 6)] == [0.5, 1, 2, 3, 3]
+    assert politica.espera(3, erro, aleatorio=lambda: 0.25) == 0.5
+
+
+def test_repete_transitorios_respeitando_retry_after():
+    funcao, chamadas = _roteiro(ErroAPI(429, {"retry-after": "7"}), APITimeoutError(), "ok")
+    esperas, repeticoes = [], []
+    resultado = chamar_com_resiliencia(
+        funcao,
+        PoliticaRetentativas(tentativas=3, espera_base=0, timeout=12),
+        ao_repetir=lambda tentativa, espera, erro: repeticoes.append((tentativa, espera)),
+        dormir=esperas.append,
+        entrada="x",
+    )
+    assert resultado == "ok"
+    assert chamadas == [{"entrada": "x", "timeout": 12}] * 3
+    assert repeticoes == [(1, 7.0), (2, 0.0)] and esperas == [7.0, 0.0]
+
+
+def test_erro_definitivo_e_tentativas_esgotadas():
+    funcao, chamadas = _roteiro(ErroAPI(400), "nunca")
+    with pytest.raises(ErroAPI):
+        chamar_com_resiliencia(funcao, PoliticaRetentativas(tentativas=4), dormir=lambda s: None)
+    assert len(chamadas) == 1
+
+    funcao, chamadas = _roteiro(*[ErroAPI(500)] * 3)
+    with pytest.raises(ErroAPI):
+        chamar_com_resiliencia(funcao, PoliticaRetentativas(tentativas=3, timeout=None), dormir=lambda s: None)
+    assert chamadas == [{}] * 3
+
+
+def test_disjuntor_aberto_recusa_a_chamada():
+    relogio = Relogio()
+    disjuntor = Disjuntor(limiar_falhas=2, espera=30, relogio=relogio)
+    funcao, chamadas = _roteiro(ErroAPI(502), ErroAPI(502), "ok")
+    politica = PoliticaRetentativas(tentativas=5, espera_base=0)
+
+    with pytest.raises(IAIndisponivel):
+        chamar_com_resiliencia(funcao, politica, disjuntor, dormir=lambda s: None)
+    assert len(chamadas) == 2 and disjuntor.estado == ABERTO
+
+    relogio.agora = 30
+    assert chamar_com_resiliencia(funcao, politica, disjuntor, dormir=lambda s: None) == "ok"
+    assert disjuntor.estado == FECHADO
+
+
+def test_erro_definitivo_na_sondagem_libera_o_disjuntor():
+    relogio = Relogio()
+    disjuntor = Disjuntor(limiar_falhas=1, espera=1, relogio=relogio)
+    disjuntor.registrar_falha()
+    relogio.agora = 1
+    funcao, _ = _roteiro(ErroAPI(401))
+    with pytest.raises(ErroAPI):
+        chamar_com_resiliencia(funcao, PoliticaRetentativas(), disjuntor)
+    assert disjuntor.estado == SEMIABERTO and disjuntor.permitir()
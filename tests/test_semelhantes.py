@@ -0,0 +1,75 @@
+import numpy as np
+
+from helps.heuristica import heuristica_risco_explicacao
+from helps.semelhantes import agrupar_semelhantes, assinaturas_minhash, fragmentos, jaccard
+
+ELOGIO = "O técnico foi ótimo, chegou no horário e resolveu tudo rapidamente"
+CRITICA = "O técnico foi péssimo, chegou no horário e resolveu tudo rapidamente"
+RESOLVIDO = "o problema foi resolvido no mesmo dia pela equipe da loja"
+NAO_RESOLVIDO = "o problema não foi resolvido no mesmo dia pela equipe da loja"
+
+
+def test_fragmentos_ignoram_acentos_caixa_e_pontuacao():
+    assert fragmentos("Atendimento ÓTIMO!!") == fragmentos("atendimento otimo")
+    assert {"otimo", " ot", "mo "} <= fragmentos("ótimo")
+    assert fragmentos(None) == fragmentos("  ") == frozenset()
+    assert jaccard(frozenset(), frozenset()) == 0.0
+
+
+def test_minhash_estima_jaccard():
+    conjuntos = [fragmentos(ELOGIO), fragmentos(CRITICA), fragmentos("nada a ver com o resto"), frozenset()]
+    assinaturas = assinaturas_minhash(conjuntos)
+    assert assinaturas.shape == (4, 64)
+    assert np.array_equal(assinaturas, assinaturas_minhash(conjuntos))  # determinística
+    estimada = float(np.mean(assinaturas[0] == assinaturas[1]))
+    assert abs(estimada - jaccard(conjuntos[0], conjuntos[1])) < 0.15
+    assert np.mean(assinaturas[0] == assinaturas[2]) < 0.2
+    assert (assinaturas[3] == np.iinfo(np.uint64).max).all()
+
+
+def test_variantes_agrupadas_no_primeiro_representante():
+    pares = [
+        ("Reparo", "Atendimento ótimo!! técnico muito educado e atencioso"),
+        ("Reparo", "atendimento otimo, tecnico muito educado e atencioso"),
+        ("Reparo", "Atendimento ÓTIMO, técnico muito educado e atencioso."),
+        ("Troca", "atendimento otimo, tecnico muito educado e atencioso"),  # outra descrição
+        ("Reparo", "Demorou demais para agendar a troca do vidro"),
+        ("Reparo", ""),
+        ("Reparo", None),
+    ]
+    representantes, divergentes = agrupar_semelhantes(pares)
+    assert representantes == [0, 0, 0, 3, 4, 5, 6]
+    assert divergentes == 0
+
+
+def test_negacao_separa_comentarios_quase_iguais():
+    assert jaccard(fragmentos(RESOLVIDO), fragmentos(NAO_RESOLVIDO)) >= 0.9
+    # Mesmo grau na heurística: quem separa o par é a negação, não a divergência
+    assert heuristica_risco_explicacao("Reparo", RESOLVIDO)[0] == heuristica_risco_explicacao("Reparo", NAO_RESOLVIDO)[0]
+    pares = [
+        ("Reparo", RESOLVIDO), ("Reparo", NAO_RESOLVIDO), ("Reparo", RESOLVIDO + "!"), ("Reparo", NAO_RESOLVIDO + "!"),
+    ]
+    representantes, divergentes = agrupar_semelhantes(pares)
+    assert representantes == [0, 1, 0, 1]
+    assert divergentes == 0
+
+
+def test_heuristica_divergente_separa_o_membro():
+    assert jaccard(fragmentos(ELOGIO), fragmentos(CRITICA)) >= 0.8
+    assert heuristica_risco_explicacao("Reparo", ELOGIO)[0] != heuristica_risco_explicacao("Reparo", CRITICA)[0]
+    pares = [("Reparo", ELOGIO), ("Reparo", CRITICA), ("Reparo", CRITICA + "!")]
+
+    representantes, divergentes = agrupar_semelhantes(pares, limiar=0.8)
+    # O membro separado vira representante dos seus próprios semelhantes
+    assert representantes == [0, 1, 1] and divergentes == 1
+
+    # Sem limite de divergência (diferença máxima entre graus é 3), o par fica junto
+    representantes, divergentes = agrupar_semelhantes(pares[:2], limiar=0.8, divergencia=len(pares) + 1)
+    assert representantes == [0, 0] and divergentes == 0
+
+
+def test_limiar_controla_o_agrupamento():
+    pares = [("Reparo", ELOGIO), ("Reparo", ELOGIO + " e deixou tudo limpo")]
+    semelhanca = jaccard(fragmentos(pares[0][1]), fragmentos(pares[1][1]))
+    assert agrupar_semelhantes(pares, limiar=semelhanca - 0.01)[0] == [0, 0]
+    assert agrupar_semelhantes(pares, limiar=semelhanca + 0.01)[0] == [0, 1]
@@ -0,0 +1,85 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from helps import vetorizado
+from helps.heuristica import heuristica_com_score
+from helps.lexico import (
+    COMENTARIOS_TRIVIAIS,
+    INDICADORES_SARCASMO,
+    INTENSIFICADORES,
+    NEGADORES,
+    PALAVRAS_POSITIVAS,
+    PALAVRAS_RISCO,
+)
+
+
+def _corpus(base, linhas=1500, semente=7):
+    """Comentários sintéticos com termos dos léxicos, negações, intensificadores, caps e pontuação."""
+    aleatorio = random.Random(semente)
+    termos = list(PALAVRAS_RISCO) + list(PALAVRAS_POSITIVAS) + list(INDICADORES_SARCASMO)
+    modificadores = list(NEGADORES) + list(INTENSIFICADORES) + ["o", "e", "mas", "atendimento", "técnico"]
+    extras = ["", "!!!", "??", "...", " 😀", " 中文", " Ærø straße"]
+    pares = list(base)
+    for _ in range(linhas):
+        palavras = []
+        for _ in range(aleatorio.randint(0, 6)):
+            if aleatorio.random() < 0.4:
+                palavras.append(aleatorio.choice(modificadores))
+            palavras.append(aleatorio.choice(termos))
+        texto = " ".join(palavras) + aleatorio.choice(extras)
+        if aleatorio.random() < 0.15:
+            texto = texto.upper()
+        elif aleatorio.random() < 0.05:
+            texto = aleatorio.choice(list(COMENTARIOS_TRIVIAIS))
+        descricao = aleatorio.choice([None, "", "Reparo", "Troca de vidro", "Instalação péssima"])
+        pares.append((descricao, texto))
+    return pares
+
+
+def _por_linha(pares):
+    return [heuristica_com_score(d if d is not None else "", c if c is not None else "") for d, c in pares]
+
+
+@pytest.mark.parametrize("minimo", [0, 10 ** 9], ids=["vetorizado", "por_linha"])
+def test_lote_equivale_a_funcao_por_linha(comentarios, monkeypatch, minimo):
+    monkeypatch.setattr(vetorizado, "MIN_LINHAS_VETORIZADO", minimo)
+    pares = _corpus(comentarios)
+    df = pd.DataFrame(pares, columns=["Descrição", "Comentário"], index=range(100, 100 + len(pares)))
+
+    resultado = vetorizado.heuristica_lote(df, "Descrição", "Comentário")
+    esperado = _por_linha(pares)
+
+    assert list(resultado.index) == list(df.index)
+    assert list(resultado["grau_risco"]) == [grau for grau, _, _ in esperado]
+    assert list(resultado["explicacao"]) == [explicacao for _, explicacao, _ in esperado]
+    assert np.allclose(resultado["score"].to_numpy(), [score for _, _, score in esperado])
+
+
+def test_caminhos_produzem_os_mesmos_tipos(comentarios, monkeypatch):
+    df = pd.DataFrame(comentarios, columns=["Descrição", "Comentário"])
+    monkeypatch.setattr(vetorizado, "MIN_LINHAS_VETORIZADO", 0)
+    vetorizada = vetorizado.heuristica_lote(df, "Descrição", "Comentário")
+    monkeypatch.setattr(vetorizado, "MIN_LINHAS_VETORIZADO", 10 ** 9)
+    por_linha = vetorizado.heuristica_lote(df, "Descrição", "Comentário")
+    pd.testing.assert_frame_equal(vetorizada, por_linha)
+
+
+def test_sem_coluna_de_descricao_e_base_vazia(comentarios, monkeypatch):
+    monkeypatch.setattr(vetorizado, "MIN_LINHAS_VETORIZADO", 0)
+    df = pd.DataFrame({"Comentário": [c for _, c in comentarios]})
+    resultado = vetorizado.heuristica_lote(df, None, "Comentário")
+    assert list(resultado["grau_risco"]) == [grau for grau, _, _ in _por_linha([("", c) for _, c in comentarios])]
+
+    vazio = vetorizado.heuristica_lote(df.iloc[:0], None, "Comentário")
+    assert len(vazio) == 0 and list(vazio.columns) == ["grau_risco", "explicacao", "score"]
+
+
+def test_mascara_unicode_acima_da_tabela():
+    texto = "aÁ😀中Ωß\U0001D400ǅ"
+    pontos = vetorizado._code_points(texto)
+    assert pontos.max() >= len(vetorizado._tabela_unicode("letra"))
+    for nome, predicado in vetorizado._PREDICADOS_UNICODE.items():
+        assert vetorizado._mascara_unicode(nome, pontos).tolist() == [predicado(c) for c in texto]